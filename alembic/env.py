@@ -11,6 +11,9 @@ from alembic import context
 from app.persistence.database import Base
 from app.persistence.models.user_model import User
 from app.persistence.models.proposal_model import Proposal
+from app.persistence.models.ingestion_job_model import IngestionJob
+from app.persistence.models.llm_usage_model import LLMUsage
+from app.persistence.models.vote_tally_model import ProposalOptionTally
 from app.config import ConfigService
 
 # this is the Alembic Config object, which provides
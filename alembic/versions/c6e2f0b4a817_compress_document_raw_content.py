@@ -0,0 +1,63 @@
+"""compress_document_raw_content
+
+Revision ID: c6e2f0b4a817
+Revises: a3c91e5d7b20
+Create Date: 2026-10-19 11:04:27.590318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.compression import compress_text, decompress_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e2f0b4a817'
+down_revision: Union[str, None] = 'a3c91e5d7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+documents = sa.table(
+    'documents',
+    sa.column('id', sa.Integer),
+    sa.column('raw_content', sa.Text),
+    sa.column('raw_content_compressed', sa.LargeBinary),
+    sa.column('content_encoding', sa.String),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('raw_content_compressed', sa.LargeBinary(), nullable=True))
+    op.add_column('documents', sa.Column('content_encoding', sa.String(), nullable=True))
+
+    # Compress existing content row by row
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(documents.c.id, documents.c.raw_content).where(documents.c.raw_content.isnot(None))).fetchall()
+    for row in rows:
+        compressed, encoding = compress_text(row.raw_content)
+        bind.execute(
+            documents.update().where(documents.c.id == row.id).values(raw_content_compressed=compressed, content_encoding=encoding)
+        )
+
+    op.drop_column('documents', 'raw_content')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('documents', sa.Column('raw_content', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(documents.c.id, documents.c.raw_content_compressed, documents.c.content_encoding)
+        .where(documents.c.raw_content_compressed.isnot(None))
+    ).fetchall()
+    for row in rows:
+        bind.execute(
+            documents.update().where(documents.c.id == row.id).values(raw_content=decompress_text(row.raw_content_compressed, row.content_encoding))
+        )
+
+    op.drop_column('documents', 'content_encoding')
+    op.drop_column('documents', 'raw_content_compressed')
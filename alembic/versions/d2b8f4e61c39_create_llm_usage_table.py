@@ -0,0 +1,48 @@
+"""create_llm_usage_table
+
+Revision ID: d2b8f4e61c39
+Revises: c6e2f0b4a817
+Create Date: 2026-10-19 13:42:08.104562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b8f4e61c39'
+down_revision: Union[str, None] = 'c6e2f0b4a817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'llm_usage',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('task', sa.String(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('calls', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Integer(), nullable=False),
+        sa.Column('prompt_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('completion_tokens', sa.BigInteger(), nullable=False),
+        sa.Column('cost_usd', sa.Float(), nullable=False),
+        sa.Column('latency_seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_usage_id'), 'llm_usage', ['id'], unique=False)
+    op.create_index(op.f('ix_llm_usage_recorded_at'), 'llm_usage', ['recorded_at'], unique=False)
+    op.create_index(op.f('ix_llm_usage_source'), 'llm_usage', ['source'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_llm_usage_source'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_recorded_at'), table_name='llm_usage')
+    op.drop_index(op.f('ix_llm_usage_id'), table_name='llm_usage')
+    op.drop_table('llm_usage')
@@ -0,0 +1,76 @@
+"""create_vote_tallies
+
+Revision ID: e7a1c3f09b52
+Revises: d2b8f4e61c39
+Create Date: 2026-10-19 16:05:31.427913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c3f09b52'
+down_revision: Union[str, None] = 'd2b8f4e61c39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Keeps proposal_option_tallies in step with submissions inside the writing transaction. A trigger sees the exact
+# OLD and NEW rows of an INSERT ... ON CONFLICT DO UPDATE, so changed votes move between options correctly even when
+# the same user votes twice concurrently, and the vote still costs a single statement from the application.
+MAINTAIN_TALLIES_FUNCTION = """
+CREATE OR REPLACE FUNCTION maintain_proposal_option_tallies() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.proposal_id = NEW.proposal_id AND OLD.response_content = NEW.response_content THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE proposal_option_tallies SET vote_count = vote_count - 1
+        WHERE proposal_id = OLD.proposal_id AND option = OLD.response_content;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND EXISTS (
+        SELECT 1 FROM proposals WHERE id = NEW.proposal_id AND proposal_type = 'multiple_choice'
+    ) THEN
+        INSERT INTO proposal_option_tallies (proposal_id, option, vote_count)
+        VALUES (NEW.proposal_id, NEW.response_content, 1)
+        ON CONFLICT (proposal_id, option) DO UPDATE SET vote_count = proposal_option_tallies.vote_count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'proposal_option_tallies',
+        sa.Column('proposal_id', sa.Integer(), nullable=False),
+        sa.Column('option', sa.Text(), nullable=False),
+        sa.Column('vote_count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['proposal_id'], ['proposals.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('proposal_id', 'option')
+    )
+    op.execute(MAINTAIN_TALLIES_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER submissions_maintain_tallies "
+        "AFTER INSERT OR UPDATE OF proposal_id, response_content OR DELETE ON submissions "
+        "FOR EACH ROW EXECUTE FUNCTION maintain_proposal_option_tallies()"
+    )
+    # Backfill from existing votes
+    op.execute(
+        "INSERT INTO proposal_option_tallies (proposal_id, option, vote_count) "
+        "SELECT s.proposal_id, s.response_content, count(*) FROM submissions s "
+        "JOIN proposals p ON p.id = s.proposal_id WHERE p.proposal_type = 'multiple_choice' "
+        "GROUP BY s.proposal_id, s.response_content"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS submissions_maintain_tallies ON submissions")
+    op.execute("DROP FUNCTION IF EXISTS maintain_proposal_option_tallies()")
+    op.drop_table('proposal_option_tallies')
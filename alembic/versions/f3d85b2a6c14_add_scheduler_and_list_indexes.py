@@ -0,0 +1,40 @@
+"""add_scheduler_and_list_indexes
+
+Revision ID: f3d85b2a6c14
+Revises: e7a1c3f09b52
+Create Date: 2026-10-19 17:21:09.586310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3d85b2a6c14'
+down_revision: Union[str, None] = 'e7a1c3f09b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # find_expired_open_proposals runs every minute; only open proposals are ever scanned by deadline
+    op.create_index(
+        'ix_proposals_open_deadline_date', 'proposals', ['deadline_date'], unique=False,
+        postgresql_where=sa.text("status = 'open'")
+    )
+    # get_proposals_by_channel_id and the /proposals status lists filter on one column and sort by creation_date
+    op.create_index('ix_proposals_target_channel_id_creation_date', 'proposals', ['target_channel_id', 'creation_date'], unique=False)
+    op.create_index('ix_proposals_status_creation_date', 'proposals', ['status', 'creation_date'], unique=False)
+    # get_submissions_by_user (/my_votes) sorts a user's submissions by timestamp
+    op.create_index('ix_submissions_submitter_id_timestamp', 'submissions', ['submitter_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_submissions_submitter_id_timestamp', table_name='submissions')
+    op.drop_index('ix_proposals_status_creation_date', table_name='proposals')
+    op.drop_index('ix_proposals_target_channel_id_creation_date', table_name='proposals')
+    op.drop_index('ix_proposals_open_deadline_date', table_name='proposals', postgresql_where=sa.text("status = 'open'"))
@@ -1,5 +1,6 @@
 import os
-from typing import List
+import json
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from dotenv import load_dotenv
 
@@ -19,8 +20,61 @@ POSTGRES_DB = os.getenv("POSTGRES_DB")
 # Database URL constructed from PostgreSQL config
 DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
+# Connection pool per bot process. DB_POOL_SIZE=0 opens a connection per session instead of pooling (NullPool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+# Prepared statements cached per connection by asyncpg. Transaction poolers (PgBouncer, Supabase's pooler on port 6543)
+# can't keep them across transactions, so DB_PGBOUNCER_MODE=true disables the caches and uses unique statement names
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_PGBOUNCER_MODE = os.getenv("DB_PGBOUNCER_MODE", "false").strip().lower() in ("1", "true", "yes")
+
 # OpenAI API configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Overrides the OpenAI API endpoint, e.g. the local fake server (app/scripts/fake_openai_server.py) for offline benchmarks
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# LLM model routing: small/fast model for classification and parsing, large model for synthesis and summarization
+LLM_SMALL_MODEL = os.getenv("LLM_SMALL_MODEL", "gpt-4o-mini")
+LLM_LARGE_MODEL = os.getenv("LLM_LARGE_MODEL", "gpt-4o")
+LLM_EMBEDDING_MODEL = os.getenv("LLM_EMBEDDING_MODEL", "text-embedding-3-small")
+# Optional JSON overrides per task, e.g. {"ask_answer": {"model": "gpt-4.1", "timeout_seconds": 90}}
+LLM_TASK_ROUTES_JSON = os.getenv("LLM_TASK_ROUTES", "")
+
+# Shared OpenAI account limits enforced in-process (0 disables a limit); set these to your account tier's limits
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+# Share of each budget background jobs may not use, so interactive commands always find headroom
+OPENAI_INTERACTIVE_RESERVE_FRACTION = float(os.getenv("OPENAI_INTERACTIVE_RESERVE_FRACTION", "0.2"))
+
+# Retries for transient OpenAI errors (timeouts, 429s, 5xx): jittered exponential backoff within each task's deadline
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.5"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "8"))
+
+class LLMTaskRoute(NamedTuple):
+    """
+    Which model serves an LLM task, with its per-attempt timeout and completion token limit (None = model default).
+    deadline_seconds bounds all attempts including retries; hedge_after_seconds (latency-critical tasks only) is the
+    fallback budget after which a second request is sent, until enough calls were seen to use the observed p95.
+    """
+    model: str
+    timeout_seconds: float
+    max_tokens: Optional[int] = None
+    deadline_seconds: Optional[float] = None
+    hedge_after_seconds: Optional[float] = None
+
+# Default route per LLMService task
+DEFAULT_LLM_TASK_ROUTES: Dict[str, LLMTaskRoute] = {
+    "parse_duration": LLMTaskRoute(LLM_SMALL_MODEL, timeout_seconds=15, max_tokens=50, deadline_seconds=30),
+    "analyze_ask_query": LLMTaskRoute(LLM_SMALL_MODEL, timeout_seconds=10, max_tokens=400, deadline_seconds=20, hedge_after_seconds=3),
+    "ask_answer": LLMTaskRoute(LLM_LARGE_MODEL, timeout_seconds=60, max_tokens=1200, deadline_seconds=90),
+    "summarize_cluster": LLMTaskRoute(LLM_SMALL_MODEL, timeout_seconds=60, max_tokens=200, deadline_seconds=180),
+    "summarize_submissions": LLMTaskRoute(LLM_LARGE_MODEL, timeout_seconds=120, max_tokens=1500, deadline_seconds=300),
+    "completion": LLMTaskRoute(LLM_LARGE_MODEL, timeout_seconds=60, deadline_seconds=120),
+    "embedding": LLMTaskRoute(LLM_EMBEDDING_MODEL, timeout_seconds=30, deadline_seconds=60, hedge_after_seconds=2),
+}
 
 # Admin IDs (comma-separated string)
 ADMIN_TELEGRAM_IDS_STR = os.getenv("ADMIN_TELEGRAM_IDS", "")
@@ -29,6 +83,43 @@ ADMIN_TELEGRAM_IDS = [int(id_str.strip()) for id_str in ADMIN_TELEGRAM_IDS_STR.s
 # Target channel ID where proposals will be posted
 TARGET_CHANNEL_ID = os.getenv("TARGET_CHANNEL_ID")
 
+# How often per-command LLM usage totals are flushed from memory to the llm_usage table
+LLM_USAGE_FLUSH_INTERVAL_SECONDS = int(os.getenv("LLM_USAGE_FLUSH_INTERVAL_SECONDS", "60"))
+
+# Background ingestion worker: max number of documents processed concurrently
+INGESTION_WORKER_CONCURRENCY = int(os.getenv("INGESTION_WORKER_CONCURRENCY", "2"))
+
+# How document chunks are kept in the vector store: "text" stores chunk text in ChromaDB,
+# "offsets" stores only (document_sql_id, start, end) and rebuilds snippets from Postgres at query time
+CHUNK_STORAGE_MODE = os.getenv("CHUNK_STORAGE_MODE", "text").strip().lower()
+DOCUMENT_TEXT_CACHE_SIZE = int(os.getenv("DOCUMENT_TEXT_CACHE_SIZE", "64"))
+# How new document text is compressed in Postgres: "zlib" (stdlib) or "zstd" (needs the zstandard package wherever the
+# bot runs, since rows are decompressed with the encoding they were written with)
+DOCUMENT_CONTENT_ENCODING = os.getenv("DOCUMENT_CONTENT_ENCODING", "zlib").strip().lower()
+
+# In-process cache of users already stored with their current username/first name, so repeat interactions skip the upsert
+KNOWN_USER_CACHE_SIZE = int(os.getenv("KNOWN_USER_CACHE_SIZE", "10000"))
+KNOWN_USER_CACHE_TTL_SECONDS = float(os.getenv("KNOWN_USER_CACHE_TTL_SECONDS", "600"))
+# Proposals whose type/options/deadline/status are kept in memory for validating votes without a proposal query
+PROPOSAL_FACTS_CACHE_SIZE = int(os.getenv("PROPOSAL_FACTS_CACHE_SIZE", "1024"))
+# Full proposals (with proposer) kept in memory for get_proposal_by_id; every write bumps the proposal's cache version
+PROPOSAL_CACHE_SIZE = int(os.getenv("PROPOSAL_CACHE_SIZE", "256"))
+# Rows fetched per round trip when streaming free-form submission texts with a server-side cursor
+SUBMISSION_STREAM_BATCH_SIZE = int(os.getenv("SUBMISSION_STREAM_BATCH_SIZE", "500"))
+# Rows per page of /proposals and /my_votes; pages are fetched one at a time with Next/Prev buttons
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "10"))
+
+# /ask streams its answer by editing a placeholder message; minimum seconds between edits
+# (Telegram allows roughly one edit per second per chat, and fewer in groups)
+ASK_STREAM_EDIT_INTERVAL_SECONDS = float(os.getenv("ASK_STREAM_EDIT_INTERVAL_SECONDS", "1.5"))
+# Token budget for the proposal and document context in the /ask synthesis prompt; lower-ranked blocks are dropped
+ASK_CONTEXT_TOKEN_BUDGET = int(os.getenv("ASK_CONTEXT_TOKEN_BUDGET", "6000"))
+# Number of best-matching proposals whose attached documents are searched for /ask context
+ASK_DOCUMENT_SEARCH_MAX_PROPOSALS = int(os.getenv("ASK_DOCUMENT_SEARCH_MAX_PROPOSALS", "5"))
+
+# Free-form proposals with more submissions than this are summarized with map-reduce (embed, cluster, summarize, merge)
+FREE_FORM_MAP_REDUCE_THRESHOLD = int(os.getenv("FREE_FORM_MAP_REDUCE_THRESHOLD", "150"))
+
 # Configuration class to provide easy access to all settings
 class ConfigService:
     @staticmethod
@@ -66,11 +157,39 @@ class ConfigService:
         
         return constructed_url
     
+    @staticmethod
+    def get_db_pool_size() -> int:
+        return max(0, DB_POOL_SIZE)
+
+    @staticmethod
+    def get_db_max_overflow() -> int:
+        return max(0, DB_MAX_OVERFLOW)
+
+    @staticmethod
+    def get_db_pool_timeout_seconds() -> float:
+        return max(1.0, DB_POOL_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def get_db_pool_recycle_seconds() -> int:
+        return DB_POOL_RECYCLE_SECONDS if DB_POOL_RECYCLE_SECONDS > 0 else -1 # -1 never recycles
+
+    @staticmethod
+    def is_db_pgbouncer_mode() -> bool:
+        return DB_PGBOUNCER_MODE
+
+    @staticmethod
+    def get_db_statement_cache_size() -> int:
+        return 0 if DB_PGBOUNCER_MODE else max(0, DB_STATEMENT_CACHE_SIZE)
+
     @staticmethod
     def get_openai_api_key() -> str:
         if not OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not set in environment variables")
         return OPENAI_API_KEY
+
+    @staticmethod
+    def get_openai_base_url() -> Optional[str]:
+        return OPENAI_BASE_URL
     
     @staticmethod
     def get_admin_ids() -> List[int]:
@@ -80,4 +199,113 @@ class ConfigService:
     def get_target_channel_id() -> str:
         if not TARGET_CHANNEL_ID:
             raise ValueError("TARGET_CHANNEL_ID is not set in environment variables")
-        return TARGET_CHANNEL_ID 
\ No newline at end of file
+        return TARGET_CHANNEL_ID
+
+    @staticmethod
+    def get_ingestion_worker_concurrency() -> int:
+        return max(1, INGESTION_WORKER_CONCURRENCY)
+
+    @staticmethod
+    def get_llm_usage_flush_interval_seconds() -> int:
+        return max(5, LLM_USAGE_FLUSH_INTERVAL_SECONDS)
+
+    @staticmethod
+    def get_chunk_storage_mode() -> str:
+        if CHUNK_STORAGE_MODE not in ("text", "offsets"):
+            raise ValueError(f"Invalid CHUNK_STORAGE_MODE '{CHUNK_STORAGE_MODE}'. Use 'text' or 'offsets'.")
+        return CHUNK_STORAGE_MODE
+
+    @staticmethod
+    def get_document_content_encoding() -> str:
+        if DOCUMENT_CONTENT_ENCODING not in ("zlib", "zstd"):
+            raise ValueError(f"Invalid DOCUMENT_CONTENT_ENCODING '{DOCUMENT_CONTENT_ENCODING}'. Use 'zlib' or 'zstd'.")
+        return DOCUMENT_CONTENT_ENCODING
+
+    @staticmethod
+    def get_document_text_cache_size() -> int:
+        return max(1, DOCUMENT_TEXT_CACHE_SIZE)
+
+    @staticmethod
+    def get_known_user_cache_size() -> int:
+        return max(1, KNOWN_USER_CACHE_SIZE)
+
+    @staticmethod
+    def get_known_user_cache_ttl_seconds() -> float:
+        return max(0.0, KNOWN_USER_CACHE_TTL_SECONDS)
+
+    @staticmethod
+    def get_proposal_facts_cache_size() -> int:
+        return max(1, PROPOSAL_FACTS_CACHE_SIZE)
+
+    @staticmethod
+    def get_proposal_cache_size() -> int:
+        return max(1, PROPOSAL_CACHE_SIZE)
+
+    @staticmethod
+    def get_submission_stream_batch_size() -> int:
+        return max(1, SUBMISSION_STREAM_BATCH_SIZE)
+
+    @staticmethod
+    def get_list_page_size() -> int:
+        return min(50, max(1, LIST_PAGE_SIZE))
+
+    @staticmethod
+    def get_ask_stream_edit_interval_seconds() -> float:
+        return max(0.5, ASK_STREAM_EDIT_INTERVAL_SECONDS)
+
+    @staticmethod
+    def get_ask_context_token_budget() -> int:
+        return max(500, ASK_CONTEXT_TOKEN_BUDGET)
+
+    @staticmethod
+    def get_ask_document_search_max_proposals() -> int:
+        return max(0, ASK_DOCUMENT_SEARCH_MAX_PROPOSALS)
+
+    @staticmethod
+    def get_free_form_map_reduce_threshold() -> int:
+        return max(1, FREE_FORM_MAP_REDUCE_THRESHOLD)
+
+    @staticmethod
+    def get_llm_task_routes() -> Dict[str, LLMTaskRoute]:
+        """The full task -> route table: defaults merged with any LLM_TASK_ROUTES overrides."""
+        routes = dict(DEFAULT_LLM_TASK_ROUTES)
+        if not LLM_TASK_ROUTES_JSON:
+            return routes
+        try:
+            overrides = json.loads(LLM_TASK_ROUTES_JSON)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"LLM_TASK_ROUTES is not valid JSON: {e}")
+        for task, fields in overrides.items():
+            base = routes.get(task, DEFAULT_LLM_TASK_ROUTES["completion"])
+            try:
+                routes[task] = base._replace(**fields)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid LLM_TASK_ROUTES entry for task '{task}': {e}")
+        return routes
+
+    @staticmethod
+    def get_openai_requests_per_minute() -> int:
+        return max(0, OPENAI_REQUESTS_PER_MINUTE)
+
+    @staticmethod
+    def get_openai_tokens_per_minute() -> int:
+        return max(0, OPENAI_TOKENS_PER_MINUTE)
+
+    @staticmethod
+    def get_openai_interactive_reserve_fraction() -> float:
+        return min(max(OPENAI_INTERACTIVE_RESERVE_FRACTION, 0.0), 0.9)
+
+    @staticmethod
+    def get_llm_max_retries() -> int:
+        return max(0, LLM_MAX_RETRIES)
+
+    @staticmethod
+    def get_llm_retry_delays() -> Tuple[float, float]:
+        """(base, max) seconds for jittered exponential backoff between retries."""
+        return max(0.0, LLM_RETRY_BASE_DELAY_SECONDS), max(0.0, LLM_RETRY_MAX_DELAY_SECONDS)
+
+    @staticmethod
+    def get_llm_task_route(task: str) -> LLMTaskRoute:
+        """Route for one task; unknown tasks fall back to the generic 'completion' route."""
+        routes = ConfigService.get_llm_task_routes()
+        return routes.get(task, routes["completion"])
@@ -1,23 +1,41 @@
 import logging
 import hashlib
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta, timezone # Import timedelta for date range parsing
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, CacheMode, BrowserConfig # For fetching and parsing URLs
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 from crawl4ai.content_filter_strategy import PruningContentFilter
 
 from app.services.llm_service import LLMService
+from app.services.resilience import LLMStreamInterruptedError
 from app.services.vector_db_service import VectorDBService
+from app.persistence.database import commit_unless_in_update_session, run_when_committed
 from app.persistence.repositories.document_repository import DocumentRepository
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.utils.text_processing import simple_chunk_text # Moved import
+from app.utils.text_processing import content_defined_chunk_text, chunk_spans_in_text
 from app.persistence.models.proposal_model import Proposal
 from app.persistence.models.document_model import Document
 from app.persistence.repositories.proposal_repository import ProposalRepository
-from app.services.vector_db_service import DEFAULT_COLLECTION_NAME
+from app.services.vector_db_service import DEFAULT_COLLECTION_NAME, make_chunk_id, invalidate_document_text
+from app.config import ConfigService
+from app.utils.metrics import metrics
+from app.utils.prompt_packing import ContextBlock, pack_context_blocks
 
 logger = logging.getLogger(__name__)
 
+# Proposal summaries outrank document excerpts when packing the /ask synthesis prompt:
+# the list of matching proposals is the core of the answer, documents only add detail
+PROPOSAL_BLOCK_PRIORITY = 1.0
+
+# Appended to a streamed /ask answer that was cut off, so a partial answer is never shown as the full one
+ANSWER_INTERRUPTED_NOTE = "\n\n(Answer interrupted: the language model stopped responding. Ask again for the full answer.)"
+
+def _similarity_from_distance(distance: Optional[float]) -> float:
+    """Maps a vector distance (smaller is closer) to a retrieval score in (0, 1]; unknown distances score 0."""
+    if distance is None:
+        return 0.0
+    return 1.0 / (1.0 + max(0.0, float(distance)))
+
 class ContextService:
     def __init__(
         self,
@@ -89,7 +107,8 @@ class ContextService:
         title: Optional[str] = None,
         proposal_id: Optional[int] = None,
         chunk_size: int = 1000, # Default chunk size for text processing
-        chunk_overlap: int = 100 # Default overlap for text processing
+        chunk_overlap: int = 100, # Default overlap for text processing
+        progress_callback: Optional[Callable[[str], Awaitable[None]]] = None # Called with the current stage, e.g. by the ingestion worker
     ) -> Optional[int]: # Returns the SQL Document ID if successful
         """
         Processes content (text or URL), chunks it, generates embeddings, 
@@ -97,11 +116,20 @@ class ContextService:
         """
         logger.info(f"Processing document. Title: '{title}', Source Type: '{source_type}', Proposal ID: {proposal_id}")
 
+        async def report_progress(stage: str):
+            if progress_callback:
+                try:
+                    await progress_callback(stage)
+                except Exception as e:
+                    # Progress reporting is best-effort and must never fail the ingestion itself
+                    logger.warning(f"Progress callback failed at stage '{stage}': {e}")
+
         text_content: Optional[str] = None
         final_source_url: Optional[str] = None
 
         if source_type.endswith("_url"):
             final_source_url = content_source
+            await report_progress("fetching")
             text_content = await self._fetch_content_from_url(content_source)
             if not text_content:
                 logger.error(f"Failed to fetch content from URL: {content_source}")
@@ -126,14 +154,17 @@ class ContextService:
         # For now, we proceed with adding it.
 
         # 1. Chunk the text
-        # Using the simple_chunk_text defined above for now.
-        text_chunks = simple_chunk_text(text_content, chunk_size=chunk_size, overlap=chunk_overlap)
+        # Content-defined boundaries keep unchanged regions identical across edits (see update_document_content).
+        await report_progress("chunking")
+        text_chunks = content_defined_chunk_text(text_content, chunk_size=chunk_size, overlap=chunk_overlap)
         if not text_chunks:
             logger.warning("Text content resulted in no chunks.")
             return None
+        text_chunks = list(dict.fromkeys(text_chunks)) # Repeated chunks would share a content-addressed ID
         logger.info(f"Text content split into {len(text_chunks)} chunks.")
 
         # 2. Generate embeddings for chunks via LLMService
+        await report_progress(f"embedding {len(text_chunks)} chunks")
         embeddings: List[List[float]] = []
         for i, chunk in enumerate(text_chunks):
             try:
@@ -169,6 +200,7 @@ class ContextService:
 
         # Let's try Option A: Store in SQL (without vector_ids), get ID, then store in Chroma, then update SQL with Chroma IDs.
         # This requires Document.vector_ids to be nullable or updatable.
+        await report_progress("storing")
 
         sql_document = await self.document_repository.add_document(
             title=title,
@@ -195,10 +227,14 @@ class ContextService:
         if proposal_id:
             base_metadata_for_chunks["proposal_id"] = str(proposal_id) # Add proposal_id if available
 
+        chunk_spans = chunk_spans_in_text(text_content, text_chunks)
         chunk_metadatas = []
         for i in range(len(text_chunks)):
             meta = base_metadata_for_chunks.copy()
             meta["chunk_index"] = i
+            if chunk_spans[i]:
+                # Offsets into raw_content, so the vector store can skip storing the text (CHUNK_STORAGE_MODE=offsets)
+                meta["chunk_start"], meta["chunk_end"] = chunk_spans[i]
             # The chunk_text_preview is added by VectorDBService itself, no need to add it here.
             # We are passing the original title to the vector store metadata.
             # The dynamic title for proposals will be constructed during retrieval in get_answer_for_question.
@@ -210,7 +246,8 @@ class ContextService:
             doc_id=sql_document.id,
             text_chunks=text_chunks,
             embeddings=embeddings,
-            chunk_metadatas=chunk_metadatas
+            chunk_metadatas=chunk_metadatas,
+            chunk_ids=[make_chunk_id(sql_document.id, chunk) for chunk in text_chunks]
         )
 
         if not chroma_vector_ids:
@@ -225,7 +262,7 @@ class ContextService:
 
         # Update the SQL document with the Chroma vector IDs
         try:
-            await self.db_session.commit() # Commits the update to sql_document.vector_ids
+            await commit_unless_in_update_session(self.db_session) # Commits the update to sql_document.vector_ids
             await self.db_session.refresh(sql_document)
             logger.info(f"Successfully updated SQL document ID {sql_document.id} with Chroma vector IDs: {sql_document.vector_ids}")
             return sql_document.id
@@ -235,6 +272,245 @@ class ContextService:
             # SQL doc was created, vectors possibly stored, but link in SQL failed. Potential inconsistency.
             return None # Or return sql_document.id but log the linking failure more severely
 
+    async def process_and_store_documents_batch(
+        self,
+        documents: List[Dict[str, Any]], # Each: {"title": str, "content": str, "source": Optional[str]}
+        source_type: str = "admin_bulk_text",
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Ingests a batch of already-extracted text documents in one go.
+        Skips documents whose content_hash is already stored (or repeated within the batch),
+        embeds every chunk of the batch with batched embedding requests, and commits
+        all new Document rows in a single SQL transaction. If any part fails (including storing
+        one document's vectors), the whole batch is rolled back and listed under "failed".
+
+        Returns a dict with "stored" (list of (title, document_id)), "duplicates" and "failed"
+        (lists of titles), and "chunks" (number of chunks embedded).
+        """
+        summary: Dict[str, Any] = {"stored": [], "duplicates": [], "failed": [], "chunks": 0}
+        if not documents:
+            return summary
+
+        # 1. Dedupe by content hash, both within the batch and against what's already stored
+        hashed_docs: List[Tuple[Dict[str, Any], str]] = []
+        seen_hashes = set()
+        for doc in documents:
+            content = doc.get("content")
+            if not content or not content.strip():
+                logger.warning(f"Batch ingest: document '{doc.get('title')}' has no text content. Skipping.")
+                summary["failed"].append(doc.get("title"))
+                continue
+            content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            if content_hash in seen_hashes:
+                summary["duplicates"].append(doc.get("title"))
+                continue
+            seen_hashes.add(content_hash)
+            hashed_docs.append((doc, content_hash))
+
+        existing_hashes = await self.document_repository.get_existing_content_hashes([h for _, h in hashed_docs])
+        if existing_hashes:
+            logger.info(f"Batch ingest: {len(existing_hashes)} document(s) already stored, skipping them.")
+
+        # 2. Chunk the remaining documents
+        docs_to_store: List[Tuple[Dict[str, Any], str, List[str]]] = []
+        for doc, content_hash in hashed_docs:
+            if content_hash in existing_hashes:
+                summary["duplicates"].append(doc.get("title"))
+                continue
+            text_chunks = content_defined_chunk_text(doc["content"], chunk_size=chunk_size, overlap=chunk_overlap)
+            if not text_chunks:
+                logger.warning(f"Batch ingest: document '{doc.get('title')}' resulted in no chunks. Skipping.")
+                summary["failed"].append(doc.get("title"))
+                continue
+            text_chunks = list(dict.fromkeys(text_chunks))
+            docs_to_store.append((doc, content_hash, text_chunks))
+
+        if not docs_to_store:
+            return summary
+
+        # 3. Embed every chunk of the batch using batched embedding requests
+        all_chunks = [chunk for _, _, text_chunks in docs_to_store for chunk in text_chunks]
+        embeddings = await self.llm_service.generate_embeddings(all_chunks)
+        if not embeddings or len(embeddings) != len(all_chunks):
+            logger.error(f"Batch ingest: failed to generate embeddings for {len(all_chunks)} chunks. Skipping batch of {len(docs_to_store)} document(s).")
+            summary["failed"].extend(doc.get("title") for doc, _, _ in docs_to_store)
+            return summary
+
+        # 4. Store documents and their vectors, then commit the whole batch once
+        stored: List[Tuple[str, Document]] = []
+        written_chunk_ids: List[str] = [] # Deleted again if the batch rolls back, so no vectors outlive their rows
+        offset = 0
+        try:
+            for doc, content_hash, text_chunks in docs_to_store:
+                doc_embeddings = embeddings[offset:offset + len(text_chunks)]
+                offset += len(text_chunks)
+                title = doc.get("title")
+
+                sql_document = await self.document_repository.add_document(
+                    title=title,
+                    content_hash=content_hash,
+                    source_url=None,
+                    vector_ids=None, # Set below once the vectors are stored
+                    proposal_id=None,
+                    raw_content=doc["content"]
+                )
+
+                chunk_spans = chunk_spans_in_text(doc["content"], text_chunks)
+                chunk_metadatas = []
+                for i in range(len(text_chunks)):
+                    meta = {
+                        "document_sql_id": str(sql_document.id),
+                        "original_source": doc.get("source") or source_type,
+                        "title": title,
+                        "chunk_index": i
+                    }
+                    if chunk_spans[i]:
+                        meta["chunk_start"], meta["chunk_end"] = chunk_spans[i]
+                    chunk_metadatas.append(meta)
+
+                chroma_vector_ids = await self.vector_db_service.store_embeddings(
+                    doc_id=sql_document.id,
+                    text_chunks=text_chunks,
+                    embeddings=doc_embeddings,
+                    chunk_metadatas=chunk_metadatas,
+                    chunk_ids=[make_chunk_id(sql_document.id, chunk) for chunk in text_chunks]
+                )
+                if not chroma_vector_ids:
+                    # Raised so the whole batch rolls back below, instead of committing a document with no vectors
+                    raise RuntimeError(f"failed to store embeddings for document ID {sql_document.id} ('{title}')")
+                written_chunk_ids.extend(chroma_vector_ids)
+                sql_document.vector_ids = chroma_vector_ids
+                stored.append((title, sql_document))
+
+            await commit_unless_in_update_session(self.db_session)
+        except Exception as e:
+            logger.error(f"Batch ingest: error storing batch of {len(docs_to_store)} document(s), rolling back: {e}", exc_info=True)
+            await self.db_session.rollback()
+            if written_chunk_ids and not await self.vector_db_service.delete_chunks(written_chunk_ids):
+                logger.error(f"Batch ingest: {len(written_chunk_ids)} vectors of the rolled-back batch could not be deleted.")
+            summary["failed"].extend(doc.get("title") for doc, _, _ in docs_to_store)
+            return summary
+
+        summary["stored"] = [(title, sql_document.id) for title, sql_document in stored]
+        summary["chunks"] = len(all_chunks)
+        logger.info(f"Batch ingest: stored {len(stored)} document(s) with {len(all_chunks)} chunks in one transaction.")
+        return summary
+
+    async def update_document_content(
+        self,
+        document_id: int,
+        new_content: str,
+        new_title: Optional[str] = None,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 100
+    ) -> Optional[Dict[str, int]]:
+        """
+        Replaces a document's content and incrementally refreshes its vectors.
+        Chunks are content-defined and content-addressed, so only chunks that are new after the edit
+        are embedded and stored; surviving chunks only get their metadata refreshed, and chunks
+        that no longer exist are deleted from the vector store.
+
+        Returns a dict with "embedded", "reused" and "deleted" chunk counts, or None on failure.
+        """
+        document = await self.document_repository.get_document_by_id(document_id, include_content=False)
+        if not document:
+            logger.warning(f"Document ID {document_id} not found. Cannot update content.")
+            return None
+        if not new_content or not new_content.strip():
+            logger.warning(f"No text content provided to update document ID {document_id}.")
+            return None
+
+        new_hash = hashlib.sha256(new_content.encode('utf-8')).hexdigest()
+        title = new_title or document.title
+
+        text_chunks = content_defined_chunk_text(new_content, chunk_size=chunk_size, overlap=chunk_overlap)
+        text_chunks = list(dict.fromkeys(text_chunks))
+        chunk_ids = [make_chunk_id(document_id, chunk) for chunk in text_chunks]
+
+        existing_ids = await self.vector_db_service.get_document_chunk_ids(document_id)
+        if existing_ids is None:
+            logger.error(f"Could not read existing chunks for document ID {document_id}. Aborting update.")
+            return None
+        existing_id_set = set(existing_ids)
+
+        base_metadata = {
+            "document_sql_id": str(document_id),
+            "original_source": document.source_url or "document_edit",
+            "title": title
+        }
+        if document.proposal_id:
+            base_metadata["proposal_id"] = str(document.proposal_id)
+
+        chunk_spans = chunk_spans_in_text(new_content, text_chunks)
+        new_chunks: List[Tuple[str, str, Dict[str, Any]]] = []
+        reused: List[Tuple[str, Dict[str, Any]]] = []
+        for i, (chunk_id, chunk) in enumerate(zip(chunk_ids, text_chunks)):
+            meta = base_metadata.copy()
+            meta["chunk_index"] = i
+            if chunk_spans[i]:
+                meta["chunk_start"], meta["chunk_end"] = chunk_spans[i]
+            if chunk_id in existing_id_set:
+                reused.append((chunk_id, meta))
+            else:
+                new_chunks.append((chunk_id, chunk, meta))
+        new_id_set = set(chunk_ids)
+        stale_ids = [chunk_id for chunk_id in existing_ids if chunk_id not in new_id_set]
+
+        # 1. Embed and store only the chunks the edit introduced
+        if new_chunks:
+            embeddings = await self.llm_service.generate_embeddings([chunk for _, chunk, _ in new_chunks])
+            if not embeddings or len(embeddings) != len(new_chunks):
+                logger.error(f"Failed to generate embeddings for {len(new_chunks)} new chunks of document ID {document_id}. Aborting update.")
+                return None
+            stored_ids = await self.vector_db_service.store_embeddings(
+                doc_id=document_id,
+                text_chunks=[chunk for _, chunk, _ in new_chunks],
+                embeddings=embeddings,
+                chunk_metadatas=[meta for _, _, meta in new_chunks],
+                chunk_ids=[chunk_id for chunk_id, _, _ in new_chunks]
+            )
+            if not stored_ids:
+                logger.error(f"Failed to store {len(new_chunks)} new chunks for document ID {document_id}. Aborting update.")
+                return None
+
+        # 2. Persist the new content; if that fails, remove the chunks just stored so none outlive the rollback
+        try:
+            await self.document_repository.update_document(
+                document_id,
+                raw_content=new_content,
+                title=new_title,
+                content_hash=new_hash,
+                vector_ids=chunk_ids
+            )
+            await commit_unless_in_update_session(self.db_session)
+        except Exception as e:
+            logger.error(f"Error committing content update for document ID {document_id}: {e}", exc_info=True)
+            await self.db_session.rollback()
+            new_chunk_ids = [chunk_id for chunk_id, _, _ in new_chunks]
+            if new_chunk_ids and not await self.vector_db_service.delete_chunks(new_chunk_ids):
+                logger.error(f"Document ID {document_id}: {len(new_chunk_ids)} chunks of the rolled-back edit could not be deleted.")
+            return None
+
+        async def apply_committed_edit():
+            # 3. Surviving chunks keep their embeddings; only chunk_index/offsets/title may have shifted. Done after the
+            # commit, since the offsets refer to the new raw_content
+            invalidate_document_text(document_id)
+            if reused and not await self.vector_db_service.update_chunk_metadatas(
+                [chunk_id for chunk_id, _ in reused],
+                [meta for _, meta in reused]
+            ):
+                logger.error(f"Document ID {document_id} updated, but the metadata of {len(reused)} surviving chunks could not be refreshed; their offsets are stale.")
+            # 4. Drop chunks the edit removed
+            if stale_ids and not await self.vector_db_service.delete_chunks(stale_ids):
+                logger.warning(f"Document ID {document_id} updated, but {len(stale_ids)} stale chunks could not be deleted.")
+        await run_when_committed(self.db_session, apply_committed_edit)
+
+        summary = {"embedded": len(new_chunks), "reused": len(reused), "deleted": len(stale_ids)}
+        logger.info(f"Updated content of document ID {document_id}: {summary}")
+        return summary
+
     async def get_document_content(self, document_id: int) -> Optional[str]:
         """Fetches the raw content of a document by its ID."""
         document = await self.document_repository.get_document_by_id(document_id)
@@ -257,23 +533,38 @@ class ContextService:
         Returns a tuple: (formatted_context_string, list_of_source_details_dicts).
         Each dict in list_of_source_details_dicts is like: {"id": 123, "title": "Document Title"}
         """
+        context_str, source_details, _ = await self._get_scored_document_context_for_query(question_text, proposal_id_filter, top_n_chunks)
+        return context_str, source_details
+
+    async def _get_scored_document_context_for_query(
+        self,
+        question_text: str,
+        proposal_id_filter: Optional[int] = None,
+        top_n_chunks: int = 3
+    ) -> Tuple[str, List[Dict[str, Any]], float]:
+        """
+        Same as _get_raw_document_context_for_query, plus the retrieval score of the best chunk
+        (similarity in (0, 1], from the vector distance; 0.0 when nothing was found).
+        """
         logger.info(f"_get_raw_document_context_for_query: question='{question_text}', proposal_id_filter={proposal_id_filter}")
         query_embedding = await self.llm_service.generate_embedding(question_text)
         if not query_embedding:
             logger.warning("_get_raw_document_context_for_query: Failed to generate embedding for question.")
-            return "", [] # Return empty context and sources
+            return "", [], 0.0 # Return empty context and sources
 
         similar_chunks_results = await self.vector_db_service.search_similar_chunks(
             query_embedding=query_embedding,
             proposal_id_filter=proposal_id_filter,
-            top_n=top_n_chunks
+            top_n=top_n_chunks,
+            content_loader=self.get_document_content # Only used in "offsets" chunk storage mode
         )
 
         if not similar_chunks_results:
             logger.info("_get_raw_document_context_for_query: No similar document chunks found.")
             # If a filter was applied, don't retry here; let the caller decide on broader searches.
-            return "", []
+            return "", [], 0.0
         
+        best_score = max((_similarity_from_distance(hit.get('distance')) for hit in similar_chunks_results), default=0.0)
         context_str_parts = []
         source_details_list: List[Dict[str, Any]] = [] # New: list of dicts
 
@@ -313,7 +604,7 @@ class ContextService:
         
         if not context_str_parts:
             logger.info("_get_raw_document_context_for_query: No text content found in similar chunks.")
-            return "", []
+            return "", [], 0.0
         
         # Construct the full context string
         # We don't add "Context from documents..." here, the caller can do that if needed.
@@ -327,9 +618,42 @@ class ContextService:
                 unique_source_details.append(detail)
                 seen_doc_ids.add(detail['id'])
         
-        return full_context_str, unique_source_details
+        return full_context_str, unique_source_details, best_score
+
+    async def _generate_answer(
+        self,
+        prompt: str,
+        on_partial_answer: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Optional[str]:
+        """
+        Gets the final answer completion for /ask. When on_partial_answer is given, the answer is streamed
+        and the callback receives the accumulated text after every delta (e.g. to edit a Telegram message).
+        If the stream breaks off, the partial answer is returned with ANSWER_INTERRUPTED_NOTE appended.
+        """
+        if not on_partial_answer:
+            return await self.llm_service.get_completion(prompt, task="ask_answer")
 
-    async def get_answer_for_question(self, question_text: str, proposal_id_filter: Optional[int] = None, top_n_chunks: int = 3) -> Tuple[str, List[Dict[str, Any]]]:
+        answer = ""
+        try:
+            async for delta in self.llm_service.stream_completion(prompt, task="ask_answer"):
+                answer += delta
+                try:
+                    await on_partial_answer(answer)
+                except Exception as e:
+                    # Showing partial output is best-effort and must never fail the answer itself
+                    logger.warning(f"Partial answer callback failed: {e}")
+        except LLMStreamInterruptedError as e:
+            logger.warning(f"/ask answer stream interrupted after {len(answer)} characters: {e}")
+            return answer.strip() + ANSWER_INTERRUPTED_NOTE if answer.strip() else None
+        return answer.strip() or None
+
+    async def get_answer_for_question(
+        self,
+        question_text: str,
+        proposal_id_filter: Optional[int] = None,
+        top_n_chunks: int = 3,
+        on_partial_answer: Optional[Callable[[str], Awaitable[None]]] = None # Streams the answer as it is generated
+    ) -> Tuple[str, List[Dict[str, Any]]]:
         """
         Answers a question using RAG by fetching relevant document chunks and synthesizing an answer.
         Returns a tuple: (answer_string, list_of_source_details_for_buttons)
@@ -381,7 +705,7 @@ class ContextService:
             
             logger.info(f"get_answer_for_question: Prompt for LLM:\n{context_header}{raw_context}")
 
-            answer = await self.llm_service.get_completion(prompt)
+            answer = await self._generate_answer(prompt, on_partial_answer)
 
             return answer, source_details # Return the answer and the structured source details
 
@@ -389,58 +713,40 @@ class ContextService:
             logger.error(f"Error getting answer for question '{question_text}': {e}", exc_info=True)
             return "Sorry, I encountered an error while trying to answer your question. Please try again later.", []
 
-    async def _parse_date_query_to_range(self, date_query: Optional[str]) -> Optional[Tuple[Optional[datetime], Optional[datetime]]]:
+    @staticmethod
+    def _date_range_from_analysis(analysis: Dict[str, Any]) -> Optional[Tuple[Optional[datetime], Optional[datetime]]]:
         """
-        Parses a natural language date query into a start and end datetime tuple using LLMService.
+        Converts the date bounds resolved by the ask planner (ISO 8601 strings) into a UTC datetime tuple.
+        Returns None if the query had no date phrase or the planner could not resolve it.
         """
-        if not date_query:
-            logger.debug("_parse_date_query_to_range called with no date_query.")
-            return None
-
-        parsed_range_dict = await self.llm_service.parse_natural_language_date_range_query(date_query)
-
-        if not parsed_range_dict:
-            logger.warning(f"LLMService.parse_natural_language_date_range_query returned None for query: '{date_query}'.")
+        date_range = analysis.get("date_range")
+        if not date_range:
             return None
 
-        start_datetime_str = parsed_range_dict.get("start_datetime")
-        end_datetime_str = parsed_range_dict.get("end_datetime")
-
-        start_datetime: Optional[datetime] = None
-        end_datetime: Optional[datetime] = None
-
-        try:
-            if start_datetime_str:
-                # LLMService should return it in "YYYY-MM-DD HH:MM:SS UTC" format
-                start_datetime = datetime.strptime(start_datetime_str, "%Y-%m-%d %H:%M:%S %Z")
-                # Ensure it's timezone-aware and UTC
-                if start_datetime.tzinfo is None:
-                    start_datetime = start_datetime.replace(tzinfo=timezone.utc)
-                else:
-                    start_datetime = start_datetime.astimezone(timezone.utc)
-            
-            if end_datetime_str:
-                end_datetime = datetime.strptime(end_datetime_str, "%Y-%m-%d %H:%M:%S %Z")
-                if end_datetime.tzinfo is None:
-                    end_datetime = end_datetime.replace(tzinfo=timezone.utc)
-                else:
-                    end_datetime = end_datetime.astimezone(timezone.utc)
-            
-            if start_datetime or end_datetime:
-                logger.info(f"Successfully parsed date query '{date_query}' into range: Start={start_datetime}, End={end_datetime}")
-                return (start_datetime, end_datetime)
-            else:
-                logger.warning(f"Date query '{date_query}' resulted in no valid start or end datetimes after LLM parsing.")
-                return None
-                
-        except ValueError as ve:
-            logger.error(f"Error parsing datetime strings from LLM for date_query '{date_query}'. Start: '{start_datetime_str}', End: '{end_datetime_str}'. Error: {ve}", exc_info=True)
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error in _parse_date_query_to_range for '{date_query}': {e}", exc_info=True)
+        bounds: List[Optional[datetime]] = []
+        for key in ("start_datetime", "end_datetime"):
+            value = date_range.get(key)
+            if not value:
+                bounds.append(None)
+                continue
+            try:
+                parsed = datetime.fromisoformat(value)
+            except (TypeError, ValueError) as e:
+                logger.error(f"Invalid {key} '{value}' in ask plan: {e}")
+                bounds.append(None)
+                continue
+            bounds.append(parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed.astimezone(timezone.utc))
+
+        if not any(bounds):
             return None
+        return (bounds[0], bounds[1])
 
-    async def handle_intelligent_ask(self, query_text: str, user_telegram_id: int) -> Tuple[str, List[Dict[str, Any]]]:
+    async def handle_intelligent_ask(
+        self,
+        query_text: str,
+        user_telegram_id: int,
+        on_partial_answer: Optional[Callable[[str], Awaitable[None]]] = None # Streams the final answer as it is generated
+    ) -> Tuple[str, List[Dict[str, Any]]]:
         logger.info(f"Handling intelligent ask from user {user_telegram_id}: '{query_text}'")
         
         analysis = await self.llm_service.analyze_ask_query(query_text)
@@ -462,9 +768,10 @@ class ContextService:
             # Initialize ProposalRepository
             proposal_repo = ProposalRepository(self.db_session)
 
-            # Parse date_query into a date range
-            # This is a simplified date parsing. For production, this would need to be more robust.
-            deadline_range = await self._parse_date_query_to_range(date_query_filter)
+            # The planner already resolved the date phrase into bounds, so no second LLM call is needed
+            deadline_range = self._date_range_from_analysis(analysis)
+            if date_query_filter and not deadline_range:
+                logger.warning(f"Ask planner could not resolve date query '{date_query_filter}'; ignoring the date filter.")
             
             # 1. Get proposals based on structured filters (SQL query)
             candidate_proposals_sql: List[Proposal] = []
@@ -521,12 +828,17 @@ class ContextService:
                     logger.warning("Could not generate embedding for content_keywords.")
             
             semantic_filtered_proposal_ids = []
+            proposal_scores: Dict[int, float] = {} # Retrieval score per proposal, used to rank prompt context
             if candidate_proposals_semantic:
                 for hit in candidate_proposals_semantic:
                     meta = hit.get("metadata", {})
                     if meta and "proposal_id" in meta:
                         try:
-                            semantic_filtered_proposal_ids.append(int(meta["proposal_id"]))
+                            semantic_proposal_id = int(meta["proposal_id"])
+                            semantic_filtered_proposal_ids.append(semantic_proposal_id)
+                            proposal_scores[semantic_proposal_id] = max(
+                                proposal_scores.get(semantic_proposal_id, 0.0), _similarity_from_distance(hit.get("distance"))
+                            )
                         except ValueError:
                             logger.warning(f"Could not parse proposal_id from semantic search metadata: {meta['proposal_id']}")
             
@@ -555,28 +867,32 @@ class ContextService:
             if not final_proposals:
                 return "I found some potential matches by ID, but couldn't retrieve their full details. Please try again.", []
 
+            # Rank by retrieval score (proposals found only through SQL filters keep their order, after scored ones)
+            final_proposals = sorted(final_proposals, key=lambda prop: proposal_scores.get(prop.id, 0.0), reverse=True)
+
             # 4. Synthesize answer with LLM
-            proposal_summaries = []
+            context_blocks: List[ContextBlock] = []
             for prop in final_proposals:
                 summary = f"Proposal ID: {prop.id}\nTitle: {prop.title}\nStatus: {prop.status}\nType: {prop.proposal_type}"
                 if prop.creation_date:
                     summary += f"\nCreated: {prop.creation_date.strftime('%Y-%m-%d %H:%M UTC')}"
                 if prop.deadline_date:
                     summary += f"\nDeadline: {prop.deadline_date.strftime('%Y-%m-%d %H:%M UTC')}"
-                proposal_summaries.append(summary)
+                context_blocks.append(ContextBlock(f"proposal:{prop.id}", summary, PROPOSAL_BLOCK_PRIORITY + proposal_scores.get(prop.id, 0.0)))
             
-            if not proposal_summaries: # Should not happen if final_proposals is not empty
+            if not context_blocks: # Should not happen if final_proposals is not empty
                  return "I couldn't find any proposals matching your query criteria.", []
 
-            # --- New: Gather context from documents attached to these proposals ---
-            all_doc_source_details: List[Dict[str, Any]] = [] # New: collect structured source details
-            additional_document_contexts_for_prompt = [] # For constructing the prompt
+            # --- Gather context from documents attached to the best-ranked proposals ---
+            doc_source_details_by_key: Dict[str, List[Dict[str, Any]]] = {} # Sources for each document block, for buttons
 
             if len(query_text.split()) > 3: # Arbitrary threshold
-                logger.info(f"Query '{query_text}' seems detailed enough to search attached documents for {len(final_proposals)} proposals.")
-                for prop in final_proposals:
+                # Document searches run one after another on this session, so only the top-ranked proposals are searched
+                doc_search_proposals = final_proposals[:ConfigService.get_ask_document_search_max_proposals()]
+                logger.info(f"Query '{query_text}' seems detailed enough to search attached documents for {len(doc_search_proposals)} of {len(final_proposals)} proposals.")
+                for prop in doc_search_proposals:
                     logger.info(f"Searching documents attached to proposal ID {prop.id} for query: '{query_text}'")
-                    raw_doc_context, current_prop_doc_source_details = await self._get_raw_document_context_for_query(
+                    raw_doc_context, current_prop_doc_source_details, doc_score = await self._get_scored_document_context_for_query(
                         question_text=query_text, 
                         proposal_id_filter=prop.id,
                         top_n_chunks=3
@@ -584,31 +900,43 @@ class ContextService:
                     
                     if raw_doc_context:
                         # We want to provide the raw context directly to the final LLM
-                        # Construct a header for this proposal's document context
+                        block_key = f"documents:proposal:{prop.id}"
                         context_header_for_prompt = f"From documents related to Proposal {prop.id} ('{prop.title}'):"
-                        additional_document_contexts_for_prompt.append(f"{context_header_for_prompt}\n{raw_doc_context}")
-                        all_doc_source_details.extend(current_prop_doc_source_details) # Add sources from this proposal's docs
+                        context_blocks.append(ContextBlock(block_key, f"{context_header_for_prompt}\n{raw_doc_context}", doc_score))
+                        doc_source_details_by_key[block_key] = current_prop_doc_source_details
                         logger.info(f"Added raw context from documents of proposal {prop.id}. Context length: {len(raw_doc_context)}")
                     else:
                         logger.info(f"No significant additional context found in documents for proposal {prop.id} regarding query: '{query_text}'")
-            # --- End new section ---
+
+            # Fit the context into the token budget, highest-ranked blocks first, so prompt size and latency stay bounded
+            packed = pack_context_blocks(context_blocks, ConfigService.get_ask_context_token_budget())
+            metrics.observe("ask.context_tokens", packed.tokens)
+            if packed.dropped:
+                metrics.increment("ask.context_blocks_dropped", len(packed.dropped))
+                logger.info(f"Context token budget reached: kept {len(packed.included)} block(s) ({packed.tokens} tokens), "
+                            f"dropped {len(packed.dropped)}: {', '.join(block.key for block in packed.dropped)}")
+
+            proposal_summaries = [block.text for block in packed.included if block.key.startswith("proposal:")]
+            additional_document_contexts_for_prompt = [block.text for block in packed.included if block.key.startswith("documents:")]
+            omitted_proposal_count = sum(1 for block in packed.dropped if block.key.startswith("proposal:"))
+
             context_for_llm = "Here are the proposals I found matching your query:\n\n" + "\n\n---\n\n".join(proposal_summaries)
+            if omitted_proposal_count:
+                context_for_llm += f"\n\n({omitted_proposal_count} more matching proposal(s) were omitted for length; mention that the list is partial.)"
             
             if additional_document_contexts_for_prompt:
                 context_for_llm += "\n\n---\n\nAdditionally, here is some context from documents related to these proposals:\n\n" + "\n\n---\n\n".join(additional_document_contexts_for_prompt)
 
             logger.info(f"=== Context for LLM: {context_for_llm} ===\n\n")
             
-            # The actual source details for buttons will be `all_doc_source_details`
-            # We might want to de-duplicate `all_doc_source_details` before returning if not already handled by _get_raw_document_context_for_query
-            # _get_raw_document_context_for_query now de-duplicates, so all_doc_source_details might have duplicates if same doc linked to multiple relevant proposals.
-            # For buttons, we want a unique list.
+            # Buttons only for documents whose context made it into the prompt, de-duplicated across proposals
             final_unique_doc_source_details_for_buttons: List[Dict[str, Any]] = []
             seen_button_doc_ids = set()
-            for detail in all_doc_source_details:
-                if detail['id'] not in seen_button_doc_ids:
-                    final_unique_doc_source_details_for_buttons.append(detail)
-                    seen_button_doc_ids.add(detail['id'])
+            for block in packed.included:
+                for detail in doc_source_details_by_key.get(block.key, []):
+                    if detail['id'] not in seen_button_doc_ids:
+                        final_unique_doc_source_details_for_buttons.append(detail)
+                        seen_button_doc_ids.add(detail['id'])
             
             synthesis_prompt = (
                 f"{context_for_llm}\n\nUser's original query: '{query_text}'\n\nBased on all the proposal information and any additional document context provided above, "
@@ -618,7 +946,7 @@ class ContextService:
                 f"Also, if the user is asking about results for a proposal, remind the user that they can use `/my_vote <proposal_id>` to see their specific vote or submission for any of these proposals, or if they are asking about a proposal, remind the user that they can use `/view_proposal <proposal_id>` to see the proposal details."
             )
 
-            final_answer = await self.llm_service.get_completion(synthesis_prompt)
+            final_answer = await self._generate_answer(synthesis_prompt, on_partial_answer)
             if not final_answer:
                 return "I found some proposals, but I had trouble summarizing them. You can try viewing them individually.", []
             
@@ -628,7 +956,7 @@ class ContextService:
             logger.info("Intent is query_general_docs, falling back to standard RAG.")
             # Assuming no specific proposal_id is relevant for a general query fallback
             # This call now correctly returns a tuple (answer_text, source_details_list)
-            return await self.get_answer_for_question(query_text, proposal_id_filter=None)
+            return await self.get_answer_for_question(query_text, proposal_id_filter=None, on_partial_answer=on_partial_answer)
 
     async def link_document_to_proposal_in_vector_store(
         self,
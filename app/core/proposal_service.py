@@ -3,12 +3,15 @@ from typing import List, Optional, Dict, Any
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.persistence.database import commit_unless_in_update_session, run_when_committed
 from app.persistence.models.proposal_model import Proposal, ProposalType, ProposalStatus
-from app.persistence.repositories.proposal_repository import ProposalRepository
+from app.persistence.repositories.proposal_repository import ProposalListItem, ProposalRepository
 from app.persistence.repositories.submission_repository import SubmissionRepository
+from app.persistence.repositories.vote_tally_repository import VoteTallyRepository
 from app.services.llm_service import LLMService
 from app.services.vector_db_service import VectorDBService
 from app.utils import telegram_utils
+from app.utils.pagination import PAGE_NEXT, Page, PageCursor
 from app.config import ConfigService
 from telegram.ext import Application
 
@@ -23,12 +26,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ProposalService:
-    def __init__(self, db_session: AsyncSession, bot_app: Optional[Application] = None):
+    def __init__(self, db_session: AsyncSession, bot_app: Optional[Application] = None, llm_service: Optional[LLMService] = None):
         self.db_session = db_session
         self.proposal_repository = ProposalRepository(db_session)
         self.user_service = UserService(db_session)
         self.submission_repository = SubmissionRepository(db_session)
-        self.llm_service = LLMService()
+        self.vote_tally_repository = VoteTallyRepository(db_session)
+        self.llm_service = llm_service or LLMService()
         self.vector_db_service = VectorDBService()
         self.bot_app = bot_app
 
@@ -51,9 +55,9 @@ class ProposalService:
         Ensures the proposer exists via UserService and then adds the proposal.
         """
         # Ensure proposer exists. UserService's register_user_interaction
-        # handles the get_or_create logic. The underlying UserRepository
+        # upserts the user (or skips them if already known). The underlying UserRepository
         # methods are designed not to commit, allowing service layer to control transactions.
-        proposer = await self.user_service.register_user_interaction(
+        await self.user_service.register_user_interaction(
             telegram_id=proposer_telegram_id,
             username=proposer_username,
             first_name=proposer_first_name,
@@ -63,7 +67,7 @@ class ProposalService:
         # Note: ProposalRepository.add_proposal currently has its own commit.
         # This might be revisited for unified transaction management.
         new_proposal = await self.proposal_repository.add_proposal(
-            proposer_telegram_id=proposer.telegram_id,
+            proposer_telegram_id=proposer_telegram_id,
             title=title,
             description=description,
             proposal_type=proposal_type,
@@ -127,7 +131,7 @@ class ProposalService:
 
     async def list_proposals_by_proposer(self, user_telegram_id: int) -> List[Dict[str, Any]]:
         """Lists proposals created by a specific user, formatted for display."""
-        proposals = await self.proposal_repository.get_proposals_by_proposer_id(user_telegram_id)
+        proposals = await self.proposal_repository.get_proposal_list_items_by_proposer_id(user_telegram_id)
         formatted_proposals = []
         for proposal in proposals:
             formatted_proposals.append({
@@ -143,26 +147,42 @@ class ProposalService:
             })
         return formatted_proposals
 
+    @staticmethod
+    def _format_proposal_listing(proposal: ProposalListItem) -> dict:
+        proposal_info = {
+            "id": proposal.id,
+            "title": proposal.title,
+            "status": proposal.status.value if hasattr(proposal.status, 'value') else str(proposal.status),
+            "target_channel_id": proposal.target_channel_id,
+            "channel_message_id": proposal.channel_message_id
+        }
+        if proposal.status == ProposalStatus.OPEN.value:
+            proposal_info["deadline_date"] = telegram_utils.format_datetime_for_display(proposal.deadline_date)
+        elif proposal.status == ProposalStatus.CLOSED.value:
+            proposal_info["outcome"] = proposal.outcome or "Results not yet processed or N/A"
+            proposal_info["closed_date"] = telegram_utils.format_datetime_for_display(proposal.deadline_date) # Or a separate closed_at field if added
+        return proposal_info
+
     async def list_proposals_by_status(self, status: str) -> list[dict]:
         """Lists proposals by their status (e.g., 'open', 'closed')."""
-        proposals = await self.proposal_repository.get_proposals_by_status(status)
-        formatted_proposals = []
-        for proposal in proposals:
-            proposal_info = {
-                "id": proposal.id,
-                "title": proposal.title,
-                "status": proposal.status.value if hasattr(proposal.status, 'value') else str(proposal.status),
-                "target_channel_id": proposal.target_channel_id,
-                "channel_message_id": proposal.channel_message_id
-            }
-            if proposal.status == ProposalStatus.OPEN.value:
-                proposal_info["deadline_date"] = telegram_utils.format_datetime_for_display(proposal.deadline_date)
-            elif proposal.status == ProposalStatus.CLOSED.value:
-                proposal_info["outcome"] = proposal.outcome or "Results not yet processed or N/A"
-                proposal_info["closed_date"] = telegram_utils.format_datetime_for_display(proposal.deadline_date) # Or a separate closed_at field if added
-            
-            formatted_proposals.append(proposal_info)
-        return formatted_proposals
+        proposals = await self.proposal_repository.get_proposal_list_items_by_status(status)
+        return [self._format_proposal_listing(proposal) for proposal in proposals]
+
+    async def list_proposals_page_by_status(
+        self,
+        status: str,
+        cursor: Optional[PageCursor] = None,
+        direction: str = PAGE_NEXT,
+        page_size: Optional[int] = None
+    ) -> Page[dict]:
+        """
+        One page of proposals with a status, newest first, formatted like list_proposals_by_status.
+        Pass a page's next_cursor/prev_cursor with PAGE_NEXT/PAGE_PREV to move to the older/newer page.
+        """
+        page = await self.proposal_repository.get_proposals_page_by_status(
+            status, page_size or ConfigService.get_list_page_size(), cursor, direction
+        )
+        return page._replace(items=[self._format_proposal_listing(proposal) for proposal in page.items])
 
     async def get_proposal_for_editing(self, proposal_id: int, user_telegram_id: int) -> tuple[Optional[Proposal], Optional[str]]:
         """
@@ -308,41 +328,44 @@ class ProposalService:
         if not updated_proposal:
             return False, "Failed to update proposal status to cancelled."
 
-        # Commit the session after successful status update and before trying to send messages
-        await self.db_session.commit()
-        logger.info(f"Proposal {proposal_id} cancelled by user {user_telegram_id}. Status updated and committed.")
-
-        # Edit the original message in the channel to indicate cancellation
-        if self.bot_app and updated_proposal.target_channel_id and updated_proposal.channel_message_id:
-            try:
-                if not proposal.proposer: # Should not happen due to eager loading
-                    logger.error(f"Proposer not loaded for proposal {proposal_id} during cancellation message update.")
-                    # Avoid raising an error that might rollback the successful cancellation,
-                    # just log and proceed with user message. Channel message edit will fail gracefully.
-                else:
-                    # To ensure the formatted message reflects the "cancelled" status,
-                    # we should pass the `updated_proposal` object, as its status field is current.
-                    # The `proposer` information comes from the original `proposal` object which had it eager-loaded.
-                    channel_message_text = telegram_utils.format_proposal_message(
-                        proposal=updated_proposal, # This has the updated 'cancelled' status
-                        proposer=proposal.proposer # This is the eagerly loaded User object
-                    )
+        # Commit (or, inside an update_session, leave it to the update's commit) before trying to send messages
+        await commit_unless_in_update_session(self.db_session)
+        logger.info(f"Proposal {proposal_id} cancelled by user {user_telegram_id}. Status updated.")
+
+        async def edit_channel_message():
+            # Edit the original message in the channel to indicate cancellation
+            if self.bot_app and updated_proposal.target_channel_id and updated_proposal.channel_message_id:
+                try:
+                    if not proposal.proposer: # Should not happen due to eager loading
+                        logger.error(f"Proposer not loaded for proposal {proposal_id} during cancellation message update.")
+                        # Avoid raising an error that might rollback the successful cancellation,
+                        # just log and proceed with user message. Channel message edit will fail gracefully.
+                    else:
+                        # To ensure the formatted message reflects the "cancelled" status,
+                        # we should pass the `updated_proposal` object, as its status field is current.
+                        # The `proposer` information comes from the original `proposal` object which had it eager-loaded.
+                        channel_message_text = telegram_utils.format_proposal_message(
+                            proposal=updated_proposal, # This has the updated 'cancelled' status
+                            proposer=proposal.proposer # This is the eagerly loaded User object
+                        )
                     
-                    # Add a clear "CANCELLED" prefix or suffix to the message
-                    cancelled_prefix = escape_markdown_v2("--- CANCELLED ---\n\n")
-                    final_channel_text = cancelled_prefix + channel_message_text
-
-                    await self.bot_app.bot.edit_message_text(
-                        chat_id=updated_proposal.target_channel_id,
-                        message_id=updated_proposal.channel_message_id,
-                        text=final_channel_text,
-                        reply_markup=None, # Remove voting buttons
-                        parse_mode=ParseMode.MARKDOWN_V2
-                    )
-                    logger.info(f"Edited channel message for cancelled proposal ID {proposal_id}.")
-            except Exception as e:
-                logger.error(f"Failed to edit channel message for cancelled proposal ID {proposal_id}: {e}", exc_info=True)
-                # Don't return error to user here, proposal is already cancelled. This is a secondary effect.
+                        # Add a clear "CANCELLED" prefix or suffix to the message
+                        cancelled_prefix = escape_markdown_v2("--- CANCELLED ---\n\n")
+                        final_channel_text = cancelled_prefix + channel_message_text
+
+                        await self.bot_app.bot.edit_message_text(
+                            chat_id=updated_proposal.target_channel_id,
+                            message_id=updated_proposal.channel_message_id,
+                            text=final_channel_text,
+                            reply_markup=None, # Remove voting buttons
+                            parse_mode=ParseMode.MARKDOWN_V2
+                        )
+                        logger.info(f"Edited channel message for cancelled proposal ID {proposal_id}.")
+                except Exception as e:
+                    logger.error(f"Failed to edit channel message for cancelled proposal ID {proposal_id}: {e}", exc_info=True)
+                    # Don't return error to user here, proposal is already cancelled. This is a secondary effect.
+
+        await run_when_committed(self.db_session, edit_channel_message)
 
         return True, f"Proposal ID {proposal_id} has been successfully cancelled."
 
@@ -365,14 +388,17 @@ class ProposalService:
 
         for proposal in expired_proposals:
             logger.info(f"Processing expired proposal ID: {proposal.id} - '{proposal.title}'")
-            submissions = await self.submission_repository.get_submissions_for_proposal(proposal.id)
-            
             outcome_text = "Results are now available."
             raw_results_data = {}
 
             if proposal.proposal_type == ProposalType.MULTIPLE_CHOICE.value:
-                if submissions:
-                    vote_counts = Counter(sub.response_content for sub in submissions if sub.response_content in proposal.options)
+                # Read the maintained per-option tallies: O(options) rows however many people voted.
+                # Without tallies (e.g. a schema created without the tally trigger) let Postgres GROUP BY the votes.
+                tallies = await self.vote_tally_repository.get_tallies(proposal.id)
+                if not tallies:
+                    tallies = await self.submission_repository.count_responses_for_proposal(proposal.id)
+                if tallies:
+                    vote_counts = Counter({option: count for option, count in tallies.items() if option in (proposal.options or [])})
                     raw_results_data = dict(vote_counts)
                     
                     if vote_counts:
@@ -399,14 +425,24 @@ class ProposalService:
                 logger.info(f"Proposal {proposal.id} (MC) outcome: {outcome_text}, Raw: {raw_results_data}")
 
             elif proposal.proposal_type == ProposalType.FREE_FORM.value:
-                submission_texts = [sub.response_content for sub in submissions]
+                # Stream just the texts through a server-side cursor instead of loading Submission objects
+                submission_texts = [
+                    text async for text in self.submission_repository.stream_response_texts(
+                        proposal.id, batch_size=ConfigService.get_submission_stream_batch_size()
+                    )
+                ]
                 raw_results_data = {"submissions": submission_texts} # Store all submissions
                 
                 if submission_texts:
                     num_submissions = len(submission_texts)
                     s_char = 's' if num_submissions != 1 else ''
                     try:
-                        summary = await self.llm_service.cluster_and_summarize_texts(submission_texts)
+                        if num_submissions > ConfigService.get_free_form_map_reduce_threshold():
+                            # Too many submissions for one prompt: cluster locally and summarize per cluster, then merge
+                            logger.info(f"Proposal {proposal.id} (FF) has {num_submissions} submissions; using map-reduce summarization.")
+                            summary = await self.llm_service.map_reduce_summarize_texts(submission_texts)
+                        else:
+                            summary = await self.llm_service.cluster_and_summarize_texts(submission_texts)
                         if summary: # Check if summary is not None or empty
                             # Ensure newlines from LLM (which might be literal \n or \\n) are actual \n characters
                             # The LLM is prompted to provide newlines for formatting.
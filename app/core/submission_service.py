@@ -3,12 +3,16 @@ from typing import Optional, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.persistence.database import in_update_session
 from app.persistence.models.proposal_model import Proposal, ProposalType, ProposalStatus
-from app.persistence.repositories.proposal_repository import ProposalRepository
+from app.persistence.repositories.proposal_repository import ProposalRepository, invalidate_proposal_facts
 from app.persistence.repositories.submission_repository import SubmissionRepository
+from app.persistence.repositories.vote_tally_repository import VoteTallyRepository
 from app.core.user_service import UserService # To ensure voter exists
 from app.persistence.repositories.user_repository import UserRepository
-from app.utils.telegram_utils import format_datetime_for_display 
+from app.utils.telegram_utils import format_datetime_for_display
+from app.config import ConfigService 
+from app.utils.pagination import PAGE_NEXT, Page, PageCursor
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +20,7 @@ class SubmissionService:
     def __init__(self, db_session: AsyncSession):
         self.db_session = db_session
         self.submission_repository = SubmissionRepository(db_session)
+        self.vote_tally_repository = VoteTallyRepository(db_session)
         self.user_repository = UserRepository(db_session)
         self.proposal_repository = ProposalRepository(db_session)
         self.user_service = UserService(db_session)
@@ -28,11 +33,12 @@ class SubmissionService:
     ) -> Tuple[bool, str]: # Returns (success_status, message_to_user)
         """
         Records a vote for a multiple-choice proposal.
-        Validates the proposal and option, then adds/updates the submission.
+        Validates the option against cached proposal facts, then adds/updates the submission with one guarded upsert,
+        so a repeat voter on a cached proposal costs a single database round trip.
         """
         try:
-            # 1. Fetch the proposal
-            proposal = await self.proposal_repository.get_proposal_by_id(proposal_id)
+            # 1. Fetch the proposal's type, options and status (cached in process until edited, closed or cancelled)
+            proposal = await self.proposal_repository.get_proposal_facts(proposal_id)
             if not proposal:
                 logger.warning(f"Attempt to vote on non-existent proposal ID: {proposal_id}")
                 return False, "Error: Proposal not found."
@@ -53,46 +59,27 @@ class SubmissionService:
             
             selected_option_string = proposal.options[option_index]
 
-            # 4. Ensure voter (submitter) exists - UserService handles get_or_create logic
-            # We assume user details (username, first_name) are not strictly needed here for submission,
-            # but if they were, the callback_query.from_user object would be passed here.
-            # For now, just ensuring the user is in our DB is enough via their ID.
-            voter = await self.user_service.register_user_interaction(
-                telegram_id=submitter_telegram_id,
-                username=None,  # We don't have these details here
-                first_name=None  # We don't have these details here
-            )
-            if not voter: # Should ideally be registered from some prior interaction like /start
-                # If we want to auto-register on vote, we'd need more user details.
-                # For now, we assume they must have interacted before if they are voting.
-                logger.warning(f"User {submitter_telegram_id} attempted to vote but is not registered. This should ideally not happen.")
-                # This case is tricky: if user not in DB, FK constraint on submissions.submitter_id will fail.
-                # Best practice: ensure users are registered upon any interaction that could lead to DB writes.
-                # For now, we will rely on UserService.get_user_by_telegram_id and fail if not found, 
-                # assuming /start or other commands register them.
-                # If a truly new user (no /start) somehow gets a vote button, this needs robust handling.
-                # One approach: If UserService.register_user_interaction was called with (id, None, None)
-                # during the callback handler setup or here if it can be done without breaking flow.
-                # Simplest for now: user must exist. This implies that their first_name/username 
-                # were captured during an earlier interaction.
-                return False, "Error: Voter registration not found. Please /start the bot first."
-
-            # 5. Add or update the submission
-            submission = await self.submission_repository.add_or_update_submission(
+            # 4. Ensure voter (submitter) exists for the submissions foreign key, keeping any names stored from /start etc.
+            await self.user_service.ensure_user_exists(submitter_telegram_id)
+
+            # 5. Add or update the submission; the statement itself re-checks that the proposal is still open
+            submission = await self.submission_repository.upsert_submission_if_open(
                 proposal_id=proposal_id,
                 submitter_id=submitter_telegram_id,
                 response_content=selected_option_string
             )
+            if submission is None: # Closed or cancelled since its facts were cached
+                invalidate_proposal_facts(proposal_id)
+                logger.warning(f"Vote on proposal {proposal_id} rejected by the open-status guard.")
+                return False, f"Sorry, voting for proposal '{proposal.title}' is closed."
 
-            if submission:
-                logger.info(f"Successfully recorded vote for user {submitter_telegram_id} on proposal {proposal_id}, option: '{selected_option_string}'")
-                return True, f"Your vote for '{selected_option_string}' has been recorded!"
-            else:
-                logger.error(f"Failed to record vote for user {submitter_telegram_id} on proposal {proposal_id} in repository.")
-                return False, "An error occurred while saving your vote. Please try again."
+            logger.info(f"Successfully recorded vote for user {submitter_telegram_id} on proposal {proposal_id}, option: '{selected_option_string}'")
+            return True, f"Your vote for '{selected_option_string}' has been recorded!"
 
         except Exception as e:
             logger.error(f"Unexpected error in record_vote for proposal {proposal_id}, user {submitter_telegram_id}: {e}", exc_info=True)
+            if in_update_session():
+                raise # So the update's unit of work rolls back (and drops its after-commit callbacks)
             return False, "An unexpected error occurred. Please try again later."
 
     async def record_free_form_submission(
@@ -103,11 +90,11 @@ class SubmissionService:
     ) -> Tuple[bool, str]: # Returns (success_status, message_to_user)
         """
         Records a free-form submission for a proposal.
-        Validates the proposal, then adds/updates the submission.
+        Validates the proposal, then adds/updates the submission with one guarded upsert.
         """
         try:
-            # 1. Fetch the proposal
-            proposal = await self.proposal_repository.get_proposal_by_id(proposal_id)
+            # 1. Fetch the proposal's type and status (cached in process until edited, closed or cancelled)
+            proposal = await self.proposal_repository.get_proposal_facts(proposal_id)
             if not proposal:
                 logger.warning(f"Attempt to submit to non-existent proposal ID: {proposal_id}")
                 return False, "Error: Proposal not found."
@@ -121,34 +108,27 @@ class SubmissionService:
                 logger.warning(f"Attempt to submit to proposal {proposal_id} which is not free_form (type: {proposal.proposal_type}).")
                 return False, "Error: This proposal does not accept free-form submissions."
 
-            # 3. Ensure submitter exists
-            # Assuming user details (username, first_name) are not strictly needed here for submission.
-            # The command handler for /submit should pass the user's telegram_id.
-            submitter = await self.user_service.register_user_interaction(
-                telegram_id=submitter_telegram_id,
-                username=None,  # We don't have these details here from just the ID and text
-                first_name=None  # We don't have these details here
-            )
-            if not submitter:
-                logger.warning(f"User {submitter_telegram_id} attempted to submit but is not registered. This should ideally not happen.")
-                return False, "Error: Submitter registration not found. Please /start the bot first."
+            # 3. Ensure submitter exists (only the telegram_id is known here, so stored names are left as they are)
+            await self.user_service.ensure_user_exists(submitter_telegram_id)
 
-            # 4. Add or update the submission
-            submission = await self.submission_repository.add_or_update_submission(
+            # 4. Add or update the submission; the statement itself re-checks that the proposal is still open
+            submission = await self.submission_repository.upsert_submission_if_open(
                 proposal_id=proposal_id,
                 submitter_id=submitter_telegram_id,
                 response_content=text_submission
             )
+            if submission is None: # Closed or cancelled since its facts were cached
+                invalidate_proposal_facts(proposal_id)
+                logger.warning(f"Submission to proposal {proposal_id} rejected by the open-status guard.")
+                return False, f"Sorry, submissions for proposal '{proposal.title}' are closed."
 
-            if submission:
-                logger.info(f"Successfully recorded free-form submission for user {submitter_telegram_id} on proposal {proposal_id}.")
-                return True, "Your submission has been recorded!"
-            else:
-                logger.error(f"Failed to record free-form submission for user {submitter_telegram_id} on proposal {proposal_id} in repository.")
-                return False, "An error occurred while saving your submission. Please try again."
+            logger.info(f"Successfully recorded free-form submission for user {submitter_telegram_id} on proposal {proposal_id}.")
+            return True, "Your submission has been recorded!"
 
         except Exception as e:
             logger.error(f"Unexpected error in record_free_form_submission for proposal {proposal_id}, user {submitter_telegram_id}: {e}", exc_info=True)
+            if in_update_session():
+                raise # So the update's unit of work rolls back (and drops its after-commit callbacks)
             return False, "An unexpected error occurred. Please try again later."
 
     async def get_user_submission_history(self, submitter_id: int) -> list[dict]:
@@ -161,6 +141,29 @@ class SubmissionService:
             logger.info(f"No submissions found for user {submitter_id}")
             return []
 
+        history = await self._format_submission_history(submissions, submitter_id)
+        logger.info(f"Returning {len(history)} items for user {submitter_id} submission history.")
+        return history
+
+    async def get_user_submission_history_page(
+        self,
+        submitter_id: int,
+        cursor: Optional[PageCursor] = None,
+        direction: str = PAGE_NEXT,
+        page_size: Optional[int] = None
+    ) -> Page[dict]:
+        """
+        One page of a user's submission history, newest first, formatted like get_user_submission_history.
+        Only the page's submissions and their proposals are loaded.
+        """
+        page = await self.submission_repository.get_submissions_page_by_user(
+            submitter_id, page_size or ConfigService.get_list_page_size(), cursor, direction
+        )
+        return page._replace(items=await self._format_submission_history(page.items, submitter_id))
+
+    async def _format_submission_history(self, submissions, submitter_id: int) -> list[dict]:
+        if not submissions:
+            return []
         proposal_ids = list(set(sub.proposal_id for sub in submissions))
         proposals_list = await self.proposal_repository.get_proposals_by_ids(proposal_ids)
         
@@ -185,10 +188,32 @@ class SubmissionService:
                 })
             else:
                 logger.warning(f"Proposal ID {sub.proposal_id} not found for submission ID {sub.id} by user {submitter_id}")
-        
-        logger.info(f"Returning {len(history)} items for user {submitter_id} submission history.")
         return history
 
     async def get_all_results_for_proposal_view(self, proposal_id: int) -> Optional[dict]:
-        # Implementation of get_all_results_for_proposal_view method
-        pass 
\ No newline at end of file
+        """
+        Results of a proposal for display (live while it is open): per-option counts from the maintained vote tallies
+        for multiple-choice proposals, or the anonymized submission texts for free-form ones.
+        Returns None if the proposal does not exist.
+        """
+        proposal = await self.proposal_repository.get_proposal_facts(proposal_id)
+        if not proposal:
+            return None
+
+        results = {
+            "proposal_id": proposal.id,
+            "proposal_title": proposal.title,
+            "proposal_type": proposal.proposal_type,
+            "proposal_status": proposal.status,
+        }
+        if proposal.proposal_type == ProposalType.MULTIPLE_CHOICE.value:
+            tallies = await self.vote_tally_repository.get_tallies(proposal_id)
+            results["vote_counts"] = {option: tallies.get(option, 0) for option in proposal.options}
+            results["total_votes"] = sum(results["vote_counts"].values())
+        else:
+            results["submissions"] = [
+                text async for text in self.submission_repository.stream_response_texts(
+                    proposal_id, batch_size=ConfigService.get_submission_stream_batch_size()
+                )
+            ]
+        return results 
\ No newline at end of file
@@ -1,6 +1,66 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import ConfigService
+from app.persistence.database import in_update_session, run_after_commit
 from app.persistence.repositories.user_repository import UserRepository
 from app.persistence.models.user_model import User
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+UserNames = Optional[Tuple[Optional[str], Optional[str]]] # (username, first_name); None if only existence is known
+
+class _KnownUserCache:
+    """Bounded LRU of users known to be stored, with the names stored for them; entries expire after a TTL."""
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._users: "OrderedDict[int, Tuple[float, UserNames]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, telegram_id: int) -> Tuple[bool, UserNames]:
+        """Returns (known, names) for a user."""
+        with self._lock:
+            entry = self._users.get(telegram_id)
+            if entry is None:
+                return False, None
+            expires_at, names = entry
+            if time.monotonic() >= expires_at:
+                del self._users[telegram_id]
+                return False, None
+            self._users.move_to_end(telegram_id)
+            return True, names
+
+    def put(self, telegram_id: int, names: UserNames, only_if_missing: bool = False):
+        with self._lock:
+            if only_if_missing and telegram_id in self._users:
+                return
+            self._users[telegram_id] = (time.monotonic() + self.ttl_seconds, names)
+            self._users.move_to_end(telegram_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+_known_users = _KnownUserCache(ConfigService.get_known_user_cache_size(), ConfigService.get_known_user_cache_ttl_seconds())
+
+def _remember_user_when_committed(telegram_id: int, names: UserNames, only_if_missing: bool = False):
+    """
+    Caches a user once the surrounding update_session has committed their row, so an uncommitted or rolled-back
+    insert is never treated as stored. Outside update_session the commit can't be observed, so nothing is cached.
+    """
+    if not in_update_session():
+        return
+    async def remember():
+        _known_users.put(telegram_id, names, only_if_missing=only_if_missing)
+    run_after_commit(remember)
 
 class UserService:
     def __init__(self, db_session: AsyncSession):
@@ -8,18 +68,35 @@ class UserService:
 
     async def register_user_interaction(
         self, telegram_id: int, username: str | None, first_name: str | None
-    ) -> User:
+    ) -> None:
         """
-        Registers or updates a user based on their interaction.
-        Effectively an upsert based on telegram_id.
+        Registers or updates a user based on their interaction (an upsert on telegram_id).
+        Users already stored with the same names within the cache TTL cost no database round trip.
         """
-        user = await self.user_repository.get_or_create_user(
+        names = (username, first_name)
+        known, cached_names = _known_users.lookup(telegram_id)
+        if known and cached_names == names:
+            metrics.increment("users.known_user_cache", result="hit")
+            return
+        metrics.increment("users.known_user_cache", result="miss")
+        await self.user_repository.upsert_user(
             telegram_id=telegram_id,
             username=username,
             first_name=first_name,
         )
-        return user 
+        _remember_user_when_committed(telegram_id, names)
+
+    async def ensure_user_exists(self, telegram_id: int) -> None:
+        """
+        Makes sure a user row exists for telegram_id without touching stored names, for callers that only know the ID
+        (e.g. recording a submission, which needs the foreign key).
+        """
+        known, _ = _known_users.lookup(telegram_id)
+        if known:
+            return
+        await self.user_repository.insert_user_if_missing(telegram_id)
+        _remember_user_when_committed(telegram_id, None, only_if_missing=True)
 
     async def get_user_by_telegram_id(self, telegram_id: int) -> User | None:
         """Gets a user by their Telegram ID."""
-        return await self.user_repository.get_user_by_telegram_id(telegram_id) 
\ No newline at end of file
+        return await self.user_repository.get_user_by_telegram_id(telegram_id)
@@ -1,22 +1,81 @@
-from typing import AsyncGenerator
-from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterator, List, Optional
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 import logging
+import time
+from uuid import uuid4
 
+from sqlalchemy import event, exc as sa_exc
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base as sa_declarative_base
+from sqlalchemy.orm import Session, declarative_base as sa_declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 
 from app.config import ConfigService
+from app.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+class _InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection and how many are in use."""
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            metrics.increment("db.pool_checkout_timeouts")
+            raise
+        metrics.observe("db.pool_checkout_wait_seconds", time.perf_counter() - started)
+        metrics.observe("db.pool_in_use", self.checkedout())
+        return connection
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+def engine_options() -> Dict[str, Any]:
+    """create_async_engine arguments for the connection pool and asyncpg statement caching, from ConfigService."""
+    statement_cache_size = ConfigService.get_db_statement_cache_size()
+    connect_args: Dict[str, Any] = {
+        "statement_cache_size": statement_cache_size, # asyncpg's per-connection cache
+        "prepared_statement_cache_size": statement_cache_size, # SQLAlchemy's asyncpg adapter cache
+    }
+    if ConfigService.is_db_pgbouncer_mode():
+        # A transaction pooler may run each transaction on a different server connection, so generated statement
+        # names (__asyncpg_stmt_1__, ...) would collide with ones another client already prepared there
+        connect_args["prepared_statement_name_func"] = _unique_statement_name
+
+    options: Dict[str, Any] = {"connect_args": connect_args, "pool_pre_ping": True}
+    if ConfigService.get_db_pool_size() == 0:
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=_InstrumentedQueuePool,
+            pool_size=ConfigService.get_db_pool_size(),
+            max_overflow=ConfigService.get_db_max_overflow(),
+            pool_timeout=ConfigService.get_db_pool_timeout_seconds(),
+            pool_recycle=ConfigService.get_db_pool_recycle_seconds(),
+        )
+    return options
+
 # Create async engine using the database URL from ConfigService
 engine = create_async_engine(
     ConfigService.get_database_url(),
     echo=False,  # Set to True for SQL query logging (development only)
     future=True,  # Use SQLAlchemy 2.0 style
-    pool_pre_ping=True, # Add pre-ping to check connection liveness
+    **engine_options()
 )
 
+def pool_status() -> Optional[Dict[str, int]]:
+    """Current connection counts of the engine's pool, or None when connections aren't pooled (DB_POOL_SIZE=0)."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return None
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+    }
+
 # Create async session maker
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -28,8 +87,6 @@ AsyncSessionLocal = async_sessionmaker(
 # Create a base class for declarative models
 Base = sa_declarative_base()
 
-POOL_RECYCLE_SECONDS = 3600  # Recycle connections every hour, e.g.
-
 @asynccontextmanager
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """Provide a transactional scope around a series of operations."""
@@ -40,6 +97,129 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             raise
 
+class QueryCounter:
+    """Counts SQL statements and commits sent to the database, e.g. while handling one Telegram update."""
+    def __init__(self):
+        self.queries = 0
+        self.commits = 0
+
+_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("db_query_counter", default=None)
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get() # SQLAlchemy runs this in a greenlet that shares the calling task's context
+    if counter is not None:
+        counter.queries += 1
+
+@event.listens_for(engine.sync_engine, "commit")
+def _count_commit(conn):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.commits += 1
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Counts the statements and commits issued inside the block (including by tasks it awaits directly)."""
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+class _UnitOfWork:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.after_commit: List[Callable[[], Awaitable[None]]] = []
+        self.rollback_only = False # Set once any part of the update failed; the whole update is then rolled back
+
+_unit_of_work: ContextVar[Optional[_UnitOfWork]] = ContextVar("update_unit_of_work", default=None)
+
+_UNIT_OF_WORK_KEY = "update_unit_of_work" # Session.info key of the session's _UnitOfWork
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_unit_of_work(session: Session):
+    # Whoever rolled the update's session back, its after-commit callbacks describe writes that no longer exist
+    unit = session.info.get(_UNIT_OF_WORK_KEY)
+    if unit is not None:
+        unit.after_commit.clear()
+        unit.rollback_only = True
+
+@asynccontextmanager
+async def update_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Unit of work for one Telegram update (or job): the outermost block opens a session and commits it once when the
+    block exits, rolling back on error. Nested blocks, e.g. in services called by the handler, share that session
+    instead of opening and committing their own, so one update costs one session and one commit.
+    Callbacks registered with run_after_commit run once the commit has succeeded.
+    If a nested block raises (even if the handler then handles the error) or the session is rolled back, the whole
+    update is rolled back instead and its after-commit callbacks are dropped.
+    """
+    current = _unit_of_work.get()
+    if current is not None:
+        try:
+            yield current.session
+        except BaseException:
+            current.rollback_only = True
+            raise
+        return
+
+    async with AsyncSessionLocal() as session:
+        unit = _UnitOfWork(session)
+        session.info[_UNIT_OF_WORK_KEY] = unit
+        token = _unit_of_work.set(unit)
+        try:
+            yield session
+            if unit.rollback_only:
+                await session.rollback()
+                unit.after_commit.clear()
+            else:
+                await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            _unit_of_work.reset(token)
+    for callback in unit.after_commit:
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"Error in after-commit callback {callback}: {e}", exc_info=True)
+
+def in_update_session() -> bool:
+    """True while running inside an update_session block, i.e. writes will be committed by its unit of work."""
+    return _unit_of_work.get() is not None
+
+def run_after_commit(callback: Callable[[], Awaitable[None]]):
+    """
+    Defers work that needs this update's writes to be visible to other sessions (e.g. starting a background job)
+    until the surrounding update_session has committed. Must be called inside update_session.
+    """
+    unit = _unit_of_work.get()
+    if unit is None:
+        raise RuntimeError("run_after_commit must be called inside update_session().")
+    unit.after_commit.append(callback)
+
+async def commit_unless_in_update_session(session: AsyncSession):
+    """
+    Commits `session`, unless it is the surrounding update_session's session: then it only flushes, and the unit of
+    work commits once when the block exits. For repositories and services that commit for callers with their own
+    session but are also called inside an update.
+    """
+    unit = _unit_of_work.get()
+    if unit is not None and unit.session is session:
+        await session.flush()
+        return
+    await session.commit()
+
+async def run_when_committed(session: AsyncSession, callback: Callable[[], Awaitable[None]]):
+    """Runs `callback` once writes passed to commit_unless_in_update_session(session) are committed."""
+    unit = _unit_of_work.get()
+    if unit is not None and unit.session is session:
+        unit.after_commit.append(callback)
+        return
+    await callback()
+
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(Base.metadata.drop_all) # Uncomment to drop tables on startup (for dev)
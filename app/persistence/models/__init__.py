@@ -3,10 +3,16 @@ from .user_model import User
 from .proposal_model import Proposal
 from .document_model import Document
 from .submission_model import Submission
+from .ingestion_job_model import IngestionJob
+from .llm_usage_model import LLMUsage
+from .vote_tally_model import ProposalOptionTally
 
 __all__ = [
     "User",
     "Proposal",
     "Document",
     "Submission",
+    "IngestionJob",
+    "LLMUsage",
+    "ProposalOptionTally",
 ] 
\ No newline at end of file
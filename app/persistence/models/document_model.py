@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from typing import Iterator, Optional
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, LargeBinary
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
+from app.config import ConfigService
 from app.persistence.database import Base
+from app.utils.compression import compress_text, decompress_text, iter_decompressed_text
 # Assuming Proposal model might be needed for ForeignKey, adjust if not directly linked in model def
 # from app.persistence.models.proposal_model import Proposal 
 
@@ -17,10 +20,35 @@ class Document(Base):
     
     # Foreign Key to proposals table, nullable as documents can be general context too
     proposal_id = Column(Integer, ForeignKey("proposals.id"), nullable=True, index=True)
-    raw_content = Column(Text, nullable=True) # Stores the raw (or cleaned) text content of the document
+
+    # The raw (or cleaned) text content, stored compressed. Deferred so list views never load it;
+    # load it explicitly with undefer(Document.raw_content_compressed) when the content is needed.
+    raw_content_compressed = deferred(Column(LargeBinary, nullable=True))
+    content_encoding = Column(String, nullable=True) # "zstd" or "zlib", see app.utils.compression
     
     # Relationship (optional, if you need to access Document.proposal or Proposal.documents)
     # proposal = relationship("Proposal", back_populates="documents") # Requires back_populates on Proposal
 
+    @property
+    def raw_content(self) -> Optional[str]:
+        """The document text, decompressed on access."""
+        if self.raw_content_compressed is None:
+            return None
+        return decompress_text(self.raw_content_compressed, self.content_encoding)
+
+    @raw_content.setter
+    def raw_content(self, value: Optional[str]):
+        if value is None:
+            self.raw_content_compressed = None
+            self.content_encoding = None
+        else:
+            self.raw_content_compressed, self.content_encoding = compress_text(value, ConfigService.get_document_content_encoding())
+
+    def iter_raw_content_pages(self, page_size: int) -> Iterator[str]:
+        """Yields the document text page by page, decompressing lazily."""
+        if self.raw_content_compressed is None:
+            return iter(())
+        return iter_decompressed_text(self.raw_content_compressed, self.content_encoding, page_size)
+
     def __repr__(self):
-        return f"<Document(id={self.id}, title='{self.title}', proposal_id={self.proposal_id})>" 
\ No newline at end of file
+        return f"<Document(id={self.id}, title='{self.title}', proposal_id={self.proposal_id})>"
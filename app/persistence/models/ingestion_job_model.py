@@ -0,0 +1,30 @@
+import enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, BigInteger
+from sqlalchemy.sql import func
+from app.persistence.database import Base
+
+class IngestionJobStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    requester_telegram_id = Column(BigInteger, nullable=False, index=True) # Who gets notified when the job finishes
+    content_source = Column(Text, nullable=False) # Raw text or URL to ingest
+    source_type = Column(String, nullable=False) # Same values as ContextService.process_and_store_document, e.g. "admin_global_url"
+    title = Column(String, nullable=True)
+    proposal_id = Column(Integer, ForeignKey("proposals.id"), nullable=True) # Set for proposal context docs
+    status = Column(String, default=IngestionJobStatus.PENDING.value, nullable=False, index=True) # Using String for enum
+    progress = Column(String, nullable=True) # Current stage, e.g. "fetching", "embedding"
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True) # Set once the document is stored
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<IngestionJob(id={self.id}, status='{self.status}', document_id={self.document_id})>"
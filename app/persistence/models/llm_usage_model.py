@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Float
+from app.persistence.database import Base
+
+class LLMUsage(Base):
+    """OpenAI usage totals for one (source, task, model) over one in-memory flush period."""
+    __tablename__ = "llm_usage"
+
+    id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    recorded_at = Column(DateTime(timezone=True), nullable=False, index=True) # End of the flush period
+    source = Column(String, nullable=False, index=True) # Originating command or job, e.g. "/ask", "deadline_check_job"
+    task = Column(String, nullable=False) # Routing-table task, e.g. "ask_answer", "embedding"
+    model = Column(String, nullable=False)
+    calls = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0) # Estimated from MODEL_PRICES_PER_MILLION_TOKENS
+    latency_seconds = Column(Float, nullable=False, default=0.0) # Sum over calls; divide by calls for the mean
+
+    def __repr__(self):
+        return f"<LLMUsage(source='{self.source}', task='{self.task}', model='{self.model}', calls={self.calls})>"
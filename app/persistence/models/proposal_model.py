@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, BigInteger
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, BigInteger, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.persistence.database import Base
@@ -33,5 +33,11 @@ class Proposal(Base):
 
     proposer = relationship("User")
 
+    __table_args__ = (
+        Index("ix_proposals_open_deadline_date", "deadline_date", postgresql_where=text("status = 'open'")),
+        Index("ix_proposals_target_channel_id_creation_date", "target_channel_id", "creation_date"),
+        Index("ix_proposals_status_creation_date", "status", "creation_date"),
+    )
+
     def __repr__(self):
         return f"<Proposal(id={self.id}, title='{self.title}', type='{self.proposal_type}', status='{self.status}')>" 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, UniqueConstraint, BigInteger
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, UniqueConstraint, BigInteger, Index
 from sqlalchemy.sql import func
 from app.persistence.database import Base
 
@@ -11,7 +11,10 @@ class Submission(Base):
     response_content = Column(Text, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
-    __table_args__ = (UniqueConstraint('proposal_id', 'submitter_id', name='uq_proposal_submitter'),)
+    __table_args__ = (
+        UniqueConstraint('proposal_id', 'submitter_id', name='uq_proposal_submitter'),
+        Index('ix_submissions_submitter_id_timestamp', 'submitter_id', 'timestamp'),
+    )
 
     def __repr__(self):
         return f"<Submission(id={self.id}, proposal_id={self.proposal_id}, submitter_id={self.submitter_id})>" 
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Text, ForeignKey
+from app.persistence.database import Base
+
+class ProposalOptionTally(Base):
+    """
+    Live vote count per option of a multiple-choice proposal.
+    Maintained by the submissions_maintain_tallies trigger (see the create_vote_tallies migration) in the same
+    transaction as every vote insert, change or delete, so reading results costs O(options) rows.
+    """
+    __tablename__ = "proposal_option_tallies"
+
+    proposal_id = Column(Integer, ForeignKey("proposals.id", ondelete="CASCADE"), primary_key=True)
+    option = Column(Text, primary_key=True)
+    vote_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<ProposalOptionTally(proposal_id={self.proposal_id}, option='{self.option}', vote_count={self.vote_count})>"
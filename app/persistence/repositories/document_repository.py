@@ -1,7 +1,8 @@
-from typing import Optional, List
+from typing import Optional, List, Set
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.persistence.models.document_model import Document
 from sqlalchemy.future import select
+from sqlalchemy.orm import undefer
 
 class DocumentRepository:
     def __init__(self, db_session: AsyncSession):
@@ -58,15 +59,54 @@ class DocumentRepository:
             return document
         return None 
 
-    async def get_document_by_id(self, document_id: int) -> Optional[Document]:
-        """Fetches a document by its ID, including its raw_content."""
-        result = await self.db_session.execute(
-            select(Document).where(Document.id == document_id)
-        )
-        return result.scalars().first() 
+    async def get_document_by_id(self, document_id: int, include_content: bool = True) -> Optional[Document]:
+        """
+        Fetches a document by its ID.
+        The compressed raw_content is only loaded when include_content is True; it is deferred otherwise.
+        """
+        stmt = select(Document).where(Document.id == document_id)
+        if include_content:
+            stmt = stmt.options(undefer(Document.raw_content_compressed))
+        result = await self.db_session.execute(stmt)
+        return result.scalars().first()
+
+    async def update_document(
+        self,
+        document_id: int,
+        raw_content: Optional[str] = None,
+        title: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        vector_ids: Optional[List[str]] = None,
+    ) -> Optional[Document]:
+        """
+        Updates the given fields of an existing document. Fields left as None are unchanged.
+        The commit is left to the calling service.
+        """
+        document = await self.get_document_by_id(document_id, include_content=False)
+        if not document:
+            return None
+
+        if raw_content is not None:
+            document.raw_content = raw_content
+        if title is not None:
+            document.title = title
+        if content_hash is not None:
+            document.content_hash = content_hash
+        if vector_ids is not None:
+            document.vector_ids = vector_ids
+        await self.db_session.flush()
+        return document
+
+    async def get_existing_content_hashes(self, content_hashes: List[str]) -> Set[str]:
+        """Returns the subset of the given content hashes that already belong to a stored document."""
+        if not content_hashes:
+            return set()
+        stmt = select(Document.content_hash).where(Document.content_hash.in_(content_hashes))
+        result = await self.db_session.execute(stmt)
+        return set(result.scalars().all())
 
     async def get_documents_by_proposal_id(self, proposal_id: int) -> List[Document]:
-        """Fetches all documents associated with a given proposal_id."""
+        """Fetches all documents associated with a given proposal_id. raw_content is deferred and not loaded."""
         stmt = select(Document).where(Document.proposal_id == proposal_id).order_by(Document.upload_date.desc())
         result = await self.db_session.execute(stmt)
         return list(result.scalars().all()) 
\ No newline at end of file
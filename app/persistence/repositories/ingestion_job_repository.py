@@ -0,0 +1,101 @@
+import logging
+from typing import List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+
+from app.persistence.models.ingestion_job_model import IngestionJob, IngestionJobStatus
+
+logger = logging.getLogger(__name__)
+
+class IngestionJobRepository:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def add_job(
+        self,
+        requester_telegram_id: int,
+        content_source: str,
+        source_type: str,
+        title: Optional[str] = None,
+        proposal_id: Optional[int] = None,
+    ) -> IngestionJob:
+        """Adds a new pending ingestion job. The caller is responsible for committing."""
+        new_job = IngestionJob(
+            requester_telegram_id=requester_telegram_id,
+            content_source=content_source,
+            source_type=source_type,
+            title=title,
+            proposal_id=proposal_id,
+            status=IngestionJobStatus.PENDING.value,
+            # created_at is server_default
+        )
+        self.db_session.add(new_job)
+        await self.db_session.flush()
+        await self.db_session.refresh(new_job)
+        return new_job
+
+    async def get_job_by_id(self, job_id: int) -> Optional[IngestionJob]:
+        result = await self.db_session.execute(
+            select(IngestionJob).where(IngestionJob.id == job_id)
+        )
+        return result.scalars().first()
+
+    async def get_jobs_by_requester(self, requester_telegram_id: int, limit: int = 5) -> List[IngestionJob]:
+        """Fetches the most recent jobs submitted by a user."""
+        stmt = (
+            select(IngestionJob)
+            .where(IngestionJob.requester_telegram_id == requester_telegram_id)
+            .order_by(IngestionJob.created_at.desc(), IngestionJob.id.desc())
+            .limit(limit)
+        )
+        result = await self.db_session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_unfinished_jobs(self) -> List[IngestionJob]:
+        """Fetches jobs that are still pending or were interrupted while running (e.g. by a restart)."""
+        stmt = (
+            select(IngestionJob)
+            .where(IngestionJob.status.in_([IngestionJobStatus.PENDING.value, IngestionJobStatus.RUNNING.value]))
+            .order_by(IngestionJob.id)
+        )
+        result = await self.db_session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def update_job(
+        self,
+        job_id: int,
+        status: Optional[IngestionJobStatus] = None,
+        progress: Optional[str] = None,
+        document_id: Optional[int] = None,
+        error_message: Optional[str] = None,
+    ) -> Optional[IngestionJob]:
+        """
+        Updates a job's status/progress. Sets started_at when the job starts running
+        and finished_at when it completes or fails. The caller is responsible for committing.
+        """
+        values_to_update = {}
+        if status is not None:
+            values_to_update["status"] = status.value
+            if status == IngestionJobStatus.RUNNING:
+                values_to_update["started_at"] = func.now()
+            elif status in (IngestionJobStatus.COMPLETED, IngestionJobStatus.FAILED):
+                values_to_update["finished_at"] = func.now()
+        if progress is not None:
+            values_to_update["progress"] = progress
+        if document_id is not None:
+            values_to_update["document_id"] = document_id
+        if error_message is not None:
+            values_to_update["error_message"] = error_message
+
+        if not values_to_update:
+            return await self.get_job_by_id(job_id)
+
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(**values_to_update)
+            .returning(IngestionJob)
+        )
+        result = await self.db_session.execute(stmt)
+        return result.scalar_one_or_none()
@@ -0,0 +1,52 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.models.llm_usage_model import LLMUsage
+
+logger = logging.getLogger(__name__)
+
+class LLMUsageRepository:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def add_usage_rows(self, rows: Sequence[Tuple[str, str, str, Any]], recorded_at: datetime) -> None:
+        """
+        Inserts one row per (source, task, model, totals) tuple, where totals has calls, errors, prompt_tokens,
+        completion_tokens, cost_usd and latency_seconds attributes. The caller is responsible for committing.
+        """
+        self.db_session.add_all([
+            LLMUsage(
+                recorded_at=recorded_at,
+                source=source,
+                task=task,
+                model=model,
+                calls=totals.calls,
+                errors=totals.errors,
+                prompt_tokens=totals.prompt_tokens,
+                completion_tokens=totals.completion_tokens,
+                cost_usd=totals.cost_usd,
+                latency_seconds=totals.latency_seconds
+            )
+            for source, task, model, totals in rows
+        ])
+        await self.db_session.flush()
+
+    async def get_usage_by_source(self, since: Optional[datetime] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Aggregates usage per source since a time (or all time), most expensive first."""
+        cost = func.sum(LLMUsage.cost_usd)
+        stmt = select(
+            LLMUsage.source,
+            func.sum(LLMUsage.calls).label("calls"),
+            func.sum(LLMUsage.errors).label("errors"),
+            func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+            cost.label("cost_usd"),
+            func.sum(LLMUsage.latency_seconds).label("latency_seconds")
+        ).group_by(LLMUsage.source).order_by(cost.desc()).limit(limit)
+        if since is not None:
+            stmt = stmt.where(LLMUsage.recorded_at >= since)
+        result = await self.db_session.execute(stmt)
+        return [dict(row._mapping) for row in result.all()]
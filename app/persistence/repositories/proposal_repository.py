@@ -1,10 +1,169 @@
-from typing import List, Optional, Dict, Any, Sequence
-from sqlalchemy import select, update
+import copy
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Dict, Any, Sequence, Tuple
+from sqlalchemy import event, inspect as sa_inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import Session, make_transient_to_detached, selectinload
+from sqlalchemy.orm.util import identity_key
+from app.config import ConfigService
+from app.persistence.database import commit_unless_in_update_session
 from app.persistence.models.proposal_model import Proposal, ProposalStatus, ProposalType
+from app.persistence.models.user_model import User
+from app.utils.pagination import PAGE_NEXT, Page, PageCursor, build_page, keyset_select
 from datetime import datetime
 
+class ProposalFacts(NamedTuple):
+    """The proposal fields needed to validate a vote or submission; they only change on edit, close or cancel."""
+    id: int
+    title: str
+    proposal_type: str
+    options: Tuple[str, ...]
+    deadline_date: datetime
+    status: str
+
+class ProposalListItem(NamedTuple):
+    """
+    The columns list views show, read with a column-projected select: no description or raw_results transfer,
+    and no ORM identity-map bookkeeping per row.
+    """
+    id: int
+    title: str
+    status: str
+    proposal_type: str
+    target_channel_id: str
+    channel_message_id: Optional[int]
+    creation_date: datetime
+    deadline_date: datetime
+    outcome: Optional[str]
+
+_PROPOSAL_LIST_COLUMNS = tuple(getattr(Proposal, field) for field in ProposalListItem._fields)
+
+class _ProposalFactsCache:
+    """
+    Small LRU of ProposalFacts, so recording a vote doesn't need to load the proposal.
+    Each invalidation bumps a per-proposal version; a fill is dropped if the version changed since its read started,
+    so facts read before an edit or close can't be cached after the invalidation.
+    """
+    def __init__(self, max_proposals: int):
+        self.max_proposals = max_proposals
+        self._facts: "OrderedDict[int, ProposalFacts]" = OrderedDict()
+        self._versions: Dict[int, int] = {} # Only proposals invalidated since startup; one int each
+        self._lock = threading.Lock()
+
+    def version(self, proposal_id: int) -> int:
+        with self._lock:
+            return self._versions.get(proposal_id, 0)
+
+    def get(self, proposal_id: int) -> Optional[ProposalFacts]:
+        with self._lock:
+            facts = self._facts.get(proposal_id)
+            if facts is not None:
+                self._facts.move_to_end(proposal_id)
+            return facts
+
+    def put(self, facts: ProposalFacts, version: int) -> bool:
+        with self._lock:
+            if self._versions.get(facts.id, 0) != version:
+                return False # Invalidated while it was being read
+            self._facts[facts.id] = facts
+            self._facts.move_to_end(facts.id)
+            while len(self._facts) > self.max_proposals:
+                self._facts.popitem(last=False)
+            return True
+
+    def invalidate(self, proposal_id: int):
+        with self._lock:
+            self._versions[proposal_id] = self._versions.get(proposal_id, 0) + 1
+            self._facts.pop(proposal_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._facts.clear()
+            self._versions.clear()
+
+_proposal_facts_cache = _ProposalFactsCache(ConfigService.get_proposal_facts_cache_size())
+
+def invalidate_proposal_facts(proposal_id: int):
+    """Drops a proposal's cached facts; call whenever its type, options, deadline or status change."""
+    _proposal_facts_cache.invalidate(proposal_id)
+
+class _CachedProposal(NamedTuple):
+    version: int
+    proposal: Dict[str, Any] # Column values
+    proposer: Optional[Dict[str, Any]]
+
+class _ProposalCache:
+    """
+    Read-through LRU of proposal rows (with their proposer) for get_proposal_by_id, guarded by a version per proposal.
+    A load records the version before querying and is only cached if no write bumped it meanwhile, so a fill racing
+    a write can't store the pre-write row.
+    """
+    def __init__(self, max_proposals: int):
+        self.max_proposals = max_proposals
+        self._entries: "OrderedDict[int, _CachedProposal]" = OrderedDict()
+        self._versions: Dict[int, int] = {} # Only proposals written since startup; one int each
+        self._lock = threading.Lock()
+
+    def version(self, proposal_id: int) -> int:
+        with self._lock:
+            return self._versions.get(proposal_id, 0)
+
+    def get(self, proposal_id: int) -> Optional[_CachedProposal]:
+        with self._lock:
+            entry = self._entries.get(proposal_id)
+            if entry is None or entry.version != self._versions.get(proposal_id, 0):
+                return None
+            self._entries.move_to_end(proposal_id)
+            return entry
+
+    def put(self, proposal_id: int, version: int, proposal: Dict[str, Any], proposer: Optional[Dict[str, Any]]) -> bool:
+        with self._lock:
+            if self._versions.get(proposal_id, 0) != version:
+                return False # Written while it was being loaded
+            self._entries[proposal_id] = _CachedProposal(version, copy.deepcopy(proposal), copy.deepcopy(proposer))
+            self._entries.move_to_end(proposal_id)
+            while len(self._entries) > self.max_proposals:
+                self._entries.popitem(last=False)
+            return True
+
+    def bump(self, proposal_id: int):
+        with self._lock:
+            self._versions[proposal_id] = self._versions.get(proposal_id, 0) + 1
+            self._entries.pop(proposal_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+_proposal_cache = _ProposalCache(ConfigService.get_proposal_cache_size())
+
+# Session.info key: ids of proposals written in the session's current transaction
+_PENDING_PROPOSAL_WRITES = "pending_proposal_writes"
+
+def _record_proposal_write(session: AsyncSession, proposal_id: int):
+    """
+    Bumps the proposal's cache version now and again when the session's transaction commits or rolls back, so
+    nothing loaded in between (from before the commit, or this session's uncommitted write) stays cached.
+    """
+    _proposal_cache.bump(proposal_id)
+    session.info.setdefault(_PENDING_PROPOSAL_WRITES, set()).add(proposal_id)
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _bump_proposals_written_in_transaction(session: Session):
+    for proposal_id in session.info.pop(_PENDING_PROPOSAL_WRITES, ()):
+        _proposal_cache.bump(proposal_id)
+        invalidate_proposal_facts(proposal_id) # Facts read before a deferred commit would otherwise stay cached
+
+def _loaded_columns(instance: Any) -> Optional[Dict[str, Any]]:
+    """Column values of a loaded instance, or None if any column is expired or deferred."""
+    state = sa_inspect(instance)
+    columns = state.mapper.column_attrs
+    values = {column.key: state.dict[column.key] for column in columns if column.key in state.dict}
+    return values if len(values) == len(columns) else None
+
 class ProposalRepository:
     def __init__(self, db_session: AsyncSession):
         self.db_session = db_session
@@ -37,18 +196,80 @@ class ProposalRepository:
         self.db_session.add(new_proposal)
         await self.db_session.flush()
         await self.db_session.refresh(new_proposal)
+        _record_proposal_write(self.db_session, new_proposal.id)
         return new_proposal
 
     async def get_proposal_by_id(self, proposal_id: int) -> Optional[Proposal]:
+        """
+        The proposal with its proposer loaded. Served from the read-through cache when possible; a hit is attached
+        to this session without a query. Proposals already in this session, or written in its open transaction,
+        are always queried.
+        """
+        in_session = identity_key(Proposal, proposal_id) in self.db_session.identity_map
+        written_here = proposal_id in self.db_session.info.get(_PENDING_PROPOSAL_WRITES, ())
+        if not in_session and not written_here:
+            cached = _proposal_cache.get(proposal_id)
+            if cached is not None:
+                return self._attach_cached_proposal(cached)
+
+        version = _proposal_cache.version(proposal_id)
         result = await self.db_session.execute(
             select(Proposal).where(Proposal.id == proposal_id).options(selectinload(Proposal.proposer))
         )
-        return result.scalar_one_or_none()
+        proposal = result.scalar_one_or_none()
+        if proposal is not None and not in_session and not written_here:
+            proposal_values = _loaded_columns(proposal)
+            proposer_values = _loaded_columns(proposal.proposer) if proposal.proposer is not None else None
+            if proposal_values is not None and (proposal.proposer is None or proposer_values is not None):
+                _proposal_cache.put(proposal_id, version, proposal_values, proposer_values)
+        return proposal
+
+    def _attach_cached_proposal(self, cached: _CachedProposal) -> Proposal:
+        """Builds a persistent instance of this session from cached values, as if it had just been loaded."""
+        proposer = None
+        if cached.proposer is not None:
+            proposer = self.db_session.identity_map.get(identity_key(User, cached.proposer["id"]))
+            if proposer is None:
+                proposer = User(**copy.deepcopy(cached.proposer))
+                make_transient_to_detached(proposer)
+        proposal = Proposal(**copy.deepcopy(cached.proposal), proposer=proposer)
+        make_transient_to_detached(proposal) # Marks every attribute as committed, so nothing is flushed back
+        self.db_session.add(proposal)
+        return proposal
+
+    async def get_proposal_facts(self, proposal_id: int) -> Optional[ProposalFacts]:
+        """The vote-validation fields of a proposal, from the in-process cache or one narrow query (no proposer join)."""
+        written_here = proposal_id in self.db_session.info.get(_PENDING_PROPOSAL_WRITES, ())
+        facts = None if written_here else _proposal_facts_cache.get(proposal_id)
+        if facts is not None:
+            return facts
+        version = _proposal_facts_cache.version(proposal_id)
+        result = await self.db_session.execute(
+            select(
+                Proposal.id, Proposal.title, Proposal.proposal_type, Proposal.options,
+                Proposal.deadline_date, Proposal.status
+            ).where(Proposal.id == proposal_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        facts = ProposalFacts(
+            id=row.id,
+            title=row.title,
+            proposal_type=row.proposal_type,
+            options=tuple(row.options or ()),
+            deadline_date=row.deadline_date,
+            status=row.status
+        )
+        if not written_here: # Uncommitted changes are never cached
+            _proposal_facts_cache.put(facts, version)
+        return facts
 
     async def update_proposal_message_id(self, proposal_id: int, message_id: int) -> Optional[Proposal]:
         proposal = await self.get_proposal_by_id(proposal_id)
         if proposal:
             proposal.channel_message_id = message_id
+            _record_proposal_write(self.db_session, proposal_id)
             await self.db_session.flush()
             await self.db_session.refresh(proposal)
         return proposal
@@ -87,8 +308,10 @@ class ProposalRepository:
             .values(**values_to_update)
             .returning(Proposal)
         )
+        _record_proposal_write(self.db_session, proposal_id)
         result = await self.db_session.execute(stmt)
-        await self.db_session.commit()
+        await commit_unless_in_update_session(self.db_session)
+        invalidate_proposal_facts(proposal_id) # And again on commit, see _bump_proposals_written_in_transaction
         return result.scalar_one_or_none()
 
     async def get_proposals_by_status(self, status: ProposalStatus) -> List[Proposal]:
@@ -130,8 +353,10 @@ class ProposalRepository:
             .values(**values_to_update)
             .returning(Proposal)
         )
+        _record_proposal_write(self.db_session, proposal_id)
         result = await self.db_session.execute(stmt)
-        await self.db_session.commit()
+        await commit_unless_in_update_session(self.db_session)
+        invalidate_proposal_facts(proposal_id) # And again on commit, see _bump_proposals_written_in_transaction
         return result.scalar_one_or_none()
 
     async def get_proposals_by_channel_id(self, channel_id: str) -> List[Proposal]:
@@ -151,6 +376,38 @@ class ProposalRepository:
         result = await self.db_session.execute(stmt)
         return list(result.scalars().all())
 
+    async def get_proposals_page_by_status(
+        self,
+        status: str,
+        limit: int,
+        cursor: Optional[PageCursor] = None,
+        direction: str = PAGE_NEXT
+    ) -> Page[ProposalListItem]:
+        """One newest-first page of proposals with a status, keyset-paginated on (creation_date, id)."""
+        stmt = keyset_select(
+            select(*_PROPOSAL_LIST_COLUMNS).where(Proposal.status == status),
+            Proposal.creation_date, Proposal.id, limit, cursor, direction
+        )
+        result = await self.db_session.execute(stmt)
+        rows = [ProposalListItem._make(row) for row in result.all()]
+        return build_page(rows, limit, lambda proposal: (proposal.creation_date, proposal.id), cursor, direction)
+
+    async def get_proposal_list_items_by_status(self, status: str) -> List[ProposalListItem]:
+        """List-view columns of proposals with a status, latest deadline first (same order as get_proposals_by_status)."""
+        stmt = select(*_PROPOSAL_LIST_COLUMNS).where(Proposal.status == status).order_by(Proposal.deadline_date.desc())
+        result = await self.db_session.execute(stmt)
+        return [ProposalListItem._make(row) for row in result.all()]
+
+    async def get_proposal_list_items_by_proposer_id(self, proposer_telegram_id: int) -> List[ProposalListItem]:
+        """List-view columns of a user's proposals, newest first (same order as get_proposals_by_proposer_id)."""
+        stmt = (
+            select(*_PROPOSAL_LIST_COLUMNS)
+            .where(Proposal.proposer_telegram_id == proposer_telegram_id)
+            .order_by(Proposal.creation_date.desc())
+        )
+        result = await self.db_session.execute(stmt)
+        return [ProposalListItem._make(row) for row in result.all()]
+
     async def get_proposals_by_status(self, status: str) -> Sequence[Proposal]:
         """Fetches proposals from the database by their status."""
         query = select(Proposal).where(Proposal.status == status).order_by(Proposal.deadline_date.desc())
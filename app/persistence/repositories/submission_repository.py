@@ -1,12 +1,14 @@
 import logging
-from typing import List, Optional
-from sqlalchemy import select, update
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy import BigInteger, Integer, Text, exists, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert # For INSERT ... ON CONFLICT DO UPDATE
 from datetime import datetime
 from sqlalchemy.sql import func
 
+from app.persistence.models.proposal_model import Proposal, ProposalStatus
 from app.persistence.models.submission_model import Submission
+from app.utils.pagination import PAGE_NEXT, Page, PageCursor, build_page, keyset_select
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +25,7 @@ class SubmissionRepository:
         """
         Adds a new submission or updates an existing one based on proposal_id and submitter_id.
         This implements an "upsert" functionality.
-        Returns the Submission object if successful, None otherwise.
+        Returns the Submission object if successful, None otherwise. The caller is responsible for committing.
         """
         try:
             stmt = insert(Submission).values(
@@ -42,16 +44,44 @@ class SubmissionRepository:
                 # set_=dict(response_content=response_content, timestamp=func.now()) # If explicitly updating timestamp
             ).returning(Submission)
             
-            result = await self.db_session.execute(stmt)
-            await self.db_session.commit() # Commit after upsert
+            result = await self.db_session.execute(stmt) # The caller's unit of work commits
             submission = result.scalar_one_or_none()
             if submission:
                 logger.info(f"Successfully added/updated submission for proposal {proposal_id} by user {submitter_id}")
             return submission
         except Exception as e:
-            await self.db_session.rollback()
+            # Not rolled back here: the session belongs to the caller's unit of work, which rolls back as a whole
             logger.error(f"Error adding/updating submission for proposal {proposal_id}, user {submitter_id}: {e}", exc_info=True)
-            return None
+            raise
+
+    async def upsert_submission_if_open(
+        self,
+        proposal_id: int,
+        submitter_id: int,
+        response_content: str
+    ) -> Optional[Submission]:
+        """
+        Adds or updates a submission in one statement, only while the proposal is open:
+        INSERT ... SELECT ... WHERE EXISTS (open proposal) ON CONFLICT (proposal_id, submitter_id) DO UPDATE.
+        Returns the Submission, or None if the proposal is not open (nothing is written).
+        The caller is responsible for committing.
+        """
+        proposal_is_open = exists().where(
+            Proposal.id == proposal_id,
+            Proposal.status == ProposalStatus.OPEN.value
+        )
+        values = select(
+            literal(proposal_id, Integer),
+            literal(submitter_id, BigInteger),
+            literal(response_content, Text)
+        ).where(proposal_is_open)
+        stmt = insert(Submission).from_select(['proposal_id', 'submitter_id', 'response_content'], values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['proposal_id', 'submitter_id'],
+            set_=dict(response_content=stmt.excluded.response_content)
+        ).returning(Submission)
+        result = await self.db_session.execute(stmt) # Errors propagate; the caller's unit of work rolls back
+        return result.scalar_one_or_none()
 
     async def get_submissions_for_proposal(self, proposal_id: int) -> List[Submission]:
         """
@@ -68,11 +98,55 @@ class SubmissionRepository:
             logger.error(f"Error retrieving submissions for proposal {proposal_id}: {e}", exc_info=True)
             return []
 
+    async def count_responses_for_proposal(self, proposal_id: int) -> Dict[str, int]:
+        """
+        Number of submissions per distinct response (i.e. votes per option for a multiple-choice proposal),
+        aggregated by Postgres with GROUP BY response_content so no Submission rows are loaded.
+        """
+        stmt = (
+            select(Submission.response_content, func.count())
+            .where(Submission.proposal_id == proposal_id)
+            .group_by(Submission.response_content)
+        )
+        result = await self.db_session.execute(stmt)
+        return {response: count for response, count in result.all()}
+
+    async def stream_response_texts(self, proposal_id: int, batch_size: int = 500) -> AsyncIterator[str]:
+        """
+        Yields a proposal's submission texts in submission order through a server-side cursor, fetching batch_size
+        rows at a time, so memory doesn't depend on turnout and no ORM objects are built.
+        """
+        stmt = (
+            select(Submission.response_content)
+            .where(Submission.proposal_id == proposal_id)
+            .order_by(Submission.id)
+            .execution_options(yield_per=batch_size)
+        )
+        texts = await self.db_session.stream_scalars(stmt)
+        async for text in texts:
+            yield text
+
     async def get_submissions_by_user(self, submitter_id: int) -> List[Submission]:
         stmt = select(Submission).where(Submission.submitter_id == submitter_id).order_by(Submission.timestamp.desc())
         result = await self.db_session.execute(stmt)
         return result.scalars().all()
 
+    async def get_submissions_page_by_user(
+        self,
+        submitter_id: int,
+        limit: int,
+        cursor: Optional[PageCursor] = None,
+        direction: str = PAGE_NEXT
+    ) -> Page[Submission]:
+        """One newest-first page of a user's submissions, keyset-paginated on (timestamp, id)."""
+        stmt = keyset_select(
+            select(Submission).where(Submission.submitter_id == submitter_id),
+            Submission.timestamp, Submission.id, limit, cursor, direction
+        )
+        result = await self.db_session.execute(stmt)
+        rows = result.scalars().all()
+        return build_page(rows, limit, lambda submission: (submission.timestamp, submission.id), cursor, direction)
+
     async def count_submissions_for_proposal(self, proposal_id: int) -> int:
         stmt = select(func.count(Submission.id)).where(Submission.proposal_id == proposal_id)
         result = await self.db_session.execute(stmt)
@@ -1,6 +1,9 @@
+from sqlalchemy import or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.dialects.postgresql import insert # For INSERT ... ON CONFLICT
+from sqlalchemy.sql import func
 
 from app.persistence.models.user_model import User
 
@@ -34,6 +37,40 @@ class UserRepository:
             # await self.session.refresh(user) # Refresh if needed after commit
         return user
 
+    async def upsert_user(self, telegram_id: int, username: str | None, first_name: str | None) -> bool:
+        """
+        Inserts the user, or updates their username/first name, in one statement.
+        The conflict update only fires when a name actually changed, so an unchanged user costs no row write.
+        Returns True if a row was inserted or updated.
+        """
+        stmt = insert(User).values(
+            telegram_id=telegram_id,
+            username=username,
+            first_name=first_name
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.telegram_id],
+            set_={
+                "username": stmt.excluded.username,
+                "first_name": stmt.excluded.first_name,
+                "last_updated": func.now()
+            },
+            where=or_(
+                User.username.is_distinct_from(stmt.excluded.username),
+                User.first_name.is_distinct_from(stmt.excluded.first_name)
+            )
+        ).returning(User.id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
+    async def insert_user_if_missing(self, telegram_id: int) -> bool:
+        """Creates a bare user row (no names) unless the user already exists. Returns True if a row was inserted."""
+        stmt = insert(User).values(telegram_id=telegram_id).on_conflict_do_nothing(
+            index_elements=[User.telegram_id]
+        ).returning(User.id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none() is not None
+
     async def get_user_by_telegram_id(self, telegram_id: int) -> User | None:
         """Gets a user by their Telegram ID."""
         result = await self.session.execute(
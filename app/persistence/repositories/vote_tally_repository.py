@@ -0,0 +1,85 @@
+import logging
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.models.proposal_model import Proposal, ProposalType
+from app.persistence.models.submission_model import Submission
+from app.persistence.models.vote_tally_model import ProposalOptionTally
+
+logger = logging.getLogger(__name__)
+
+class TallyMismatch(NamedTuple):
+    proposal_id: int
+    option: str
+    tallied: int # Count in proposal_option_tallies
+    actual: int # Count of submissions with this response
+
+class VoteTallyRepository:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def get_tallies(self, proposal_id: int) -> Dict[str, int]:
+        """Vote counts per option for a multiple-choice proposal (options with votes only), most votes first."""
+        stmt = (
+            select(ProposalOptionTally.option, ProposalOptionTally.vote_count)
+            .where(ProposalOptionTally.proposal_id == proposal_id, ProposalOptionTally.vote_count > 0)
+            .order_by(ProposalOptionTally.vote_count.desc(), ProposalOptionTally.option)
+        )
+        result = await self.db_session.execute(stmt)
+        return {option: vote_count for option, vote_count in result.all()}
+
+    def _actual_counts(self, proposal_id: Optional[int] = None):
+        """Per-option vote counts recomputed from the raw submissions of multiple-choice proposals."""
+        stmt = (
+            select(
+                Submission.proposal_id.label("proposal_id"),
+                Submission.response_content.label("option"),
+                func.count().label("vote_count")
+            )
+            .join(Proposal, Proposal.id == Submission.proposal_id)
+            .where(Proposal.proposal_type == ProposalType.MULTIPLE_CHOICE.value)
+            .group_by(Submission.proposal_id, Submission.response_content)
+        )
+        if proposal_id is not None:
+            stmt = stmt.where(Submission.proposal_id == proposal_id)
+        return stmt
+
+    async def find_mismatches(self, proposal_id: Optional[int] = None) -> List[TallyMismatch]:
+        """
+        Compares the maintained tallies with counts recomputed from submissions (for one proposal, or all of them).
+        Returns every (proposal, option) whose counts differ; an empty list means the tallies are consistent.
+        """
+        actual = self._actual_counts(proposal_id).subquery()
+        tallies = select(ProposalOptionTally)
+        if proposal_id is not None:
+            tallies = tallies.where(ProposalOptionTally.proposal_id == proposal_id)
+        tallies = tallies.subquery()
+
+        mismatch_proposal_id = func.coalesce(tallies.c.proposal_id, actual.c.proposal_id)
+        mismatch_option = func.coalesce(tallies.c.option, actual.c.option)
+        tallied_count = func.coalesce(tallies.c.vote_count, 0)
+        actual_count = func.coalesce(actual.c.vote_count, 0)
+        stmt = (
+            select(mismatch_proposal_id, mismatch_option, tallied_count, actual_count)
+            .select_from(tallies.outerjoin(
+                actual,
+                (tallies.c.proposal_id == actual.c.proposal_id) & (tallies.c.option == actual.c.option),
+                full=True
+            ))
+            .where(tallied_count != actual_count)
+            .order_by(mismatch_proposal_id, mismatch_option)
+        )
+        result = await self.db_session.execute(stmt)
+        return [TallyMismatch(*row) for row in result.all()]
+
+    async def rebuild_tallies(self, proposal_id: int) -> None:
+        """Recomputes a proposal's tallies from its submissions. The caller is responsible for committing."""
+        await self.db_session.execute(
+            delete(ProposalOptionTally).where(ProposalOptionTally.proposal_id == proposal_id)
+        )
+        actual = self._actual_counts(proposal_id)
+        await self.db_session.execute(
+            insert(ProposalOptionTally).from_select(["proposal_id", "option", "vote_count"], actual)
+        )
+        logger.info(f"Rebuilt vote tallies for proposal {proposal_id} from its submissions.")
@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List, NamedTuple
+
+# Ensure the app directory is in the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.database import engine
+from app.persistence.models.proposal_model import Proposal, ProposalStatus
+from app.persistence.repositories.proposal_repository import ProposalRepository
+
+# Configure basic logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seeds synthetic proposals with realistic description and raw_results sizes inside a transaction, then compares
+# loading the list views as full Proposal ORM objects against the column-projected ProposalListItem queries.
+# Everything is rolled back afterwards. Point it at a local database.
+
+SEED_PROPOSER_ID = 9_100_000_001 # Far above real Telegram IDs, so the seeded proposer never collides
+
+class Measurement(NamedTuple):
+    rows: int
+    median_ms: float
+    peak_kib: float # Peak Python memory allocated while loading the rows
+
+async def seed(connection, proposals: int, description_chars: int, raw_results_items: int):
+    await connection.execute(text(
+        "INSERT INTO users (telegram_id, username, first_name) VALUES (:proposer, 'seed_proposer', 'Seed') "
+        "ON CONFLICT (telegram_id) DO NOTHING"
+    ), {"proposer": SEED_PROPOSER_ID})
+    await connection.execute(text(
+        "INSERT INTO proposals (proposer_telegram_id, title, description, proposal_type, options, target_channel_id, "
+        "creation_date, deadline_date, status, outcome, raw_results) "
+        "SELECT :proposer, 'Seed proposal ' || n, left(repeat('Seed description. ', :description_chars / 18 + 1), :description_chars), "
+        "'free_form', NULL, 'seed_channel', now() - (n || ' minutes')::interval, "
+        "now() - (n || ' minutes')::interval + interval '3 days', "
+        "CASE WHEN n % 20 = 0 THEN 'open' ELSE 'closed' END, "
+        "CASE WHEN n % 20 = 0 THEN NULL ELSE 'Seed outcome ' || n END, "
+        "(SELECT json_agg(json_build_object('submitter_id', k, 'response', 'Seed response ' || k)) "
+        " FROM generate_series(1, :raw_results_items) AS k) "
+        "FROM generate_series(1, :proposals) AS n"
+    ), {
+        "proposer": SEED_PROPOSER_ID, "proposals": proposals,
+        "description_chars": description_chars, "raw_results_items": raw_results_items
+    })
+    await connection.execute(text("ANALYZE proposals"))
+
+async def measure(session: AsyncSession, load: Callable[[], Awaitable[List]], runs: int) -> Measurement:
+    """Median wall time and peak traced memory of `load` over `runs` runs, each starting with an empty identity map."""
+    timings, peaks, rows = [], [], 0
+    for _ in range(runs):
+        session.expunge_all()
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = len(await load())
+        timings.append((time.perf_counter() - started) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return Measurement(rows, statistics.median(timings), statistics.median(peaks))
+
+async def benchmark_list_projections(proposals: int, description_chars: int, raw_results_items: int, runs: int):
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            logger.info(f"Seeding {proposals} proposals ({description_chars}-char descriptions, {raw_results_items}-item raw_results)...")
+            await seed(connection, proposals, description_chars, raw_results_items)
+
+            session = AsyncSession(bind=connection, expire_on_commit=False)
+            repository = ProposalRepository(session)
+
+            async def orm_by_status():
+                result = await session.execute(
+                    select(Proposal).where(Proposal.status == ProposalStatus.CLOSED.value).order_by(Proposal.deadline_date.desc())
+                )
+                return result.scalars().all()
+
+            async def orm_by_proposer():
+                result = await session.execute(
+                    select(Proposal).where(Proposal.proposer_telegram_id == SEED_PROPOSER_ID).order_by(Proposal.creation_date.desc())
+                )
+                return result.scalars().all()
+
+            cases = [
+                ("list_proposals_by_status", orm_by_status, lambda: repository.get_proposal_list_items_by_status(ProposalStatus.CLOSED.value)),
+                ("list_proposals_by_proposer", orm_by_proposer, lambda: repository.get_proposal_list_items_by_proposer_id(SEED_PROPOSER_ID)),
+            ]
+            for name, orm_load, projected_load in cases:
+                orm = await measure(session, orm_load, runs)
+                projected = await measure(session, projected_load, runs)
+                logger.info(
+                    f"{name}: {orm.rows} rows | ORM objects {orm.median_ms:.1f} ms, {orm.peak_kib:.0f} KiB | "
+                    f"ProposalListItem {projected.median_ms:.1f} ms, {projected.peak_kib:.0f} KiB | "
+                    f"{orm.median_ms / max(projected.median_ms, 1e-9):.1f}x faster, {orm.peak_kib / max(projected.peak_kib, 1e-9):.1f}x less memory"
+                )
+            await session.close()
+        finally:
+            await transaction.rollback() # Leave the database as it was
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full ORM loads with column-projected DTOs for the proposal list views, on seeded data that is rolled back.")
+    parser.add_argument("--proposals", type=int, default=10000)
+    parser.add_argument("--description-chars", type=int, default=2000)
+    parser.add_argument("--raw-results-items", type=int, default=50, help="Entries in each seeded proposal's raw_results JSON.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(benchmark_list_projections(args.proposals, args.description_chars, args.raw_results_items, args.runs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+from typing import List, Dict, Any
+
+# Ensure the app directory is in the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.persistence.database import AsyncSessionLocal
+from app.core.context_service import ContextService
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import LANE_BACKGROUND
+from app.services.usage_accounting import flush_llm_usage, set_usage_source
+from app.services.vector_db_service import VectorDBService
+from app.utils.text_processing import html_to_text
+
+# Configure basic logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {".md", ".markdown", ".txt", ".html", ".htm"}
+
+def _to_document(name: str, raw_bytes: bytes) -> Dict[str, Any]:
+    """Decodes a file and converts it to the {"title", "content", "source"} dict ContextService expects."""
+    text = raw_bytes.decode("utf-8", errors="replace")
+    suffix = Path(name).suffix.lower()
+    if suffix in (".html", ".htm"):
+        text = html_to_text(text)
+    return {"title": Path(name).stem, "content": text, "source": f"bulk_import:{name}"}
+
+def load_documents(source_path: str) -> List[Dict[str, Any]]:
+    """Reads all supported files from a directory (recursively) or a .zip archive."""
+    documents = []
+    path = Path(source_path)
+    if path.is_dir():
+        for file_path in sorted(path.rglob("*")):
+            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS:
+                documents.append(_to_document(str(file_path.relative_to(path)), file_path.read_bytes()))
+    elif path.is_file() and zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in sorted(archive.infolist(), key=lambda i: i.filename):
+                if not info.is_dir() and Path(info.filename).suffix.lower() in SUPPORTED_EXTENSIONS:
+                    documents.append(_to_document(info.filename, archive.read(info)))
+    else:
+        raise ValueError(f"{source_path} is neither a directory nor a .zip archive.")
+    return documents
+
+def dedupe_documents(documents: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], int]:
+    """Drops documents whose content repeats an earlier file, so concurrent batches can't race on the same hash."""
+    unique, seen = [], set()
+    for doc in documents:
+        content_hash = hashlib.sha256(doc["content"].encode("utf-8")).hexdigest()
+        if content_hash in seen:
+            continue
+        seen.add(content_hash)
+        unique.append(doc)
+    return unique, len(documents) - len(unique)
+
+async def import_batch(
+    batch: List[Dict[str, Any]],
+    semaphore: asyncio.Semaphore,
+    llm_service: LLMService,
+    vector_db_service: VectorDBService,
+    chunk_size: int,
+    chunk_overlap: int
+) -> Dict[str, Any]:
+    """Runs one batch through ContextService in its own session (one SQL transaction per batch)."""
+    async with semaphore:
+        async with AsyncSessionLocal() as session:
+            context_service = ContextService(session, llm_service, vector_db_service)
+            return await context_service.process_and_store_documents_batch(
+                batch,
+                source_type="admin_bulk_text",
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk import markdown, text and HTML files as global documents.")
+    parser.add_argument("source", type=str, help="A directory (searched recursively) or a .zip archive of .md/.txt/.html files.")
+    parser.add_argument("--batch-size", type=int, default=20, help="Documents per batch; each batch is one SQL transaction (default: 20).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of batches processed concurrently (default: 4).")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Chunk size in characters (default: 1000).")
+    parser.add_argument("--chunk-overlap", type=int, default=100, help="Chunk overlap in characters (default: 100).")
+
+    args = parser.parse_args()
+
+    try:
+        documents = load_documents(args.source)
+    except ValueError as e:
+        logger.error(str(e))
+        return
+    if not documents:
+        logger.info(f"No supported files ({', '.join(sorted(SUPPORTED_EXTENSIONS))}) found in {args.source}.")
+        return
+
+    documents, in_source_duplicates = dedupe_documents(documents)
+    logger.info(f"Loaded {len(documents)} unique document(s) from {args.source} ({in_source_duplicates} duplicate file(s) skipped).")
+
+    llm_service = LLMService(lane=LANE_BACKGROUND)
+    if not llm_service.client:
+        logger.error("Failed to initialize LLMService. Exiting.")
+        return
+    vector_db_service = VectorDBService()
+    if not vector_db_service.client:
+        logger.error("Failed to initialize VectorDBService. Exiting.")
+        return
+
+    batches = [documents[i:i + args.batch_size] for i in range(0, len(documents), args.batch_size)]
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    set_usage_source("bulk_import")
+    start_time = time.perf_counter()
+    results = await asyncio.gather(*[
+        import_batch(batch, semaphore, llm_service, vector_db_service, args.chunk_size, args.chunk_overlap)
+        for batch in batches
+    ])
+    elapsed = time.perf_counter() - start_time
+    await flush_llm_usage()
+
+    stored = [item for result in results for item in result["stored"]]
+    duplicates = sum(len(result["duplicates"]) for result in results) + in_source_duplicates
+    failed = [title for result in results for title in result["failed"]]
+    chunks = sum(result["chunks"] for result in results)
+
+    print("\n--- Bulk import summary ---")
+    print(f"Source:            {args.source}")
+    print(f"Batches:           {len(batches)} (size {args.batch_size}, concurrency {args.concurrency})")
+    print(f"Imported:          {len(stored)} document(s), {chunks} chunk(s)")
+    print(f"Skipped duplicate: {duplicates}")
+    print(f"Failed:            {len(failed)}")
+    for title in failed:
+        print(f"  - {title}")
+    print(f"Elapsed:           {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Throughput:        {len(stored) / elapsed:.2f} docs/s, {chunks / elapsed:.2f} chunks/s")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+# Ensure the app directory is in the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.persistence.database import AsyncSessionLocal
+from app.persistence.repositories.vote_tally_repository import VoteTallyRepository
+
+# Configure basic logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Compares the trigger-maintained proposal_option_tallies with counts recomputed from the raw submissions.
+# Exits with status 1 if any tally is off (and wasn't repaired), so it can run as a periodic check.
+
+async def check_vote_tallies(proposal_id: int | None, repair: bool) -> int:
+    """Returns the number of mismatched (proposal, option) tallies left after the run."""
+    async with AsyncSessionLocal() as session:
+        repository = VoteTallyRepository(session)
+        mismatches = await repository.find_mismatches(proposal_id)
+        if not mismatches:
+            logger.info("Vote tallies match the submissions.")
+            return 0
+
+        for mismatch in mismatches:
+            logger.warning(
+                f"Proposal {mismatch.proposal_id}, option '{mismatch.option}': "
+                f"tally {mismatch.tallied}, submissions {mismatch.actual}"
+            )
+        if not repair:
+            logger.warning(f"{len(mismatches)} tally mismatch(es) found. Re-run with --repair to rebuild them.")
+            return len(mismatches)
+
+        for affected_proposal_id in sorted({mismatch.proposal_id for mismatch in mismatches}):
+            await repository.rebuild_tallies(affected_proposal_id)
+        await session.commit()
+
+        remaining = await repository.find_mismatches(proposal_id)
+        logger.info(f"Rebuilt tallies; {len(remaining)} mismatch(es) remain.")
+        return len(remaining)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the maintained per-option vote tallies against the raw submissions.")
+    parser.add_argument("--proposal-id", type=int, default=None, help="Only check this proposal (default: all multiple-choice proposals).")
+    parser.add_argument("--repair", action="store_true", help="Rebuild the tallies of proposals that don't match.")
+    args = parser.parse_args()
+    remaining = asyncio.run(check_vote_tallies(args.proposal_id, args.repair))
+    sys.exit(1 if remaining else 0)
+
+if __name__ == "__main__":
+    main()
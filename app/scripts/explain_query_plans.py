@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+# Ensure the app directory is in the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.persistence.database import engine
+from app.persistence.models.proposal_model import Proposal, ProposalStatus
+from app.persistence.models.submission_model import Submission
+
+# Configure basic logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Seeds synthetic users, proposals and submissions inside a transaction, runs EXPLAIN ANALYZE on the scheduler and
+# list queries, reports which index (if any) each plan uses, and rolls everything back. Point it at a local database.
+
+SEED_TELEGRAM_ID_BASE = 9_000_000_000 # Far above real Telegram IDs, so seeded users never collide
+
+def benchmark_queries(channel_id: str, submitter_id: int) -> List[Tuple[str, Any, str]]:
+    """(name, statement, index expected to serve it) for the queries the new indexes target."""
+    return [
+        (
+            "find_expired_open_proposals",
+            select(Proposal).where(Proposal.status == ProposalStatus.OPEN.value, Proposal.deadline_date < func.now()),
+            "ix_proposals_open_deadline_date"
+        ),
+        (
+            "get_proposals_by_channel_id",
+            select(Proposal).where(Proposal.target_channel_id == channel_id).order_by(Proposal.creation_date.desc()).limit(20),
+            "ix_proposals_target_channel_id_creation_date"
+        ),
+        (
+            "proposals_by_status_newest_first",
+            select(Proposal.id, Proposal.creation_date).where(Proposal.status == ProposalStatus.CLOSED.value).order_by(Proposal.creation_date.desc()).limit(20),
+            "ix_proposals_status_creation_date"
+        ),
+        (
+            "get_submissions_by_user",
+            select(Submission).where(Submission.submitter_id == submitter_id).order_by(Submission.timestamp.desc()),
+            "ix_submissions_submitter_id_timestamp"
+        ),
+    ]
+
+def plan_nodes(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flattens an EXPLAIN (FORMAT JSON) plan tree into a list of nodes."""
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+def summarize_plan(plan: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(scan descriptions, index names used) for a plan tree."""
+    scans, indexes = [], []
+    for node in plan_nodes(plan):
+        node_type = node.get("Node Type", "")
+        if "Scan" not in node_type:
+            continue
+        index_name = node.get("Index Name")
+        scans.append(f"{node_type} using {index_name}" if index_name else f"{node_type} on {node.get('Relation Name')}")
+        if index_name:
+            indexes.append(index_name)
+    return scans, indexes
+
+async def seed(connection, proposals: int, users: int, submissions_per_proposal: int, channels: int):
+    await connection.execute(text(
+        "INSERT INTO users (telegram_id, username, first_name) "
+        "SELECT :base + n, 'seed_user_' || n, 'Seed' FROM generate_series(1, :users) AS n"
+    ), {"base": SEED_TELEGRAM_ID_BASE, "users": users})
+    # Roughly 5% of proposals open, spread over past and future deadlines
+    await connection.execute(text(
+        "INSERT INTO proposals (proposer_telegram_id, title, description, proposal_type, options, target_channel_id, "
+        "creation_date, deadline_date, status) "
+        "SELECT :base + 1 + (n % :users), 'Seed proposal ' || n, repeat('Seed description. ', 20), 'multiple_choice', "
+        "'[\"A\", \"B\", \"C\"]'::json, 'seed_channel_' || (n % :channels), "
+        "now() - (n || ' minutes')::interval, now() - (n || ' minutes')::interval + interval '3 days', "
+        "CASE WHEN n % 20 = 0 THEN 'open' ELSE 'closed' END "
+        "FROM generate_series(1, :proposals) AS n"
+    ), {"base": SEED_TELEGRAM_ID_BASE, "users": users, "channels": channels, "proposals": proposals})
+    await connection.execute(text(
+        "INSERT INTO submissions (proposal_id, submitter_id, response_content) "
+        "SELECT p.id, :base + 1 + ((p.id * 7 + k) % :users), (ARRAY['A', 'B', 'C'])[1 + k % 3] "
+        "FROM proposals p CROSS JOIN generate_series(1, :per_proposal) AS k "
+        "WHERE p.title LIKE 'Seed proposal %' "
+        "ON CONFLICT (proposal_id, submitter_id) DO NOTHING"
+    ), {"base": SEED_TELEGRAM_ID_BASE, "users": users, "per_proposal": submissions_per_proposal})
+    for table in ("users", "proposals", "submissions"):
+        await connection.execute(text(f"ANALYZE {table}"))
+
+async def explain_query_plans(proposals: int, users: int, submissions_per_proposal: int, channels: int) -> int:
+    """Returns the number of queries whose plan did not use the expected index."""
+    misses = 0
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            logger.info(f"Seeding {proposals} proposals, {users} users and up to {submissions_per_proposal} submissions per proposal...")
+            await seed(connection, proposals, users, submissions_per_proposal, channels)
+
+            for name, statement, expected_index in benchmark_queries("seed_channel_1", SEED_TELEGRAM_ID_BASE + 1):
+                sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+                result = await connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+                explain = result.scalar_one()
+                explain = json.loads(explain) if isinstance(explain, str) else explain
+                plan = explain[0]
+                scans, indexes = summarize_plan(plan["Plan"])
+                uses_expected = expected_index in indexes
+                misses += 0 if uses_expected else 1
+                log = logger.info if uses_expected else logger.warning
+                log(
+                    f"{name}: {'; '.join(scans)} | {plan['Execution Time']:.2f} ms"
+                    f"{'' if uses_expected else f' | expected {expected_index}'}"
+                )
+        finally:
+            await transaction.rollback() # Leave the database as it was
+    return misses
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic data in a rolled-back transaction and check the query plans of the scheduler and list queries.")
+    parser.add_argument("--proposals", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--submissions-per-proposal", type=int, default=10)
+    parser.add_argument("--channels", type=int, default=20)
+    args = parser.parse_args()
+    misses = asyncio.run(explain_query_plans(args.proposals, args.users, args.submissions_per_proposal, args.channels))
+    sys.exit(1 if misses else 0)
+
+if __name__ == "__main__":
+    main()
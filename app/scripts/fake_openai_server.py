@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add project root to Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Local stand-in for the two OpenAI endpoints LLMService uses (embeddings and chat completions), so /ask,
+# ingestion and deadline summarization can be load-tested offline without spending tokens.
+# Point the bot or a benchmark at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1 (any OPENAI_API_KEY works).
+
+DEFAULT_EMBEDDING_DIMENSIONS = 1536 # Same as text-embedding-3-small
+
+@dataclass
+class FakeOpenAIConfig:
+    latency_seconds: float = 0.0 # Fixed delay before every response
+    latency_jitter_seconds: float = 0.0 # Extra uniform random delay in [0, jitter]
+    stream_chunk_delay_seconds: float = 0.0 # Delay between streamed chunks
+    error_rate: float = 0.0 # Fraction of requests answered with error_status instead
+    error_status: int = 500
+    embedding_dimensions: int = DEFAULT_EMBEDDING_DIMENSIONS
+    seed: int = 0 # Seeds latency jitter and error injection so runs are reproducible
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1 if text else 0
+
+def fake_embedding(text: str, dimensions: int = DEFAULT_EMBEDDING_DIMENSIONS) -> List[float]:
+    """
+    Deterministic unit vector for a text via feature hashing of its words: the same text always gets the same
+    vector, and texts sharing words get similar vectors, so clustering and similarity search behave plausibly.
+    """
+    vector = [0.0] * dimensions
+    words = re.findall(r"\w+", text.lower()) or [text]
+    for word in words:
+        digest = hashlib.sha256(word.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "big") % dimensions
+        vector[index] += 1.0 if digest[4] % 2 == 0 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+def fake_completion_text(prompt: str, model: str, json_output: bool = False) -> str:
+    """Templated completion chosen from markers in the bot's own prompts, so callers can parse the answer."""
+    now = datetime.now(timezone.utc)
+    if json_output: # The /ask planner is the only JSON-mode caller
+        query_match = re.search(r'User Query: "(.*?)"', prompt)
+        return json.dumps({
+            "intent": "query_proposals",
+            "content_keywords": query_match.group(1) if query_match else prompt[:50],
+            "structured_filters": {"status": None, "proposal_type": None, "date_query": None},
+            "date_query_type": None,
+            "date_range": None
+        })
+    if "'YYYY-MM-DD HH:MM:SS UTC'" in prompt:
+        return (now + timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S UTC")
+    if "Theme 1:" in prompt:
+        return "Theme 1: Fake theme\nSummary: A templated summary of the submissions."
+    if "Title:" in prompt:
+        return "Title: Fake cluster\nSummary: A templated summary of this group of submissions."
+    return f"This is a templated answer from {model} for a {len(prompt)}-character prompt."
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: FakeOpenAIConfig):
+        super().__init__(address, FakeOpenAIRequestHandler)
+        self.config = config
+        self.request_count = 0
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def next_request_plan(self) -> Tuple[float, bool]:
+        """Delay and whether to inject an error for the next request, drawn from the seeded generator."""
+        with self._lock:
+            self.request_count += 1
+            delay = self.config.latency_seconds + self._rng.uniform(0, self.config.latency_jitter_seconds)
+            fail = self._rng.random() < self.config.error_rate
+        return delay, fail
+
+class FakeOpenAIRequestHandler(BaseHTTPRequestHandler):
+    server: FakeOpenAIServer
+
+    def log_message(self, format: str, *args: Any):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def do_POST(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.startswith("/v1/"):
+            path = path[3:]
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except json.JSONDecodeError:
+            self._send_error(400, "Request body is not valid JSON.")
+            return
+
+        delay, fail = self.server.next_request_plan()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._send_error(self.server.config.error_status, "Injected error from the fake OpenAI server.")
+            return
+
+        if path == "/embeddings":
+            self._send_json(self._embeddings(body))
+        elif path == "/chat/completions":
+            if body.get("stream"):
+                self._stream_chat_completion(body)
+            else:
+                self._send_json(self._chat_completion(body))
+        else:
+            self._send_error(404, f"Unknown endpoint {self.path}")
+
+    def _embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or self.server.config.embedding_dimensions
+        prompt_tokens = sum(estimate_tokens(text) for text in inputs)
+        return {
+            "object": "list",
+            "data": [{"object": "embedding", "index": index, "embedding": fake_embedding(text, dimensions)} for index, text in enumerate(inputs)],
+            "model": body.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+        }
+
+    @staticmethod
+    def _prompt_and_usage(body: Dict[str, Any]) -> Tuple[str, str, Dict[str, int]]:
+        prompt = "\n".join(str(message.get("content") or "") for message in body.get("messages", []))
+        json_output = (body.get("response_format") or {}).get("type") == "json_object"
+        content = fake_completion_text(prompt, body.get("model", "gpt-4o"), json_output)
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return prompt, content, usage
+
+    def _chat_completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        _, content, usage = self._prompt_and_usage(body)
+        return {
+            "id": f"chatcmpl-fake-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": usage
+        }
+
+    def _stream_chat_completion(self, body: Dict[str, Any]):
+        _, content, usage = self._prompt_and_usage(body)
+        completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": body.get("model", "gpt-4o")}
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        words = re.findall(r"\S+\s*", content) or [content]
+        for index, word in enumerate(words):
+            if index and self.server.config.stream_chunk_delay_seconds:
+                time.sleep(self.server.config.stream_chunk_delay_seconds)
+            self._send_event({**base, "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]})
+        self._send_event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._send_event({**base, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_event(self, payload: Dict[str, Any]):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str):
+        error_type = "rate_limit_error" if status == 429 else "invalid_request_error" if status < 500 else "server_error"
+        headers = {"retry-after": "1"} if status == 429 else None
+        self._send_json({"error": {"message": message, "type": error_type, "param": None, "code": None}}, status, headers)
+
+def start_fake_openai_server(config: Optional[FakeOpenAIConfig] = None, host: str = "127.0.0.1", port: int = 0) -> FakeOpenAIServer:
+    """Starts the fake server on a daemon thread and returns it; port 0 picks a free port (see server.base_url)."""
+    server = FakeOpenAIServer((host, port), config or FakeOpenAIConfig())
+    threading.Thread(target=server.serve_forever, name="fake-openai-server", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a deterministic local stand-in for the OpenAI embeddings and chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed delay in seconds before each response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay in seconds, uniform in [0, jitter].")
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.0, help="Delay in seconds between streamed chunks.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests (0-1) that fail with --error-status.")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status for injected errors, e.g. 429 or 503.")
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_EMBEDDING_DIMENSIONS, help="Embedding vector size.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for jitter and error injection.")
+    args = parser.parse_args()
+
+    config = FakeOpenAIConfig(
+        latency_seconds=args.latency,
+        latency_jitter_seconds=args.jitter,
+        stream_chunk_delay_seconds=args.stream_chunk_delay,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        embedding_dimensions=args.dimensions,
+        seed=args.seed
+    )
+    server = FakeOpenAIServer((args.host, args.port), config)
+    logger.info(f"Fake OpenAI server listening on {server.base_url}. Set OPENAI_BASE_URL={server.base_url} to use it.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down fake OpenAI server.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import logging
+import asyncio
+from typing import Optional, Set
+from telegram.ext import Application
+
+from app.config import ConfigService
+from app.persistence.database import AsyncSessionLocal, in_update_session, run_after_commit, update_session
+from app.persistence.models.ingestion_job_model import IngestionJobStatus
+from app.persistence.repositories.ingestion_job_repository import IngestionJobRepository
+from app.core.context_service import ContextService
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import LANE_BACKGROUND
+from app.services.usage_accounting import set_usage_source
+from app.services.vector_db_service import VectorDBService
+
+logger = logging.getLogger(__name__)
+
+_bot_app: Optional[Application] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_running_tasks: Set[asyncio.Task] = set() # Keep references so tasks aren't garbage-collected mid-run
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Lazily creates the semaphore bounding how many jobs run at once."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(ConfigService.get_ingestion_worker_concurrency())
+    return _semaphore
+
+async def start_ingestion_worker(application: Application):
+    """Stores the application instance (for notifications) and resumes jobs left unfinished by a restart."""
+    global _bot_app
+    _bot_app = application
+
+    try:
+        async with AsyncSessionLocal() as session:
+            unfinished_jobs = await IngestionJobRepository(session).get_unfinished_jobs()
+        for job in unfinished_jobs:
+            enqueue_ingestion_job(job.id)
+        logger.info(f"Ingestion worker started. Resumed {len(unfinished_jobs)} unfinished job(s).")
+    except Exception as e:
+        logger.error(f"Error resuming unfinished ingestion jobs: {e}", exc_info=True)
+
+async def submit_ingestion_job(
+    requester_telegram_id: int,
+    content_source: str,
+    source_type: str,
+    title: Optional[str] = None,
+    proposal_id: Optional[int] = None
+) -> Optional[int]:
+    """
+    Records a new ingestion job and schedules it on the worker once the job row is committed.
+    Inside a handler's update_session the job joins that transaction (so it can reference a proposal created in
+    the same update); otherwise it is committed on its own.
+    Returns the job ID immediately, or None if the job could not be recorded on its own. Inside an update_session the
+    error is re-raised instead, since the failed flush leaves the update's transaction unusable.
+    """
+    try:
+        async with update_session() as session:
+            job = await IngestionJobRepository(session).add_job(
+                requester_telegram_id=requester_telegram_id,
+                content_source=content_source,
+                source_type=source_type,
+                title=title,
+                proposal_id=proposal_id
+            )
+            job_id = job.id
+
+            async def enqueue_committed_job():
+                enqueue_ingestion_job(job_id)
+            run_after_commit(enqueue_committed_job) # The worker reads the job in its own session
+    except Exception as e:
+        logger.error(f"Error creating ingestion job for user {requester_telegram_id}: {e}", exc_info=True)
+        if in_update_session():
+            raise
+        return None
+
+    logger.info(f"Ingestion job {job_id} submitted by user {requester_telegram_id} (source_type: {source_type}).")
+    return job_id
+
+def enqueue_ingestion_job(job_id: int) -> asyncio.Task:
+    """Schedules a job on the running event loop. At most N jobs run concurrently (see ConfigService)."""
+    task = asyncio.create_task(run_ingestion_job(job_id))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return task
+
+async def run_ingestion_job(job_id: int):
+    """Runs one ingestion job: fetch + chunk + embed + store, recording progress and notifying the requester."""
+    set_usage_source("ingestion") # Each job runs in its own task, so the tag doesn't leak to the submitting command
+    async with _get_semaphore():
+        async with AsyncSessionLocal() as job_session:
+            job_repo = IngestionJobRepository(job_session)
+            job = await job_repo.update_job(job_id, status=IngestionJobStatus.RUNNING, progress="starting")
+            await job_session.commit()
+            if not job:
+                logger.error(f"Ingestion job {job_id} not found. Skipping.")
+                return
+
+            async def report_progress(stage: str):
+                await job_repo.update_job(job_id, progress=stage)
+                await job_session.commit()
+
+            document_id: Optional[int] = None
+            error_message: Optional[str] = None
+            try:
+                # The document itself is stored in a separate session so progress commits don't interfere with it
+                async with AsyncSessionLocal() as work_session:
+                    context_service = ContextService(
+                        db_session=work_session,
+                        llm_service=LLMService(lane=LANE_BACKGROUND),
+                        vector_db_service=VectorDBService()
+                    )
+                    document_id = await context_service.process_and_store_document(
+                        content_source=job.content_source,
+                        source_type=job.source_type,
+                        title=job.title,
+                        proposal_id=job.proposal_id,
+                        progress_callback=report_progress
+                    )
+                if document_id is None:
+                    error_message = "The document could not be processed. Check that the URL is reachable or the text is not empty."
+            except Exception as e:
+                logger.error(f"Error running ingestion job {job_id}: {e}", exc_info=True)
+                error_message = "An unexpected error occurred while processing the document."
+
+            try:
+                if document_id is not None:
+                    await job_repo.update_job(job_id, status=IngestionJobStatus.COMPLETED, progress="done", document_id=document_id)
+                else:
+                    await job_repo.update_job(job_id, status=IngestionJobStatus.FAILED, progress="failed", error_message=error_message)
+                await job_session.commit()
+            except Exception as e:
+                logger.error(f"Error recording final status of ingestion job {job_id}: {e}", exc_info=True)
+                await job_session.rollback()
+
+    logger.info(f"Ingestion job {job_id} finished. Document ID: {document_id}. Error: {error_message}")
+    await _notify_requester(job.requester_telegram_id, job_id, job.title, document_id, error_message)
+
+async def _notify_requester(
+    requester_telegram_id: int,
+    job_id: int,
+    title: Optional[str],
+    document_id: Optional[int],
+    error_message: Optional[str]
+):
+    """DMs the user who submitted the job with its outcome."""
+    if not _bot_app:
+        logger.warning(f"Bot application not available; cannot notify user {requester_telegram_id} about ingestion job {job_id}.")
+        return
+
+    title_display = f" '{title}'" if title else ""
+    if document_id is not None:
+        text = f"Document{title_display} is ready (Job ID: {job_id}, Document ID: {document_id}). Use /view_doc {document_id} to see it."
+    else:
+        text = f"Processing document{title_display} failed (Job ID: {job_id}). {error_message or ''}".strip()
+    try:
+        await _bot_app.bot.send_message(chat_id=requester_telegram_id, text=text)
+    except Exception as e:
+        logger.error(f"Failed to notify user {requester_telegram_id} about ingestion job {job_id}: {e}", exc_info=True)
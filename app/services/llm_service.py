@@ -1,20 +1,101 @@
 import logging
-from typing import List, Dict, Any, Optional
+import json
+import time
+import asyncio
+import numpy as np
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, Callable, Awaitable
 from openai import AsyncOpenAI # Using AsyncOpenAI for non-blocking calls
-from app.config import ConfigService
+from app.config import ConfigService, LLMTaskRoute
+from app.services.rate_limiter import LANE_INTERACTIVE, get_openai_rate_limiter
+from app.services.single_flight import SingleFlight, normalize_for_coalescing
+from app.services.usage_accounting import usage_accumulator
+from app.services.resilience import (
+    LLMDeadlineExceededError,
+    LLMStreamInterruptedError,
+    backoff_delay,
+    hedged_call,
+    is_retryable_error,
+    retry_after_seconds,
+)
+from app.utils.metrics import metrics
+from app.utils.clustering import kmeans, representative_indices, suggest_cluster_count
 from datetime import datetime, timezone # Added timezone
 
 logger = logging.getLogger(__name__)
 
+# Approximate USD prices per 1M tokens as (input, output), used for per-task cost metrics
+MODEL_PRICES_PER_MILLION_TOKENS: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+}
+
+def estimate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int = 0) -> float:
+    """Estimated cost of one call; 0.0 for models missing from the price table."""
+    input_price, output_price = MODEL_PRICES_PER_MILLION_TOKENS.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+# Completion budget assumed for rate limiting when a route sets no max_tokens
+DEFAULT_COMPLETION_TOKEN_ESTIMATE = 1000
+
+# Map-reduce summarization: responses shown per cluster (closest to its centroid), their max length, and parallel map calls
+MAP_REDUCE_SAMPLE_PER_CLUSTER = 40
+MAP_REDUCE_SAMPLE_TEXT_CHARS = 500
+MAP_REDUCE_CONCURRENCY = 4
+
+# Latency samples needed before the observed p95 replaces a route's default hedge budget
+HEDGE_MIN_SAMPLES = 20
+
+# Shared by all LLMService instances: concurrent identical calls (same task, model and normalized input) share one request
+_single_flight = SingleFlight("llm")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) used to reserve rate-limit budget before a call."""
+    return len(text) // 4 + 1
+
+def _record_llm_call(task: str, model: str, latency_seconds: float, usage: Any = None, success: bool = True):
+    """
+    Records per-task latency, token and cost metrics for one OpenAI call, and adds it to the usage totals
+    of the command or job that made it (see usage_accounting.llm_usage_source).
+    """
+    metrics.observe("llm.latency_seconds", latency_seconds, task=task, model=model)
+    if not success:
+        metrics.increment("llm.errors", task=task, model=model)
+        usage_accumulator.record(task, model, latency_seconds, success=False)
+        return
+    metrics.increment("llm.calls", task=task, model=model)
+    if usage is None:
+        usage_accumulator.record(task, model, latency_seconds)
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    cost = estimate_cost_usd(model, prompt_tokens, completion_tokens)
+    usage_accumulator.record(task, model, latency_seconds, prompt_tokens, completion_tokens, cost)
+    metrics.increment("llm.prompt_tokens", prompt_tokens, task=task, model=model)
+    metrics.increment("llm.completion_tokens", completion_tokens, task=task, model=model)
+    metrics.increment("llm.cost_usd", cost, task=task, model=model)
+    logger.debug(f"LLM task '{task}' on {model}: {latency_seconds:.2f}s, {prompt_tokens}+{completion_tokens} tokens, ${cost:.5f}")
+
 class LLMService:
-    def __init__(self):
+    def __init__(self, lane: int = LANE_INTERACTIVE):
+        # Priority lane for the shared OpenAI rate limiter; background jobs pass LANE_BACKGROUND
+        self.lane = lane
         try:
             self.api_key = ConfigService.get_openai_api_key()
             if not self.api_key:
                 logger.error("OpenAI API key is not configured. LLMService will not function.")
                 raise ValueError("OpenAI API key is missing.")
-            self.client = AsyncOpenAI(api_key=self.api_key)
-            logger.info("LLMService initialized successfully.")
+            # Retries are handled by _call_openai (jittered backoff within task deadlines), not by the SDK
+            base_url = ConfigService.get_openai_base_url()
+            self.client = AsyncOpenAI(api_key=self.api_key, base_url=base_url, max_retries=0)
+            if base_url:
+                logger.info(f"LLMService initialized successfully against {base_url}.")
+            else:
+                logger.info("LLMService initialized successfully.")
         except ValueError as e:
             logger.error(f"Error initializing LLMService: {e}")
             self.client = None # Ensure client is None if initialization fails
@@ -50,7 +131,7 @@ class LLMService:
         logger.info(f"Attempting to parse duration from text: '{text}' with current time context: {current_time_str}")
 
         try:
-            response_text = await self.get_completion(prompt, model="gpt-4o") # Using a capable model
+            response_text = await self.get_completion(prompt, task="parse_duration")
 
             if not response_text or response_text == "ERROR_CANNOT_PARSE":
                 logger.warning(f"LLM could not parse duration string: '{text}'. Response: '{response_text}'")
@@ -78,18 +159,29 @@ class LLMService:
             logger.error(f"Unexpected error during natural language duration parsing for '{text}': {e}", exc_info=True)
             return None
 
-    async def generate_embedding(self, text: str, model: str = "text-embedding-3-small") -> Optional[List[float]]:
+    async def generate_embedding(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
         """
-        Generates an embedding for the given text using the specified OpenAI model.
+        Generates an embedding for the given text using the specified OpenAI model (default: the 'embedding' route).
         Returns a list of floats representing the embedding, or None if an error occurs.
         """
         if not self.client:
             logger.error("LLMService client not initialized. Cannot generate embedding.")
             return None
         
+        route = ConfigService.get_llm_task_route("embedding")
+        model = model or route.model
+        key = ("embedding", model, normalize_for_coalescing(text))
+        return await _single_flight.run(key, lambda: self._generate_embedding(text, model, route))
+
+    async def _generate_embedding(self, text: str, model: str, route: LLMTaskRoute) -> Optional[List[float]]:
+        text_to_embed = text.replace("\n", " ") # OpenAI recommendation
         try:
-            text_to_embed = text.replace("\n", " ") # OpenAI recommendation
-            response = await self.client.embeddings.create(input=[text_to_embed], model=model)
+            response = await self._call_openai(
+                "embedding", model, route,
+                lambda timeout: self.client.embeddings.create(input=[text_to_embed], model=model, timeout=timeout),
+                estimated_tokens=estimate_tokens(text_to_embed),
+                hedge=True # Single embeddings are on the /ask path
+            )
             embedding = response.data[0].embedding
             logger.info(f"Successfully generated embedding for text (first 50 chars): '{text[:50]}...'")
             return embedding
@@ -97,22 +189,171 @@ class LLMService:
             logger.error(f"Error generating embedding for text '{text[:50]}...': {e}", exc_info=True)
             return None
 
-    async def get_completion(self, prompt: str, model: str = "gpt-4o") -> Optional[str]: # Changed default to gpt-4o
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        model: Optional[str] = None,
+        batch_size: int = 100
+    ) -> Optional[List[List[float]]]:
+        """
+        Generates embeddings for many texts, sending up to `batch_size` inputs per API request.
+        Returns the embeddings in the same order as `texts`, or None if any batch fails.
+        """
+        if not self.client:
+            logger.error("LLMService client not initialized. Cannot generate embeddings.")
+            return None
+
+        if not texts:
+            return []
+
+        route = ConfigService.get_llm_task_route("embedding")
+        model = model or route.model
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), batch_size):
+            batch = [text.replace("\n", " ") for text in texts[start:start + batch_size]] # OpenAI recommendation
+            try:
+                response = await self._call_openai(
+                    "embedding", model, route,
+                    lambda timeout: self.client.embeddings.create(input=batch, model=model, timeout=timeout),
+                    estimated_tokens=sum(estimate_tokens(text) for text in batch)
+                )
+                # The API returns one item per input; sort by index to be safe about ordering
+                batch_embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+                if len(batch_embeddings) != len(batch):
+                    logger.error(f"Embedding batch starting at {start} returned {len(batch_embeddings)} embeddings for {len(batch)} inputs.")
+                    return None
+                embeddings.extend(batch_embeddings)
+            except Exception as e:
+                logger.error(f"Error generating embeddings for batch starting at {start} ({len(batch)} texts): {e}", exc_info=True)
+                return None
+
+        logger.info(f"Successfully generated {len(embeddings)} embeddings in {(len(texts) + batch_size - 1) // batch_size} request(s).")
+        return embeddings
+
+    def _hedge_budget(self, task: str, model: str, route: LLMTaskRoute) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call: the observed p95 latency once enough calls were recorded, otherwise
+        the route's default. None when the route doesn't hedge or the call is background work.
+        """
+        if route.hedge_after_seconds is None or self.lane != LANE_INTERACTIVE:
+            return None
+        summary = metrics.get_summary("llm.latency_seconds", task=task, model=model)
+        if summary and summary["count"] >= HEDGE_MIN_SAMPLES:
+            return summary["p95"]
+        return route.hedge_after_seconds
+
+    async def _call_openai(
+        self,
+        task: str,
+        model: str,
+        route: LLMTaskRoute,
+        request: Callable[[float], Awaitable[Any]],
+        estimated_tokens: int,
+        hedge: bool = False,
+        record_usage: bool = True
+    ) -> Any:
+        """
+        Runs request(timeout) against OpenAI with rate limiting, jittered exponential retry of transient errors
+        within the task's deadline and, if hedge is set and the route allows it, a hedge request once the call
+        exceeds its p95 latency budget. Raises the last error when retries are exhausted or the deadline is reached.
+        """
+        limiter = get_openai_rate_limiter()
+        max_retries = ConfigService.get_llm_max_retries()
+        base_delay, max_delay = ConfigService.get_llm_retry_delays()
+        deadline = time.monotonic() + route.deadline_seconds if route.deadline_seconds else None
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated_tokens, self.lane)
+            timeout = route.timeout_seconds
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.increment("llm.deadline_exceeded", task=task, model=model)
+                    raise LLMDeadlineExceededError(f"LLM task '{task}' exceeded its {route.deadline_seconds}s deadline.")
+                timeout = min(timeout, remaining)
+
+            hedge_after = self._hedge_budget(task, model, route) if hedge else None
+            start_time = time.monotonic()
+            try:
+                if hedge_after is not None:
+                    result = await hedged_call(
+                        lambda: request(timeout),
+                        hedge_after,
+                        on_hedge=lambda: limiter.acquire(estimated_tokens, self.lane),
+                        label=task
+                    )
+                else:
+                    result = await request(timeout)
+            except Exception as e:
+                _record_llm_call(task, model, time.monotonic() - start_time, success=False)
+                if not is_retryable_error(e) or attempt >= max_retries:
+                    raise
+                delay = max(backoff_delay(attempt, base_delay, max_delay), retry_after_seconds(e) or 0.0)
+                if deadline is not None and time.monotonic() + delay >= deadline:
+                    metrics.increment("llm.deadline_exceeded", task=task, model=model)
+                    raise
+                attempt += 1
+                metrics.increment("llm.retries", task=task, model=model, reason=type(e).__name__)
+                logger.warning(f"Transient error on LLM task '{task}' ({type(e).__name__}: {e}). Retry {attempt}/{max_retries} in {delay:.2f}s.")
+                await asyncio.sleep(delay)
+                continue
+
+            if record_usage:
+                _record_llm_call(task, model, time.monotonic() - start_time, getattr(result, "usage", None))
+            return result
+
+    def _completion_request_options(self, task: str, model: Optional[str], json_output: bool = False) -> Tuple[str, LLMTaskRoute, Dict[str, Any]]:
+        """Resolves the model, route and extra request options (max_tokens, JSON mode) for a task from the routing table."""
+        route = ConfigService.get_llm_task_route(task)
+        options: Dict[str, Any] = {}
+        if route.max_tokens:
+            options["max_tokens"] = route.max_tokens
+        if json_output:
+            options["response_format"] = {"type": "json_object"}
+        return model or route.model, route, options
+
+    @staticmethod
+    def _completion_token_estimate(prompt: str, route: LLMTaskRoute) -> int:
+        """Rate-limit budget for a completion: the prompt plus the completion limit, as OpenAI itself counts it."""
+        return estimate_tokens(prompt) + (route.max_tokens or DEFAULT_COMPLETION_TOKEN_ESTIMATE)
+
+    async def get_completion(self, prompt: str, model: Optional[str] = None, task: str = "completion", json_output: bool = False) -> Optional[str]:
         """
         Gets a completion from the OpenAI API given a prompt.
+        The task selects model, timeout and max_tokens from ConfigService's routing table; an explicit model overrides the route's model.
+        json_output enables OpenAI's JSON mode, which guarantees a bare JSON object (the prompt must mention JSON).
         Returns the content of the completion, or None if an error occurs.
         """
         if not self.client:
             logger.error("LLMService client not initialized. Cannot get completion.")
             return None
             
+        model, route, request_options = self._completion_request_options(task, model, json_output)
+        key = (task, model, json_output, normalize_for_coalescing(prompt))
+        return await _single_flight.run(key, lambda: self._get_completion(prompt, task, model, route, request_options))
+
+    async def _get_completion(
+        self,
+        prompt: str,
+        task: str,
+        model: str,
+        route: LLMTaskRoute,
+        request_options: Dict[str, Any]
+    ) -> Optional[str]:
         try:
-            response = await self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": prompt}
-                ]
+            response = await self._call_openai(
+                task, model, route,
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    timeout=timeout,
+                    **request_options
+                ),
+                estimated_tokens=self._completion_token_estimate(prompt, route),
+                hedge=True # Only routes with a hedge budget (latency-critical parsing) actually hedge
             )
             completion_text = response.choices[0].message.content
             logger.info(f"Successfully got completion for prompt (first 50 chars): '{prompt[:50]}...'")
@@ -121,7 +362,60 @@ class LLMService:
             logger.error(f"Error getting completion for prompt '{prompt[:50]}...': {e}", exc_info=True)
             return None
 
-    async def cluster_and_summarize_texts(self, texts: List[str], model: str = "gpt-4o") -> Optional[str]:
+    async def stream_completion(self, prompt: str, model: Optional[str] = None, task: str = "ask_answer") -> AsyncIterator[str]:
+        """
+        Streams a completion from the OpenAI API, yielding text deltas as they arrive.
+        Yields nothing if the request fails before the first token; a failure after tokens were yielded raises
+        LLMStreamInterruptedError, so callers can tell a cut-off answer from a complete one.
+        """
+        if not self.client:
+            logger.error("LLMService client not initialized. Cannot stream completion.")
+            return
+
+        model, route, request_options = self._completion_request_options(task, model)
+        start_time = time.monotonic()
+        stream = None
+        first_token_seen = False
+        usage = None
+        try:
+            # Only opening the stream is retried; once tokens have been shown, a failure ends the answer
+            stream = await self._call_openai(
+                task, model, route,
+                lambda timeout: self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    stream=True,
+                    stream_options={"include_usage": True}, # Usage arrives on a final chunk without choices
+                    timeout=timeout,
+                    **request_options
+                ),
+                estimated_tokens=self._completion_token_estimate(prompt, route),
+                record_usage=False # Recorded below once the stream has finished
+            )
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if not first_token_seen:
+                    first_token_seen = True
+                    metrics.observe("llm.time_to_first_token_seconds", time.monotonic() - start_time, task=task, model=model)
+                yield delta
+            _record_llm_call(task, model, time.monotonic() - start_time, usage)
+            logger.info(f"Successfully streamed completion for prompt (first 50 chars): '{prompt[:50]}...'")
+        except Exception as e:
+            if stream is not None: # Failures opening the stream are already recorded by _call_openai
+                _record_llm_call(task, model, time.monotonic() - start_time, success=False)
+            logger.error(f"Error streaming completion for prompt '{prompt[:50]}...': {e}", exc_info=True)
+            if first_token_seen:
+                raise LLMStreamInterruptedError(str(e)) from e
+
+    async def cluster_and_summarize_texts(self, texts: List[str], model: Optional[str] = None) -> Optional[str]:
         """
         Clusters a list of texts and generates a concise summary for each cluster using an LLM.
         Aims to identify 3-5 main themes or clusters.
@@ -159,7 +453,7 @@ class LLMService:
         logger.info(f"Attempting to cluster and summarize {len(texts)} texts.")
 
         try:
-            summary_text = await self.get_completion(prompt, model=model)
+            summary_text = await self.get_completion(prompt, model=model, task="summarize_submissions")
 
             if not summary_text:
                 logger.warning("LLM returned no summary for clustering.")
@@ -171,13 +465,84 @@ class LLMService:
             logger.error(f"Unexpected error during text clustering and summarization for {len(texts)} texts: {e}", exc_info=True)
             return "An error occurred while generating the summary." # Return a placeholder
 
-    async def analyze_ask_query(self, query_text: str, model: str = "gpt-4o") -> Dict[str, Any]:
+    async def map_reduce_summarize_texts(self, texts: List[str], num_clusters: Optional[int] = None) -> Optional[str]:
         """
-        Analyzes the user's /ask query to determine intent and extract relevant entities.
+        Summarizes a large set of texts whose combined size would not fit (or be slow and costly) in one prompt:
+        embeds them in batches, clusters them locally with k-means, summarizes each cluster concurrently from its
+        most representative texts (map), then merges the cluster summaries into themes (reduce).
+        Returns the merged summary in the same "Theme N / Summary" format as cluster_and_summarize_texts, or None on failure.
+        """
+        if not self.client:
+            logger.error("LLMService client not initialized. Cannot map-reduce summarize texts.")
+            return None
+
+        texts = [text for text in texts if text and text.strip()]
+        if not texts:
+            logger.warning("No texts provided to map_reduce_summarize_texts. Returning None.")
+            return None
+
+        embeddings = await self.generate_embeddings([text[:MAP_REDUCE_SAMPLE_TEXT_CHARS * 4] for text in texts])
+        if not embeddings:
+            logger.error(f"Could not embed {len(texts)} texts for map-reduce summarization.")
+            return None
+
+        k = num_clusters or suggest_cluster_count(len(texts))
+        labels, centroids = kmeans(embeddings, k)
+        cluster_sizes = np.bincount(labels, minlength=len(centroids))
+        logger.info(f"Map-reduce summarization: {len(texts)} texts in {int((cluster_sizes > 0).sum())} clusters (sizes: {cluster_sizes.tolist()}).")
+
+        semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+
+        async def summarize_cluster(cluster: int) -> Optional[Tuple[int, str]]:
+            indices = representative_indices(embeddings, labels, centroids, cluster, MAP_REDUCE_SAMPLE_PER_CLUSTER)
+            size = int(cluster_sizes[cluster])
+            sample = "\n".join(f"- {texts[i][:MAP_REDUCE_SAMPLE_TEXT_CHARS]}" for i in indices)
+            prompt = (
+                f"Below are {len(indices)} of {size} similar free-form submissions (the most representative ones). "
+                f"Give this group a CONCISE title and a BRIEF summary (1-2 sentences) of the ideas in it.\n\n"
+                f"{sample}\n\n"
+                f"Format:\nTitle: [title]\nSummary: [summary]"
+            )
+            async with semaphore:
+                summary = await self.get_completion(prompt, task="summarize_cluster")
+            return (size, summary) if summary else None
+
+        cluster_results = await asyncio.gather(*[
+            summarize_cluster(cluster) for cluster in range(len(centroids)) if cluster_sizes[cluster] > 0
+        ])
+        cluster_summaries = sorted((result for result in cluster_results if result), key=lambda result: result[0], reverse=True)
+        if not cluster_summaries:
+            logger.error("Map-reduce summarization: no cluster summaries could be generated.")
+            return None
+
+        groups = "\n\n".join(f"Group {i + 1} ({size} submissions):\n{summary}" for i, (size, summary) in enumerate(cluster_summaries))
+        merge_prompt = (
+            f"You are a text analysis assistant. {len(texts)} free-form submissions were grouped by similarity and each group was summarized. "
+            f"Merge these group summaries into between 1 and 5 main themes, combining groups that express the same idea. "
+            f"For each theme, provide a CONCISE title and a BRIEF summary (1-2 sentences), and mention roughly how many submissions it covers.\n\n"
+            f"{groups}\n\n"
+            f"Please format your output clearly, for example:\n"
+            f"Theme 1: [Theme Title 1]\n"
+            f"Summary: [Brief summary of ideas in theme 1]\n\n"
+            f"Theme 2: [Theme Title 2]\n"
+            f"Summary: [Brief summary of ideas in theme 2]\n"
+            f"..."
+        )
+        merged = await self.get_completion(merge_prompt, task="summarize_submissions")
+        if not merged:
+            logger.error("Map-reduce summarization: merge step returned no summary.")
+            return None
+        logger.info(f"Successfully generated map-reduce summary for {len(texts)} texts from {len(cluster_summaries)} cluster summaries.")
+        return merged
+
+    async def analyze_ask_query(self, query_text: str, model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Plans the user's /ask query in a single LLM call: determines intent, extracts keywords and filters,
+        and resolves any date phrase into concrete bounds, so date-scoped questions need no second round trip.
 
         Args:
             query_text: The raw text of the user's query.
-            model: The LLM model to use for analysis.
+            model: Overrides the model from the "analyze_ask_query" route.
 
         Returns:
             A dictionary containing:
@@ -185,25 +550,46 @@ class LLMService:
             - "content_keywords": Extracted keywords for semantic search (if intent is query_proposals).
             - "structured_filters": A dict with keys like "status", "proposal_type", "date_query" (if intent is query_proposals).
             - "date_query_type": "creation" or "deadline" to indicate which field the date query applies to.
+            - "date_range": {"start_datetime", "end_datetime"} as ISO 8601 UTC strings (either may be None), or None.
             - "error": An error message if parsing failed.
         """
         if not self.client:
             logger.error("LLMService client not initialized. Cannot analyze ask query.")
             return {"error": "LLMService not initialized."}
 
-        # Get current time in UTC to provide as context for date queries
+        # Coalesce on the query itself: the prompt embeds the current time, so prompt-level keys would rarely match
+        resolved_model = model or ConfigService.get_llm_task_route("analyze_ask_query").model
+        key = ("analyze_ask_query", resolved_model, normalize_for_coalescing(query_text, casefold=True))
+        return await _single_flight.run(key, lambda: self._analyze_ask_query(query_text, model))
+
+    @staticmethod
+    def _normalize_iso_datetime(value: Any) -> Optional[str]:
+        """Validates an ISO 8601 datetime from the planner and returns it as a UTC ISO string; naive values are taken as UTC."""
+        if not isinstance(value, str) or not value.strip():
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.strip())
+        except ValueError:
+            logger.warning(f"Ask planner returned an invalid ISO datetime: {value}")
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.astimezone(timezone.utc).isoformat()
+
+    async def _analyze_ask_query(self, query_text: str, model: Optional[str]) -> Dict[str, Any]:
+        # Get current time in UTC to provide as context for resolving date phrases
         now_utc = datetime.now(timezone.utc)
-        current_time_str = now_utc.strftime("%Y-%m-%d %H:%M:%S %Z")
+        current_time_str = now_utc.strftime("%A %Y-%m-%d %H:%M:%S %Z")
 
         prompt = f"""
         You are an expert query analysis assistant for a Telegram bot.
         Your task is to analyze the user's question and determine if they are asking about specific 'proposals'
         or if they are asking a general question that should be answered from 'general_documents'.
-        If the question is about proposals, you also need to extract keywords for semantic content search and
-        any structured filters like status, proposal type, or date-related queries.
+        If the question is about proposals, you also need to extract keywords for semantic content search,
+        any structured filters like status or proposal type, and resolve any date phrase into a concrete date range.
 
         User Query: "{query_text}"
-        Current UTC Time for context (if needed for date queries): {current_time_str}
+        Current UTC Time: {current_time_str}
 
         Allowed proposal statuses: "open", "closed", "cancelled"
         Allowed proposal types: "multiple_choice", "free_form"
@@ -215,40 +601,40 @@ class LLMService:
           "structured_filters": {{
             "status": "string (one of the allowed statuses, or null if not specified)",
             "proposal_type": "string (one of the allowed types, or null if not specified)",
-            "date_query": "string (natural language date phrase like 'last week', 'July 2024', 'before May 10th', or null if not specified)"
+            "date_query": "string (the natural language date phrase like 'last week', 'July 2024', 'before May 10th', or null if not specified)"
           }} (This whole dict is null if intent is query_general_docs),
-          "date_query_type": "creation" | "deadline" (Identify if date query refers to when proposals were created or when they are due/deadline)
+          "date_query_type": "creation" | "deadline" (Identify if date query refers to when proposals were created or when they are due/deadline),
+          "date_range": {{
+            "start_datetime": "ISO 8601 UTC datetime like 2024-05-13T00:00:00Z, or null for an open start",
+            "end_datetime": "ISO 8601 UTC datetime like 2024-05-19T23:59:59Z, or null for an open end"
+          }} (null if there is no date query or it cannot be resolved)
         }}
 
         IMPORTANT ABOUT DATE QUERIES:
         - If the user asks about when proposals were "created", "made", "started", "proposed", etc., set date_query_type to "creation".
         - If the user asks about proposals that are "due", "expire", "end", "close", "deadline", etc., set date_query_type to "deadline".
         - If there's no date query or it's ambiguous, set date_query_type to "deadline" by default.
+        - Resolve date_range relative to the current time. A single day spans 00:00:00 to 23:59:59; weeks start on Monday.
+        - Open-ended phrases set only one bound: "since last Monday" has no end_datetime, "until Friday" has no start_datetime.
 
-        Examples:
+        Examples (Current UTC Time: Monday 2024-05-20 10:00:00 UTC):
         1. User Query: "what proposals closed last week?"
            Output:
            {{
              "intent": "query_proposals",
              "content_keywords": "proposals closed last week",
-             "structured_filters": {{
-               "status": "closed",
-               "proposal_type": null,
-               "date_query": "last week"
-             }},
-             "date_query_type": "deadline"
+             "structured_filters": {{"status": "closed", "proposal_type": null, "date_query": "last week"}},
+             "date_query_type": "deadline",
+             "date_range": {{"start_datetime": "2024-05-13T00:00:00Z", "end_datetime": "2024-05-19T23:59:59Z"}}
            }}
         2. User Query: "tell me about the pizza party proposal"
            Output:
            {{
              "intent": "query_proposals",
              "content_keywords": "pizza party proposal",
-             "structured_filters": {{
-               "status": null,
-               "proposal_type": null,
-               "date_query": null
-             }},
-             "date_query_type": "deadline"
+             "structured_filters": {{"status": null, "proposal_type": null, "date_query": null}},
+             "date_query_type": "deadline",
+             "date_range": null
            }}
         3. User Query: "how does the budget work?"
            Output:
@@ -256,68 +642,36 @@ class LLMService:
              "intent": "query_general_docs",
              "content_keywords": null,
              "structured_filters": null,
-             "date_query_type": null
+             "date_query_type": null,
+             "date_range": null
            }}
         4. User Query: "any open multiple choice proposals about funding from this month?"
            Output:
            {{
              "intent": "query_proposals",
              "content_keywords": "funding proposals",
-             "structured_filters": {{
-               "status": "open",
-               "proposal_type": "multiple_choice",
-               "date_query": "this month"
-             }},
-             "date_query_type": "deadline"
-           }}
-        5. User Query: "what proposals were created last week?"
-           Output:
-           {{
-             "intent": "query_proposals",
-             "content_keywords": "proposals created last week",
-             "structured_filters": {{
-               "status": null,
-               "proposal_type": null,
-               "date_query": "last week"
-             }},
-             "date_query_type": "creation"
+             "structured_filters": {{"status": "open", "proposal_type": "multiple_choice", "date_query": "this month"}},
+             "date_query_type": "deadline",
+             "date_range": {{"start_datetime": "2024-05-01T00:00:00Z", "end_datetime": "2024-05-31T23:59:59Z"}}
            }}
-        6. User Query: "which proposals were proposed this month?"
+        5. User Query: "which proposals were created since yesterday?"
            Output:
            {{
              "intent": "query_proposals",
-             "content_keywords": "proposals proposed this month",
-             "structured_filters": {{
-               "status": null,
-               "proposal_type": null,
-               "date_query": "this month"
-             }},
-             "date_query_type": "creation"
+             "content_keywords": "proposals created since yesterday",
+             "structured_filters": {{"status": null, "proposal_type": null, "date_query": "since yesterday"}},
+             "date_query_type": "creation",
+             "date_range": {{"start_datetime": "2024-05-19T00:00:00Z", "end_datetime": null}}
            }}
-        
-        VERY IMPORTANT: Respond with ONLY the JSON object. Do NOT include any other text, explanations, or conversational phrases.
+
         If you cannot confidently determine the intent or extract information, lean towards "query_general_docs" or provide nulls for fields.
-        Ensure the output is a valid JSON.
         """
 
         logger.info(f"Attempting to analyze ask query: '{query_text}'")
 
         try:
-            # Use a model that's good at following instructions and JSON output.
-            # gpt-4o or gpt-3.5-turbo with response_format={"type": "json_object"} could work.
-            # For now, just using get_completion and will parse JSON manually.
-            # response = await self.client.chat.completions.create(
-            #     model=model,
-            #     messages=[
-            #         {"role": "system", "content": "You are an expert query analysis assistant. Your output must be a valid JSON object."},
-            #         {"role": "user", "content": prompt}
-            #     ],
-            #     response_format={"type": "json_object"} # This requires newer OpenAI library versions and compatible models
-            # )
-            # raw_response_text = response.choices[0].message.content
-
-            # Using existing get_completion for now, as response_format might not be set up everywhere
-            raw_response_text = await self.get_completion(prompt, model=model)
+            # JSON mode guarantees a bare JSON object, so no code-fence cleanup is needed
+            raw_response_text = await self.get_completion(prompt, model=model, task="analyze_ask_query", json_output=True)
 
             if not raw_response_text:
                 logger.warning(f"LLM returned no response for ask query analysis of '{query_text}'.")
@@ -326,30 +680,22 @@ class LLMService:
                     "content_keywords": None,
                     "structured_filters": None,
                     "date_query_type": None,
+                    "date_range": None,
                     "error": "LLM provided no response."
                 }
 
             logger.debug(f"Raw LLM response for ask query analysis: {raw_response_text}")
-            
-            # Clean the response to ensure it's valid JSON (e.g., remove potential markdown backticks)
-            cleaned_response_text = raw_response_text.strip()
-            if cleaned_response_text.startswith("```json"):
-                cleaned_response_text = cleaned_response_text[7:]
-            if cleaned_response_text.endswith("```"):
-                cleaned_response_text = cleaned_response_text[:-3]
-            cleaned_response_text = cleaned_response_text.strip()
-
-            import json # Import json here, as it's a standard library
-            parsed_response = json.loads(cleaned_response_text)
+            parsed_response = json.loads(raw_response_text)
             
             # Basic validation of the parsed structure
             if not isinstance(parsed_response, dict) or "intent" not in parsed_response:
-                logger.error(f"LLM response for ask query analysis was not a valid dictionary with 'intent'. Response: {cleaned_response_text}")
+                logger.error(f"LLM response for ask query analysis was not a valid dictionary with 'intent'. Response: {raw_response_text}")
                 return {
                     "intent": "query_general_docs", 
                     "content_keywords": None,
                     "structured_filters": None,
                     "date_query_type": None,
+                    "date_range": None,
                     "error": "LLM response was not in the expected format."
                 }
             
@@ -364,21 +710,29 @@ class LLMService:
                     # Default to "deadline" if it's not specified or invalid value
                     has_date_query = parsed_response.get("structured_filters", {}).get("date_query") is not None
                     parsed_response["date_query_type"] = "deadline" if has_date_query else None
+                # Keep only well-formed bounds; a range with neither bound is no range at all
+                date_range = parsed_response.get("date_range")
+                date_range = date_range if isinstance(date_range, dict) else {}
+                start_datetime = self._normalize_iso_datetime(date_range.get("start_datetime"))
+                end_datetime = self._normalize_iso_datetime(date_range.get("end_datetime"))
+                parsed_response["date_range"] = {"start_datetime": start_datetime, "end_datetime": end_datetime} if (start_datetime or end_datetime) else None
             else: # For query_general_docs
                 parsed_response["content_keywords"] = None
                 parsed_response["structured_filters"] = None
                 parsed_response["date_query_type"] = None
+                parsed_response["date_range"] = None
 
-            logger.info(f"Successfully analyzed ask query: '{query_text}'. Intent: {parsed_response.get('intent')}, Date query type: {parsed_response.get('date_query_type')}")
+            logger.info(f"Successfully analyzed ask query: '{query_text}'. Intent: {parsed_response.get('intent')}, Date query type: {parsed_response.get('date_query_type')}, Date range: {parsed_response.get('date_range')}")
             return parsed_response
 
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM JSON response for ask query analysis of '{query_text}': {e}. Response was: {cleaned_response_text}", exc_info=True)
+            logger.error(f"Failed to parse LLM JSON response for ask query analysis of '{query_text}': {e}. Response was: {raw_response_text}", exc_info=True)
             return {
                 "intent": "query_general_docs", 
                 "content_keywords": None,
                 "structured_filters": None,
                 "date_query_type": None,
+                "date_range": None,
                 "error": "Failed to parse LLM JSON response."
             }
         except Exception as e:
@@ -388,128 +742,10 @@ class LLMService:
                 "content_keywords": None,
                 "structured_filters": None,
                 "date_query_type": None,
+                "date_range": None,
                 "error": f"An unexpected error occurred: {str(e)}"
             }
 
-    async def parse_natural_language_date_range_query(self, date_query_text: str, model: str = "gpt-4o") -> Optional[Dict[str, Optional[str]]]:
-        """
-        Parses a natural language date query text into a start and end datetime string.
-        Example: "last week", "this month", "July 2024", "next monday to friday"
-        Returns a dictionary {"start_datetime": "YYYY-MM-DD HH:MM:SS UTC", "end_datetime": "YYYY-MM-DD HH:MM:SS UTC"} 
-        or None if parsing fails or query is not a range.
-        Individual datetimes in the dict can be None if only one part of the range is specified (e.g. "before today").
-        """
-        if not self.client:
-            logger.error("LLMService client not initialized. Cannot parse date range query.")
-            return None
-
-        now_utc = datetime.now(timezone.utc)
-        current_time_str = now_utc.strftime("%Y-%m-%d %H:%M:%S %Z")
-
-        prompt = f"""
-        You are a precise date range parsing assistant.
-        Given the current time is {current_time_str}, parse the following user input to determine a start datetime and an end datetime for a date range.
-        User input: '{date_query_text}'.
-
-        RULES:
-        1.  Your entire response MUST be a JSON object.
-        2.  The JSON object should have two keys: "start_datetime" and "end_datetime".
-        3.  Values for these keys should be date strings in the exact format 'YYYY-MM-DD HH:MM:SS UTC'.
-        4.  If the user input implies an open-ended range (e.g., "since last Monday", "until next Friday"), one of the keys can be null.
-            - For "since last Monday": "start_datetime" would be last Monday 00:00:00 UTC, "end_datetime" would be null.
-            - For "until next Friday": "start_datetime" would be null, "end_datetime" would be next Friday 23:59:59 UTC.
-            - For "today": "start_datetime" is today 00:00:00 UTC, "end_datetime" is today 23:59:59 UTC.
-            - For "last week": "start_datetime" is the beginning of last week (e.g., Monday 00:00:00 UTC), "end_datetime" is the end of last week (e.g., Sunday 23:59:59 UTC).
-            - For "July 2024": "start_datetime" is "2024-07-01 00:00:00 UTC", "end_datetime" is "2024-07-31 23:59:59 UTC".
-        5.  If the input is not a recognizable date range or specific date, or is too vague, respond with: {{"start_datetime": null, "end_datetime": null, "error": "ERROR_CANNOT_PARSE"}}
-        6.  If the input refers to a single day (e.g. "yesterday", "May 10th"), set start_datetime to the beginning of that day (00:00:00 UTC) and end_datetime to the end of that day (23:59:59 UTC).
-
-        Examples:
-        User input: "last week" (Current time: 2024-05-20 10:00:00 UTC)
-        Output: {{"start_datetime": "2024-05-13 00:00:00 UTC", "end_datetime": "2024-05-19 23:59:59 UTC"}}
-
-        User input: "this month" (Current time: 2024-05-20 10:00:00 UTC)
-        Output: {{"start_datetime": "2024-05-01 00:00:00 UTC", "end_datetime": "2024-05-31 23:59:59 UTC"}}
-        
-        User input: "today" (Current time: 2024-05-20 10:00:00 UTC)
-        Output: {{"start_datetime": "2024-05-20 00:00:00 UTC", "end_datetime": "2024-05-20 23:59:59 UTC"}}
-
-        User input: "since yesterday" (Current time: 2024-05-20 10:00:00 UTC)
-        Output: {{"start_datetime": "2024-05-19 00:00:00 UTC", "end_datetime": null}}
-
-        User input: "until tomorrow evening" (Current time: 2024-05-20 10:00:00 UTC)
-        Output: {{"start_datetime": null, "end_datetime": "2024-05-21 23:59:59 UTC"}}
-        
-        User input: "gibberish"
-        Output: {{"start_datetime": null, "end_datetime": null, "error": "ERROR_CANNOT_PARSE"}}
-        """
-
-        logger.info(f"Attempting to parse date range from text: '{date_query_text}' with current time context: {current_time_str}")
-
-        try:
-            raw_response_text = await self.get_completion(prompt, model=model)
-
-            if not raw_response_text:
-                logger.warning(f"LLM returned no response for date range parsing of '{date_query_text}'.")
-                return None
-            
-            logger.debug(f"Raw LLM response for date range parsing: {raw_response_text}")
-
-            import json
-            cleaned_response_text = raw_response_text.strip()
-            if cleaned_response_text.startswith("```json"):
-                cleaned_response_text = cleaned_response_text[7:]
-            if cleaned_response_text.endswith("```"):
-                cleaned_response_text = cleaned_response_text[:-3]
-            cleaned_response_text = cleaned_response_text.strip()
-            
-            parsed_json = json.loads(cleaned_response_text)
-
-            if not isinstance(parsed_json, dict) or ("start_datetime" not in parsed_json and "end_datetime" not in parsed_json):
-                logger.error(f"LLM response for date range parsing was not a valid dictionary with expected keys. Response: {cleaned_response_text}")
-                return None
-            
-            if parsed_json.get("error") == "ERROR_CANNOT_PARSE":
-                logger.warning(f"LLM indicated it cannot parse date range: '{date_query_text}'.")
-                return None
-
-            # Validate date formats if they exist
-            start_dt_str = parsed_json.get("start_datetime")
-            end_dt_str = parsed_json.get("end_datetime")
-
-            if start_dt_str:
-                try:
-                    datetime.strptime(start_dt_str, "%Y-%m-%d %H:%M:%S %Z")
-                except ValueError:
-                    logger.warning(f"LLM returned invalid start_datetime format: {start_dt_str}. Query: '{date_query_text}'")
-                    # Decide if to return None or try to recover/ignore this part
-                    parsed_json["start_datetime"] = None # Invalidate if malformed
-            
-            if end_dt_str:
-                try:
-                    datetime.strptime(end_dt_str, "%Y-%m-%d %H:%M:%S %Z")
-                except ValueError:
-                    logger.warning(f"LLM returned invalid end_datetime format: {end_dt_str}. Query: '{date_query_text}'")
-                    parsed_json["end_datetime"] = None # Invalidate if malformed
-            
-            # Return the dict with potentially null start/end if one part was invalid but other was okay,
-            # or if LLM intentionally returned one as null for open ranges.
-            # If both are null and no error was explicitly set by LLM, it means parsing failed.
-            if not parsed_json.get("start_datetime") and not parsed_json.get("end_datetime") and not parsed_json.get("error"):
-                 logger.warning(f"LLM parsing for date range query '{date_query_text}' resulted in no valid start or end dates.")
-                 return None
-
-
-            logger.info(f"Successfully parsed date range query '{date_query_text}': {parsed_json}")
-            return {"start_datetime": parsed_json.get("start_datetime"), "end_datetime": parsed_json.get("end_datetime")}
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM JSON response for date range query '{date_query_text}': {e}. Response was: {cleaned_response_text}", exc_info=True)
-            return None
-        except Exception as e:
-            logger.error(f"Unexpected error during date range query parsing for '{date_query_text}': {e}", exc_info=True)
-            return None
-
 # Example usage (for testing purposes, would not be here in production)
 if __name__ == '__main__':
     import asyncio
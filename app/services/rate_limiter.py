@@ -0,0 +1,152 @@
+import logging
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Callable, List, Optional, Tuple
+
+from app.config import ConfigService
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes: lower value is served first
+LANE_INTERACTIVE = 0 # User-facing commands such as /ask
+LANE_BACKGROUND = 1 # Ingestion, bulk imports, deadline summarization
+LANE_NAMES = {LANE_INTERACTIVE: "interactive", LANE_BACKGROUND: "background"}
+
+class TokenBucket:
+    """A bucket refilled continuously at per_minute / 60 units per second, holding at most per_minute units."""
+    def __init__(self, per_minute: int, clock: Callable[[], float]):
+        self.capacity = float(per_minute)
+        self.rate_per_second = per_minute / 60.0
+        self.level = self.capacity
+        self._clock = clock
+        self._updated_at = clock()
+
+    def refill(self):
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def seconds_until_available(self, amount: float, floor: float = 0.0) -> float:
+        """Seconds until `amount` can be taken while leaving at least `floor` units in the bucket."""
+        missing = amount + floor - self.level
+        return max(0.0, missing / self.rate_per_second)
+
+class OpenAIRateLimiter:
+    """
+    Process-wide limiter for the shared OpenAI account: one bucket for requests per minute and one for tokens per minute.
+    Waiters are served strictly by lane, then FIFO, so interactive calls never queue behind background work.
+    Background calls also leave a reserve of each bucket untouched, so a burst of /ask calls still finds capacity
+    while a large ingestion is draining the budget.
+    """
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        interactive_reserve_fraction: float = 0.2,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._clock = clock
+        self.request_bucket = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self.interactive_reserve_fraction = min(max(interactive_reserve_fraction, 0.0), 0.9)
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = [] # Heap of (lane, sequence, tokens, future)
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.request_bucket is not None or self.token_bucket is not None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for *_, future in self._waiters if not future.done())
+
+    async def acquire(self, estimated_tokens: int, lane: int = LANE_INTERACTIVE) -> float:
+        """
+        Waits until one request of about `estimated_tokens` tokens fits in the budget, then reserves it.
+        Returns the time spent waiting, in seconds.
+        """
+        if not self.enabled:
+            return 0.0
+
+        tokens = float(max(1, estimated_tokens))
+        if self.token_bucket:
+            tokens = min(tokens, self.token_bucket.capacity) # A single oversized request must still be admitted eventually
+
+        start_time = self._clock()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane, next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._refund(tokens) # Granted, but the caller went away before using it
+            self._dispatch()
+            raise
+
+        waited = self._clock() - start_time
+        lane_name = LANE_NAMES.get(lane, str(lane))
+        metrics.observe("llm.queue_wait_seconds", waited, lane=lane_name)
+        if waited >= 1.0:
+            logger.info(f"OpenAI rate limiter delayed a {lane_name} request by {waited:.2f}s ({self.queue_depth} still queued).")
+        return waited
+
+    def _refund(self, tokens: float):
+        if self.request_bucket:
+            self.request_bucket.level = min(self.request_bucket.capacity, self.request_bucket.level + 1)
+        if self.token_bucket:
+            self.token_bucket.level = min(self.token_bucket.capacity, self.token_bucket.level + tokens)
+
+    def _floor(self, bucket: TokenBucket, lane: int, amount: float) -> float:
+        """Units a request in this lane must leave in the bucket."""
+        if lane == LANE_INTERACTIVE:
+            return 0.0
+        return min(bucket.capacity * self.interactive_reserve_fraction, bucket.capacity - amount)
+
+    def _dispatch(self):
+        """Grants queued requests in priority order while the buckets allow; schedules a wake-up for the rest."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        for bucket in (self.request_bucket, self.token_bucket):
+            if bucket:
+                bucket.refill()
+
+        while self._waiters:
+            lane, _, tokens, future = self._waiters[0]
+            if future.done(): # Cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+
+            wait_seconds = 0.0
+            if self.request_bucket:
+                wait_seconds = self.request_bucket.seconds_until_available(1, self._floor(self.request_bucket, lane, 1))
+            if self.token_bucket:
+                wait_seconds = max(wait_seconds, self.token_bucket.seconds_until_available(tokens, self._floor(self.token_bucket, lane, tokens)))
+            if wait_seconds > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait_seconds, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            if self.request_bucket:
+                self.request_bucket.level -= 1
+            if self.token_bucket:
+                self.token_bucket.level -= tokens
+            future.set_result(None)
+
+_rate_limiter: Optional[OpenAIRateLimiter] = None
+
+def get_openai_rate_limiter() -> OpenAIRateLimiter:
+    """Returns the process-wide limiter shared by every LLMService instance, creating it from ConfigService on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = OpenAIRateLimiter(
+            requests_per_minute=ConfigService.get_openai_requests_per_minute(),
+            tokens_per_minute=ConfigService.get_openai_tokens_per_minute(),
+            interactive_reserve_fraction=ConfigService.get_openai_interactive_reserve_fraction()
+        )
+    return _rate_limiter
@@ -0,0 +1,92 @@
+import logging
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional
+
+import openai
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server-side failures
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+class LLMDeadlineExceededError(Exception):
+    """Raised when a task's overall deadline leaves no time for another attempt."""
+
+class LLMStreamInterruptedError(Exception):
+    """Raised when a streamed completion fails after part of it was already yielded."""
+
+def is_retryable_error(error: BaseException) -> bool:
+    """True for transient OpenAI failures (timeouts, connection errors, 429s, 5xx). Quota exhaustion is not transient."""
+    if isinstance(error, (openai.APIConnectionError, asyncio.TimeoutError)): # Includes openai.APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        if error.status_code == 429 and getattr(error, "code", None) == "insufficient_quota":
+            return False
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The server's Retry-After hint in seconds, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float, rng: Callable[[], float] = random.random) -> float:
+    """Full-jitter exponential backoff: a random delay in [0, min(max, base * 2^attempt)]."""
+    return rng() * min(max_seconds, base_seconds * (2 ** attempt))
+
+async def hedged_call(
+    request: Callable[[], Awaitable[Any]],
+    hedge_after_seconds: float,
+    on_hedge: Optional[Callable[[], Awaitable[None]]] = None,
+    label: str = "request"
+) -> Any:
+    """
+    Runs request(); if it has not finished after hedge_after_seconds, starts a second identical request and returns
+    whichever succeeds first, cancelling the other. Raises the last error if both fail.
+    on_hedge runs before the second request is sent (e.g. to reserve rate-limit budget).
+    """
+    first = asyncio.ensure_future(request())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after_seconds)
+        if done:
+            return first.result()
+
+        if on_hedge:
+            await on_hedge()
+        metrics.increment("llm.hedges", label=label)
+        logger.info(f"{label} exceeded its {hedge_after_seconds:.2f}s hedge budget; sending a hedge request.")
+        second = asyncio.ensure_future(request())
+        tasks.add(second)
+
+        last_error: Optional[BaseException] = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        metrics.increment("llm.hedge_wins", label=label)
+                    return task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -4,6 +4,10 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from telegram.ext import Application
 from app.persistence.database import AsyncSessionLocal
 from app.core.proposal_service import ProposalService
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import LANE_BACKGROUND
+from app.services.usage_accounting import flush_llm_usage, llm_usage_source
+from app.config import ConfigService
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +22,7 @@ async def start_scheduler_async(application: Application):
     if not scheduler.running:
         try:
             add_deadline_check_job()
+            add_llm_usage_flush_job()
             scheduler.start()
             logger.info("APScheduler started successfully with jobs.")
         except Exception as e:
@@ -44,8 +49,10 @@ async def check_proposal_deadlines_job():
 
     async with AsyncSessionLocal() as session:
         try:
-            proposal_service = ProposalService(session, bot_app=_bot_app)
-            processed_proposals = await proposal_service.process_expired_proposals()
+            # Deadline summarization is background work; it yields OpenAI capacity to interactive commands
+            proposal_service = ProposalService(session, bot_app=_bot_app, llm_service=LLMService(lane=LANE_BACKGROUND))
+            with llm_usage_source("deadline_check_job"):
+                processed_proposals = await proposal_service.process_expired_proposals()
             if processed_proposals:
                 logger.info(f"Deadline check job processed {len(processed_proposals)} proposals.")
             else:
@@ -67,6 +74,28 @@ def add_deadline_check_job():
     except Exception as e:
         logger.error(f"Error adding deadline_check_job to scheduler: {e}", exc_info=True)
 
+async def flush_llm_usage_job():
+    """Job to persist the in-memory per-command LLM usage totals."""
+    try:
+        await flush_llm_usage()
+    except Exception as e:
+        logger.error(f"Error in flush_llm_usage_job: {e}", exc_info=True)
+
+def add_llm_usage_flush_job():
+    """Adds the LLM usage flush job to the scheduler."""
+    interval_seconds = ConfigService.get_llm_usage_flush_interval_seconds()
+    try:
+        scheduler.add_job(
+            flush_llm_usage_job,
+            'interval',
+            seconds=interval_seconds,
+            id="llm_usage_flush_job",
+            replace_existing=True
+        )
+        logger.info(f"Job 'llm_usage_flush_job' added to scheduler. Interval: {interval_seconds} seconds.")
+    except Exception as e:
+        logger.error(f"Error adding llm_usage_flush_job to scheduler: {e}", exc_info=True)
+
 # Example of how to add a job (will be done in Task 5.2)
 # def add_my_job(func, *args, **kwargs):
 #     """Adds a job to the scheduler."""
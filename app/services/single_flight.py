@@ -0,0 +1,51 @@
+import logging
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def normalize_for_coalescing(text: str, casefold: bool = False) -> str:
+    """Collapses whitespace (and optionally case) so trivially different inputs share one in-flight call."""
+    normalized = " ".join(text.split())
+    return normalized.casefold() if casefold else normalized
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a call for a key is in flight, later callers await the same result
+    instead of starting their own. Nothing is cached; the key is forgotten as soon as the call finishes, so a
+    result is only ever shared between callers that overlapped in time.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns call()'s result, sharing one execution among concurrent callers with the same key.
+        Followers get a deep copy so no caller can mutate another's result. A caller that is cancelled
+        does not cancel the shared call for the others.
+        """
+        future = self._in_flight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+
+            def _forget(done: asyncio.Future, key=key):
+                if self._in_flight.get(key) is done:
+                    del self._in_flight[key]
+                if not done.cancelled():
+                    done.exception() # Mark the exception retrieved even if every waiter went away
+            future.add_done_callback(_forget)
+        else:
+            metrics.increment("llm.coalesced_calls", flight=self.name, task=str(key[0]) if isinstance(key, tuple) else self.name)
+
+        result = await asyncio.shield(future)
+        return result if is_leader else copy.deepcopy(result)
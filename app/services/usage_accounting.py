@@ -0,0 +1,124 @@
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+UNTAGGED_SOURCE = "untagged"
+
+# The command or job an OpenAI call is made on behalf of, e.g. "/ask", "deadline_check_job", "ingestion".
+# Context variables follow asyncio tasks, so tasks spawned while handling a command inherit its tag.
+_usage_source: ContextVar[str] = ContextVar("llm_usage_source", default=UNTAGGED_SOURCE)
+
+def current_usage_source() -> str:
+    return _usage_source.get()
+
+def set_usage_source(source: str) -> Token:
+    """Tags every LLM call made from the current context (and tasks it spawns) with `source`."""
+    return _usage_source.set(source)
+
+@contextmanager
+def llm_usage_source(source: str) -> Iterator[None]:
+    """Tags LLM calls made inside the block with `source`, restoring the previous tag afterwards."""
+    token = _usage_source.set(source)
+    try:
+        yield
+    finally:
+        _usage_source.reset(token)
+
+class UsageTotals(NamedTuple):
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_seconds: float = 0.0
+
+    def add(self, other: "UsageTotals") -> "UsageTotals":
+        return UsageTotals(*(mine + theirs for mine, theirs in zip(self, other)))
+
+UsageKey = Tuple[str, str, str] # (source, task, model)
+
+class UsageAccumulator:
+    """
+    In-memory per-(source, task, model) totals of OpenAI usage since the last flush.
+    Recording is a dict update, so it adds nothing measurable to a call; flush_llm_usage() persists the totals.
+    """
+    def __init__(self):
+        self._totals: Dict[UsageKey, UsageTotals] = {}
+        self._lock = threading.Lock() # Scripts may call LLMService from worker threads
+
+    def record(
+        self,
+        task: str,
+        model: str,
+        latency_seconds: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cost_usd: float = 0.0,
+        success: bool = True,
+        source: Optional[str] = None
+    ):
+        key = (source or current_usage_source(), task, model)
+        delta = UsageTotals(
+            calls=1,
+            errors=0 if success else 1,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost_usd=cost_usd,
+            latency_seconds=latency_seconds
+        )
+        with self._lock:
+            self._totals[key] = self._totals.get(key, UsageTotals()).add(delta)
+
+    def drain(self) -> Dict[UsageKey, UsageTotals]:
+        """Returns and clears the totals accumulated so far."""
+        with self._lock:
+            totals, self._totals = self._totals, {}
+        return totals
+
+    def restore(self, totals: Dict[UsageKey, UsageTotals]):
+        """Merges drained totals back, e.g. after a failed flush, so no usage is lost."""
+        with self._lock:
+            for key, value in totals.items():
+                self._totals[key] = self._totals.get(key, UsageTotals()).add(value)
+
+    def pending(self) -> Dict[UsageKey, UsageTotals]:
+        with self._lock:
+            return dict(self._totals)
+
+usage_accumulator = UsageAccumulator()
+
+async def flush_llm_usage() -> int:
+    """
+    Writes the accumulated usage to Postgres as one row per (source, task, model) for this flush period.
+    Returns the number of rows written. On failure the totals are kept in memory for the next flush.
+    """
+    # Imported here so LLMService (which records usage) can be imported, e.g. by offline benchmarks, without a database
+    from app.persistence.database import AsyncSessionLocal
+    from app.persistence.repositories.llm_usage_repository import LLMUsageRepository
+
+    totals = usage_accumulator.drain()
+    if not totals:
+        return 0
+
+    period_end = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as session:
+        try:
+            await LLMUsageRepository(session).add_usage_rows(
+                [(source, task, model, value) for (source, task, model), value in totals.items()],
+                recorded_at=period_end
+            )
+            await session.commit()
+        except Exception as e:
+            logger.error(f"Error flushing LLM usage ({len(totals)} rows); keeping it for the next flush: {e}", exc_info=True)
+            await session.rollback()
+            usage_accumulator.restore(totals)
+            return 0
+
+    logger.info(f"Flushed LLM usage: {len(totals)} row(s).")
+    return len(totals)
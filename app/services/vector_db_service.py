@@ -1,7 +1,10 @@
 import logging
+import hashlib
+from collections import OrderedDict
 import chromadb
 from chromadb.utils import embedding_functions
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+from app.config import ConfigService
 
 # Potentially load model name from config if it needs to be configurable
 # For now, let's assume we use the same OpenAI model as in LLMService for consistency
@@ -18,8 +21,44 @@ CHROMA_DATA_PATH = "./chroma_db_store"
 DEFAULT_COLLECTION_NAME = "general_context"
 PROPOSALS_COLLECTION_NAME = "proposals_content"  # New constant for proposals collection
 
+# Chunk storage modes (see ConfigService.get_chunk_storage_mode)
+CHUNK_STORAGE_TEXT = "text"
+CHUNK_STORAGE_OFFSETS = "offsets"
+
+def make_chunk_id(doc_id: int, chunk_text: str) -> str:
+    """Content-addressed ChromaDB ID for a document chunk: identical chunk text keeps the same ID across edits."""
+    return f"doc_{doc_id}_chunk_{hashlib.sha256(chunk_text.encode('utf-8')).hexdigest()[:16]}"
+
+class _DocumentTextCache:
+    """Small LRU of document texts, used to cut snippets out of documents in "offsets" storage mode."""
+    def __init__(self, max_documents: int):
+        self.max_documents = max_documents
+        self._texts: "OrderedDict[int, str]" = OrderedDict()
+
+    def get(self, document_id: int) -> Optional[str]:
+        text = self._texts.get(document_id)
+        if text is not None:
+            self._texts.move_to_end(document_id)
+        return text
+
+    def put(self, document_id: int, text: str):
+        self._texts[document_id] = text
+        self._texts.move_to_end(document_id)
+        while len(self._texts) > self.max_documents:
+            self._texts.popitem(last=False)
+
+    def invalidate(self, document_id: int):
+        self._texts.pop(document_id, None)
+
+_document_text_cache = _DocumentTextCache(ConfigService.get_document_text_cache_size())
+
+def invalidate_document_text(document_id: int):
+    """Drops a document's cached text; call whenever its raw_content changes."""
+    _document_text_cache.invalidate(document_id)
+
 class VectorDBService:
-    def __init__(self, path: str = CHROMA_DATA_PATH):
+    def __init__(self, path: str = CHROMA_DATA_PATH, storage_mode: Optional[str] = None):
+        self.storage_mode = storage_mode or ConfigService.get_chunk_storage_mode()
         try:
             self.client = chromadb.PersistentClient(path=path)
             # We can also use chromadb.HttpClient(host='localhost', port=8000) if running a server
@@ -45,7 +84,8 @@ class VectorDBService:
         text_chunks: List[str],
         embeddings: List[List[float]],
         chunk_metadatas: Optional[List[Dict[str, Any]]] = None, # e.g., {"document_sql_id": doc_id, "chunk_index": i}
-        collection_name: str = DEFAULT_COLLECTION_NAME
+        collection_name: str = DEFAULT_COLLECTION_NAME,
+        chunk_ids: Optional[List[str]] = None # e.g., from make_chunk_id; defaults to positional IDs
     ) -> Optional[List[str]]:
         """
         Stores text chunks and their pre-computed embeddings in the specified ChromaDB collection.
@@ -61,29 +101,50 @@ class VectorDBService:
         if chunk_metadatas and len(text_chunks) != len(chunk_metadatas):
             logger.error("Number of text chunks and chunk_metadatas must be the same if metadata is provided.")
             return None
+        if chunk_ids and len(text_chunks) != len(chunk_ids):
+            logger.error("Number of text chunks and chunk_ids must be the same if chunk_ids are provided.")
+            return None
 
         try:
             collection = self._get_or_create_collection(collection_name)
             
+            # In "offsets" mode, chunks that carry chunk_start/chunk_end are stored without their text;
+            # search_similar_chunks cuts the snippet out of the document's raw_content instead.
+            store_offsets_only = (
+                self.storage_mode == CHUNK_STORAGE_OFFSETS
+                and bool(chunk_metadatas)
+                and all(meta and "chunk_start" in meta and "chunk_end" in meta for meta in chunk_metadatas)
+            )
+
             ids_for_chroma = []
             final_metadatas = []
 
             for i, chunk in enumerate(text_chunks):
-                chroma_id = f"doc_{doc_id}_chunk_{i}" # Create a unique ID for ChromaDB
+                chroma_id = chunk_ids[i] if chunk_ids else f"doc_{doc_id}_chunk_{i}" # Create a unique ID for ChromaDB
                 ids_for_chroma.append(chroma_id)
                 
-                metadata = {"document_sql_id": str(doc_id), "chunk_text_preview": chunk[:100]} # Basic metadata
+                metadata = {"document_sql_id": str(doc_id)} # Basic metadata
+                if not store_offsets_only:
+                    metadata["chunk_text_preview"] = chunk[:100]
                 if chunk_metadatas and chunk_metadatas[i]:
                     metadata.update(chunk_metadatas[i]) # Merge with provided metadata
                 final_metadatas.append(metadata)
 
-            logger.info(f"VectorDBService: About to add to collection '{collection_name}' for doc ID {doc_id}. Final metadatas: {final_metadatas}, Chroma IDs: {ids_for_chroma}")
-            collection.add(
-                embeddings=embeddings,
-                documents=text_chunks, # Storing the text itself for potential retrieval
-                metadatas=final_metadatas,
-                ids=ids_for_chroma
-            )
+            logger.info(f"VectorDBService: About to add {len(ids_for_chroma)} chunks to collection '{collection_name}' for doc ID {doc_id} (offsets only: {store_offsets_only}).")
+            logger.debug(f"VectorDBService: Chroma IDs for doc ID {doc_id}: {ids_for_chroma}")
+            if store_offsets_only:
+                collection.add(
+                    embeddings=embeddings,
+                    metadatas=final_metadatas,
+                    ids=ids_for_chroma
+                )
+            else:
+                collection.add(
+                    embeddings=embeddings,
+                    documents=text_chunks, # Storing the text itself for potential retrieval
+                    metadatas=final_metadatas,
+                    ids=ids_for_chroma
+                )
             logger.info(f"Successfully stored {len(text_chunks)} embeddings for document ID {doc_id} in collection '{collection_name}'. Chroma IDs: {ids_for_chroma}")
             return ids_for_chroma
         except Exception as e:
@@ -95,11 +156,14 @@ class VectorDBService:
         query_embedding: List[float],
         top_n: int = 5,
         proposal_id_filter: Optional[int] = None, # To filter by proposal_id if linked in metadata
-        collection_name: str = DEFAULT_COLLECTION_NAME
+        collection_name: str = DEFAULT_COLLECTION_NAME,
+        content_loader: Optional[Callable[[int], Awaitable[Optional[str]]]] = None # document_sql_id -> raw_content, for "offsets" mode
     ) -> Optional[List[Dict[str, Any]]]:
         """
         Searches for text chunks in ChromaDB similar to the given query_embedding.
         Can optionally filter by proposal_id if documents are linked to proposals.
+        In "offsets" storage mode the chunk text is not transferred from ChromaDB; it is cut out of
+        the document text (loaded once via content_loader and cached) using the stored offsets.
         Returns a list of search results, each containing metadata and distance, or None.
         """
         if not self.client:
@@ -123,11 +187,12 @@ class VectorDBService:
                 where_filter = {"proposal_id": str(proposal_id_filter)}
                 logger.info(f"Searching with filter: {where_filter}")
             
+            offsets_mode = self.storage_mode == CHUNK_STORAGE_OFFSETS
             results = collection.query(
                 query_embeddings=[query_embedding],
                 n_results=top_n,
                 where=where_filter, # Apply filter if provided
-                include=['metadatas', 'documents', 'distances'] # Specify what to include in results
+                include=['metadatas', 'distances'] if offsets_mode else ['metadatas', 'documents', 'distances'] # Specify what to include in results
             )
             
             # Results is a dict-like object, extract the relevant parts
@@ -150,6 +215,9 @@ class VectorDBService:
                         "document_content": results['documents'][0][i] if results.get('documents') else None,
                     }
                     search_hits.append(hit)
+
+            if offsets_mode and search_hits:
+                await self._materialize_chunk_texts(collection, search_hits, content_loader)
             
             logger.info(f"Found {len(search_hits)} similar chunks for query.")
             return search_hits
@@ -157,6 +225,43 @@ class VectorDBService:
             logger.error(f"Error searching for similar chunks: {e}", exc_info=True)
             return None
 
+    async def _materialize_chunk_texts(
+        self,
+        collection,
+        search_hits: List[Dict[str, Any]],
+        content_loader: Optional[Callable[[int], Awaitable[Optional[str]]]]
+    ):
+        """Fills each hit's document_content from its (document_sql_id, chunk_start, chunk_end) metadata."""
+        missing_ids = []
+        for hit in search_hits:
+            metadata = hit.get("metadata") or {}
+            start, end = metadata.get("chunk_start"), metadata.get("chunk_end")
+            text = None
+            if content_loader and start is not None and end is not None:
+                try:
+                    document_id = int(metadata.get("document_sql_id"))
+                except (TypeError, ValueError):
+                    document_id = None
+                if document_id is not None:
+                    document_text = _document_text_cache.get(document_id)
+                    if document_text is None:
+                        document_text = await content_loader(document_id)
+                        if document_text is not None:
+                            _document_text_cache.put(document_id, document_text)
+                    if document_text is not None and end <= len(document_text):
+                        text = document_text[start:end]
+            hit["document_content"] = text
+            if text is None:
+                missing_ids.append(hit["id"])
+
+        if missing_ids:
+            # Chunks stored before "offsets" mode was enabled still carry their text in ChromaDB
+            fallback = collection.get(ids=missing_ids, include=['documents'])
+            texts_by_id = dict(zip(fallback.get('ids') or [], fallback.get('documents') or []))
+            for hit in search_hits:
+                if hit["document_content"] is None:
+                    hit["document_content"] = texts_by_id.get(hit["id"])
+
     async def get_document_chunks(
         self,
         sql_document_id: int,
@@ -164,6 +269,7 @@ class VectorDBService:
     ) -> Optional[List[str]]:
         """
         Retrieves all text chunks from ChromaDB associated with a given SQL document ID.
+        Chunks stored in "offsets" mode have no text in ChromaDB and come back as None.
         Returns a list of text chunks if successful, else None.
         """
         if not self.client:
@@ -192,6 +298,79 @@ class VectorDBService:
             logger.error(f"Error retrieving chunks for SQL document ID {sql_document_id}: {e}", exc_info=True)
             return None
 
+    async def get_document_chunk_ids(
+        self,
+        sql_document_id: int,
+        collection_name: str = DEFAULT_COLLECTION_NAME
+    ) -> Optional[List[str]]:
+        """
+        Retrieves the ChromaDB IDs of all chunks associated with a given SQL document ID.
+        Returns a list of IDs (empty if none are stored), or None on error.
+        """
+        if not self.client:
+            logger.error("VectorDBService client not initialized. Cannot retrieve chunk IDs.")
+            return None
+
+        try:
+            collection = self._get_or_create_collection(collection_name)
+            results = collection.get(
+                where={"document_sql_id": str(sql_document_id)},
+                include=[] # IDs are always returned; we don't need documents or embeddings
+            )
+            return list(results.get('ids') or []) if results else []
+        except Exception as e:
+            logger.error(f"Error retrieving chunk IDs for SQL document ID {sql_document_id}: {e}", exc_info=True)
+            return None
+
+    async def update_chunk_metadatas(
+        self,
+        chunk_ids: List[str],
+        metadatas: List[Dict[str, Any]],
+        collection_name: str = DEFAULT_COLLECTION_NAME
+    ) -> bool:
+        """
+        Replaces the metadata of existing chunks without touching their documents or embeddings.
+        Used to refresh e.g. chunk_index or title on chunks that survive a document edit.
+        """
+        if not self.client:
+            logger.error("VectorDBService client not initialized. Cannot update chunk metadatas.")
+            return False
+        if len(chunk_ids) != len(metadatas):
+            logger.error("Number of chunk_ids and metadatas must be the same.")
+            return False
+        if not chunk_ids:
+            return True
+
+        try:
+            collection = self._get_or_create_collection(collection_name)
+            collection.update(ids=chunk_ids, metadatas=metadatas)
+            logger.info(f"Updated metadata of {len(chunk_ids)} chunks in collection '{collection_name}'.")
+            return True
+        except Exception as e:
+            logger.error(f"Error updating metadata of {len(chunk_ids)} chunks in collection '{collection_name}': {e}", exc_info=True)
+            return False
+
+    async def delete_chunks(
+        self,
+        chunk_ids: List[str],
+        collection_name: str = DEFAULT_COLLECTION_NAME
+    ) -> bool:
+        """Deletes the given chunks (by ChromaDB ID) from the collection."""
+        if not self.client:
+            logger.error("VectorDBService client not initialized. Cannot delete chunks.")
+            return False
+        if not chunk_ids:
+            return True
+
+        try:
+            collection = self._get_or_create_collection(collection_name)
+            collection.delete(ids=chunk_ids)
+            logger.info(f"Deleted {len(chunk_ids)} chunks from collection '{collection_name}'.")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting {len(chunk_ids)} chunks from collection '{collection_name}': {e}", exc_info=True)
+            return False
+
     async def add_proposal_embedding(
         self, 
         proposal_id: int, 
@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime, timedelta, timezone
 from typing import TYPE_CHECKING
 
 from telegram import Update
@@ -6,10 +7,11 @@ from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, Mess
 
 # Direct imports for services needed
 from app.config import ConfigService
-from app.core.context_service import ContextService
-from app.services.llm_service import LLMService
-from app.services.vector_db_service import VectorDBService
-from app.persistence.database import AsyncSessionLocal
+from app.services.ingestion_worker import submit_ingestion_job
+from app.persistence.database import AsyncSessionLocal, pool_status
+from app.persistence.repositories.llm_usage_repository import LLMUsageRepository
+from app.services.usage_accounting import flush_llm_usage
+from app.utils.metrics import metrics
 
 from app.telegram_handlers.conversation_defs import ADD_GLOBAL_DOC_CONTENT, ADD_GLOBAL_DOC_TITLE
 
@@ -72,45 +74,31 @@ async def handle_add_global_doc_title(update: Update, context: ContextTypes.DEFA
         await update.message.reply_text("An error occurred. Please try starting over with /add_global_doc.")
         return ConversationHandler.END
 
-    config_service = ConfigService() # Instantiate directly
-    try:
-        llm_service = LLMService()
-        vector_db_service = VectorDBService()
-    except AttributeError as e: # Catch if config_service.get_openai_api_key() doesn't exist
-        logger.error(f"Configuration error for LLM/VectorDB service: {e}", exc_info=True)
-        await update.message.reply_text("A configuration error occurred with a core service (API key missing?). Please contact an admin.")
-        return ConversationHandler.END
-    except Exception as e:
-        logger.error(f"Failed to initialize LLM or VectorDB service in admin_command_handler: {e}", exc_info=True)
-        await update.message.reply_text("A configuration error occurred with a core service. Please contact an admin.")
-        return ConversationHandler.END
-
     source_type_suffix = "_text"
     if doc_content_or_url.startswith("http://") or doc_content_or_url.startswith("https://"):
         source_type_suffix = "_url"
     
     final_source_type = f"admin_global{source_type_suffix}"
 
-    document_id_stored = None
+    # Fetching, chunking and embedding can take a while (especially for URLs), so hand the work
+    # to the background ingestion worker and reply right away with the job ID.
     try:
-        async with AsyncSessionLocal() as session:
-            context_service = ContextService(
-                db_session=session, 
-                llm_service=llm_service, 
-                vector_db_service=vector_db_service
-            )
-            document_id_stored = await context_service.process_and_store_document(
-                content_source=doc_content_or_url, 
-                source_type=final_source_type, # Use the more specific source type 
-                title=title,
-                proposal_id=None 
+        job_id = await submit_ingestion_job(
+            requester_telegram_id=update.effective_user.id,
+            content_source=doc_content_or_url,
+            source_type=final_source_type, # Use the more specific source type
+            title=title,
+            proposal_id=None
+        )
+        if job_id is not None:
+            await update.message.reply_text(
+                f"Global document '{title}' is being processed in the background (Job ID: {job_id}). "
+                f"I'll message you when it's ready. Check progress anytime with /doc_status {job_id}."
             )
-        if document_id_stored is not None:
-            await update.message.reply_text(f"Global document '{title}' (ID: {document_id_stored}) added successfully.")
         else:
-            await update.message.reply_text("Failed to add the global document. Please check the logs or try again.")
+            await update.message.reply_text("Failed to queue the global document for processing. Please try again later.")
     except Exception as e:
-        logger.error(f"Error processing and storing global document: {e}", exc_info=True)
+        logger.error(f"Error submitting ingestion job for global document: {e}", exc_info=True)
         await update.message.reply_text("An error occurred while adding the document. Please try again later.")
     finally:
         if 'add_global_doc_content_or_url' in context.user_data:
@@ -140,6 +128,64 @@ def get_add_global_doc_conversation_handler() -> ConversationHandler:
         fallbacks=[CommandHandler("cancel", cancel_add_global_doc)],
     )
 
+STATS_DEFAULT_DAYS = 7
+STATS_TOP_SOURCES = 10
+
+def format_db_pool_stats() -> str:
+    """One line on the database connection pool: connections in use and recent checkout waits."""
+    status = pool_status()
+    if status is None:
+        return "DB pool: disabled (one connection per session)."
+    line = f"DB pool: {status['checked_out']} in use, {status['checked_in']} idle, size {status['size']} (+{status['overflow']} overflow)"
+    wait = metrics.get_summary("db.pool_checkout_wait_seconds")
+    if wait:
+        line += f", checkout wait p50 {wait['p50'] * 1000:.1f} ms, p95 {wait['p95'] * 1000:.1f} ms"
+    timeouts = metrics.get_counter("db.pool_checkout_timeouts")
+    if timeouts:
+        line += f", {int(timeouts)} checkout timeouts"
+    return line + "."
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Shows the commands and jobs that used the most OpenAI tokens (by estimated cost) and the DB pool state. Usage: /stats [days]"""
+    user_id = update.effective_user.id
+    if user_id not in ConfigService.get_admin_ids():
+        await update.message.reply_text("Access Denied: This command is for administrators only.")
+        return
+
+    days = STATS_DEFAULT_DAYS
+    if context.args:
+        try:
+            days = max(1, int(context.args[0]))
+        except ValueError:
+            await update.message.reply_text("Usage: /stats [days]")
+            return
+
+    await flush_llm_usage() # Include usage recorded since the last scheduled flush
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await LLMUsageRepository(session).get_usage_by_source(since=since, limit=STATS_TOP_SOURCES)
+    except Exception as e:
+        logger.error(f"Error loading LLM usage stats for user {user_id}: {e}", exc_info=True)
+        await update.message.reply_text("Sorry, I couldn't load usage stats right now.")
+        return
+
+    if not rows:
+        await update.message.reply_text(f"No LLM usage recorded in the last {days} day(s).\n\n{format_db_pool_stats()}")
+        return
+
+    total_cost = sum(row["cost_usd"] or 0 for row in rows)
+    lines = [f"LLM usage, last {days} day(s), top {len(rows)} by cost (${total_cost:.4f} total):", ""]
+    for row in rows:
+        calls = row["calls"] or 0
+        avg_latency = (row["latency_seconds"] or 0) / calls if calls else 0.0
+        lines.append(
+            f"{row['source']}: ${row['cost_usd'] or 0:.4f}, {calls} calls ({row['errors'] or 0} errors), "
+            f"{row['prompt_tokens'] or 0}+{row['completion_tokens'] or 0} tokens, avg {avg_latency:.2f}s"
+        )
+    lines.extend(["", format_db_pool_stats()])
+    await update.message.reply_text("\n".join(lines))
+
 # TODO: Implement admin-onlycommand handlers here:
 # - add_global_doc
 # - view_global_docs
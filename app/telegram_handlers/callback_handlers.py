@@ -1,5 +1,6 @@
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from typing import Optional
+from telegram import Update, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from telegram.constants import ParseMode
 
@@ -7,14 +8,17 @@ from app.telegram_handlers.conversation_defs import (
     COLLECT_PROPOSAL_TYPE, COLLECT_OPTIONS, ASK_DURATION,
     USER_DATA_PROPOSAL_TYPE, PROPOSAL_TYPE_CALLBACK,
     VOTE_CALLBACK_PREFIX, PROPOSAL_FILTER_CALLBACK_PREFIX,
-    PROPOSAL_FILTER_OPEN, PROPOSAL_FILTER_CLOSED
+    PROPOSAL_FILTER_OPEN, PROPOSAL_FILTER_CLOSED, PROPOSALS_PAGE_CALLBACK_PREFIX,
+    MY_VOTES_PAGE_CALLBACK_PREFIX
 )
 from app.persistence.models.proposal_model import ProposalType, ProposalStatus
 from app.core.submission_service import SubmissionService
 from app.core.proposal_service import ProposalService
-from app.persistence.database import AsyncSessionLocal
+from app.persistence.database import AsyncSessionLocal, update_session
 from app.core.user_service import UserService
 from app.utils import telegram_utils
+from app.utils.pagination import PAGE_NEXT, PageCursor
+from app.telegram_handlers.session_middleware import with_update_session
 
 # Placeholder for imports that will be needed soon:
 # from app.core.services import AppServiceFactory # Or direct service instantiation
@@ -94,6 +98,7 @@ async def handle_collect_proposal_type_callback(update: Update, context: Context
 
     return next_state 
 
+@with_update_session
 async def handle_vote_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handles callback queries for voting on multiple-choice proposals.
@@ -125,14 +130,14 @@ async def handle_vote_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 
         logger.info(f"Vote received: User {user_telegram_id} selected option {option_index} for proposal {proposal_id}.")
 
-        async with AsyncSessionLocal() as session:
+        # One session for the whole update; with_update_session commits the user upsert and the vote together
+        async with update_session() as session:
             user_service = UserService(session)
             await user_service.register_user_interaction(
                 telegram_id=user_telegram_id,
                 username=user_username,
                 first_name=user_first_name
             )
-            await session.commit() # Commit user interaction separately
 
             submission_service = SubmissionService(session)
             success_for_alert, response_message_text = await submission_service.record_vote(
@@ -140,7 +145,6 @@ async def handle_vote_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 submitter_telegram_id=user_telegram_id,
                 option_index=option_index
             )
-            # record_vote now handles its own commit for the submission, so no session.commit() here for that.
 
     except ValueError as ve:
         logger.error(f"Error parsing vote callback data '{callback_data}': {ve}", exc_info=True)
@@ -198,66 +202,106 @@ async def handle_proposal_filter_callback(update: Update, context: ContextTypes.
                 logger.error(f"Error editing message (unknown action): {e}")    
         return
 
+    await _show_proposals_page(query, status_to_fetch, display_title)
+    logger.info(f"User {query.from_user.id} viewed {filter_type} proposals via callback.")
+
+_PROPOSAL_LIST_TITLES = {
+    ProposalStatus.OPEN.value: "Open Proposals",
+    ProposalStatus.CLOSED.value: "Closed Proposals",
+}
+
+async def _show_proposals_page(
+    query: CallbackQuery,
+    status: ProposalStatus,
+    display_title: str,
+    cursor: Optional[PageCursor] = None,
+    direction: str = PAGE_NEXT
+) -> None:
+    """Replaces the callback's message with one page of proposals and its Prev/Next buttons."""
     try:
         async with AsyncSessionLocal() as session:
             proposal_service = ProposalService(session)
-            proposals_data = await proposal_service.list_proposals_by_status(status_to_fetch.value)
-            
-            full_message = f"*{telegram_utils.escape_markdown_v2(display_title)}:*\n\n"
-            if not proposals_data:
-                full_message += "No proposals found\\."
-            else:
-                message_parts = []
-                for prop_data in proposals_data:
-                    title_escaped = telegram_utils.escape_markdown_v2(prop_data['title'])
-                    channel_id_str = str(prop_data['target_channel_id'])
-                    channel_message_id = prop_data.get('channel_message_id')
-                    
-                    channel_display = f"Channel ID: `{telegram_utils.escape_markdown_v2(channel_id_str)}`"
-                    if channel_message_id:
-                        link = telegram_utils.create_telegram_message_link(channel_id_str, channel_message_id)
-                        if link:
-                            escaped_link_text = telegram_utils.escape_markdown_v2(f"Channel: {channel_id_str}")
-                            # Link itself should not be Markdown escaped
-                            channel_display = f"[{escaped_link_text}]({link})" # Corrected: use link variable
-                        else: # Fallback if link couldn't be formed, but message_id exists
-                            channel_display = f"Channel ID: `{telegram_utils.escape_markdown_v2(channel_id_str)}` (msg: {channel_message_id})"
-
-                    part = f"\\- *ID:* `{prop_data['id']}` *Title:* {title_escaped}\n"
-                    part += f"  {channel_display}\n"
-            
-                    if status_to_fetch == ProposalStatus.OPEN:
-                        deadline_escaped = telegram_utils.escape_markdown_v2(str(prop_data.get('deadline_date', 'N/A')))
-                        part += f"  *Voting ends:* {deadline_escaped}\n"
-                    elif status_to_fetch == ProposalStatus.CLOSED:
-                        outcome_escaped = telegram_utils.escape_markdown_v2(str(prop_data.get('outcome', 'Not Processed')))
-                        closed_date_escaped = telegram_utils.escape_markdown_v2(str(prop_data.get('closed_date', 'N/A')))
-                        part += f"  *Closed on:* {closed_date_escaped}\n"
-                        part += f"  *Outcome:* {outcome_escaped}\n"
-                    message_parts.append(part)
-                full_message += "\n".join(message_parts)
-            
-            if query.message:
-                if not full_message.strip(): # Ensure message is not empty after formatting
-                    logger.warning(f"Formatted message for {filter_type} is empty. Defaulting text.")
-                    full_message = "No proposals found or an error occurred generating the list."
-                
-                await query.edit_message_text(
-                    text=full_message,
-                    parse_mode=ParseMode.MARKDOWN_V2
+            page = await proposal_service.list_proposals_page_by_status(status.value, cursor, direction)
+
+        if query.message:
+            await query.edit_message_text(
+                text=telegram_utils.format_proposal_list_message(display_title, page.items, status.value),
+                parse_mode=ParseMode.MARKDOWN_V2,
+                reply_markup=telegram_utils.create_page_navigation_keyboard(
+                    page, f"{PROPOSALS_PAGE_CALLBACK_PREFIX}{status.value}_"
                 )
-            else:
-                logger.warning("Callback query message does not exist, cannot edit.")
+            )
+        else:
+            logger.warning("Callback query message does not exist, cannot edit.")
 
     except Exception as e:
-        logger.error(f"Error processing proposal filter callback ({filter_type}): {e}", exc_info=True)
+        logger.error(f"Error showing {status.value} proposals page: {e}", exc_info=True)
         if query.message:
             try:
                 await query.edit_message_text(text="Sorry, an error occurred while fetching proposals.")
             except Exception as edit_e:
                 logger.error(f"Error editing message on exception: {edit_e}")
 
-    logger.info(f"User {query.from_user.id} viewed {filter_type} proposals via callback.")
+async def handle_proposals_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Handles the Prev/Next buttons under a /proposals list. Callback data: proposals_page_[status]_[n|p]_[cursor]"""
+    query = update.callback_query
+    if not query:
+        logger.error("handle_proposals_page_callback called without callback_query.")
+        return
+
+    await query.answer()
+
+    status_value = (query.data or "").removeprefix(PROPOSALS_PAGE_CALLBACK_PREFIX).split("_", 1)[0]
+    parsed = telegram_utils.parse_page_callback_data(query.data, f"{PROPOSALS_PAGE_CALLBACK_PREFIX}{status_value}_")
+    if status_value not in _PROPOSAL_LIST_TITLES or not parsed:
+        logger.warning(f"Invalid callback data for proposals page: {query.data}")
+        if query.message:
+            try:
+                await query.edit_message_text(text="Invalid selection. Please try again.")
+            except Exception as e:
+                logger.error(f"Error editing message (invalid page data): {e}")
+        return
+
+    direction, cursor = parsed
+    await _show_proposals_page(query, ProposalStatus(status_value), _PROPOSAL_LIST_TITLES[status_value], cursor, direction)
+
+async def handle_my_votes_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Handles the Prev/Next buttons under a /my_votes history. Callback data: my_votes_page_[n|p]_[cursor]
+    The history shown is always that of the user pressing the button.
+    """
+    query = update.callback_query
+    if not query:
+        logger.error("handle_my_votes_page_callback called without callback_query.")
+        return
+
+    await query.answer()
+
+    parsed = telegram_utils.parse_page_callback_data(query.data, MY_VOTES_PAGE_CALLBACK_PREFIX)
+    if not parsed:
+        logger.warning(f"Invalid callback data for my_votes page: {query.data}")
+        return
+    direction, cursor = parsed
+
+    try:
+        async with AsyncSessionLocal() as session:
+            submission_service = SubmissionService(session)
+            page = await submission_service.get_user_submission_history_page(query.from_user.id, cursor, direction)
+
+        if not page.items:
+            await query.edit_message_text(text="No more submissions to show. Use /my_votes to start over.")
+            return
+        await query.edit_message_text(
+            text=telegram_utils.format_submission_history_message(page.items),
+            parse_mode=ParseMode.MARKDOWN_V2,
+            reply_markup=telegram_utils.create_page_navigation_keyboard(page, MY_VOTES_PAGE_CALLBACK_PREFIX)
+        )
+    except Exception as e:
+        logger.error(f"Error showing my_votes page for user {query.from_user.id}: {e}", exc_info=True)
+        try:
+            await query.edit_message_text(text="Sorry, something went wrong while fetching your history. Please try again later.")
+        except Exception as edit_e:
+            logger.error(f"Error editing message on exception: {edit_e}")
 
 async def handle_my_proposals_for_edit_prompt(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handles the 'My Proposals' button from the /edit_proposal prompt by displaying the user's proposals."""
@@ -275,7 +319,7 @@ async def handle_my_proposals_for_edit_prompt(update: Update, context: ContextTy
     user_id = query.from_user.id
     chat_id = query.message.chat.id
 
-    async with AsyncSessionLocal() as session:
+    async with update_session() as session: # Commits the user upsert when the block exits
         user_service = UserService(session)
         # Ensure user is registered/updated. This typically happens in command entry, but good practice here too.
         await user_service.register_user_interaction(
@@ -283,10 +327,6 @@ async def handle_my_proposals_for_edit_prompt(update: Update, context: ContextTy
             username=query.from_user.username, 
             first_name=query.from_user.first_name
         )
-        # No explicit commit needed here if register_user_interaction handles its transaction
-        # or if the main purpose is read-only for proposals.
-        # However, my_proposals_command does commit after user registration, so let's be consistent.
-        await session.commit()
 
         proposal_service = ProposalService(session)
         proposals_list_data = await proposal_service.list_proposals_by_proposer(user_id)
@@ -1,17 +1,21 @@
 import logging
+import re
+import time
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from telegram.constants import ParseMode, ChatType
 from typing import Optional, List, Dict, Any
 
 from app.core.user_service import UserService
-from app.persistence.database import AsyncSessionLocal, get_session
+from app.persistence.database import AsyncSessionLocal, get_session, update_session
 from app.core.proposal_service import ProposalService
 from app.core.context_service import ContextService
 from app.services.llm_service import LLMService
 from app.services.vector_db_service import VectorDBService
 from app.config import ConfigService
-from app.utils.telegram_utils import escape_markdown_v2
+from app.utils.telegram_utils import escape_markdown_v2, StreamingMessageEditor
+from app.utils.metrics import metrics
+from app.services.usage_accounting import set_usage_source
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +25,21 @@ logger = logging.getLogger(__name__)
 config_service = ConfigService()
 # Note: Consider dependency injection or a context-based service provider for more complex scenarios
 
+def usage_source_for_update(update: Update) -> str:
+    """Names the command or interaction an update belongs to, e.g. "/ask", "callback:vote" or "message"."""
+    if update.callback_query and update.callback_query.data:
+        # Drop IDs so e.g. every vote button shares one source: "vote_12_3" -> "vote", "/view_doc 5" -> "/view_doc"
+        return "callback:" + re.sub(r"[_\s]\d.*$", "", update.callback_query.data)
+    message = update.effective_message
+    text = message.text if message and message.text else ""
+    if text.startswith("/"):
+        return text.split()[0].split("@")[0].lower()
+    return "message" if message else "other"
+
+async def tag_llm_usage_source(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Runs before every other handler (group -1) so LLM usage is attributed to the command that caused it."""
+    set_usage_source(usage_source_for_update(update))
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Sends a welcome message when the /start command is issued, handles deep links."""
     if not update.effective_user or not update.message:
@@ -36,7 +55,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         payload = context.args[0]
         logger.info(f"User {user.id} started bot with payload: {payload}")
 
-    async with AsyncSessionLocal() as session:
+    async with update_session() as session: # Commits the upsert, so later votes can reference the user
         user_service = UserService(session)
         await user_service.register_user_interaction(
             telegram_id=user.id,
@@ -156,6 +175,7 @@ async def ask_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         await update.message.reply_text("Your question seems to be empty. Please provide a question.")
         return
 
+    start_time = time.monotonic()
     await update.message.reply_chat_action(action='typing')
 
     # Determine if the first argument is a proposal ID for specific document RAG
@@ -175,7 +195,12 @@ async def ask_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
             logger.info("First argument not a proposal ID, proceeding with intelligent ask for the full query.")
             pass # proposal_id_filter remains None, question_text_for_service is already full query
 
+    # The answer is streamed into this placeholder as it is generated (edits are throttled, see ConfigService)
+    placeholder_message = None
     try:
+        placeholder_message = await update.message.reply_text("Thinking…")
+        editor = StreamingMessageEditor(placeholder_message, ConfigService.get_ask_stream_edit_interval_seconds())
+
         async with AsyncSessionLocal() as session:
             context_service = ContextService(
                 db_session=session,
@@ -191,17 +216,18 @@ async def ask_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 logger.info(f"Calling get_answer_for_question for prop ID {proposal_id_filter} and question '{question_text_for_service}'")
                 answer_text, source_details = await context_service.get_answer_for_question(
                     question_text=question_text_for_service,
-                    proposal_id_filter=proposal_id_filter
+                    proposal_id_filter=proposal_id_filter,
+                    on_partial_answer=editor.update
                 )
             else:
                 # Case 2: /ask <general_question_about_proposals_or_docs> - Intelligent ask
                 logger.info(f"Calling handle_intelligent_ask for query '{question_text_for_service}'")
                 answer_text, source_details = await context_service.handle_intelligent_ask(
                     query_text=question_text_for_service, 
-                    user_telegram_id=update.effective_user.id
+                    user_telegram_id=update.effective_user.id,
+                    on_partial_answer=editor.update
                 )
             
-            escaped_answer = escape_markdown_v2(answer_text)
             reply_markup: Optional[InlineKeyboardMarkup] = None
 
             if source_details: # source_details is List[Dict[str, Any]]
@@ -229,13 +255,25 @@ async def ask_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
                 if keyboard_rows:
                     reply_markup = InlineKeyboardMarkup(keyboard_rows)
 
-        # Ensure the message object exists before replying
-        if update.message:
-            await update.message.reply_text(escaped_answer, reply_markup=reply_markup, parse_mode='MarkdownV2')
+        await editor.finalize(answer_text or "Sorry, I couldn't generate an answer for that question.", reply_markup=reply_markup)
+
+        # Time-to-first-visible-token: from the command arriving to answer text first showing in the chat
+        if editor.first_visible_at is not None:
+            time_to_first_visible = editor.first_visible_at - start_time
+            metrics.observe("ask.time_to_first_visible_token_seconds", time_to_first_visible)
+            logger.info(f"/ask answered for user {update.effective_user.id}: first visible text after {time_to_first_visible:.2f}s, "
+                        f"complete after {time.monotonic() - start_time:.2f}s ({editor.edit_count} edit(s)).")
+        metrics.observe("ask.total_seconds", time.monotonic() - start_time)
     except Exception as e:
         logger.error(f"Error in ask_command: {e}", exc_info=True)
-        if update.message: # Ensure message object exists for error reply
-            await update.message.reply_text("Sorry, I couldn't process your request at the moment.")
+        error_text = "Sorry, I couldn't process your request at the moment."
+        try:
+            if placeholder_message:
+                await placeholder_message.edit_text(error_text)
+            elif update.message: # Ensure message object exists for error reply
+                await update.message.reply_text(error_text)
+        except Exception as reply_error:
+            logger.error(f"Error reporting /ask failure to user: {reply_error}", exc_info=True)
 
 async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handles unknown commands."""
@@ -36,6 +36,10 @@ PROPOSAL_FILTER_CALLBACK_PREFIX = "proposal_filter_"
 PROPOSAL_FILTER_OPEN = f"{PROPOSAL_FILTER_CALLBACK_PREFIX}open"
 PROPOSAL_FILTER_CLOSED = f"{PROPOSAL_FILTER_CALLBACK_PREFIX}closed"
 
+# Next/Prev buttons of paged lists: proposals_page_[status]_[n|p]_[cursor] and my_votes_page_[n|p]_[cursor]
+PROPOSALS_PAGE_CALLBACK_PREFIX = "proposals_page_"
+MY_VOTES_PAGE_CALLBACK_PREFIX = "my_votes_page_"
+
 # User data keys
 USER_DATA_PROPOSAL_TITLE = "proposal_title"
 USER_DATA_PROPOSAL_DESCRIPTION = "proposal_description"
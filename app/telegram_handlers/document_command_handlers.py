@@ -8,38 +8,40 @@ from app.persistence.database import AsyncSessionLocal
 from app.core.proposal_service import ProposalService
 from app.core.context_service import ContextService
 from app.config import ConfigService
-from app.utils.telegram_utils import escape_markdown_v2
+from app.persistence.repositories.ingestion_job_repository import IngestionJobRepository
+from app.persistence.models.ingestion_job_model import IngestionJob, IngestionJobStatus
+from app.persistence.models.document_model import Document
+from app.utils.telegram_utils import escape_markdown_v2, format_datetime_for_display
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Tuple, Any
 # Add any other necessary imports from the original command_handlers.py, like services or models if directly used.
 
 logger = logging.getLogger(__name__)
 
+# Raw characters per /view_doc message. MarkdownV2 escaping at most doubles the length,
+# so an escaped page always fits in Telegram's 4096-character limit.
+VIEW_DOC_PAGE_SIZE = 2000
+
 # Helper Function for fetching document content
-async def _get_and_format_document_for_display(document_id: int, session: AsyncSession) -> Tuple[Optional[str], bool, Optional[str]]:
+async def _get_and_format_document_for_display(document_id: int, session: AsyncSession) -> Optional[Document]:
     """
-    Fetches document content and indicates if found.
-    Returns a tuple: (raw_content_string_or_none, found_boolean, source_url_or_none).
+    Fetches a document with its (compressed) content loaded, or None if it doesn't exist.
+    The content itself is decompressed lazily, page by page, by the caller.
     """
     # ContextService needs to be initialized.
-    # Since get_document_content doesn't use LLM or VectorDB services, we can pass None.
+    # Since get_document_by_id doesn't use LLM or VectorDB services, we can pass None.
     context_service = ContextService(
         db_session=session,
         llm_service=None, 
         vector_db_service=None
     )
-    
-    # Get the document to access both content and source_url
-    document = await context_service.document_repository.get_document_by_id(document_id)
-    
-    if document:
-        return document.raw_content, True, document.source_url
-    return None, False, None
+    return await context_service.document_repository.get_document_by_id(document_id, include_content=True)
 
 # New Helper Function for displaying document content
 async def _display_document_content(doc_id: int, message_destination: Any, log_prefix: str = "", user_id: Optional[int] = None) -> bool:
     """
     Shared helper to fetch and display document content to a given message destination.
+    Long documents are decompressed and sent page by page rather than materialized in full.
     
     Args:
         doc_id: The document ID to display
@@ -52,31 +54,33 @@ async def _display_document_content(doc_id: int, message_destination: Any, log_p
     """
     try:
         async with AsyncSessionLocal() as session:
-            raw_content, found, source_url = await _get_and_format_document_for_display(doc_id, session)
+            document = await _get_and_format_document_for_display(doc_id, session)
 
-        if found and raw_content:
-            display_content = escape_markdown_v2(raw_content)
-            max_length = 4096
-            
-            # Include source URL in header if available
-            if source_url:
-                message_header = f"Content for Document ID {doc_id}: {escape_markdown_v2(source_url)}\n\n"
-            else:
-                message_header = f"Content for Document ID {doc_id}:\n\n"
-            
-            if len(display_content) <= (max_length - len(message_header)):
-                await message_destination.reply_text(f"{message_header}{display_content}", parse_mode=ParseMode.MARKDOWN_V2)
+        pages = document.iter_raw_content_pages(VIEW_DOC_PAGE_SIZE) if document else iter(())
+        first_page = next(pages, None)
+
+        if first_page:
+            source_url = document.source_url
+            second_page = next(pages, None)
+
+            if second_page is None:
+                # Include source URL in header if available
+                if source_url:
+                    message_header = f"Content for Document ID {doc_id}: {escape_markdown_v2(source_url)}\n\n"
+                else:
+                    message_header = f"Content for Document ID {doc_id}:\n\n"
+                await message_destination.reply_text(f"{message_header}{escape_markdown_v2(first_page)}", parse_mode=ParseMode.MARKDOWN_V2)
             else:
-                # For truncated content, still include the source URL in the header
                 header_text = f"Displaying content for Document ID {doc_id}"
                 if source_url:
                     header_text += f": {escape_markdown_v2(source_url)}"
-                header_text += " \\(truncated due to length\\):"
-                
+                header_text += " \\(sent in parts due to length\\):"
                 await message_destination.reply_text(header_text, parse_mode=ParseMode.MARKDOWN_V2)
-                for i in range(0, len(display_content), max_length):
-                    chunk = display_content[i:i + max_length]
-                    await message_destination.reply_text(chunk, parse_mode=ParseMode.MARKDOWN_V2)
+
+                await message_destination.reply_text(escape_markdown_v2(first_page), parse_mode=ParseMode.MARKDOWN_V2)
+                await message_destination.reply_text(escape_markdown_v2(second_page), parse_mode=ParseMode.MARKDOWN_V2)
+                for page in pages:
+                    await message_destination.reply_text(escape_markdown_v2(page), parse_mode=ParseMode.MARKDOWN_V2)
             if user_id:
                 logger.info(f"{log_prefix} User {user_id} viewed content of document {doc_id}.")
             return True
@@ -242,7 +246,7 @@ async def view_doc_button_callback(update: Update, context: ContextTypes.DEFAULT
             llm_service=None,
             vector_db_service=None
         )
-        document = await context_service.document_repository.get_document_by_id(doc_id)
+        document = await context_service.document_repository.get_document_by_id(doc_id, include_content=False)
         
         if document and document.source_url:
             # For URL documents, provide a clickable button to the original source
@@ -267,6 +271,59 @@ async def view_doc_button_callback(update: Update, context: ContextTypes.DEFAULT
             log_prefix="view_doc_button_callback:"
         )
 
+def _format_ingestion_job_status(job: IngestionJob) -> str:
+    """Formats a one-job status summary for /doc_status."""
+    lines = [f"Job {job.id}: {job.status}" + (f" ({job.progress})" if job.progress and job.status == IngestionJobStatus.RUNNING.value else "")]
+    if job.title:
+        lines.append(f"  Title: {job.title}")
+    if job.created_at:
+        lines.append(f"  Submitted: {format_datetime_for_display(job.created_at)}")
+    if job.status == IngestionJobStatus.COMPLETED.value and job.document_id:
+        lines.append(f"  Document ID: {job.document_id} (use /view_doc {job.document_id})")
+    elif job.status == IngestionJobStatus.FAILED.value and job.error_message:
+        lines.append(f"  Error: {job.error_message}")
+    return "\n".join(lines)
+
+async def doc_status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Reports the progress of background document ingestion jobs.
+    `/doc_status <job_id>` shows one job; `/doc_status` lists the user's most recent jobs.
+    """
+    if not update.effective_user or not update.message:
+        logger.warning("doc_status_command called without effective_user or message.")
+        return
+
+    user_id = update.effective_user.id
+
+    job_id: Optional[int] = None
+    if context.args:
+        try:
+            job_id = int(context.args[0])
+        except ValueError:
+            await update.message.reply_text("Invalid Job ID. It must be a number, e.g. /doc_status 12")
+            return
+
+    try:
+        async with AsyncSessionLocal() as session:
+            job_repo = IngestionJobRepository(session)
+            if job_id is not None:
+                job = await job_repo.get_job_by_id(job_id)
+                # Only the requester (or an admin) may see a job
+                if not job or (job.requester_telegram_id != user_id and user_id not in ConfigService.get_admin_ids()):
+                    await update.message.reply_text(f"No document job found with ID {job_id}.")
+                    return
+                await update.message.reply_text(_format_ingestion_job_status(job))
+            else:
+                jobs = await job_repo.get_jobs_by_requester(user_id)
+                if not jobs:
+                    await update.message.reply_text("You have no document processing jobs.")
+                    return
+                await update.message.reply_text(
+                    "Your recent document jobs:\n\n" + "\n\n".join(_format_ingestion_job_status(job) for job in jobs)
+                )
+    except Exception as e:
+        logger.error(f"Error fetching document job status for user {user_id}: {e}", exc_info=True)
+        await update.message.reply_text("Sorry, I couldn't retrieve the job status at the moment.")
+
 # TODO: Move other document-related commands here:
 # - add_doc_command
 # - edit_doc_command
@@ -1,4 +1,5 @@
 import logging
+from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
 from telegram.constants import ParseMode
@@ -7,18 +8,17 @@ from app.telegram_handlers.conversation_defs import (
     COLLECT_TITLE, COLLECT_DESCRIPTION, COLLECT_PROPOSAL_TYPE, COLLECT_OPTIONS, ASK_DURATION, ASK_CONTEXT,
     USER_DATA_PROPOSAL_TITLE, USER_DATA_PROPOSAL_DESCRIPTION, USER_DATA_PROPOSAL_TYPE,
     USER_DATA_PROPOSAL_OPTIONS, USER_DATA_DEADLINE_DATE, USER_DATA_TARGET_CHANNEL_ID,
-    USER_DATA_CONTEXT_DOCUMENT_ID, PROPOSAL_TYPE_CALLBACK
+    PROPOSAL_TYPE_CALLBACK
 )
 from app.persistence.models.proposal_model import ProposalType
 from app.services.llm_service import LLMService
-from app.core.context_service import ContextService
+from app.services.ingestion_worker import submit_ingestion_job
 from app.core.proposal_service import ProposalService
-from app.persistence.database import AsyncSessionLocal
+from app.persistence.database import AsyncSessionLocal, run_after_commit, update_session
+from app.telegram_handlers.session_middleware import with_update_session
 from app.utils import telegram_utils
 from app.config import ConfigService
-from app.persistence.repositories.document_repository import DocumentRepository
 from app.persistence.repositories.user_repository import UserRepository
-from app.services.vector_db_service import VectorDBService
 
 logger = logging.getLogger(__name__)
 
@@ -116,65 +116,25 @@ async def handle_ask_duration(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return ASK_DURATION
 
+@with_update_session
 async def handle_ask_context(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     # Implementation for ASK_CONTEXT (Task 3.4 continued)
-    # This will use ContextService.process_and_store_document
+    # The context itself is ingested by the background ingestion worker once the proposal exists,
+    # so the conversation doesn't hang while URLs are fetched and chunks are embedded.
     user_input_context = update.message.text.strip()
     user = update.effective_user
     logger.info(f"User {user.id} provided context string: '{user_input_context[:100]}...'")
 
+    pending_context: Optional[str] = None
     if user_input_context.lower() not in ["no", "none", "skip"]:
-        async with AsyncSessionLocal() as session:
-            # Instantiate required services for ContextService
-            llm_service = LLMService()
-            vector_db_service = VectorDBService() # Uses default path
-            
-            context_service = ContextService(
-                db_session=session, 
-                llm_service=llm_service, 
-                vector_db_service=vector_db_service
-            )
-            try:
-                # Determine source_type (text or url)
-                # Basic check, can be improved
-                source_type = "user_url" if user_input_context.startswith(("http://", "https://")) else "user_text"
-                
-                # Construct the title with tappable username if available
-                if user.username:
-                    user_display_name = f"@{user.username}"
-                elif user.first_name:
-                    user_display_name = user.first_name
-                else:
-                    user_display_name = str(user.id)
-                
-                title = f"proposal context by {user_display_name}"
-                
-                # process_and_store_document expects proposal_id to be optional for general docs
-                # For proposal creation, we don't have proposal_id yet.
-                # We store the doc, get doc_id, then link it *after* proposal is created.
-                document = await context_service.process_and_store_document(
-                    content_source=user_input_context,
-                    source_type=source_type,
-                    title=title,
-                    # proposal_id will be linked later
-                )
-                if document: # Check if document ID was returned (it's an int)
-                    context.user_data[USER_DATA_CONTEXT_DOCUMENT_ID] = document # Store the int ID directly
-                    logger.info(f"User {user.id} context processed and stored. Document ID: {document}")
-                    await update.message.reply_text(f"Context added (Document ID: {document}).")
-                else:
-                    logger.warning(f"User {user.id} provided context, but document processing returned None or no ID.")
-                    await update.message.reply_text("I tried to process your context, but something went wrong. We'll proceed without it for now.")
-            except Exception as e:
-                logger.error(f"Error processing context for user {user.id}: {e}", exc_info=True)
-                await update.message.reply_text("Sorry, there was an error processing your context. We'll proceed without it for now.")
+        pending_context = user_input_context
     else:
         logger.info(f"User {user.id} opted out of providing initial context.")
         await update.message.reply_text("No initial context will be added.")
 
     # All data collected, proceed to create proposal
     try:
-        async with AsyncSessionLocal() as session:
+        async with update_session() as session: # Committed once by with_update_session
             proposal_service = ProposalService(session, bot_app=context.application)
             user_repo = UserRepository(session) # For fetching full user object for channel message
 
@@ -223,32 +183,37 @@ async def handle_ask_context(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
             logger.info(f"User {user.id}: Proposal {new_proposal.id} created successfully in DB.")
 
-            # Link context document if it was created
-            context_document_id = context.user_data.get(USER_DATA_CONTEXT_DOCUMENT_ID)
-            if context_document_id:
-                doc_repo = DocumentRepository(session)
-                # Link the document to the proposal in the SQL database
-                linked_doc = await doc_repo.link_document_to_proposal(context_document_id, new_proposal.id)
-                if linked_doc:
-                    await session.commit() # Commit the document link update
-                    logger.info(f"User {user.id}: Linked document {context_document_id} to proposal {new_proposal.id} in SQL.")
-
-                    # Now, update the metadata in ChromaDB
-                    # Instantiate services needed for ContextService within this session scope
-                    llm_service_for_linking = LLMService()
-                    vector_db_service_for_linking = VectorDBService()
-                    context_service_for_linking = ContextService(
-                        db_session=session, # Use the current session
-                        llm_service=llm_service_for_linking,
-                        vector_db_service=vector_db_service_for_linking
-                    )
-                    await context_service_for_linking.link_document_to_proposal_in_vector_store(
-                        document_sql_id=context_document_id,
-                        proposal_id=new_proposal.id
+            # Queue the context document for background ingestion, already linked to the new proposal
+            context_job_line = ""
+            if pending_context:
+                # The job joins this update's transaction and is only handed to the worker after it commits
+                # Basic check, can be improved
+                source_type = "user_url" if pending_context.startswith(("http://", "https://")) else "user_text"
+
+                # Construct the title with tappable username if available
+                if user.username:
+                    user_display_name = f"@{user.username}"
+                elif user.first_name:
+                    user_display_name = user.first_name
+                else:
+                    user_display_name = str(user.id)
+
+                job_id = await submit_ingestion_job(
+                    requester_telegram_id=user.id,
+                    content_source=pending_context,
+                    source_type=source_type,
+                    title=f"proposal context by {user_display_name}",
+                    proposal_id=new_proposal.id
+                )
+                if job_id is not None:
+                    logger.info(f"User {user.id}: Context for proposal {new_proposal.id} queued as ingestion job {job_id}.")
+                    context_job_line = (
+                        f"Your context is being processed in the background \\(Job ID: `{job_id}`\\)\\. "
+                        f"I'll message you when it's ready, or check with `/doc_status {job_id}`\\.\n\n"
                     )
                 else:
-                    logger.error(f"User {user.id}: Failed to link document {context_document_id} to proposal {new_proposal.id}. Update returned None.")
-                    # Decide if we should rollback or just log
+                    logger.warning(f"User {user.id}: Failed to queue context for proposal {new_proposal.id}.")
+                    context_job_line = "I couldn't queue your context for processing\\. You can add it later with `/add_doc`\\.\n\n"
 
             # Send confirmation DM
             # Ensure all parts of the message that might contain special MarkdownV2 characters are escaped.
@@ -260,14 +225,13 @@ async def handle_ask_context(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 f"Proposal ID `{new_proposal.id}` created successfully\\!\n",
                 f"Title: {title_escaped}\n",
                 f"It will be posted to the channel '{channel_id_escaped}' shortly\\.\n\n",
+                context_job_line,
                 f"You can add more context later using: `/add_doc {new_proposal.id} <URL or paste text>`\n",
                 f"To edit \\(only if no votes\\): `/edit_proposal {new_proposal.id}`\n",
                 f"To cancel: `/cancel_proposal {new_proposal.id}`" # Clarified cancel command
             ]
             confirmation_dm = "".join(confirmation_dm_parts)
 
-            await update.message.reply_text(confirmation_dm, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=ReplyKeyboardRemove())
-
             # Post to channel
             channel_message_text = telegram_utils.format_proposal_message(new_proposal, db_user) # Use db_user
             channel_reply_markup = None
@@ -287,21 +251,36 @@ async def handle_ask_context(update: Update, context: ContextTypes.DEFAULT_TYPE)
             
             logger.info(f"User {user.id}: Final channel_reply_markup: {channel_reply_markup is not None}")
 
-            sent_channel_message = await context.bot.send_message(
-                chat_id=new_proposal.target_channel_id,
-                text=channel_message_text,
-                parse_mode=ParseMode.MARKDOWN_V2,
-                reply_markup=channel_reply_markup
-            )
+            proposal_id = new_proposal.id
+            target_channel_id = new_proposal.target_channel_id
+
+            async def announce_proposal():
+                # Only once the proposal is committed, so nobody sees (or votes on) a proposal that was rolled back
+                await update.message.reply_text(confirmation_dm, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=ReplyKeyboardRemove())
+                sent_channel_message = await context.bot.send_message(
+                    chat_id=target_channel_id,
+                    text=channel_message_text,
+                    parse_mode=ParseMode.MARKDOWN_V2,
+                    reply_markup=channel_reply_markup
+                )
+                # Update proposal with channel_message_id in a follow-up unit of work
+                async with update_session() as followup_session:
+                    followup_service = ProposalService(followup_session, bot_app=context.application)
+                    await followup_service.proposal_repository.update_proposal_message_id(proposal_id, sent_channel_message.message_id)
+                logger.info(f"User {user.id}: Proposal {proposal_id} posted to channel {target_channel_id}, message ID {sent_channel_message.message_id} updated.")
 
-            # Update proposal with channel_message_id
-            await proposal_service.proposal_repository.update_proposal_message_id(new_proposal.id, sent_channel_message.message_id)
-            await session.commit() # Commit message_id update
-            logger.info(f"User {user.id}: Proposal {new_proposal.id} posted to channel {new_proposal.target_channel_id}, message ID {sent_channel_message.message_id} updated.")
+            run_after_commit(announce_proposal)
 
     except Exception as e:
         logger.error(f"Critical error in final proposal creation step for user {user.id}: {e}", exc_info=True)
-        await update.message.reply_text("A critical error occurred while finalizing your proposal. Please try again later or contact an admin.", reply_markup=ReplyKeyboardRemove())
-    finally:
-        context.user_data.clear()
-        return ConversationHandler.END
\ No newline at end of file
+        await update.message.reply_text(
+            "A critical error occurred while finalizing your proposal, so nothing was saved. "
+            "Send your context again to retry, or /cancel.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        # Re-raised so with_update_session rolls back the half-created proposal; the conversation stays in
+        # ASK_CONTEXT with user_data intact, so the user can retry
+        raise
+
+    context.user_data.clear()
+    return ConversationHandler.END
\ No newline at end of file
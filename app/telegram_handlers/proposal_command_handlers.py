@@ -6,7 +6,7 @@ import telegram.ext.filters as filters # For PTB V20+
 from telegram.constants import ParseMode
 
 from app.core.user_service import UserService
-from app.persistence.database import AsyncSessionLocal
+from app.persistence.database import AsyncSessionLocal, commit_unless_in_update_session, run_when_committed, update_session
 from app.persistence.models.proposal_model import ProposalType, ProposalStatus
 from app.config import ConfigService
 from app.telegram_handlers.conversation_defs import (
@@ -14,7 +14,7 @@ from app.telegram_handlers.conversation_defs import (
     USER_DATA_PROPOSAL_PARTS, USER_DATA_PROPOSAL_TITLE, USER_DATA_PROPOSAL_DESCRIPTION,
     USER_DATA_PROPOSAL_TYPE, USER_DATA_PROPOSAL_OPTIONS, USER_DATA_DEADLINE_DATE,
     USER_DATA_TARGET_CHANNEL_ID, USER_DATA_CURRENT_CONTEXT, ASK_CONTEXT, PROPOSAL_TYPE_CALLBACK,
-    PROPOSAL_FILTER_OPEN, PROPOSAL_FILTER_CLOSED,
+    PROPOSAL_FILTER_OPEN, PROPOSAL_FILTER_CLOSED, PROPOSALS_PAGE_CALLBACK_PREFIX,
     SELECT_EDIT_ACTION, EDIT_TITLE, EDIT_DESCRIPTION, EDIT_OPTIONS, CONFIRM_EDIT_PROPOSAL,
     USER_DATA_EDIT_PROPOSAL_ID, USER_DATA_EDIT_PROPOSAL_ORIGINAL, USER_DATA_EDIT_CHANGES
 )
@@ -26,6 +26,7 @@ from app.telegram_handlers.message_handlers import (
     handle_ask_context
 )
 from app.telegram_handlers.callback_handlers import handle_collect_proposal_type_callback
+from app.telegram_handlers.session_middleware import with_update_session
 from app.telegram_handlers.command_handlers import cancel_conversation # Assuming cancel_conversation remains in core command_handlers
 from app.core.proposal_service import ProposalService
 from app.utils import telegram_utils
@@ -48,14 +49,13 @@ async def propose_command_entry(update: Update, context: ContextTypes.DEFAULT_TY
             await update.message.reply_text("Sorry, I can't identify you to create a proposal.")
         return ConversationHandler.END
 
-    async with AsyncSessionLocal() as session:
+    async with update_session() as session:
         user_service = UserService(session)
         await user_service.register_user_interaction(
             telegram_id=update.effective_user.id,
             username=update.effective_user.username,
             first_name=update.effective_user.first_name
         )
-        await session.commit() 
 
     context.user_data[USER_DATA_CURRENT_CONTEXT] = {}
     context.user_data[USER_DATA_PROPOSAL_TITLE] = None
@@ -150,7 +150,6 @@ async def proposals_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
 
     args = context.args
-    chat_id = update.message.chat_id
 
     if not args:
         keyboard = [
@@ -187,49 +186,13 @@ async def proposals_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text("An unexpected error occurred filtering proposals.")
             return
         
-        proposals_data = await proposal_service.list_proposals_by_status(status_to_fetch.value)
+        page = await proposal_service.list_proposals_page_by_status(status_to_fetch.value)
 
-    full_message = f"*{telegram_utils.escape_markdown_v2(display_title)}:*\n\n"
-    if not proposals_data:
-        full_message += "No proposals found\."
-    else:
-        message_parts = []
-        for prop_data in proposals_data:
-            title_escaped = telegram_utils.escape_markdown_v2(prop_data['title'])
-            channel_id_str = str(prop_data['target_channel_id'])
-            channel_message_id = prop_data.get('channel_message_id')
-            
-            channel_display = f"Channel ID: `{telegram_utils.escape_markdown_v2(channel_id_str)}`"
-            if channel_message_id:
-                link = telegram_utils.create_telegram_message_link(channel_id_str, channel_message_id)
-                if link:
-                    escaped_link_text = telegram_utils.escape_markdown_v2(f"Channel: {channel_id_str}")
-                    # Link itself should not be Markdown escaped
-                    channel_display = f"[{escaped_link_text}]({link})"
-                else: # Fallback if link couldn't be formed, but message_id exists
-                    channel_display = f"Channel ID: `{telegram_utils.escape_markdown_v2(channel_id_str)}` (msg: {channel_message_id})"
-
-            part = f"\\- *ID:* `{prop_data['id']}` *Title:* {title_escaped}\n"
-            part += f"  {channel_display}\n"
-    
-            if status_to_fetch == ProposalStatus.OPEN:
-                deadline_escaped = telegram_utils.escape_markdown_v2(str(prop_data.get('deadline_date', 'N/A')))
-                part += f"  *Voting ends:* {deadline_escaped}\n"
-            elif status_to_fetch == ProposalStatus.CLOSED:
-                outcome_display = prop_data.get('outcome', 'Not Processed')
-                outcome_escaped = telegram_utils.escape_markdown_v2(outcome_display)
-                closed_date_display = prop_data.get('closed_date', 'N/A')
-                closed_date_escaped = telegram_utils.escape_markdown_v2(closed_date_display)
-                part += f"  *Closed on:* {closed_date_escaped}\n"
-                part += f"  *Outcome:* {outcome_escaped}\n"
-            message_parts.append(part)
-        full_message += "\n".join(message_parts)
-
-    if not full_message.strip():
-        logger.warning(f"Formatted message for {display_title} is empty. Defaulting text.")
-        full_message = "No proposals found or an error occurred generating the list\."
-
-    await telegram_utils.send_message_in_chunks(context, chat_id=chat_id, text=full_message, parse_mode=ParseMode.MARKDOWN_V2)
+    full_message = telegram_utils.format_proposal_list_message(display_title, page.items, status_to_fetch.value)
+    reply_markup = telegram_utils.create_page_navigation_keyboard(
+        page, f"{PROPOSALS_PAGE_CALLBACK_PREFIX}{status_to_fetch.value}_"
+    )
+    await update.message.reply_text(full_message, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=reply_markup)
 
 # TODO: Add other proposal-related commands here if any (e.g., /edit_proposal, /cancel_proposal)
 
@@ -479,6 +442,7 @@ async def prompt_confirm_edit_proposal(update: Update, context: ContextTypes.DEF
         
     return CONFIRM_EDIT_PROPOSAL
 
+@with_update_session
 async def handle_confirm_edit_proposal(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
@@ -492,7 +456,7 @@ async def handle_confirm_edit_proposal(update: Update, context: ContextTypes.DEF
             await query.edit_message_text("No changes to apply or proposal ID missing. Edit cancelled.")
             return ConversationHandler.END
 
-        async with AsyncSessionLocal() as session:
+        async with update_session() as session: # Committed once by with_update_session
             proposal_service = ProposalService(session, bot_app=context.application)
             updated_proposal, error_msg = await proposal_service.edit_proposal_details(
                 proposal_id=proposal_id,
@@ -506,60 +470,67 @@ async def handle_confirm_edit_proposal(update: Update, context: ContextTypes.DEF
                 return ConversationHandler.END
             
             if updated_proposal:
-                await session.commit() # Commit changes here as service layer doesn't
-                
-                base_text_segment = " has been successfully updated."
-                proposal_identifier_text = f"Proposal ID {updated_proposal.id}"
-                
-                # Default message if no link can be formed
-                confirmation_message = f"{proposal_identifier_text}{base_text_segment}" # Plain text by default
-                current_parse_mode = None
+                await commit_unless_in_update_session(session) # Flushes; the update's commit persists the edit
 
+                # We need the proposer User object to format the channel message correctly
+                proposer_user = None
                 if updated_proposal.target_channel_id and updated_proposal.channel_message_id:
-                    message_url = telegram_utils.create_telegram_message_link(
-                        updated_proposal.target_channel_id,
-                        updated_proposal.channel_message_id
-                    )
-                        
-                    if message_url:
-                        escaped_link_text = telegram_utils.escape_markdown_v2(proposal_identifier_text)
-                        escaped_base_text = telegram_utils.escape_markdown_v2(base_text_segment)
-                        # The URL itself (message_url) should NOT be escaped for MarkdownV2 link syntax
-                        confirmation_message = f"[{escaped_link_text}]({message_url}){escaped_base_text}"
-                        current_parse_mode = ParseMode.MARKDOWN_V2
-                
-                await query.edit_message_text(confirmation_message, parse_mode=current_parse_mode)
-                
-                # Update message in channel
-                if updated_proposal.target_channel_id and updated_proposal.channel_message_id:
-                    try:
-                        # We need the proposer User object to format the message correctly
-                        proposer_user = await proposal_service.user_service.get_user_by_telegram_id(updated_proposal.proposer_telegram_id)
-                        if not proposer_user:
-                             logger.error(f"Could not find proposer user {updated_proposal.proposer_telegram_id} for updating channel message of proposal {updated_proposal.id}")
-                        else:
-                            new_channel_message_text = telegram_utils.format_proposal_message(updated_proposal, proposer_user)
-                            reply_markup_channel = None
-                            if updated_proposal.proposal_type == ProposalType.MULTIPLE_CHOICE.value and updated_proposal.options:
-                                reply_markup_channel = telegram_utils.create_proposal_options_keyboard(updated_proposal.id, updated_proposal.options)
-                            elif updated_proposal.proposal_type == ProposalType.FREE_FORM.value and context.bot.username:
-                                reply_markup_channel = telegram_utils.get_free_form_submit_button(updated_proposal.id, context.bot.username)
-
-                            await context.bot.edit_message_text(
-                                chat_id=updated_proposal.target_channel_id,
-                                message_id=updated_proposal.channel_message_id,
-                                text=new_channel_message_text,
-                                reply_markup=reply_markup_channel,
-                                parse_mode=ParseMode.MARKDOWN_V2
-                            )
-                            logger.info(f"Updated message for proposal {updated_proposal.id} in channel {updated_proposal.target_channel_id}.")
-                    except Exception as e:
-                        logger.error(f"Failed to update message in channel for proposal {updated_proposal.id}: {e}", exc_info=True)
-                        # If query.message is not available (e.g. message too old to edit for bot), send new message
+                    proposer_user = await proposal_service.user_service.get_user_by_telegram_id(updated_proposal.proposer_telegram_id)
+
+                async def announce_edit():
+                    base_text_segment = " has been successfully updated."
+                    proposal_identifier_text = f"Proposal ID {updated_proposal.id}"
+                    
+                    # Default message if no link can be formed
+                    confirmation_message = f"{proposal_identifier_text}{base_text_segment}" # Plain text by default
+                    current_parse_mode = None
+
+                    if updated_proposal.target_channel_id and updated_proposal.channel_message_id:
+                        message_url = telegram_utils.create_telegram_message_link(
+                            updated_proposal.target_channel_id,
+                            updated_proposal.channel_message_id
+                        )
+                            
+                        if message_url:
+                            escaped_link_text = telegram_utils.escape_markdown_v2(proposal_identifier_text)
+                            escaped_base_text = telegram_utils.escape_markdown_v2(base_text_segment)
+                            # The URL itself (message_url) should NOT be escaped for MarkdownV2 link syntax
+                            confirmation_message = f"[{escaped_link_text}]({message_url}){escaped_base_text}"
+                            current_parse_mode = ParseMode.MARKDOWN_V2
+                    
+                    await query.edit_message_text(confirmation_message, parse_mode=current_parse_mode)
+                    
+                    # Update message in channel
+                    if updated_proposal.target_channel_id and updated_proposal.channel_message_id:
                         try:
-                            await query.message.reply_text("Proposal details updated, but failed to update the message in the channel. Please check manually.")
-                        except AttributeError: # If query.message is None
-                             await context.bot.send_message(chat_id=update.effective_chat.id, text="Proposal details updated, but failed to update the message in the channel. Please check manually.")
+                            if not proposer_user:
+                                 logger.error(f"Could not find proposer user {updated_proposal.proposer_telegram_id} for updating channel message of proposal {updated_proposal.id}")
+                            else:
+                                new_channel_message_text = telegram_utils.format_proposal_message(updated_proposal, proposer_user)
+                                reply_markup_channel = None
+                                if updated_proposal.proposal_type == ProposalType.MULTIPLE_CHOICE.value and updated_proposal.options:
+                                    reply_markup_channel = telegram_utils.create_proposal_options_keyboard(updated_proposal.id, updated_proposal.options)
+                                elif updated_proposal.proposal_type == ProposalType.FREE_FORM.value and context.bot.username:
+                                    reply_markup_channel = telegram_utils.get_free_form_submit_button(updated_proposal.id, context.bot.username)
+
+                                await context.bot.edit_message_text(
+                                    chat_id=updated_proposal.target_channel_id,
+                                    message_id=updated_proposal.channel_message_id,
+                                    text=new_channel_message_text,
+                                    reply_markup=reply_markup_channel,
+                                    parse_mode=ParseMode.MARKDOWN_V2
+                                )
+                                logger.info(f"Updated message for proposal {updated_proposal.id} in channel {updated_proposal.target_channel_id}.")
+                        except Exception as e:
+                            logger.error(f"Failed to update message in channel for proposal {updated_proposal.id}: {e}", exc_info=True)
+                            # If query.message is not available (e.g. message too old to edit for bot), send new message
+                            try:
+                                await query.message.reply_text("Proposal details updated, but failed to update the message in the channel. Please check manually.")
+                            except AttributeError: # If query.message is None
+                                 await context.bot.send_message(chat_id=update.effective_chat.id, text="Proposal details updated, but failed to update the message in the channel. Please check manually.")
+
+                # Confirm only once the edit is committed, so a failed commit is never reported as an update
+                await run_when_committed(session, announce_edit)
             else:
                 # This case is theoretically covered by error_msg from edit_proposal_details
                 await query.edit_message_text("Failed to update proposal for an unknown reason.")
@@ -613,6 +584,7 @@ edit_proposal_conv_handler = ConversationHandler(
     # persistent=False # Consider persistence if needed
 )
 
+@with_update_session
 async def cancel_proposal_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handles the /cancel_proposal command.
@@ -659,14 +631,18 @@ async def cancel_proposal_command(update: Update, context: ContextTypes.DEFAULT_
         )
         return
 
-    async with AsyncSessionLocal() as session:
+    async with update_session() as session: # Committed once by with_update_session
         # Ensure bot_app is passed to ProposalService if it's used for sending messages (it is for editing channel message)
         proposal_service = ProposalService(db_session=session, bot_app=context.application)
         success, message = await proposal_service.cancel_proposal_by_proposer(
             proposal_id=proposal_id_to_cancel,
             user_telegram_id=user_id
         )
-        # Commit is handled within cancel_proposal_by_proposer if successful
+        if success:
+            async def confirm_cancellation():
+                await update.message.reply_text(message)
+            await run_when_committed(session, confirm_cancellation) # Like the channel edit, only after the commit
+            return
 
     await update.message.reply_text(message)
 
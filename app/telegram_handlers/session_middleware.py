@@ -0,0 +1,31 @@
+import functools
+import logging
+from typing import Any, Awaitable, Callable
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from app.persistence.database import count_queries, update_session
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Update, ContextTypes.DEFAULT_TYPE], Awaitable[Any]]
+
+def with_update_session(handler: Handler) -> Handler:
+    """
+    Runs a handler inside one update_session: every service or repository it calls through update_session() shares
+    a single AsyncSession, committed once after the handler returns and rolled back if it raises.
+    Records the SQL statements and commits per update as db.queries_per_update / db.commits_per_update.
+    """
+    @functools.wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Any:
+        with count_queries() as counter:
+            try:
+                async with update_session():
+                    return await handler(update, context)
+            finally:
+                metrics.observe("db.queries_per_update", counter.queries, handler=handler.__name__)
+                metrics.observe("db.commits_per_update", counter.commits, handler=handler.__name__)
+                logger.debug(f"{handler.__name__}: {counter.queries} queries, {counter.commits} commits.")
+    return wrapper
@@ -4,7 +4,8 @@ from telegram.ext import ContextTypes, CommandHandler
 import re # Add re for regex matching
 
 from app.core.submission_service import SubmissionService
-from app.persistence.database import AsyncSessionLocal
+from app.persistence.database import update_session
+from app.telegram_handlers.session_middleware import with_update_session
 
 # TODO: Implement submission-related command handlers here:
 # - submit_command (/submit)
@@ -13,6 +14,7 @@ from app.persistence.database import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
+@with_update_session
 async def submit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     Handles the /submit command for free-form proposals.
@@ -43,15 +45,19 @@ async def submit_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     text_submission = " ".join(args[1:])
     submitter_telegram_id = update.effective_user.id
 
-    async with AsyncSessionLocal() as session:
-        submission_service = SubmissionService(session)
-        success, message = await submission_service.record_free_form_submission(
-            proposal_id=proposal_id,
-            submitter_telegram_id=submitter_telegram_id,
-            text_submission=text_submission
-        )
-        
-        await update.message.reply_text(message)
+    try:
+        async with update_session() as session: # Committed once by with_update_session
+            submission_service = SubmissionService(session)
+            success, message = await submission_service.record_free_form_submission(
+                proposal_id=proposal_id,
+                submitter_telegram_id=submitter_telegram_id,
+                text_submission=text_submission
+            )
+    except Exception as e: # The update is rolled back by with_update_session
+        logger.error(f"Error recording /submit for proposal {proposal_id} by user {submitter_telegram_id}: {e}", exc_info=True)
+        success, message = False, "An unexpected error occurred. Please try again later."
+
+    await update.message.reply_text(message)
 
     logger.info(f"User {submitter_telegram_id} used /submit for proposal {proposal_id}. Success: {success}. Message: {message}")
 
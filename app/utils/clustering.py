@@ -0,0 +1,64 @@
+import logging
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def suggest_cluster_count(num_items: int, min_clusters: int = 2, max_clusters: int = 8) -> int:
+    """Rule-of-thumb k = sqrt(n / 2), clamped to [min_clusters, max_clusters] and never more than n."""
+    if num_items <= 0:
+        return 0
+    k = int(round(math.sqrt(num_items / 2)))
+    return min(num_items, max(min_clusters, min(max_clusters, k)))
+
+def kmeans(vectors: Sequence[Sequence[float]], k: int, max_iterations: int = 50, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized k-means with k-means++ initialisation on L2-normalised vectors (so distances follow cosine similarity).
+    Returns (labels, centroids): labels[i] is the cluster of vectors[i]. Deterministic for a given seed.
+    """
+    data = np.asarray(vectors, dtype=np.float64)
+    if data.ndim != 2 or len(data) == 0:
+        raise ValueError("kmeans expects a non-empty 2-D array of vectors.")
+    norms = np.linalg.norm(data, axis=1, keepdims=True)
+    data = data / np.where(norms == 0, 1.0, norms)
+    num_points = len(data)
+    k = max(1, min(k, num_points))
+    rng = np.random.default_rng(seed)
+
+    # k-means++: each new centroid is drawn with probability proportional to its squared distance from the nearest one
+    centroids = np.empty((k, data.shape[1]))
+    centroids[0] = data[rng.integers(num_points)]
+    closest_sq = ((data - centroids[0]) ** 2).sum(axis=1)
+    for index in range(1, k):
+        total = closest_sq.sum()
+        probabilities = closest_sq / total if total > 0 else None
+        centroids[index] = data[rng.choice(num_points, p=probabilities)]
+        closest_sq = np.minimum(closest_sq, ((data - centroids[index]) ** 2).sum(axis=1))
+
+    point_sq = (data ** 2).sum(axis=1)[:, None]
+    labels = np.zeros(num_points, dtype=np.int64)
+    for iteration in range(max_iterations):
+        distances = point_sq - 2 * data @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+        new_labels = distances.argmin(axis=1)
+        if iteration > 0 and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        non_empty = counts > 0
+        centroids[non_empty] = sums[non_empty] / counts[non_empty, None] # Empty clusters keep their previous centroid
+    return labels, centroids
+
+def representative_indices(vectors: Sequence[Sequence[float]], labels: np.ndarray, centroids: np.ndarray, cluster: int, limit: int) -> List[int]:
+    """Indices of up to `limit` members of a cluster, closest to its centroid first."""
+    members = np.flatnonzero(labels == cluster)
+    if len(members) == 0:
+        return []
+    data = np.asarray(vectors, dtype=np.float64)[members]
+    norms = np.linalg.norm(data, axis=1, keepdims=True)
+    data = data / np.where(norms == 0, 1.0, norms)
+    distances = ((data - centroids[cluster]) ** 2).sum(axis=1)
+    return [int(members[i]) for i in np.argsort(distances, kind="stable")[:limit]]
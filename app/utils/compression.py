@@ -0,0 +1,81 @@
+import logging
+import codecs
+import io
+import zlib
+from typing import Iterator, Optional, Tuple
+
+try:
+    import zstandard # Optional: used only when zstd is configured (DOCUMENT_CONTENT_ENCODING) or was used to write a row
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ZSTD_ENCODING = "zstd"
+ZLIB_ENCODING = "zlib"
+DEFAULT_CONTENT_ENCODING = ZLIB_ENCODING
+
+_READ_SIZE = 64 * 1024
+
+def compress_text(text: str, encoding: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    Compresses UTF-8 text for storage.
+    Returns (compressed_bytes, encoding); the encoding must be stored alongside the bytes to decompress them.
+    """
+    encoding = encoding or DEFAULT_CONTENT_ENCODING
+    raw = text.encode("utf-8")
+    if encoding == ZSTD_ENCODING:
+        if not zstandard:
+            raise ValueError("zstd encoding requested but the zstandard package is not installed.")
+        return zstandard.ZstdCompressor(level=10).compress(raw), encoding
+    if encoding == ZLIB_ENCODING:
+        return zlib.compress(raw, 6), encoding
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def _iter_decompressed_bytes(data: bytes, encoding: str) -> Iterator[bytes]:
+    """Yields the decompressed bytes incrementally, so large documents are never fully inflated at once."""
+    if encoding == ZSTD_ENCODING:
+        if not zstandard:
+            raise ValueError("Content is zstd-compressed but the zstandard package is not installed.")
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)) as reader:
+            while True:
+                piece = reader.read(_READ_SIZE)
+                if not piece:
+                    break
+                yield piece
+    elif encoding == ZLIB_ENCODING:
+        decompressor = zlib.decompressobj()
+        pending = data
+        while pending:
+            piece = decompressor.decompress(pending, _READ_SIZE)
+            pending = decompressor.unconsumed_tail
+            if piece:
+                yield piece
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+def iter_decompressed_text(data: bytes, encoding: str, page_size: int) -> Iterator[str]:
+    """
+    Lazily decompresses stored text and yields it in pages of page_size characters (the last page may be shorter).
+    Only about one page of text is held in memory at a time.
+    """
+    if page_size <= 0:
+        raise ValueError("page_size must be positive.")
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    for piece in _iter_decompressed_bytes(data, encoding):
+        buffer += decoder.decode(piece)
+        while len(buffer) >= page_size:
+            yield buffer[:page_size]
+            buffer = buffer[page_size:]
+    buffer += decoder.decode(b"", final=True)
+    while buffer:
+        yield buffer[:page_size]
+        buffer = buffer[page_size:]
+
+def decompress_text(data: bytes, encoding: str) -> str:
+    """Decompresses text stored by compress_text."""
+    return "".join(iter_decompressed_text(data, encoding, _READ_SIZE))
@@ -0,0 +1,103 @@
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of most recent observations kept per series for percentile estimates
+RECENT_WINDOW = 500
+
+_SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def _make_key(name: str, labels: Dict[str, Any]) -> _SeriesKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_key(key: _SeriesKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+def _percentile(sorted_values, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+class _Series:
+    """Running count/sum/min/max plus a window of recent values for p50/p95."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.recent: Deque[float] = deque(maxlen=RECENT_WINDOW)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else 0.0,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            "p50": _percentile(recent, 0.50) if recent else 0.0,
+            "p95": _percentile(recent, 0.95) if recent else 0.0,
+        }
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics: counters and value distributions (latencies, sizes), keyed by name and labels.
+    Intended for operational visibility (logs, admin commands) rather than long-term storage.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[_SeriesKey, _Series] = {}
+        self._counters: Dict[_SeriesKey, float] = {}
+
+    def observe(self, name: str, value: float, **labels: Any):
+        """Records one observation, e.g. metrics.observe("llm.latency_seconds", 0.8, task="ask_synthesis")."""
+        key = _make_key(name, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.observe(value)
+
+    def increment(self, name: str, value: float = 1.0, **labels: Any):
+        """Adds to a counter, e.g. metrics.increment("llm.cost_usd", 0.002, task="embedding")."""
+        key = _make_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def get_summary(self, name: str, **labels: Any) -> Optional[Dict[str, float]]:
+        """Returns count/sum/avg/min/max/p50/p95 for one series, or None if nothing was observed."""
+        with self._lock:
+            series = self._series.get(_make_key(name, labels))
+            return series.summary() if series else None
+
+    def get_counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self._counters.get(_make_key(name, labels), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All series summaries and counters, keyed by 'name{label=value,...}'."""
+        with self._lock:
+            return {
+                "series": {_format_key(key): series.summary() for key, series in self._series.items()},
+                "counters": {_format_key(key): value for key, value in self._counters.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Generic, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import Select, tuple_
+
+# Keyset ("seek") pagination for newest-first lists ordered by (timestamp column, id).
+# A page is fetched with WHERE (ts, id) < cursor ... LIMIT n + 1, so the cost of a page doesn't grow with its depth
+# and rows inserted meanwhile don't shift later pages, unlike OFFSET.
+
+PAGE_NEXT = "n" # Towards older rows
+PAGE_PREV = "p" # Towards newer rows
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+T = TypeVar("T")
+
+class PageCursor(NamedTuple):
+    """Position of a row in a (sort_value, id) ordering; pages start strictly after or before it."""
+    sort_value: datetime
+    id: int
+
+class Page(NamedTuple, Generic[T]):
+    items: List[T] # Newest first
+    next_cursor: Optional[PageCursor] # Last item's position if older rows exist, else None
+    prev_cursor: Optional[PageCursor] # First item's position if newer rows exist, else None
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """Compact form for Telegram callback data (64 bytes max): '<epoch microseconds>_<id>'."""
+    sort_value = cursor.sort_value if cursor.sort_value.tzinfo else cursor.sort_value.replace(tzinfo=timezone.utc)
+    return f"{(sort_value - _EPOCH) // _MICROSECOND}_{cursor.id}"
+
+def decode_cursor(value: str) -> Optional[PageCursor]:
+    """Inverse of encode_cursor; None if the value is malformed."""
+    micros, _, row_id = value.partition("_")
+    try:
+        return PageCursor(_EPOCH + timedelta(microseconds=int(micros)), int(row_id))
+    except (ValueError, OverflowError):
+        return None
+
+def keyset_select(
+    stmt: Select,
+    sort_column: Any,
+    id_column: Any,
+    limit: int,
+    cursor: Optional[PageCursor] = None,
+    direction: str = PAGE_NEXT
+) -> Select:
+    """
+    Restricts a select to the page after (PAGE_NEXT) or before (PAGE_PREV) `cursor` in newest-first order.
+    Fetches one extra row so build_page can tell whether another page follows.
+    """
+    key = tuple_(sort_column, id_column)
+    if direction == PAGE_PREV:
+        if cursor:
+            stmt = stmt.where(key > tuple_(cursor.sort_value, cursor.id))
+        return stmt.order_by(sort_column.asc(), id_column.asc()).limit(limit + 1)
+    if cursor:
+        stmt = stmt.where(key < tuple_(cursor.sort_value, cursor.id))
+    return stmt.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+def build_page(
+    rows: Sequence[T],
+    limit: int,
+    key: Callable[[T], Tuple[datetime, int]],
+    cursor: Optional[PageCursor] = None,
+    direction: str = PAGE_NEXT
+) -> Page[T]:
+    """Turns the rows of a keyset_select into a newest-first page with cursors for its Next/Prev neighbours."""
+    has_more = len(rows) > limit
+    items = list(rows[:limit])
+    if direction == PAGE_PREV:
+        items.reverse()
+        has_newer, has_older = has_more, cursor is not None
+    else:
+        has_newer, has_older = cursor is not None, has_more
+    if not items:
+        return Page(items=[], next_cursor=None, prev_cursor=None)
+    return Page(
+        items=items,
+        next_cursor=PageCursor(*key(items[-1])) if has_older else None,
+        prev_cursor=PageCursor(*key(items[0])) if has_newer else None
+    )
@@ -0,0 +1,96 @@
+import logging
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional
+
+try:
+    import tiktoken # Optional: exact token counts; falls back to a character estimate when unavailable
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN_ESTIMATE = 4
+
+class ContextBlock(NamedTuple):
+    """One unit of prompt context. Higher scores are packed first."""
+    key: str # Stable identifier used to report dropped blocks, e.g. "proposal:12"
+    text: str
+    score: float
+
+class PackedContext(NamedTuple):
+    included: List[ContextBlock] # In rank order
+    dropped: List[ContextBlock]
+    tokens: int # Tokens used by the included blocks (separators included)
+
+@lru_cache(maxsize=8)
+def _get_encoder(model: str) -> Optional[Callable[[str], List[int]]]:
+    """The tiktoken encode function for a model, or None if tiktoken or its encoding files are unavailable."""
+    if not tiktoken:
+        return None
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return encoding.encode
+    except Exception as e: # Encodings are downloaded on first use; offline hosts fall back to estimates
+        logger.warning(f"tiktoken encoding for '{model}' unavailable ({e}); estimating token counts from length.")
+        return None
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Counts tokens locally with tiktoken, or estimates ~4 characters per token if tiktoken can't be used."""
+    if not text:
+        return 0
+    encode = _get_encoder(model)
+    if encode:
+        return len(encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+
+def _truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Shortens text to roughly max_tokens, cutting at a line break where possible."""
+    if max_tokens <= 0:
+        return ""
+    encode = _get_encoder(model)
+    if encode:
+        tokens = encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        # Map the token cut back to a character offset proportionally; exact decoding isn't needed for context
+        cut = int(len(text) * max_tokens / len(tokens))
+    else:
+        cut = max_tokens * CHARS_PER_TOKEN_ESTIMATE
+    truncated = text[:cut]
+    newline = truncated.rfind("\n", cut // 2)
+    return (truncated[:newline] if newline > 0 else truncated).rstrip() + "\n[...]"
+
+def pack_context_blocks(
+    blocks: List[ContextBlock],
+    token_budget: int,
+    separator: str = "\n\n---\n\n",
+    model: str = "gpt-4o"
+) -> PackedContext:
+    """
+    Greedily fills a token budget with the highest-scoring blocks (ties keep their input order).
+    Blocks that don't fit are skipped so smaller lower-ranked blocks can still use the remaining budget.
+    If even the top block is larger than the whole budget, it is truncated rather than dropped.
+    """
+    ranked = sorted(blocks, key=lambda block: block.score, reverse=True) # sorted() is stable
+    separator_tokens = count_tokens(separator, model)
+    included: List[ContextBlock] = []
+    dropped: List[ContextBlock] = []
+    used = 0
+    for block in ranked:
+        cost = count_tokens(block.text, model) + (separator_tokens if included else 0)
+        if used + cost <= token_budget:
+            included.append(block)
+            used += cost
+        elif not included:
+            truncated_text = _truncate_to_tokens(block.text, token_budget, model)
+            if truncated_text:
+                included.append(block._replace(text=truncated_text))
+                used += count_tokens(truncated_text, model)
+            else:
+                dropped.append(block)
+        else:
+            dropped.append(block)
+    return PackedContext(included=included, dropped=dropped, tokens=used)
@@ -1,13 +1,22 @@
 import re # For escaping markdown
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
-from app.persistence.models.proposal_model import Proposal, ProposalType
+import logging
+import time
+import asyncio
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, Message
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter
+from app.persistence.models.proposal_model import Proposal, ProposalStatus, ProposalType
 from app.persistence.models.user_model import User # For proposer info
+from app.utils.pagination import PAGE_NEXT, PAGE_PREV, Page, PageCursor, decode_cursor, encode_cursor
 from datetime import datetime, timezone
 from dateutil import tz # Added for timezone conversion
 from telegram.ext import CallbackContext
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple
+
+logger = logging.getLogger(__name__)
 
 MAX_MESSAGE_LENGTH = 4096 # Telegram's max message length
+STREAM_PREVIEW_SUFFIX = " …" # Shown at the end of an in-progress streamed message
 
 # Define the target timezone (PST)
 PST = tz.gettz('America/Los_Angeles')
@@ -156,4 +165,187 @@ def create_telegram_message_link(target_channel_id: Union[str, int], message_id:
     # elif not tc_id_str.startswith("-") and not tc_id_str.isdigit(): 
     #     return f"https://t.me/{tc_id_str}/{message_id}"
     
-    return None 
\ No newline at end of file
+    return None 
+
+LIST_TEXT_PREVIEW_LENGTH = 200 # Outcomes and responses are shortened in paged lists so a page fits in one message
+
+def _preview(text: str, max_length: int = LIST_TEXT_PREVIEW_LENGTH) -> str:
+    return text if len(text) <= max_length else text[:max_length].rstrip() + "…"
+
+def format_proposal_list_message(display_title: str, proposals_data: List[Dict[str, Any]], status: str) -> str:
+    """MarkdownV2 list of proposals as returned by ProposalService.list_proposals_page_by_status."""
+    full_message = f"*{escape_markdown_v2(display_title)}:*\n\n"
+    if not proposals_data:
+        return full_message + "No proposals found\\."
+
+    message_parts = []
+    for prop_data in proposals_data:
+        title_escaped = escape_markdown_v2(prop_data['title'])
+        channel_id_str = str(prop_data['target_channel_id'])
+        channel_message_id = prop_data.get('channel_message_id')
+
+        channel_display = f"Channel ID: `{escape_markdown_v2(channel_id_str)}`"
+        if channel_message_id:
+            link = create_telegram_message_link(channel_id_str, channel_message_id)
+            if link:
+                escaped_link_text = escape_markdown_v2(f"Channel: {channel_id_str}")
+                # Link itself should not be Markdown escaped
+                channel_display = f"[{escaped_link_text}]({link})"
+            else: # Fallback if link couldn't be formed, but message_id exists
+                channel_display = f"Channel ID: `{escape_markdown_v2(channel_id_str)}` (msg: {channel_message_id})"
+
+        part = f"\\- *ID:* `{prop_data['id']}` *Title:* {title_escaped}\n"
+        part += f"  {channel_display}\n"
+        if status == ProposalStatus.OPEN.value:
+            deadline_escaped = escape_markdown_v2(str(prop_data.get('deadline_date', 'N/A')))
+            part += f"  *Voting ends:* {deadline_escaped}\n"
+        elif status == ProposalStatus.CLOSED.value:
+            outcome_escaped = escape_markdown_v2(_preview(str(prop_data.get('outcome', 'Not Processed'))))
+            closed_date_escaped = escape_markdown_v2(str(prop_data.get('closed_date', 'N/A')))
+            part += f"  *Closed on:* {closed_date_escaped}\n"
+            part += f"  *Outcome:* {outcome_escaped}\n"
+        message_parts.append(part)
+    return full_message + "\n".join(message_parts)
+
+def format_submission_history_message(history: List[Dict[str, Any]]) -> str:
+    """MarkdownV2 page of a user's votes and submissions as returned by SubmissionService.get_user_submission_history_page."""
+    message = "Here\'s your submission history:\n\n"
+    for item in history:
+        proposal_title = escape_markdown_v2(str(item.get('proposal_title', 'N/A')))
+        proposal_id_str = escape_markdown_v2(str(item.get('proposal_id', 'N/A')))
+        user_response = escape_markdown_v2(_preview(str(item.get('user_response', 'N/A'))))
+        proposal_status = escape_markdown_v2(str(item.get('proposal_status', 'N/A')))
+        proposal_outcome = escape_markdown_v2(_preview(str(item.get('proposal_outcome', 'N/A'))))
+        submission_timestamp = escape_markdown_v2(str(item.get('submission_timestamp', 'N/A')))
+        message += (
+            f"📝 *Proposal:* {proposal_title} \\(ID: {proposal_id_str}\\)\n"
+            f"   Your Response: {user_response}\n"
+            f"   Status: {proposal_status}\n"
+            f"   Outcome: {proposal_outcome}\n"
+            f"   Submitted: {submission_timestamp}\n"
+            f"\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\\-\n"
+        )
+    return message
+
+def create_page_navigation_keyboard(page: Page, callback_prefix: str) -> Optional[InlineKeyboardMarkup]:
+    """
+    Prev/Next buttons for a keyset page, or None if it is the only page.
+    Callback data format: [callback_prefix][n|p]_[cursor], e.g. proposals_page_open_n_1717171717000000_42
+    """
+    buttons = []
+    if page.prev_cursor:
+        buttons.append(InlineKeyboardButton("« Prev", callback_data=f"{callback_prefix}{PAGE_PREV}_{encode_cursor(page.prev_cursor)}"))
+    if page.next_cursor:
+        buttons.append(InlineKeyboardButton("Next »", callback_data=f"{callback_prefix}{PAGE_NEXT}_{encode_cursor(page.next_cursor)}"))
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+def parse_page_callback_data(data: str, callback_prefix: str) -> Optional[Tuple[str, PageCursor]]:
+    """Inverse of create_page_navigation_keyboard's callback data: (direction, cursor), or None if malformed."""
+    if not data or not data.startswith(callback_prefix):
+        return None
+    direction, _, encoded_cursor = data[len(callback_prefix):].partition("_")
+    cursor = decode_cursor(encoded_cursor)
+    if direction not in (PAGE_NEXT, PAGE_PREV) or cursor is None:
+        return None
+    return direction, cursor
+
+def _escape_prefix_to_fit(text: str, max_escaped_length: int) -> Tuple[str, int]:
+    """
+    Escapes the longest prefix of text whose MarkdownV2-escaped form fits in max_escaped_length.
+    Prefers to cut at a newline or space in the second half of the prefix. Returns (escaped_prefix, raw_chars_consumed).
+    """
+    escaped = escape_markdown_v2(text)
+    if len(escaped) <= max_escaped_length:
+        return escaped, len(text)
+
+    length, cut = 0, 0
+    for index, char in enumerate(text):
+        length += len(escape_markdown_v2(char))
+        if length > max_escaped_length:
+            break
+        cut = index + 1
+    for separator in ("\n", " "):
+        position = text.rfind(separator, cut // 2, cut)
+        if position > 0:
+            cut = position + 1
+            break
+    return escape_markdown_v2(text[:cut]), cut
+
+def split_text_for_markdown_v2(text: str, max_length: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Splits plain text into MarkdownV2-escaped pages that each fit in one Telegram message."""
+    pages = []
+    remaining = text
+    while remaining:
+        page, consumed = _escape_prefix_to_fit(remaining, max_length)
+        pages.append(page)
+        remaining = remaining[consumed:]
+    return pages
+
+class StreamingMessageEditor:
+    """
+    Progressively edits a placeholder message as streamed text arrives, throttled to Telegram's edit rate limits.
+    Text is treated as plain text and fully MarkdownV2-escaped on every edit, so a partial answer can never
+    produce invalid markup. Call update() with the accumulated text and finalize() once the text is complete.
+    """
+    def __init__(self, message: Message, min_interval_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.message = message
+        self.min_interval_seconds = min_interval_seconds
+        self._clock = clock
+        self._next_edit_at: float = 0.0
+        self._last_sent_text: Optional[str] = None
+        self.first_visible_at: Optional[float] = None # Clock time when the first answer text became visible
+        self.edit_count = 0
+
+    async def _edit(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+        """Edits the placeholder with already-escaped text; an unchanged message is not an error."""
+        try:
+            await self.message.edit_text(text, parse_mode=ParseMode.MARKDOWN_V2, reply_markup=reply_markup)
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+        self.edit_count += 1
+        self._last_sent_text = text
+        if self.first_visible_at is None:
+            self.first_visible_at = self._clock()
+
+    async def update(self, text: str):
+        """Shows the accumulated text so far, unless an edit was sent too recently. Never raises."""
+        now = self._clock()
+        if not text.strip() or now < self._next_edit_at:
+            return
+        preview, _ = _escape_prefix_to_fit(text, MAX_MESSAGE_LENGTH - len(STREAM_PREVIEW_SUFFIX))
+        preview += STREAM_PREVIEW_SUFFIX
+        if preview == self._last_sent_text:
+            return # Answer already overflows the preview; wait for finalize()
+        self._next_edit_at = now + self.min_interval_seconds
+        try:
+            await self._edit(preview)
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            self._next_edit_at = now + float(retry_after)
+            logger.warning(f"Telegram rate limit while streaming message {self.message.message_id}; pausing edits for {retry_after}s.")
+        except Exception as e:
+            logger.warning(f"Could not edit streamed message {self.message.message_id}: {e}")
+
+    async def finalize(self, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+        """
+        Replaces the placeholder with the complete text. Text too long for one message continues in follow-up
+        messages; reply_markup is attached to the last one.
+        """
+        pages = split_text_for_markdown_v2(text) or [escape_markdown_v2("(No answer)")]
+        wait = self._next_edit_at - self._clock()
+        if wait > 0:
+            await asyncio.sleep(wait) # Respect the throttle (or a RetryAfter) for the final edit too
+        first_markup = reply_markup if len(pages) == 1 else None
+        try:
+            await self._edit(pages[0], reply_markup=first_markup)
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+            await asyncio.sleep(float(retry_after))
+            await self._edit(pages[0], reply_markup=first_markup)
+        for index, page in enumerate(pages[1:], start=2):
+            await self.message.reply_text(
+                page,
+                parse_mode=ParseMode.MARKDOWN_V2,
+                reply_markup=reply_markup if index == len(pages) else None
+            )
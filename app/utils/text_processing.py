@@ -1,5 +1,7 @@
 import logging
-from typing import List
+import hashlib
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
 import re
 
 logger = logging.getLogger(__name__)
@@ -44,6 +46,120 @@ def simple_chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100) ->
             break 
     return chunks
 
+# Gear table for the rolling hash used by content_defined_chunk_text: one fixed pseudo-random
+# 32-bit value per byte, derived deterministically so boundaries are stable across processes.
+_GEAR_TABLE = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "big") for i in range(256)]
+
+def content_defined_chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100) -> List[str]:
+    """
+    Content-defined chunker.
+    Places chunk boundaries where a rolling (gear) hash over the last ~32 characters matches a mask,
+    so boundaries depend on local content rather than absolute offsets. An edit only changes the
+    chunks around it; every other chunk comes out byte-for-byte identical and can keep its embedding.
+
+    Args:
+        text: The text content to chunk.
+        chunk_size: The desired average size of each chunk. Chunks are between chunk_size // 4
+                    and 2 * chunk_size characters (plus overlap).
+        overlap: Number of characters from the end of the previous chunk prepended to each chunk.
+
+    Returns:
+        A list of text chunks.
+    """
+    if not text or not isinstance(text, str):
+        return []
+
+    if chunk_size <= 0:
+        logger.error(f"Invalid chunk_size: {chunk_size}. Must be positive.")
+        return [text]
+
+    if overlap < 0 or overlap >= chunk_size:
+        logger.warning(f"Invalid overlap: {overlap}. Setting to 0. Overlap should be 0 <= overlap < chunk_size.")
+        overlap = 0
+
+    min_size = max(1, chunk_size // 4)
+    max_size = chunk_size * 2
+    # A boundary fires with probability 1 / 2**mask_bits past min_size, giving an average close to chunk_size.
+    # The mask uses the high bits because those depend on the whole window, not just the last few characters.
+    mask_bits = max(1, (chunk_size - min_size).bit_length() - 1)
+    mask = ((1 << mask_bits) - 1) << (32 - mask_bits)
+
+    boundaries = []
+    start = 0
+    rolling_hash = 0
+    for i, char in enumerate(text):
+        rolling_hash = ((rolling_hash << 1) + _GEAR_TABLE[ord(char) & 0xFF]) & 0xFFFFFFFF
+        length = i + 1 - start
+        if length < min_size:
+            continue
+        if (rolling_hash & mask) == 0 or length >= max_size:
+            boundaries.append((start, i + 1))
+            start = i + 1
+            rolling_hash = 0
+    if start < len(text):
+        boundaries.append((start, len(text)))
+
+    return [text[max(0, begin - overlap):end] for begin, end in boundaries]
+
+def chunk_spans_in_text(text: str, chunks: List[str]) -> List[Optional[Tuple[int, int]]]:
+    """
+    Finds the (start, end) character offsets of each chunk in text, scanning forward in order,
+    so overlapping chunks from the chunkers above map back to their positions.
+    Returns None for a chunk that doesn't appear verbatim after the previous one.
+    """
+    spans: List[Optional[Tuple[int, int]]] = []
+    search_from = 0
+    for chunk in chunks:
+        start = text.find(chunk, search_from) if chunk else -1
+        if start == -1:
+            spans.append(None)
+            continue
+        spans.append((start, start + len(chunk)))
+        search_from = start + 1
+    return spans
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collects visible text from an HTML document, skipping script/style contents."""
+    _SKIP_TAGS = {"script", "style", "head", "noscript"}
+    _BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP_TAGS and self._skip_depth > 0:
+            self._skip_depth -= 1
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+def html_to_text(html: str) -> str:
+    """
+    Converts an HTML document to plain text for ingestion.
+    Drops script/style content, keeps block-level breaks and collapses runs of whitespace.
+    """
+    if not html:
+        return ""
+    extractor = _HTMLTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    text = "".join(extractor.parts)
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
 # TODO: Consider adding more sophisticated chunking strategies, e.g.:
 # - RecursiveCharacterTextSplitter (common in Langchain)
 # - Sentence-aware chunking (e.g., using NLTK or spaCy for sentence tokenization first)
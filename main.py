@@ -1,6 +1,7 @@
 import logging
 import asyncio # Keep for type hinting if necessary, but not for running the main loop
-from telegram.ext import Application, CommandHandler, ConversationHandler, MessageHandler, CallbackQueryHandler
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ConversationHandler, MessageHandler, CallbackQueryHandler, TypeHandler
 import telegram.ext.filters as filters # Changed import
 
 from app.config import ConfigService
@@ -8,12 +9,12 @@ from app.config import ConfigService
 
 # Import command handlers from their new locations
 from app.telegram_handlers.command_handlers import (
-    start_command, help_command, unknown_command, ask_command
+    start_command, help_command, unknown_command, ask_command, tag_llm_usage_source
     # view_doc_button_callback will be imported from document_command_handlers
 )
 from app.telegram_handlers.user_command_handlers import my_votes_command, my_proposals_command
 from app.telegram_handlers.document_command_handlers import (
-    view_document_content_command, view_docs_command,
+    view_document_content_command, view_docs_command, doc_status_command,
     view_doc_button_callback    # edit_doc_command, delete_doc_command, view_global_docs_command, edit_global_doc_command, delete_global_doc_command, add_global_doc_command, add_doc_command, edit_proposal_command # Commented out
 )
 from app.telegram_handlers.proposal_command_handlers import (
@@ -29,19 +30,25 @@ from app.telegram_handlers.callback_handlers import (
     handle_vote_callback, 
     handle_collect_proposal_type_callback,
     handle_proposal_filter_callback,
+    handle_proposals_page_callback,
+    handle_my_votes_page_callback,
     handle_my_proposals_for_edit_prompt,
     handle_ask_search_callback,
     handle_close_instructions
     # handle_channel_selection_callback # Commented out - definition missing in callback_handlers.py
 )
-from app.telegram_handlers.admin_command_handlers import get_add_global_doc_conversation_handler # view_global_docs_command, edit_global_doc_command, delete_global_doc_command
+from app.telegram_handlers.admin_command_handlers import get_add_global_doc_conversation_handler, stats_command # view_global_docs_command, edit_global_doc_command, delete_global_doc_command
 from app.telegram_handlers.error_handler import error_handler
 
 # Import scheduler functions
 from app.services.scheduling_service import start_scheduler_async, stop_scheduler
+from app.services.ingestion_worker import start_ingestion_worker
+from app.services.usage_accounting import flush_llm_usage
 
 # For PROPOSAL_TYPE_CALLBACK and CHANNEL_SELECT_CALLBACK patterns
-from app.telegram_handlers.conversation_defs import PROPOSAL_TYPE_CALLBACK, PROPOSAL_FILTER_CALLBACK_PREFIX
+from app.telegram_handlers.conversation_defs import (
+    PROPOSAL_TYPE_CALLBACK, PROPOSAL_FILTER_CALLBACK_PREFIX, PROPOSALS_PAGE_CALLBACK_PREFIX, MY_VOTES_PAGE_CALLBACK_PREFIX
+)
 
 # message_handlers, callback_handlers, and conversation_defs are now used within proposal_command_handlers.py
 # and no longer need to be directly imported into main.py
@@ -55,7 +62,12 @@ logger = logging.getLogger(__name__)
 async def post_init_actions(application: Application):
     """Actions to run after the application is initialized but before polling starts."""
     await start_scheduler_async(application)
-    logger.info("Post-initialization actions (like starting scheduler) completed.")
+    await start_ingestion_worker(application)
+    logger.info("Post-initialization actions (like starting scheduler and ingestion worker) completed.")
+
+async def post_shutdown_actions(application: Application):
+    """Persists LLM usage recorded since the last scheduled flush."""
+    await flush_llm_usage()
 
 def main() -> None:
     """Start the bot.""" 
@@ -71,6 +83,10 @@ def main() -> None:
 
     # Assign the async post_init_actions function
     application.post_init = post_init_actions
+    application.post_shutdown = post_shutdown_actions
+
+    # Tag every update with its command before any handler runs, for per-command LLM usage accounting
+    application.add_handler(TypeHandler(Update, tag_llm_usage_source), group=-1)
 
     # Register command handlers
     application.add_handler(CommandHandler("start", start_command))
@@ -79,6 +95,7 @@ def main() -> None:
     # application.add_handler(CommandHandler("add_global_doc", add_global_doc_command)) # Task 6.2
     application.add_handler(CommandHandler("view_doc", view_document_content_command)) # Task 3.5
     application.add_handler(CommandHandler("view_docs", view_docs_command)) # Task 3.5, 8.2
+    application.add_handler(CommandHandler("doc_status", doc_status_command)) # Background ingestion job status
     # application.add_handler(CommandHandler("edit_doc", edit_doc_command)) # Task 7.8
     # application.add_handler(CommandHandler("delete_doc", delete_doc_command)) # Task 7.8
     # application.add_handler(CommandHandler("view_global_docs", view_global_docs_command)) # Task 7.9
@@ -91,6 +108,7 @@ def main() -> None:
     # application.add_handler(CommandHandler("view_results", view_results_command)) # Task 7.6
     application.add_handler(CommandHandler("ask", ask_command)) # Task 6.1
     application.add_handler(CommandHandler("cancel_proposal", cancel_proposal_command)) # Task 7.5
+    application.add_handler(CommandHandler("stats", stats_command)) # Admin: LLM usage by command
     # application.add_handler(CommandHandler("add_doc", add_doc_command)) # Task 7.5
 
     # Register ConversationHandlers
@@ -106,6 +124,8 @@ def main() -> None:
     application.add_handler(CallbackQueryHandler(handle_collect_proposal_type_callback, pattern=f"^{PROPOSAL_TYPE_CALLBACK}")) # Corrected name
     application.add_handler(CallbackQueryHandler(handle_vote_callback, pattern=r"^vote_.*$")) # Task 4.2
     application.add_handler(CallbackQueryHandler(handle_proposal_filter_callback, pattern=f"^{PROPOSAL_FILTER_CALLBACK_PREFIX}")) # New handler
+    application.add_handler(CallbackQueryHandler(handle_proposals_page_callback, pattern=f"^{PROPOSALS_PAGE_CALLBACK_PREFIX}"))
+    application.add_handler(CallbackQueryHandler(handle_my_votes_page_callback, pattern=f"^{MY_VOTES_PAGE_CALLBACK_PREFIX}"))
     application.add_handler(CallbackQueryHandler(handle_my_proposals_for_edit_prompt, pattern=r"^my_proposals_for_edit_prompt$")) # Added
     application.add_handler(CallbackQueryHandler(view_doc_button_callback, pattern=r"^/view_doc \d+$"))
     application.add_handler(CallbackQueryHandler(handle_ask_search_callback, pattern=r"^ask_(proposal|doc)_search$"))
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import httpx
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, BrowserConfig, CrawlResult
 
@@ -154,7 +155,7 @@ async def test_process_and_store_document_url_success(context_service: ContextSe
     context_service.db_session.refresh = AsyncMock()
     
     # Patch simple_chunk_text
-    with patch('app.core.context_service.simple_chunk_text', return_value=["chunk1", "chunk2"]) as mock_chunk_text:
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["chunk1", "chunk2"]) as mock_chunk_text:
         stored_doc_id = await context_service.process_and_store_document(
             content_source=test_url,
             source_type="user_url",
@@ -210,7 +211,7 @@ async def test_process_and_store_document_text_success(context_service: ContextS
     context_service.db_session.commit = AsyncMock()
     context_service.db_session.refresh = AsyncMock()
 
-    with patch('app.core.context_service.simple_chunk_text', return_value=["text_chunk1", "text_chunk2"]) as mock_chunk_text:
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["text_chunk1", "text_chunk2"]) as mock_chunk_text:
         stored_doc_id = await context_service.process_and_store_document(
             content_source=text_content,
             source_type="user_text",
@@ -262,7 +263,7 @@ async def test_process_and_store_document_no_text_content(context_service: Conte
 
 @pytest.mark.asyncio
 async def test_process_and_store_document_no_chunks(context_service: ContextService, caplog):
-    with patch('app.core.context_service.simple_chunk_text', return_value=[]): # No chunks
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=[]): # No chunks
         stored_doc_id = await context_service.process_and_store_document(
             content_source="Some text",
             source_type="user_text",
@@ -277,7 +278,7 @@ async def test_process_and_store_document_no_chunks(context_service: ContextServ
 async def test_process_and_store_document_embedding_fails(context_service: ContextService, mock_llm_service, caplog):
     mock_llm_service.generate_embedding = AsyncMock(return_value=None) # Embedding generation fails
 
-    with patch('app.core.context_service.simple_chunk_text', return_value=["chunk1"]):
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["chunk1"]):
         stored_doc_id = await context_service.process_and_store_document(
             content_source="Some text",
             source_type="user_text",
@@ -292,7 +293,7 @@ async def test_process_and_store_document_sql_storage_fails(context_service: Con
     context_service.document_repository.add_document = AsyncMock(return_value=None) # SQL storage fails
     mock_llm_service.generate_embedding = AsyncMock(return_value=[0.1,0.2])
 
-    with patch('app.core.context_service.simple_chunk_text', return_value=["chunk1"]):
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["chunk1"]):
         stored_doc_id = await context_service.process_and_store_document(
             content_source="Some text",
             source_type="user_text",
@@ -313,7 +314,7 @@ async def test_process_and_store_document_vector_storage_fails(context_service:
     context_service.db_session.commit = AsyncMock() # Mock commit for the final update
     context_service.db_session.refresh = AsyncMock()
 
-    with patch('app.core.context_service.simple_chunk_text', return_value=["chunk1"]):
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["chunk1"]):
         stored_doc_id = await context_service.process_and_store_document(
             content_source="Some text",
             source_type="user_text",
@@ -337,7 +338,7 @@ async def test_process_and_store_document_vector_id_commit_fails(context_service
     context_service.db_session.commit = AsyncMock(side_effect=Exception("DB commit error")) # Final commit fails
     context_service.db_session.refresh = AsyncMock() # Won't be called if commit fails
 
-    with patch('app.core.context_service.simple_chunk_text', return_value=["chunk1"]):
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["chunk1"]):
         stored_doc_id = await context_service.process_and_store_document(
             content_source="Some text",
             source_type="user_text",
@@ -348,6 +349,103 @@ async def test_process_and_store_document_vector_id_commit_fails(context_service
     assert f"Error committing vector_ids to SQL document ID {document_sql_id}" in caplog.text
     assert mock_sql_doc.vector_ids == chroma_ids # vector_ids were set on the object, but commit failed
 
+@pytest.mark.asyncio
+async def test_process_and_store_documents_batch_success_with_dedupe(context_service: ContextService, mock_llm_service, mock_vector_db_service):
+    import hashlib
+    already_stored_hash = hashlib.sha256("old content".encode('utf-8')).hexdigest()
+    documents = [
+        {"title": "Doc A", "content": "content a", "source": "bulk_import:a.md"},
+        {"title": "Doc A copy", "content": "content a", "source": "bulk_import:a_copy.md"}, # Duplicate within batch
+        {"title": "Doc Old", "content": "old content", "source": "bulk_import:old.md"}, # Already in DB
+        {"title": "Doc B", "content": "content b", "source": "bulk_import:b.txt"},
+    ]
+    context_service.document_repository.get_existing_content_hashes = AsyncMock(return_value={already_stored_hash})
+    mock_llm_service.generate_embeddings = AsyncMock(return_value=[[0.1], [0.2], [0.3]])
+
+    doc_a = MagicMock(spec=Document); doc_a.id = 1
+    doc_b = MagicMock(spec=Document); doc_b.id = 2
+    context_service.document_repository.add_document = AsyncMock(side_effect=[doc_a, doc_b])
+    mock_vector_db_service.store_embeddings = AsyncMock(side_effect=[["doc_1_chunk_0", "doc_1_chunk_1"], ["doc_2_chunk_0"]])
+    context_service.db_session.commit = AsyncMock()
+
+    chunks_by_text = {"content a": ["a1", "a2"], "content b": ["b1"]}
+    with patch('app.core.context_service.content_defined_chunk_text', side_effect=lambda text, chunk_size, overlap: chunks_by_text[text]):
+        summary = await context_service.process_and_store_documents_batch(documents)
+
+    assert summary["stored"] == [("Doc A", 1), ("Doc B", 2)]
+    assert sorted(summary["duplicates"]) == ["Doc A copy", "Doc Old"]
+    assert summary["failed"] == []
+    assert summary["chunks"] == 3
+    # All chunks of the batch are embedded in one batched call
+    mock_llm_service.generate_embeddings.assert_awaited_once_with(["a1", "a2", "b1"])
+    first_store_kwargs = mock_vector_db_service.store_embeddings.call_args_list[0].kwargs
+    assert first_store_kwargs["embeddings"] == [[0.1], [0.2]]
+    assert first_store_kwargs["chunk_metadatas"][0]["original_source"] == "bulk_import:a.md"
+    assert mock_vector_db_service.store_embeddings.call_args_list[1].kwargs["embeddings"] == [[0.3]]
+    assert doc_a.vector_ids == ["doc_1_chunk_0", "doc_1_chunk_1"]
+    # One transaction for the whole batch
+    context_service.db_session.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_process_and_store_documents_batch_embedding_failure(context_service: ContextService, mock_llm_service, caplog):
+    context_service.document_repository.get_existing_content_hashes = AsyncMock(return_value=set())
+    mock_llm_service.generate_embeddings = AsyncMock(return_value=None)
+    context_service.document_repository.add_document = AsyncMock()
+    context_service.db_session.commit = AsyncMock()
+
+    summary = await context_service.process_and_store_documents_batch([{"title": "Doc", "content": "some text"}])
+
+    assert summary["stored"] == []
+    assert summary["failed"] == ["Doc"]
+    context_service.document_repository.add_document.assert_not_called()
+    context_service.db_session.commit.assert_not_awaited()
+    assert "failed to generate embeddings" in caplog.text
+
+@pytest.mark.asyncio
+async def test_process_and_store_documents_batch_commit_failure_rolls_back(context_service: ContextService, mock_llm_service, mock_vector_db_service, caplog):
+    context_service.document_repository.get_existing_content_hashes = AsyncMock(return_value=set())
+    mock_llm_service.generate_embeddings = AsyncMock(return_value=[[0.1]])
+    doc = MagicMock(spec=Document); doc.id = 7
+    context_service.document_repository.add_document = AsyncMock(return_value=doc)
+    mock_vector_db_service.store_embeddings = AsyncMock(return_value=["doc_7_chunk_0"])
+    mock_vector_db_service.delete_chunks = AsyncMock(return_value=True)
+    context_service.db_session.commit = AsyncMock(side_effect=Exception("DB commit error"))
+    context_service.db_session.rollback = AsyncMock()
+
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["chunk"]):
+        summary = await context_service.process_and_store_documents_batch([{"title": "Doc", "content": "some text"}])
+
+    assert summary["stored"] == []
+    assert summary["failed"] == ["Doc"]
+    context_service.db_session.rollback.assert_awaited_once()
+    mock_vector_db_service.delete_chunks.assert_awaited_once_with(["doc_7_chunk_0"]) # No orphaned vectors
+    assert "rolling back" in caplog.text
+
+@pytest.mark.asyncio
+async def test_process_and_store_documents_batch_vector_store_failure_rolls_back(context_service: ContextService, mock_llm_service, mock_vector_db_service, caplog):
+    context_service.document_repository.get_existing_content_hashes = AsyncMock(return_value=set())
+    mock_llm_service.generate_embeddings = AsyncMock(return_value=[[0.1], [0.2]])
+    doc_a = MagicMock(spec=Document); doc_a.id = 1
+    doc_b = MagicMock(spec=Document); doc_b.id = 2
+    context_service.document_repository.add_document = AsyncMock(side_effect=[doc_a, doc_b])
+    mock_vector_db_service.store_embeddings = AsyncMock(side_effect=[["doc_1_chunk_0"], []]) # Doc B's vectors fail
+    mock_vector_db_service.delete_chunks = AsyncMock(return_value=True)
+    context_service.db_session.commit = AsyncMock()
+    context_service.db_session.rollback = AsyncMock()
+
+    chunks_by_text = {"content a": ["a1"], "content b": ["b1"]}
+    with patch('app.core.context_service.content_defined_chunk_text', side_effect=lambda text, chunk_size, overlap: chunks_by_text[text]):
+        summary = await context_service.process_and_store_documents_batch([
+            {"title": "Doc A", "content": "content a"}, {"title": "Doc B", "content": "content b"}
+        ])
+
+    assert summary["stored"] == [] # Doc B is never committed without vectors
+    assert summary["failed"] == ["Doc A", "Doc B"]
+    context_service.db_session.commit.assert_not_awaited()
+    context_service.db_session.rollback.assert_awaited_once()
+    mock_vector_db_service.delete_chunks.assert_awaited_once_with(["doc_1_chunk_0"])
+    assert "failed to store embeddings for document ID 2" in caplog.text
+
 @pytest.mark.asyncio
 async def test_get_document_content_success(context_service: ContextService):
     doc_id = 1
@@ -539,4 +637,230 @@ async def test_get_answer_for_question_empty_text_in_chunks(context_service: Con
 # Placeholder for get_intelligent_help tests - to be implemented when method is fully defined
 # @pytest.mark.asyncio
 # async def test_get_intelligent_help_success(context_service: ContextService, mock_llm_service):
-#     pass
\ No newline at end of file
+#     pass
+@pytest.mark.asyncio
+async def test_update_document_content_embeds_only_new_chunks(context_service: ContextService, mock_llm_service, mock_vector_db_service):
+    from app.services.vector_db_service import make_chunk_id
+    document = MagicMock(spec=Document)
+    document.id = 10; document.title = "Policy"; document.source_url = None; document.proposal_id = 3
+    context_service.document_repository.get_document_by_id = AsyncMock(return_value=document)
+    context_service.document_repository.update_document = AsyncMock(return_value=document)
+    context_service.db_session.commit = AsyncMock()
+
+    kept_id, removed_id, added_id = make_chunk_id(10, "kept"), make_chunk_id(10, "removed"), make_chunk_id(10, "added")
+    mock_vector_db_service.get_document_chunk_ids = AsyncMock(return_value=[kept_id, removed_id])
+    mock_vector_db_service.store_embeddings = AsyncMock(return_value=[added_id])
+    mock_vector_db_service.update_chunk_metadatas = AsyncMock(return_value=True)
+    mock_vector_db_service.delete_chunks = AsyncMock(return_value=True)
+    mock_llm_service.generate_embeddings = AsyncMock(return_value=[[0.9]])
+
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["kept", "added"]):
+        summary = await context_service.update_document_content(10, "new content", new_title="Policy v2")
+
+    assert summary == {"embedded": 1, "reused": 1, "deleted": 1}
+    mock_llm_service.generate_embeddings.assert_awaited_once_with(["added"])
+    store_kwargs = mock_vector_db_service.store_embeddings.call_args.kwargs
+    assert store_kwargs["chunk_ids"] == [added_id]
+    assert store_kwargs["chunk_metadatas"][0]["chunk_index"] == 1
+    assert store_kwargs["chunk_metadatas"][0]["proposal_id"] == "3"
+    assert store_kwargs["chunk_metadatas"][0]["title"] == "Policy v2"
+    assert "chunk_start" not in store_kwargs["chunk_metadatas"][0] # Mocked chunks don't occur verbatim in the content
+    mock_vector_db_service.update_chunk_metadatas.assert_awaited_once()
+    assert mock_vector_db_service.update_chunk_metadatas.call_args.args[0] == [kept_id]
+    update_kwargs = context_service.document_repository.update_document.call_args.kwargs
+    assert update_kwargs["raw_content"] == "new content"
+    assert update_kwargs["title"] == "Policy v2"
+    assert update_kwargs["vector_ids"] == [kept_id, added_id]
+    context_service.db_session.commit.assert_awaited_once()
+    mock_vector_db_service.delete_chunks.assert_awaited_once_with([removed_id])
+
+@pytest.mark.asyncio
+async def test_update_document_content_unchanged_content_embeds_nothing(context_service: ContextService, mock_llm_service, mock_vector_db_service):
+    from app.services.vector_db_service import make_chunk_id
+    document = MagicMock(spec=Document)
+    document.id = 10; document.title = "Policy"; document.source_url = None; document.proposal_id = None
+    context_service.document_repository.get_document_by_id = AsyncMock(return_value=document)
+    context_service.document_repository.update_document = AsyncMock(return_value=document)
+    context_service.db_session.commit = AsyncMock()
+    mock_vector_db_service.get_document_chunk_ids = AsyncMock(return_value=[make_chunk_id(10, "a"), make_chunk_id(10, "b")])
+    mock_vector_db_service.update_chunk_metadatas = AsyncMock(return_value=True)
+    mock_llm_service.generate_embeddings = AsyncMock()
+
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["a", "b"]):
+        summary = await context_service.update_document_content(10, "same content")
+
+    assert summary == {"embedded": 0, "reused": 2, "deleted": 0}
+    mock_llm_service.generate_embeddings.assert_not_awaited()
+    mock_vector_db_service.store_embeddings.assert_not_awaited()
+    mock_vector_db_service.delete_chunks.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_update_document_content_embedding_failure_keeps_old_state(context_service: ContextService, mock_llm_service, mock_vector_db_service, caplog):
+    document = MagicMock(spec=Document)
+    document.id = 10; document.title = "Policy"; document.source_url = None; document.proposal_id = None
+    context_service.document_repository.get_document_by_id = AsyncMock(return_value=document)
+    context_service.document_repository.update_document = AsyncMock()
+    mock_vector_db_service.get_document_chunk_ids = AsyncMock(return_value=["old_id"])
+    mock_llm_service.generate_embeddings = AsyncMock(return_value=None)
+
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["new chunk"]):
+        summary = await context_service.update_document_content(10, "new content")
+
+    assert summary is None
+    assert "Aborting update" in caplog.text
+    context_service.document_repository.update_document.assert_not_awaited()
+    mock_vector_db_service.delete_chunks.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_update_document_content_commit_failure_removes_new_chunks_and_keeps_old_metadata(context_service: ContextService, mock_llm_service, mock_vector_db_service, caplog):
+    from app.services.vector_db_service import make_chunk_id
+    document = MagicMock(spec=Document)
+    document.id = 10; document.title = "Policy"; document.source_url = None; document.proposal_id = None
+    context_service.document_repository.get_document_by_id = AsyncMock(return_value=document)
+    context_service.document_repository.update_document = AsyncMock(return_value=document)
+    context_service.db_session.commit = AsyncMock(side_effect=Exception("DB commit error"))
+    context_service.db_session.rollback = AsyncMock()
+
+    kept_id, removed_id, added_id = make_chunk_id(10, "kept"), make_chunk_id(10, "removed"), make_chunk_id(10, "added")
+    mock_vector_db_service.get_document_chunk_ids = AsyncMock(return_value=[kept_id, removed_id])
+    mock_vector_db_service.store_embeddings = AsyncMock(return_value=[added_id])
+    mock_vector_db_service.update_chunk_metadatas = AsyncMock(return_value=True)
+    mock_vector_db_service.delete_chunks = AsyncMock(return_value=True)
+    mock_llm_service.generate_embeddings = AsyncMock(return_value=[[0.9]])
+
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["kept", "added"]):
+        summary = await context_service.update_document_content(10, "new content")
+
+    assert summary is None
+    context_service.db_session.rollback.assert_awaited_once()
+    mock_vector_db_service.delete_chunks.assert_awaited_once_with([added_id]) # Not the removed chunk: the old content stays
+    mock_vector_db_service.update_chunk_metadatas.assert_not_awaited() # Offsets still match the stored raw_content
+
+@pytest.mark.asyncio
+async def test_update_document_content_document_not_found(context_service: ContextService, mock_vector_db_service):
+    context_service.document_repository.get_document_by_id = AsyncMock(return_value=None)
+    assert await context_service.update_document_content(404, "text") is None
+    mock_vector_db_service.get_document_chunk_ids.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_process_and_store_document_records_chunk_offsets(context_service: ContextService, mock_llm_service, mock_vector_db_service):
+    text_content = "First part of the text. Second part of the text."
+    mock_llm_service.generate_embedding = AsyncMock(return_value=[0.1])
+    mock_sql_document = MagicMock(spec=Document); mock_sql_document.id = 31; mock_sql_document.vector_ids = []
+    context_service.document_repository.add_document = AsyncMock(return_value=mock_sql_document)
+    mock_vector_db_service.store_embeddings = AsyncMock(return_value=["id_a", "id_b"])
+    context_service.db_session.commit = AsyncMock()
+    context_service.db_session.refresh = AsyncMock()
+
+    with patch('app.core.context_service.content_defined_chunk_text', return_value=["First part of the text.", " Second part of the text."]):
+        await context_service.process_and_store_document(content_source=text_content, source_type="user_text", title="Offsets")
+
+    metadatas = mock_vector_db_service.store_embeddings.call_args.kwargs["chunk_metadatas"]
+    assert [(m["chunk_start"], m["chunk_end"]) for m in metadatas] == [(0, 23), (23, 48)]
+
+@pytest.mark.asyncio
+async def test_generate_answer_streams_partial_text_to_callback(context_service: ContextService, mock_llm_service):
+    async def fake_stream(prompt, task):
+        for delta in ["The answer", " is", " 42. "]:
+            yield delta
+    mock_llm_service.stream_completion = MagicMock(side_effect=fake_stream)
+    partials = []
+    async def on_partial_answer(text):
+        partials.append(text)
+
+    answer = await context_service._generate_answer("prompt", on_partial_answer)
+
+    assert answer == "The answer is 42."
+    assert partials == ["The answer", "The answer is", "The answer is 42. "]
+    mock_llm_service.get_completion.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_generate_answer_callback_failure_does_not_break_answer(context_service: ContextService, mock_llm_service):
+    async def fake_stream(prompt, task):
+        yield "Partial"
+        yield " answer"
+    mock_llm_service.stream_completion = MagicMock(side_effect=fake_stream)
+
+    answer = await context_service._generate_answer("prompt", AsyncMock(side_effect=Exception("Telegram down")))
+
+    assert answer == "Partial answer"
+
+@pytest.mark.asyncio
+async def test_generate_answer_marks_interrupted_stream(context_service: ContextService, mock_llm_service):
+    from app.core.context_service import ANSWER_INTERRUPTED_NOTE
+    from app.services.resilience import LLMStreamInterruptedError
+
+    async def fake_stream(prompt, task):
+        yield "The answer is "
+        raise LLMStreamInterruptedError("Connection reset")
+    mock_llm_service.stream_completion = MagicMock(side_effect=fake_stream)
+
+    answer = await context_service._generate_answer("prompt", AsyncMock())
+
+    assert answer == "The answer is" + ANSWER_INTERRUPTED_NOTE
+
+@pytest.mark.asyncio
+async def test_generate_answer_without_callback_uses_get_completion(context_service: ContextService, mock_llm_service):
+    mock_llm_service.get_completion = AsyncMock(return_value="Full answer")
+    assert await context_service._generate_answer("prompt") == "Full answer"
+    mock_llm_service.get_completion.assert_called_once_with("prompt", task="ask_answer")
+
+@pytest.mark.asyncio
+async def test_handle_intelligent_ask_packs_context_by_retrieval_score(context_service: ContextService, mock_llm_service, mock_vector_db_service):
+    mock_llm_service.analyze_ask_query = AsyncMock(return_value={
+        "intent": "query_proposals", "content_keywords": "garden", "structured_filters": {}
+    })
+    mock_llm_service.generate_embedding = AsyncMock(return_value=[0.1, 0.2])
+    mock_vector_db_service.search_proposal_embeddings = AsyncMock(return_value=[
+        {"metadata": {"proposal_id": "1"}, "distance": 0.9},
+        {"metadata": {"proposal_id": "2"}, "distance": 0.1},
+        {"metadata": {"proposal_id": "3"}, "distance": 0.5},
+    ])
+    proposals = []
+    for proposal_id in (1, 2, 3):
+        prop = MagicMock(id=proposal_id, title=f"Garden idea {proposal_id} " + "x" * 200, status="open", proposal_type="free_form")
+        prop.creation_date = None
+        prop.deadline_date = None
+        proposals.append(prop)
+    mock_llm_service.get_completion = AsyncMock(return_value="Two garden proposals.")
+
+    with patch('app.core.context_service.ProposalRepository') as MockProposalRepo, \
+         patch('app.core.context_service.ConfigService.get_ask_context_token_budget', return_value=150), \
+         patch('app.utils.prompt_packing._get_encoder', return_value=None):
+        MockProposalRepo.return_value.get_proposals_by_ids = AsyncMock(return_value=proposals)
+        answer, sources = await context_service.handle_intelligent_ask("garden", user_telegram_id=42)
+
+    assert answer == "Two garden proposals."
+    prompt = mock_llm_service.get_completion.call_args.args[0]
+    assert prompt.index("Proposal ID: 2") < prompt.index("Proposal ID: 3") # Closest match first
+    assert "Proposal ID: 1\n" not in prompt # Lowest-ranked proposal dropped to fit the budget
+    assert "1 more matching proposal(s) were omitted" in prompt
+
+@pytest.mark.asyncio
+async def test_handle_intelligent_ask_uses_planner_date_range(context_service: ContextService, mock_llm_service, mock_vector_db_service):
+    mock_llm_service.analyze_ask_query = AsyncMock(return_value={
+        "intent": "query_proposals",
+        "content_keywords": "proposals created last week",
+        "structured_filters": {"status": None, "proposal_type": None, "date_query": "last week"},
+        "date_query_type": "creation",
+        "date_range": {"start_datetime": "2024-05-13T00:00:00+00:00", "end_datetime": "2024-05-19T23:59:59+00:00"}
+    })
+    mock_llm_service.generate_embedding = AsyncMock(return_value=None)
+
+    with patch('app.core.context_service.ProposalRepository') as MockProposalRepo:
+        MockProposalRepo.return_value.find_proposals_by_dynamic_criteria = AsyncMock(return_value=[])
+        MockProposalRepo.return_value.get_proposals_by_ids = AsyncMock(return_value=[])
+        await context_service.handle_intelligent_ask("what proposals were created last week?", user_telegram_id=42)
+
+    criteria = MockProposalRepo.return_value.find_proposals_by_dynamic_criteria.call_args.kwargs
+    assert criteria["creation_date_range"] == (
+        datetime(2024, 5, 13, tzinfo=timezone.utc),
+        datetime(2024, 5, 19, 23, 59, 59, tzinfo=timezone.utc)
+    )
+
+def test_date_range_from_analysis_handles_open_and_missing_bounds():
+    assert ContextService._date_range_from_analysis({"date_range": None}) is None
+    assert ContextService._date_range_from_analysis({"date_range": {"start_datetime": "bad", "end_datetime": None}}) is None
+    assert ContextService._date_range_from_analysis({"date_range": {"start_datetime": None, "end_datetime": "2024-05-21T23:59:59"}}) == (
+        None, datetime(2024, 5, 21, 23, 59, 59, tzinfo=timezone.utc)
+    )
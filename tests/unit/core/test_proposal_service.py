@@ -7,6 +7,7 @@ from telegram.constants import ParseMode # Import ParseMode
 
 from app.core.proposal_service import ProposalService
 from app.persistence.models.proposal_model import Proposal, ProposalStatus, ProposalType
+from app.persistence.repositories.proposal_repository import ProposalListItem
 from app.utils import telegram_utils # For formatting dates
 from app.persistence.models.user_model import User
 from app.utils.telegram_utils import escape_markdown_v2 # Import for direct use
@@ -40,28 +41,26 @@ async def test_list_proposals_by_proposer_found():
     user_telegram_id = 12345
 
     # Mock Proposals from repository
-    repo_proposal1 = Proposal(
-        id=1, proposer_telegram_id=user_telegram_id, title="My Prop 1", 
-        description="Desc 1", proposal_type=ProposalType.MULTIPLE_CHOICE.value,
-        options=["A", "B"], target_channel_id="-1001", channel_message_id=50,
+    repo_proposal1 = ProposalListItem(
+        id=1, title="My Prop 1", status=ProposalStatus.OPEN.value,
+        proposal_type=ProposalType.MULTIPLE_CHOICE.value, target_channel_id="-1001", channel_message_id=50,
         creation_date=datetime(2023, 1, 1, 10, 0, 0, tzinfo=timezone.utc),
         deadline_date=datetime(2023, 1, 8, 10, 0, 0, tzinfo=timezone.utc),
-        status=ProposalStatus.OPEN.value, outcome=None, raw_results=None
+        outcome=None
     )
-    repo_proposal2 = Proposal(
-        id=2, proposer_telegram_id=user_telegram_id, title="My Prop 2", 
-        description="Desc 2", proposal_type=ProposalType.FREE_FORM.value,
-        options=None, target_channel_id="-1002", channel_message_id=51,
+    repo_proposal2 = ProposalListItem(
+        id=2, title="My Prop 2", status=ProposalStatus.CLOSED.value,
+        proposal_type=ProposalType.FREE_FORM.value, target_channel_id="-1002", channel_message_id=51,
         creation_date=datetime(2023, 1, 2, 11, 0, 0, tzinfo=timezone.utc),
         deadline_date=datetime(2023, 1, 9, 11, 0, 0, tzinfo=timezone.utc),
-        status=ProposalStatus.CLOSED.value, outcome="Summary", raw_results={}
+        outcome="Summary"
     )
     mock_repo_proposals = [repo_proposal1, repo_proposal2]
 
     service = ProposalService(mock_session)
 
     # Patch the repository method
-    with patch.object(service.proposal_repository, 'get_proposals_by_proposer_id', return_value=mock_repo_proposals) as mock_get_from_repo:
+    with patch.object(service.proposal_repository, 'get_proposal_list_items_by_proposer_id', return_value=mock_repo_proposals) as mock_get_from_repo:
         # Act
         formatted_proposals = await service.list_proposals_by_proposer(user_telegram_id)
 
@@ -97,7 +96,7 @@ async def test_list_proposals_by_proposer_not_found():
     user_telegram_id = 12345
     service = ProposalService(mock_session)
 
-    with patch.object(service.proposal_repository, 'get_proposals_by_proposer_id', return_value=[]) as mock_get_from_repo:
+    with patch.object(service.proposal_repository, 'get_proposal_list_items_by_proposer_id', return_value=[]) as mock_get_from_repo:
         # Act
         formatted_proposals = await service.list_proposals_by_proposer(user_telegram_id)
 
@@ -765,4 +764,56 @@ async def test_cancel_proposal_channel_message_edit_fails(proposal_service, mock
     assert success is True # Primary action (cancellation) succeeded
     assert message == f"Proposal ID {sample_proposal.id} has been successfully cancelled."
     mock_db_session.commit.assert_called_once() # Commit should still happen
-    mock_bot_app.bot.edit_message_text.assert_called_once() # Attempted to edit 
\ No newline at end of file
+    mock_bot_app.bot.edit_message_text.assert_called_once() # Attempted to edit 
+@pytest.mark.asyncio
+async def test_process_expired_multiple_choice_reads_tallies_not_submissions(proposal_service, mock_proposal_repository, sample_proposal):
+    mock_proposal_repository.find_expired_open_proposals.return_value = [sample_proposal]
+    mock_proposal_repository.update_proposal_status.return_value = None
+    proposal_service.submission_repository = AsyncMock()
+    proposal_service.vote_tally_repository = AsyncMock()
+    proposal_service.vote_tally_repository.get_tallies.return_value = {"Opt2": 5, "Opt1": 2, "Removed option": 9}
+
+    await proposal_service.process_expired_proposals()
+
+    proposal_service.vote_tally_repository.get_tallies.assert_awaited_once_with(sample_proposal.id)
+    proposal_service.submission_repository.count_responses_for_proposal.assert_not_called()
+    mock_proposal_repository.update_proposal_status.assert_awaited_once_with(
+        proposal_id=sample_proposal.id,
+        status=ProposalStatus.CLOSED,
+        outcome="Voting ended. Winner: Opt2 (5 votes).",
+        raw_results={"Opt2": 5, "Opt1": 2}
+    )
+
+@pytest.mark.asyncio
+async def test_process_expired_multiple_choice_without_tallies_groups_in_sql(proposal_service, mock_proposal_repository, sample_proposal):
+    mock_proposal_repository.find_expired_open_proposals.return_value = [sample_proposal]
+    mock_proposal_repository.update_proposal_status.return_value = None
+    proposal_service.vote_tally_repository = AsyncMock()
+    proposal_service.vote_tally_repository.get_tallies.return_value = {}
+    proposal_service.submission_repository = AsyncMock()
+    proposal_service.submission_repository.count_responses_for_proposal.return_value = {"Opt1": 1}
+
+    await proposal_service.process_expired_proposals()
+
+    proposal_service.submission_repository.count_responses_for_proposal.assert_awaited_once_with(sample_proposal.id)
+    assert mock_proposal_repository.update_proposal_status.call_args.kwargs["raw_results"] == {"Opt1": 1}
+
+@pytest.mark.asyncio
+async def test_process_expired_free_form_streams_submission_texts(proposal_service, mock_proposal_repository, sample_proposal):
+    sample_proposal.proposal_type = ProposalType.FREE_FORM.value
+    sample_proposal.options = None
+    mock_proposal_repository.find_expired_open_proposals.return_value = [sample_proposal]
+    mock_proposal_repository.update_proposal_status.return_value = None
+
+    async def stream_texts(proposal_id, batch_size):
+        for text in ["Idea one", "Idea two"]:
+            yield text
+    proposal_service.submission_repository = MagicMock()
+    proposal_service.submission_repository.stream_response_texts = MagicMock(side_effect=stream_texts)
+    proposal_service.llm_service = AsyncMock()
+    proposal_service.llm_service.cluster_and_summarize_texts.return_value = "Theme 1: Ideas"
+
+    await proposal_service.process_expired_proposals()
+
+    proposal_service.llm_service.cluster_and_summarize_texts.assert_awaited_once_with(["Idea one", "Idea two"])
+    assert mock_proposal_repository.update_proposal_status.call_args.kwargs["raw_results"] == {"submissions": ["Idea one", "Idea two"]}
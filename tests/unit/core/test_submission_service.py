@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 
 from app.core.submission_service import SubmissionService
+from app.persistence.repositories.proposal_repository import ProposalFacts
 from app.persistence.models.submission_model import Submission
 from app.persistence.models.proposal_model import Proposal, ProposalType, ProposalStatus # Import Proposal related models
 from app.persistence.models.user_model import User # Import User model for proposer
@@ -96,4 +97,66 @@ async def test_get_user_submission_history_no_submissions():
             # Assert
             mock_get_subs.assert_called_once_with(submitter_id)
             mock_get_props.assert_not_called() # Should not be called if no submissions
-            assert len(history) == 0 
\ No newline at end of file
+            assert len(history) == 0 
+def _open_poll_facts(status=ProposalStatus.OPEN.value):
+    return ProposalFacts(
+        id=3, title="Lunch", proposal_type=ProposalType.MULTIPLE_CHOICE.value, options=("Pizza", "Tacos"),
+        deadline_date=datetime.now(timezone.utc), status=status
+    )
+
+@pytest.fixture
+def vote_service():
+    service = SubmissionService(AsyncMock(spec=AsyncSession))
+    service.proposal_repository = AsyncMock()
+    service.submission_repository = AsyncMock()
+    service.user_service = AsyncMock()
+    return service
+
+@pytest.mark.asyncio
+async def test_record_vote_uses_proposal_facts_and_guarded_upsert(vote_service):
+    vote_service.proposal_repository.get_proposal_facts.return_value = _open_poll_facts()
+    vote_service.submission_repository.upsert_submission_if_open.return_value = Submission(id=1, proposal_id=3, submitter_id=42, response_content="Tacos")
+
+    success, message = await vote_service.record_vote(3, 42, 1)
+
+    assert success is True
+    assert message == "Your vote for 'Tacos' has been recorded!"
+    vote_service.proposal_repository.get_proposal_by_id.assert_not_called()
+    vote_service.user_service.ensure_user_exists.assert_awaited_once_with(42)
+    vote_service.submission_repository.upsert_submission_if_open.assert_awaited_once_with(
+        proposal_id=3, submitter_id=42, response_content="Tacos"
+    )
+
+@pytest.mark.asyncio
+async def test_record_vote_rejected_by_open_guard_invalidates_facts(vote_service):
+    vote_service.proposal_repository.get_proposal_facts.return_value = _open_poll_facts()
+    vote_service.submission_repository.upsert_submission_if_open.return_value = None # Closed after facts were cached
+
+    with patch('app.core.submission_service.invalidate_proposal_facts') as mock_invalidate:
+        success, message = await vote_service.record_vote(3, 42, 0)
+
+    assert success is False
+    assert message == "Sorry, voting for proposal 'Lunch' is closed."
+    mock_invalidate.assert_called_once_with(3)
+
+@pytest.mark.asyncio
+async def test_record_vote_closed_facts_skip_the_upsert(vote_service):
+    vote_service.proposal_repository.get_proposal_facts.return_value = _open_poll_facts(status=ProposalStatus.CLOSED.value)
+
+    success, _ = await vote_service.record_vote(3, 42, 0)
+
+    assert success is False
+    vote_service.submission_repository.upsert_submission_if_open.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_all_results_for_proposal_view_reads_tallies(vote_service):
+    vote_service.proposal_repository.get_proposal_facts.return_value = _open_poll_facts()
+    vote_service.vote_tally_repository = AsyncMock()
+    vote_service.vote_tally_repository.get_tallies.return_value = {"Tacos": 4}
+
+    results = await vote_service.get_all_results_for_proposal_view(3)
+
+    assert results["vote_counts"] == {"Pizza": 0, "Tacos": 4}
+    assert results["total_votes"] == 4
+    assert results["proposal_status"] == ProposalStatus.OPEN.value
+    vote_service.submission_repository.stream_response_texts.assert_not_called()
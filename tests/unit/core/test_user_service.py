@@ -1,11 +1,29 @@
 import pytest
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.user_service import UserService
+from app.core.user_service import UserService, _KnownUserCache, _known_users
+from app.persistence.database import update_session
 from app.persistence.repositories.user_repository import UserRepository # To mock its instance
 from app.persistence.models.user_model import User # For type hinting and return values
 
+@pytest.fixture(autouse=True)
+def clear_known_users():
+    _known_users.clear()
+    yield
+    _known_users.clear()
+
+@asynccontextmanager
+async def committed_update():
+    """One update_session over a mock session; its after-commit callbacks run when the block exits."""
+    context_manager = MagicMock()
+    context_manager.__aenter__ = AsyncMock(return_value=AsyncMock())
+    context_manager.__aexit__ = AsyncMock(return_value=None)
+    with patch('app.persistence.database.AsyncSessionLocal', return_value=context_manager):
+        async with update_session() as session:
+            yield session
+
 @pytest.fixture
 def mock_db_session(): # Although UserService takes db_session, it passes it to UserRepository
     return AsyncMock(spec=AsyncSession)
@@ -33,16 +51,12 @@ async def test_register_user_interaction(user_service: UserService, mock_user_re
     telegram_id = 123
     username = "testuser"
     first_name = "Test User"
-    expected_user = User(id=1, telegram_id=telegram_id, username=username, first_name=first_name)
-
-    mock_user_repository_instance.get_or_create_user = AsyncMock(return_value=expected_user)
 
     # Act
-    user = await user_service.register_user_interaction(telegram_id, username, first_name)
+    await user_service.register_user_interaction(telegram_id, username, first_name)
 
     # Assert
-    assert user == expected_user
-    mock_user_repository_instance.get_or_create_user.assert_called_once_with(
+    mock_user_repository_instance.upsert_user.assert_awaited_once_with(
         telegram_id=telegram_id,
         username=username,
         first_name=first_name
@@ -50,42 +64,107 @@ async def test_register_user_interaction(user_service: UserService, mock_user_re
 
 @pytest.mark.asyncio
 async def test_register_user_interaction_no_username(user_service: UserService, mock_user_repository_instance):
-    # Arrange
-    telegram_id = 456
-    username = None
-    first_name = "Another User"
-    expected_user = User(id=2, telegram_id=telegram_id, username=username, first_name=first_name)
-
-    mock_user_repository_instance.get_or_create_user = AsyncMock(return_value=expected_user)
-
-    # Act
-    user = await user_service.register_user_interaction(telegram_id, username, first_name)
+    await user_service.register_user_interaction(456, None, "Another User")
 
-    # Assert
-    assert user == expected_user
-    mock_user_repository_instance.get_or_create_user.assert_called_once_with(
-        telegram_id=telegram_id,
+    mock_user_repository_instance.upsert_user.assert_awaited_once_with(
+        telegram_id=456,
         username=None,
-        first_name=first_name
+        first_name="Another User"
     )
 
 @pytest.mark.asyncio
 async def test_register_user_interaction_no_firstname(user_service: UserService, mock_user_repository_instance):
-    # Arrange
-    telegram_id = 789
-    username = "onlyusername"
-    first_name = None
-    expected_user = User(id=3, telegram_id=telegram_id, username=username, first_name=first_name)
+    await user_service.register_user_interaction(789, "onlyusername", None)
 
-    mock_user_repository_instance.get_or_create_user = AsyncMock(return_value=expected_user)
+    mock_user_repository_instance.upsert_user.assert_awaited_once_with(
+        telegram_id=789,
+        username="onlyusername",
+        first_name=None
+    )
 
-    # Act
-    user = await user_service.register_user_interaction(telegram_id, username, first_name)
+@pytest.mark.asyncio
+async def test_register_user_interaction_skips_known_user(user_service: UserService, mock_user_repository_instance):
+    async with committed_update():
+        await user_service.register_user_interaction(123, "testuser", "Test")
+    async with committed_update():
+        await user_service.register_user_interaction(123, "testuser", "Test")
 
-    # Assert
-    assert user == expected_user
-    mock_user_repository_instance.get_or_create_user.assert_called_once_with(
-        telegram_id=telegram_id,
-        username=username,
-        first_name=None
-    ) 
\ No newline at end of file
+    mock_user_repository_instance.upsert_user.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_register_user_interaction_upserts_when_names_change(user_service: UserService, mock_user_repository_instance):
+    async with committed_update():
+        await user_service.register_user_interaction(123, "testuser", "Test")
+    async with committed_update():
+        await user_service.register_user_interaction(123, "renamed", "Test")
+
+    assert mock_user_repository_instance.upsert_user.await_count == 2
+    assert _known_users.lookup(123) == (True, ("renamed", "Test"))
+
+@pytest.mark.asyncio
+async def test_register_user_interaction_upserts_again_after_ttl(user_service: UserService, mock_user_repository_instance):
+    with patch('app.core.user_service.time.monotonic', side_effect=[0.0, 10_000.0, 10_000.0]):
+        async with committed_update():
+            await user_service.register_user_interaction(123, "testuser", "Test") # put at t=0
+        async with committed_update():
+            await user_service.register_user_interaction(123, "testuser", "Test") # lookup at t=10000: expired
+
+    assert mock_user_repository_instance.upsert_user.await_count == 2
+
+@pytest.mark.asyncio
+async def test_register_user_interaction_inside_update_session_caches_after_commit(user_service: UserService, mock_user_repository_instance):
+    async with committed_update():
+        await user_service.register_user_interaction(123, "testuser", "Test")
+        assert _known_users.lookup(123) == (False, None) # Not cached until the upsert is committed
+
+    assert _known_users.lookup(123) == (True, ("testuser", "Test"))
+
+@pytest.mark.asyncio
+async def test_ensure_user_exists_keeps_known_names(user_service: UserService, mock_user_repository_instance):
+    async with committed_update():
+        await user_service.register_user_interaction(123, "testuser", "Test")
+    async with committed_update():
+        await user_service.ensure_user_exists(123)
+
+    mock_user_repository_instance.insert_user_if_missing.assert_not_awaited()
+    assert _known_users.lookup(123) == (True, ("testuser", "Test"))
+
+@pytest.mark.asyncio
+async def test_ensure_user_exists_inserts_unknown_user_once(user_service: UserService, mock_user_repository_instance):
+    async with committed_update():
+        await user_service.ensure_user_exists(555)
+    async with committed_update():
+        await user_service.ensure_user_exists(555)
+    async with committed_update():
+        await user_service.register_user_interaction(555, "late", "Comer") # Names still get stored later
+
+    mock_user_repository_instance.insert_user_if_missing.assert_awaited_once_with(555)
+    mock_user_repository_instance.upsert_user.assert_awaited_once_with(telegram_id=555, username="late", first_name="Comer")
+
+@pytest.mark.asyncio
+async def test_register_user_interaction_outside_update_session_is_not_cached(user_service: UserService, mock_user_repository_instance):
+    await user_service.register_user_interaction(123, "testuser", "Test") # Nothing here commits the upsert
+    await user_service.ensure_user_exists(123)
+
+    assert _known_users.lookup(123) == (False, None)
+    mock_user_repository_instance.insert_user_if_missing.assert_awaited_once_with(123)
+
+@pytest.mark.asyncio
+async def test_rolled_back_update_does_not_cache_user(user_service: UserService, mock_user_repository_instance):
+    with pytest.raises(RuntimeError):
+        async with committed_update():
+            await user_service.register_user_interaction(123, "testuser", "Test")
+            raise RuntimeError("handler failed")
+
+    assert _known_users.lookup(123) == (False, None)
+
+def test_known_user_cache_evicts_least_recently_used():
+    cache = _KnownUserCache(max_users=2, ttl_seconds=60)
+    cache.put(1, ("a", None))
+    cache.put(2, ("b", None))
+    cache.lookup(1) # 1 is now most recently used
+    cache.put(3, ("c", None))
+
+    assert cache.lookup(2) == (False, None)
+    assert cache.lookup(1) == (True, ("a", None))
+    assert cache.lookup(3) == (True, ("c", None))
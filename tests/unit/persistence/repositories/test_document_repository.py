@@ -85,4 +85,79 @@ async def test_add_document_minimal_args(mock_db_session):
     # mock_db_session.commit.assert_awaited_once() # No longer asserting commit here
     mock_db_session.flush.assert_awaited_once()
     mock_db_session.refresh.assert_awaited_once_with(added_instance)
-    assert added_document is added_instance 
\ No newline at end of file
+    assert added_document is added_instance 
+
+@pytest.mark.asyncio
+async def test_get_existing_content_hashes(mock_db_session):
+    document_repo = DocumentRepository(mock_db_session)
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = ["hash_a"]
+    mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+    existing = await document_repo.get_existing_content_hashes(["hash_a", "hash_b"])
+
+    assert existing == {"hash_a"}
+    mock_db_session.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_get_existing_content_hashes_empty_input(mock_db_session):
+    document_repo = DocumentRepository(mock_db_session)
+    mock_db_session.execute = AsyncMock()
+
+    assert await document_repo.get_existing_content_hashes([]) == set()
+    mock_db_session.execute.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_update_document_sets_only_given_fields(mock_db_session):
+    document_repo = DocumentRepository(mock_db_session)
+    document = Document(id=1, title="Old", raw_content="old", content_hash="h_old", vector_ids=["a"])
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.first.return_value = document
+    mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+    updated = await document_repo.update_document(1, raw_content="new", content_hash="h_new", vector_ids=["b"])
+
+    assert updated is document
+    assert document.raw_content == "new"
+    assert document.content_hash == "h_new"
+    assert document.vector_ids == ["b"]
+    assert document.title == "Old" # Not provided, left unchanged
+    mock_db_session.flush.assert_awaited_once()
+    mock_db_session.commit.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_update_document_not_found(mock_db_session):
+    document_repo = DocumentRepository(mock_db_session)
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.first.return_value = None
+    mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+    assert await document_repo.update_document(99, raw_content="new") is None
+    mock_db_session.flush.assert_not_awaited()
+
+def test_document_raw_content_is_stored_compressed():
+    document = Document(id=1, title="Doc", raw_content="some text " * 100)
+    assert document.raw_content_compressed is not None
+    assert len(document.raw_content_compressed) < len("some text " * 100)
+    assert document.content_encoding is not None
+    assert document.raw_content == "some text " * 100
+    assert "".join(document.iter_raw_content_pages(300)) == "some text " * 100
+
+    document.raw_content = None
+    assert document.raw_content is None
+    assert list(document.iter_raw_content_pages(300)) == []
+
+@pytest.mark.asyncio
+async def test_get_document_by_id_defers_content_unless_requested(mock_db_session):
+    document_repo = DocumentRepository(mock_db_session)
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.first.return_value = None
+    mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+    await document_repo.get_document_by_id(1)
+    await document_repo.get_document_by_id(1, include_content=False)
+
+    with_content_stmt = mock_db_session.execute.call_args_list[0].args[0]
+    without_content_stmt = mock_db_session.execute.call_args_list[1].args[0]
+    assert "raw_content_compressed" in str(with_content_stmt)
+    assert "raw_content_compressed" not in str(without_content_stmt)
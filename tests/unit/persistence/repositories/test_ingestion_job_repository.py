@@ -0,0 +1,94 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.models.ingestion_job_model import IngestionJob, IngestionJobStatus
+from app.persistence.repositories.ingestion_job_repository import IngestionJobRepository
+
+@pytest.fixture
+def mock_db_session():
+    session = AsyncMock(spec=AsyncSession)
+    session.add = MagicMock()
+    return session
+
+@pytest.mark.asyncio
+async def test_add_job(mock_db_session):
+    repo = IngestionJobRepository(mock_db_session)
+
+    job = await repo.add_job(
+        requester_telegram_id=123,
+        content_source="https://example.com",
+        source_type="admin_global_url",
+        title="Example",
+    )
+
+    added_instance = mock_db_session.add.call_args[0][0]
+    assert isinstance(added_instance, IngestionJob)
+    assert added_instance.requester_telegram_id == 123
+    assert added_instance.source_type == "admin_global_url"
+    assert added_instance.status == IngestionJobStatus.PENDING.value
+    assert added_instance.proposal_id is None
+    mock_db_session.flush.assert_awaited_once()
+    mock_db_session.refresh.assert_awaited_once_with(added_instance)
+    mock_db_session.commit.assert_not_awaited() # Caller commits
+    assert job is added_instance
+
+@pytest.mark.asyncio
+async def test_update_job_running_sets_started_at(mock_db_session):
+    repo = IngestionJobRepository(mock_db_session)
+    updated_job = IngestionJob(id=1, status=IngestionJobStatus.RUNNING.value)
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = updated_job
+    mock_db_session.execute.return_value = mock_result
+
+    result = await repo.update_job(1, status=IngestionJobStatus.RUNNING, progress="starting")
+
+    assert result is updated_job
+    stmt = mock_db_session.execute.call_args[0][0]
+    params = stmt.compile().params
+    assert params["status"] == "running"
+    assert params["progress"] == "starting"
+    set_clause = str(stmt).split("RETURNING")[0]
+    assert "started_at" in set_clause
+    assert "finished_at" not in set_clause
+
+@pytest.mark.asyncio
+async def test_update_job_failed_sets_finished_at_and_error(mock_db_session):
+    repo = IngestionJobRepository(mock_db_session)
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = IngestionJob(id=1)
+    mock_db_session.execute.return_value = mock_result
+
+    await repo.update_job(1, status=IngestionJobStatus.FAILED, error_message="boom")
+
+    stmt = mock_db_session.execute.call_args[0][0]
+    params = stmt.compile().params
+    assert params["status"] == "failed"
+    assert params["error_message"] == "boom"
+    assert "finished_at" in str(stmt).split("RETURNING")[0]
+
+@pytest.mark.asyncio
+async def test_get_jobs_by_requester(mock_db_session):
+    repo = IngestionJobRepository(mock_db_session)
+    jobs = [IngestionJob(id=2), IngestionJob(id=1)]
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = jobs
+    mock_db_session.execute.return_value = mock_result
+
+    result = await repo.get_jobs_by_requester(123, limit=2)
+
+    assert result == jobs
+    mock_db_session.execute.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_get_unfinished_jobs(mock_db_session):
+    repo = IngestionJobRepository(mock_db_session)
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = [IngestionJob(id=3)]
+    mock_db_session.execute.return_value = mock_result
+
+    result = await repo.get_unfinished_jobs()
+
+    assert [job.id for job in result] == [3]
+    stmt = mock_db_session.execute.call_args[0][0]
+    assert stmt.compile().params["status_1"] == ["pending", "running"]
@@ -0,0 +1,46 @@
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.models.llm_usage_model import LLMUsage
+from app.persistence.repositories.llm_usage_repository import LLMUsageRepository
+from app.services.usage_accounting import UsageTotals
+
+@pytest.fixture
+def mock_db_session():
+    session = AsyncMock(spec=AsyncSession)
+    session.add_all = MagicMock()
+    return session
+
+@pytest.mark.asyncio
+async def test_add_usage_rows(mock_db_session):
+    repo = LLMUsageRepository(mock_db_session)
+    recorded_at = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+    await repo.add_usage_rows([("/ask", "ask_answer", "gpt-4o", UsageTotals(calls=2, prompt_tokens=300, cost_usd=0.02))], recorded_at)
+
+    added = mock_db_session.add_all.call_args[0][0]
+    assert len(added) == 1 and isinstance(added[0], LLMUsage)
+    assert (added[0].source, added[0].task, added[0].model) == ("/ask", "ask_answer", "gpt-4o")
+    assert added[0].calls == 2 and added[0].prompt_tokens == 300
+    assert added[0].recorded_at == recorded_at
+    mock_db_session.flush.assert_awaited_once()
+    mock_db_session.commit.assert_not_awaited() # Caller commits
+
+@pytest.mark.asyncio
+async def test_get_usage_by_source_groups_and_orders_by_cost(mock_db_session):
+    repo = LLMUsageRepository(mock_db_session)
+    mock_result = MagicMock()
+    mock_row = MagicMock()
+    mock_row._mapping = {"source": "/ask", "calls": 3, "cost_usd": 0.1}
+    mock_result.all.return_value = [mock_row]
+    mock_db_session.execute.return_value = mock_result
+
+    rows = await repo.get_usage_by_source(since=datetime(2026, 10, 12, tzinfo=timezone.utc), limit=5)
+
+    assert rows == [{"source": "/ask", "calls": 3, "cost_usd": 0.1}]
+    sql = str(mock_db_session.execute.call_args[0][0]).lower()
+    assert "group by llm_usage.source" in sql
+    assert "order by sum(llm_usage.cost_usd) desc" in sql
+    assert "llm_usage.recorded_at >=" in sql
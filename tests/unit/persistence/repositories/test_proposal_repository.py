@@ -5,7 +5,11 @@ from typing import List, Optional # Import Optional
 from datetime import datetime, timezone # Import timezone
 
 from app.persistence.models.proposal_model import Proposal, ProposalStatus, ProposalType
-from app.persistence.repositories.proposal_repository import ProposalRepository
+from app.persistence.models.user_model import User
+from app.persistence.repositories.proposal_repository import (
+    ProposalRepository, ProposalFacts, ProposalListItem, _proposal_facts_cache, _proposal_cache, invalidate_proposal_facts,
+    _PENDING_PROPOSAL_WRITES, _bump_proposals_written_in_transaction
+)
 
 @pytest.mark.asyncio
 async def test_get_proposals_by_ids_found():
@@ -151,4 +155,159 @@ async def test_get_proposals_by_proposer_id_not_found():
 
     # Assert
     assert len(proposals) == 0
-    mock_session.execute.assert_called_once() 
\ No newline at end of file
+    mock_session.execute.assert_called_once() 
+@pytest.mark.asyncio
+async def test_get_proposal_facts_queries_once_then_uses_cache():
+    _proposal_facts_cache.clear()
+    mock_session = AsyncMock(spec=AsyncSession)
+    deadline = datetime.now(timezone.utc)
+    row = MagicMock(id=5, title="Lunch", proposal_type=ProposalType.MULTIPLE_CHOICE.value, options=["A", "B"], deadline_date=deadline, status=ProposalStatus.OPEN.value)
+    mock_result = MagicMock()
+    mock_result.one_or_none.return_value = row
+    mock_session.execute.return_value = mock_result
+    repo = ProposalRepository(mock_session)
+
+    first = await repo.get_proposal_facts(5)
+    second = await repo.get_proposal_facts(5)
+
+    assert first == second == ProposalFacts(5, "Lunch", ProposalType.MULTIPLE_CHOICE.value, ("A", "B"), deadline, ProposalStatus.OPEN.value)
+    mock_session.execute.assert_awaited_once()
+    sql = str(mock_session.execute.call_args[0][0].compile())
+    assert "JOIN" not in sql and "users" not in sql # No proposer load
+    _proposal_facts_cache.clear()
+
+@pytest.mark.asyncio
+async def test_update_proposal_status_invalidates_cached_facts():
+    _proposal_facts_cache.clear()
+    _proposal_facts_cache.put(ProposalFacts(5, "Lunch", ProposalType.MULTIPLE_CHOICE.value, ("A",), datetime.now(timezone.utc), ProposalStatus.OPEN.value), version=0)
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.execute.return_value = MagicMock()
+    repo = ProposalRepository(mock_session)
+
+    await repo.update_proposal_status(5, ProposalStatus.CLOSED)
+
+    assert _proposal_facts_cache.get(5) is None
+
+@pytest.mark.asyncio
+async def test_get_proposal_facts_fill_racing_an_edit_is_not_cached():
+    _proposal_facts_cache.clear()
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.info = {}
+    row = MagicMock(id=5, title="Lunch", proposal_type=ProposalType.MULTIPLE_CHOICE.value, options=["A", "B"], deadline_date=datetime.now(timezone.utc), status=ProposalStatus.OPEN.value)
+
+    async def execute_then_edit(stmt):
+        invalidate_proposal_facts(5) # An edit commits while the old row is being read
+        result = MagicMock()
+        result.one_or_none.return_value = row
+        return result
+    mock_session.execute.side_effect = execute_then_edit
+
+    facts = await ProposalRepository(mock_session).get_proposal_facts(5)
+
+    assert facts.options == ("A", "B") # Still answers this caller
+    assert _proposal_facts_cache.get(5) is None
+    _proposal_facts_cache.clear()
+
+@pytest.mark.asyncio
+async def test_get_proposal_facts_in_writing_session_is_not_cached():
+    _proposal_facts_cache.clear()
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.info = {_PENDING_PROPOSAL_WRITES: {5}}
+    row = MagicMock(id=5, title="Lunch", proposal_type=ProposalType.MULTIPLE_CHOICE.value, options=["C"], deadline_date=datetime.now(timezone.utc), status=ProposalStatus.OPEN.value)
+    mock_result = MagicMock()
+    mock_result.one_or_none.return_value = row
+    mock_session.execute.return_value = mock_result
+
+    await ProposalRepository(mock_session).get_proposal_facts(5)
+
+    assert _proposal_facts_cache.get(5) is None
+    _proposal_facts_cache.clear()
+
+@pytest.mark.asyncio
+async def test_get_proposal_list_items_by_proposer_id_projects_list_columns():
+    mock_session = AsyncMock(spec=AsyncSession)
+    now = datetime.now(timezone.utc)
+    row = (1, "My Prop 1", ProposalStatus.OPEN.value, ProposalType.FREE_FORM.value, "-1001", 50, now, now, None)
+    mock_result = MagicMock()
+    mock_result.all.return_value = [row]
+    mock_session.execute.return_value = mock_result
+    repo = ProposalRepository(mock_session)
+
+    items = await repo.get_proposal_list_items_by_proposer_id(12345)
+
+    assert items == [ProposalListItem(*row)]
+    assert items[0].title == "My Prop 1" and items[0].outcome is None
+    sql = str(mock_session.execute.call_args[0][0].compile(compile_kwargs={"literal_binds": True}))
+    assert "proposals.description" not in sql and "proposals.raw_results" not in sql
+    assert "WHERE proposals.proposer_telegram_id = 12345" in sql
+    assert "ORDER BY proposals.creation_date DESC" in sql
+
+def _loaded_proposal(proposal_id: int, status: str = ProposalStatus.OPEN.value) -> Proposal:
+    """A Proposal and proposer with every column set, as a selectinload query would return them."""
+    now = datetime.now(timezone.utc)
+    proposer = User(id=1, telegram_id=12345, username="alice", first_name="Alice", last_updated=now)
+    return Proposal(
+        id=proposal_id, proposer_telegram_id=12345, title="Lunch", description="Where?", proposal_type=ProposalType.MULTIPLE_CHOICE.value,
+        options=["A", "B"], target_channel_id="-1001", channel_message_id=7, creation_date=now, deadline_date=now,
+        status=status, outcome=None, raw_results=None, proposer=proposer
+    )
+
+def _session_returning(proposal: Optional[Proposal]) -> AsyncMock:
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.info = {}
+    mock_session.identity_map = {}
+    mock_session.add = MagicMock()
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = proposal
+    mock_session.execute.return_value = mock_result
+    return mock_session
+
+@pytest.mark.asyncio
+async def test_get_proposal_by_id_second_lookup_is_served_from_cache():
+    _proposal_cache.clear()
+    repo = ProposalRepository(_session_returning(_loaded_proposal(5)))
+    await repo.get_proposal_by_id(5)
+
+    other_session = _session_returning(None)
+    cached = await ProposalRepository(other_session).get_proposal_by_id(5)
+
+    other_session.execute.assert_not_awaited()
+    other_session.add.assert_called_once_with(cached)
+    assert cached.title == "Lunch" and cached.options == ["A", "B"]
+    assert cached.proposer.username == "alice"
+    _proposal_cache.clear()
+
+@pytest.mark.asyncio
+async def test_update_proposal_status_makes_next_lookup_query_again():
+    _proposal_cache.clear()
+    repo = ProposalRepository(_session_returning(_loaded_proposal(5)))
+    await repo.get_proposal_by_id(5)
+    await repo.update_proposal_status(5, ProposalStatus.CLOSED)
+
+    other_session = _session_returning(_loaded_proposal(5, ProposalStatus.CLOSED.value))
+    proposal = await ProposalRepository(other_session).get_proposal_by_id(5)
+
+    other_session.execute.assert_awaited_once()
+    assert proposal.status == ProposalStatus.CLOSED.value
+    _proposal_cache.clear()
+
+@pytest.mark.asyncio
+async def test_lookup_in_writing_session_bypasses_cache_until_commit():
+    _proposal_cache.clear()
+    mock_session = _session_returning(_loaded_proposal(5))
+    mock_session.info[_PENDING_PROPOSAL_WRITES] = {5}
+    await ProposalRepository(mock_session).get_proposal_by_id(5)
+
+    assert _proposal_cache.get(5) is None # Uncommitted state is never cached
+    _bump_proposals_written_in_transaction(mock_session)
+    assert _PENDING_PROPOSAL_WRITES not in mock_session.info
+    _proposal_cache.clear()
+
+def test_proposal_cache_ignores_fill_that_raced_a_write():
+    _proposal_cache.clear()
+    version = _proposal_cache.version(5)
+    _proposal_cache.bump(5) # Written while the row was being loaded
+
+    assert _proposal_cache.put(5, version, {"id": 5}, None) is False
+    assert _proposal_cache.get(5) is None
+    _proposal_cache.clear()
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.dialects import postgresql
 from typing import List, Optional # Import Optional
 from datetime import datetime, timezone # Import timezone
 
@@ -154,4 +155,60 @@ async def test_count_submissions_for_proposal_proposal_not_exist():
 
     # Assert
     assert count == 0
-    mock_session.execute.assert_called_once() 
\ No newline at end of file
+    mock_session.execute.assert_called_once() 
+@pytest.mark.asyncio
+async def test_upsert_submission_if_open_is_one_guarded_statement():
+    mock_session = AsyncMock(spec=AsyncSession)
+    saved = Submission(id=1, proposal_id=3, submitter_id=42, response_content="A")
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = saved
+    mock_session.execute.return_value = mock_result
+    repo = SubmissionRepository(mock_session)
+
+    submission = await repo.upsert_submission_if_open(3, 42, "A")
+
+    assert submission is saved
+    mock_session.execute.assert_awaited_once()
+    sql = str(mock_session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "INSERT INTO submissions (proposal_id, submitter_id, response_content) SELECT" in sql
+    assert "WHERE EXISTS (SELECT * \nFROM proposals \nWHERE proposals.id = " in sql
+    assert "proposals.status = " in sql
+    assert "ON CONFLICT (proposal_id, submitter_id) DO UPDATE SET response_content = excluded.response_content" in sql
+
+@pytest.mark.asyncio
+async def test_upsert_submission_if_open_returns_none_when_closed():
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.scalar_one_or_none.return_value = None
+    mock_session.execute.return_value = mock_result
+
+    assert await SubmissionRepository(mock_session).upsert_submission_if_open(3, 42, "A") is None
+
+@pytest.mark.asyncio
+async def test_count_responses_for_proposal_groups_in_sql():
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.all.return_value = [("A", 3), ("B", 1)]
+    mock_session.execute.return_value = mock_result
+
+    counts = await SubmissionRepository(mock_session).count_responses_for_proposal(7)
+
+    assert counts == {"A": 3, "B": 1}
+    sql = str(mock_session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "count(*)" in sql
+    assert "GROUP BY submissions.response_content" in sql
+
+@pytest.mark.asyncio
+async def test_stream_response_texts_uses_server_side_cursor():
+    async def scalars():
+        for text in ["first", "second"]:
+            yield text
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.stream_scalars.return_value = scalars()
+
+    texts = [text async for text in SubmissionRepository(mock_session).stream_response_texts(7, batch_size=100)]
+
+    assert texts == ["first", "second"]
+    stmt = mock_session.stream_scalars.call_args[0][0]
+    assert stmt.get_execution_options()["yield_per"] == 100
+    assert "ORDER BY submissions.id" in str(stmt.compile(dialect=postgresql.dialect()))
@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.dialects import postgresql
 
 from app.persistence.repositories.user_repository import UserRepository
 from app.persistence.models.user_model import User
@@ -114,4 +115,34 @@ async def test_get_user_by_telegram_id_not_exists(user_repository: UserRepositor
 
     # Assert
     assert user is None
-    session_mock.execute.assert_called_once() 
\ No newline at end of file
+    session_mock.execute.assert_called_once() 
+@pytest.mark.asyncio
+async def test_upsert_user_is_one_statement_that_only_updates_changed_names(user_repository: UserRepository, mock_session):
+    session_mock, result_mock = mock_session
+    result_mock.scalar_one_or_none.return_value = 1
+
+    written = await user_repository.upsert_user(123, "newuser", "New")
+
+    assert written is True
+    session_mock.execute.assert_called_once()
+    sql = str(session_mock.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (telegram_id) DO UPDATE" in sql
+    assert "IS DISTINCT FROM excluded.username" in sql
+    assert "IS DISTINCT FROM excluded.first_name" in sql
+    assert "RETURNING users.id" in sql
+
+@pytest.mark.asyncio
+async def test_upsert_user_unchanged_returns_false(user_repository: UserRepository, mock_session):
+    session_mock, result_mock = mock_session
+    result_mock.scalar_one_or_none.return_value = None # The conflict WHERE filtered the update out
+
+    assert await user_repository.upsert_user(123, "same", "Same") is False
+
+@pytest.mark.asyncio
+async def test_insert_user_if_missing_does_nothing_on_conflict(user_repository: UserRepository, mock_session):
+    session_mock, result_mock = mock_session
+    result_mock.scalar_one_or_none.return_value = None
+
+    assert await user_repository.insert_user_if_missing(123) is False
+    sql = str(session_mock.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (telegram_id) DO NOTHING" in sql
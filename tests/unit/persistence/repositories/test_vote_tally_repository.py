@@ -0,0 +1,49 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.persistence.repositories.vote_tally_repository import VoteTallyRepository, TallyMismatch
+
+def _session_returning(rows):
+    session = AsyncMock(spec=AsyncSession)
+    result = MagicMock()
+    result.all.return_value = rows
+    session.execute.return_value = result
+    return session
+
+def _sql(session, call_index=-1):
+    return str(session.execute.call_args_list[call_index][0][0].compile(dialect=postgresql.dialect()))
+
+@pytest.mark.asyncio
+async def test_get_tallies_reads_only_the_tally_rows():
+    session = _session_returning([("Tacos", 7), ("Pizza", 3)])
+
+    tallies = await VoteTallyRepository(session).get_tallies(5)
+
+    assert tallies == {"Tacos": 7, "Pizza": 3}
+    sql = _sql(session)
+    assert "FROM proposal_option_tallies" in sql
+    assert "submissions" not in sql
+
+@pytest.mark.asyncio
+async def test_find_mismatches_compares_tallies_with_grouped_submissions():
+    session = _session_returning([(5, "Tacos", 7, 6)])
+
+    mismatches = await VoteTallyRepository(session).find_mismatches(5)
+
+    assert mismatches == [TallyMismatch(proposal_id=5, option="Tacos", tallied=7, actual=6)]
+    sql = _sql(session)
+    assert "FULL OUTER JOIN" in sql
+    assert "GROUP BY submissions.proposal_id, submissions.response_content" in sql
+
+@pytest.mark.asyncio
+async def test_rebuild_tallies_replaces_rows_from_submissions():
+    session = _session_returning([])
+
+    await VoteTallyRepository(session).rebuild_tallies(5)
+
+    assert session.execute.await_count == 2
+    assert _sql(session, 0).startswith("DELETE FROM proposal_option_tallies")
+    assert _sql(session, 1).startswith("INSERT INTO proposal_option_tallies (proposal_id, option, vote_count) SELECT")
+    session.commit.assert_not_called()
@@ -0,0 +1,179 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.persistence.database import (
+    update_session, run_after_commit, count_queries, _query_counter, engine_options, _InstrumentedQueuePool,
+    commit_unless_in_update_session, run_when_committed, _UnitOfWork, _UNIT_OF_WORK_KEY
+)
+from app.persistence.repositories.proposal_repository import ProposalRepository
+from app.persistence.models.proposal_model import ProposalStatus
+from app.utils.metrics import metrics
+
+@pytest.fixture
+def mock_session():
+    session = AsyncMock()
+    context_manager = MagicMock()
+    context_manager.__aenter__ = AsyncMock(return_value=session)
+    context_manager.__aexit__ = AsyncMock(return_value=None)
+    with patch('app.persistence.database.AsyncSessionLocal', return_value=context_manager) as mock_factory:
+        session.factory = mock_factory
+        yield session
+
+@pytest.mark.asyncio
+async def test_nested_update_sessions_share_one_session_and_commit_once(mock_session):
+    async with update_session() as outer:
+        async with update_session() as inner:
+            assert inner is outer
+        mock_session.commit.assert_not_awaited() # Nested blocks never commit
+
+    assert outer is mock_session
+    mock_session.factory.assert_called_once()
+    mock_session.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_update_session_rolls_back_on_error_and_skips_after_commit(mock_session):
+    callback = AsyncMock()
+    with pytest.raises(ValueError):
+        async with update_session():
+            run_after_commit(callback)
+            raise ValueError("boom")
+
+    mock_session.rollback.assert_awaited_once()
+    mock_session.commit.assert_not_awaited()
+    callback.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_after_commit_callbacks_run_after_commit(mock_session):
+    order = []
+    mock_session.commit.side_effect = lambda: order.append("commit")
+
+    async def callback():
+        order.append("callback")
+
+    async with update_session():
+        async with update_session():
+            run_after_commit(callback)
+        assert order == []
+
+    assert order == ["commit", "callback"]
+
+@pytest.mark.asyncio
+async def test_failing_after_commit_callback_is_logged_not_raised(mock_session, caplog):
+    async with update_session():
+        run_after_commit(AsyncMock(side_effect=Exception("enqueue failed")))
+    mock_session.commit.assert_awaited_once()
+    assert "Error in after-commit callback" in caplog.text
+
+@pytest.mark.asyncio
+async def test_handled_failure_in_nested_block_rolls_back_whole_update(mock_session):
+    callback = AsyncMock()
+    async with update_session():
+        run_after_commit(callback)
+        try:
+            async with update_session():
+                raise ValueError("vote failed") # e.g. a service error the handler reports to the user
+        except ValueError:
+            pass
+
+    mock_session.commit.assert_not_awaited()
+    mock_session.rollback.assert_awaited_once()
+    callback.assert_not_awaited()
+
+def test_session_rollback_drops_after_commit_callbacks():
+    session = Session()
+    unit = _UnitOfWork(session)
+    unit.after_commit.append(AsyncMock())
+    session.info[_UNIT_OF_WORK_KEY] = unit
+    session.begin()
+    session.rollback() # e.g. a repository rolling back the update's session
+
+    assert unit.after_commit == [] and unit.rollback_only
+
+def test_run_after_commit_outside_update_session_raises():
+    with pytest.raises(RuntimeError):
+        run_after_commit(AsyncMock())
+
+@pytest.mark.asyncio
+async def test_commit_unless_in_update_session_defers_to_the_update_commit(mock_session):
+    order = []
+    mock_session.commit.side_effect = lambda: order.append("commit")
+
+    async def callback():
+        order.append("callback")
+
+    async with update_session() as session:
+        await commit_unless_in_update_session(session)
+        await run_when_committed(session, callback)
+        mock_session.flush.assert_awaited_once()
+        assert order == []
+
+    assert order == ["commit", "callback"]
+
+@pytest.mark.asyncio
+async def test_commit_unless_in_update_session_commits_other_sessions(mock_session):
+    own_session = AsyncMock()
+    callback = AsyncMock()
+    async with update_session():
+        await commit_unless_in_update_session(own_session) # Opened by the caller, not the update's session
+        await run_when_committed(own_session, callback)
+        own_session.commit.assert_awaited_once()
+        callback.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_update_proposal_status_does_not_commit_an_update_partway(mock_session):
+    mock_session.info = {}
+    async with update_session() as session:
+        await ProposalRepository(session).update_proposal_status(5, ProposalStatus.CANCELLED)
+        mock_session.commit.assert_not_awaited()
+
+    mock_session.commit.assert_awaited_once()
+
+def test_count_queries_installs_and_resets_counter():
+    assert _query_counter.get() is None
+    with count_queries() as counter:
+        assert _query_counter.get() is counter
+        assert (counter.queries, counter.commits) == (0, 0)
+    assert _query_counter.get() is None
+
+def test_engine_options_pgbouncer_mode_disables_statement_caches():
+    with patch('app.persistence.database.ConfigService.is_db_pgbouncer_mode', return_value=True), \
+         patch('app.persistence.database.ConfigService.get_db_statement_cache_size', return_value=0):
+        options = engine_options()
+
+    connect_args = options["connect_args"]
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func() # Unique names, so pooled server connections never see a collision
+
+def test_engine_options_pool_settings_come_from_config():
+    with patch('app.persistence.database.ConfigService.is_db_pgbouncer_mode', return_value=False), \
+         patch('app.persistence.database.ConfigService.get_db_pool_size', return_value=8), \
+         patch('app.persistence.database.ConfigService.get_db_max_overflow', return_value=4), \
+         patch('app.persistence.database.ConfigService.get_db_pool_timeout_seconds', return_value=5.0), \
+         patch('app.persistence.database.ConfigService.get_db_pool_recycle_seconds', return_value=600):
+        options = engine_options()
+
+    assert options["poolclass"] is _InstrumentedQueuePool
+    assert (options["pool_size"], options["max_overflow"], options["pool_timeout"], options["pool_recycle"]) == (8, 4, 5.0, 600)
+    assert "prepared_statement_name_func" not in options["connect_args"]
+
+def test_engine_options_pool_size_zero_uses_null_pool():
+    with patch('app.persistence.database.ConfigService.get_db_pool_size', return_value=0):
+        options = engine_options()
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options
+
+def test_instrumented_pool_records_checkout_wait_and_in_use():
+    metrics.reset()
+    pool = _InstrumentedQueuePool(creator=MagicMock, pool_size=2, max_overflow=0)
+    first, second = pool.connect(), pool.connect()
+
+    assert metrics.get_summary("db.pool_checkout_wait_seconds")["count"] == 2
+    assert metrics.get_summary("db.pool_in_use")["max"] == 2
+    first.close()
+    second.close()
+    metrics.reset()
@@ -0,0 +1,22 @@
+from app.scripts.explain_query_plans import summarize_plan
+
+def test_summarize_plan_finds_index_scans_in_nested_plans():
+    plan = {
+        "Node Type": "Limit",
+        "Plans": [{
+            "Node Type": "Index Scan Backward",
+            "Index Name": "ix_proposals_target_channel_id_creation_date",
+            "Relation Name": "proposals",
+        }]
+    }
+
+    scans, indexes = summarize_plan(plan)
+
+    assert scans == ["Index Scan Backward using ix_proposals_target_channel_id_creation_date"]
+    assert indexes == ["ix_proposals_target_channel_id_creation_date"]
+
+def test_summarize_plan_reports_sequential_scans():
+    scans, indexes = summarize_plan({"Node Type": "Seq Scan", "Relation Name": "submissions"})
+
+    assert scans == ["Seq Scan on submissions"]
+    assert indexes == []
@@ -0,0 +1,53 @@
+import math
+import pytest
+from unittest.mock import patch
+
+from app.scripts.fake_openai_server import FakeOpenAIConfig, fake_embedding, start_fake_openai_server
+from app.services.llm_service import LLMService
+
+@pytest.fixture
+def fake_server():
+    server = start_fake_openai_server(FakeOpenAIConfig(embedding_dimensions=64))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def llm_service_against(fake_server):
+    with patch('app.services.llm_service.ConfigService.get_openai_api_key', return_value="sk-fake"), \
+         patch('app.services.llm_service.ConfigService.get_openai_base_url', return_value=fake_server.base_url):
+        yield LLMService()
+
+def test_fake_embedding_is_deterministic_and_similarity_preserving():
+    a = fake_embedding("rooftop garden with tomatoes", 256)
+    assert a == fake_embedding("rooftop garden with tomatoes", 256)
+    assert math.isclose(sum(value * value for value in a), 1.0)
+    similar = fake_embedding("a rooftop garden", 256)
+    unrelated = fake_embedding("bike parking downstairs", 256)
+    dot = lambda x, y: sum(p * q for p, q in zip(x, y))
+    assert dot(a, similar) > dot(a, unrelated)
+
+@pytest.mark.asyncio
+async def test_llm_service_runs_offline_against_fake_server(llm_service_against: LLMService, fake_server):
+    assert str(llm_service_against.client.base_url).startswith(fake_server.base_url)
+
+    embeddings = await llm_service_against.generate_embeddings(["first text", "second text"])
+    assert len(embeddings) == 2 and len(embeddings[0]) == 64
+    assert embeddings[0] == fake_embedding("first text", 64)
+
+    summary = await llm_service_against.get_completion("Summarize. Theme 1: ...", task="summarize_submissions")
+    assert summary.startswith("Theme 1: Fake theme")
+
+    streamed = "".join([delta async for delta in llm_service_against.stream_completion("Answer the question.")])
+    assert streamed.startswith("This is a templated answer")
+
+    analysis = await llm_service_against.analyze_ask_query("any garden proposals?")
+    assert analysis["intent"] == "query_proposals"
+    assert analysis["content_keywords"] == "any garden proposals?"
+
+@pytest.mark.asyncio
+async def test_fake_server_injects_errors(llm_service_against: LLMService, fake_server):
+    fake_server.config.error_rate = 1.0
+    fake_server.config.error_status = 400 # Not retryable, so the call fails immediately
+    assert await llm_service_against.get_completion("prompt") is None
+    assert fake_server.request_count == 1
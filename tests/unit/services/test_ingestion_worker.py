@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from telegram.ext import Application
+
+from app.services import ingestion_worker # Import the module to patch its globals
+from app.services.ingestion_worker import (
+    start_ingestion_worker,
+    submit_ingestion_job,
+    run_ingestion_job,
+)
+from app.persistence.models.ingestion_job_model import IngestionJob, IngestionJobStatus
+
+@pytest.fixture(autouse=True)
+def reset_worker_globals():
+    ingestion_worker._bot_app = None
+    ingestion_worker._semaphore = None
+    yield
+    ingestion_worker._bot_app = None
+    ingestion_worker._semaphore = None
+
+@pytest.fixture
+def mock_bot_app():
+    app = MagicMock(spec=Application)
+    app.bot = AsyncMock()
+    return app
+
+@pytest.fixture
+def mock_async_session_local():
+    mock_session_instance = AsyncMock()
+    mock_context_manager = AsyncMock()
+    mock_context_manager.__aenter__.return_value = mock_session_instance
+    mock_context_manager.__aexit__ = AsyncMock(return_value=None)
+    with patch('app.services.ingestion_worker.AsyncSessionLocal', return_value=mock_context_manager), \
+         patch('app.persistence.database.AsyncSessionLocal', return_value=mock_context_manager):
+        yield mock_session_instance
+
+@pytest.fixture
+def mock_job_repo():
+    with patch('app.services.ingestion_worker.IngestionJobRepository', autospec=True) as MockRepo:
+        yield MockRepo.return_value
+
+@pytest.fixture
+def mock_context_service():
+    with patch('app.services.ingestion_worker.ContextService', autospec=True) as MockCS, \
+         patch('app.services.ingestion_worker.LLMService'), \
+         patch('app.services.ingestion_worker.VectorDBService'):
+        yield MockCS.return_value
+
+def _job(**kwargs):
+    defaults = dict(
+        id=7, requester_telegram_id=123, content_source="some text", source_type="admin_global_text",
+        title="Doc", proposal_id=None, status=IngestionJobStatus.RUNNING.value
+    )
+    defaults.update(kwargs)
+    return IngestionJob(**defaults)
+
+@pytest.mark.asyncio
+async def test_submit_ingestion_job_records_and_enqueues(mock_async_session_local, mock_job_repo):
+    mock_job_repo.add_job.return_value = _job(status=IngestionJobStatus.PENDING.value)
+    with patch('app.services.ingestion_worker.enqueue_ingestion_job') as mock_enqueue:
+        job_id = await submit_ingestion_job(123, "some text", "admin_global_text", title="Doc")
+
+    assert job_id == 7
+    mock_job_repo.add_job.assert_awaited_once_with(
+        requester_telegram_id=123, content_source="some text", source_type="admin_global_text", title="Doc", proposal_id=None
+    )
+    mock_async_session_local.commit.assert_awaited_once()
+    mock_enqueue.assert_called_once_with(7)
+
+@pytest.mark.asyncio
+async def test_submit_ingestion_job_db_error_returns_none(mock_async_session_local, mock_job_repo, caplog):
+    mock_job_repo.add_job.side_effect = Exception("DB down")
+    with patch('app.services.ingestion_worker.enqueue_ingestion_job') as mock_enqueue:
+        job_id = await submit_ingestion_job(123, "some text", "admin_global_text")
+
+    assert job_id is None
+    mock_async_session_local.rollback.assert_awaited_once()
+    mock_enqueue.assert_not_called()
+    assert "Error creating ingestion job" in caplog.text
+
+@pytest.mark.asyncio
+async def test_submit_ingestion_job_db_error_inside_update_reraises(mock_async_session_local, mock_job_repo):
+    from app.persistence.database import update_session
+    mock_job_repo.add_job.side_effect = Exception("DB down")
+    with patch('app.services.ingestion_worker.enqueue_ingestion_job') as mock_enqueue:
+        with pytest.raises(Exception, match="DB down"):
+            async with update_session():
+                await submit_ingestion_job(123, "some text", "user_text", proposal_id=5)
+
+    mock_async_session_local.commit.assert_not_awaited() # The handler's update is rolled back with the job
+    mock_enqueue.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_run_ingestion_job_success_notifies_requester(mock_async_session_local, mock_job_repo, mock_context_service, mock_bot_app):
+    ingestion_worker._bot_app = mock_bot_app
+    mock_job_repo.update_job.return_value = _job()
+    mock_context_service.process_and_store_document.return_value = 42
+
+    await run_ingestion_job(7)
+
+    kwargs = mock_context_service.process_and_store_document.call_args.kwargs
+    assert kwargs["content_source"] == "some text"
+    assert kwargs["source_type"] == "admin_global_text"
+    assert kwargs["progress_callback"] is not None
+    mock_job_repo.update_job.assert_any_await(7, status=IngestionJobStatus.RUNNING, progress="starting")
+    mock_job_repo.update_job.assert_any_await(7, status=IngestionJobStatus.COMPLETED, progress="done", document_id=42)
+    mock_bot_app.bot.send_message.assert_awaited_once()
+    assert mock_bot_app.bot.send_message.call_args.kwargs["chat_id"] == 123
+    assert "Document ID: 42" in mock_bot_app.bot.send_message.call_args.kwargs["text"]
+
+@pytest.mark.asyncio
+async def test_run_ingestion_job_failure_marks_failed(mock_async_session_local, mock_job_repo, mock_context_service, mock_bot_app):
+    ingestion_worker._bot_app = mock_bot_app
+    mock_job_repo.update_job.return_value = _job()
+    mock_context_service.process_and_store_document.side_effect = Exception("crawl failed")
+
+    await run_ingestion_job(7)
+
+    final_call = mock_job_repo.update_job.await_args_list[-1]
+    assert final_call.kwargs["status"] == IngestionJobStatus.FAILED
+    assert final_call.kwargs["error_message"]
+    assert "failed" in mock_bot_app.bot.send_message.call_args.kwargs["text"]
+
+@pytest.mark.asyncio
+async def test_run_ingestion_job_respects_concurrency_limit(mock_async_session_local, mock_job_repo, mock_context_service):
+    mock_job_repo.update_job.return_value = _job()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_process(**kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return 1
+
+    mock_context_service.process_and_store_document.side_effect = slow_process
+    with patch('app.services.ingestion_worker.ConfigService.get_ingestion_worker_concurrency', return_value=2):
+        await asyncio.gather(*[run_ingestion_job(i) for i in range(5)])
+
+    assert max_in_flight == 2
+
+@pytest.mark.asyncio
+async def test_start_ingestion_worker_resumes_unfinished_jobs(mock_async_session_local, mock_job_repo, mock_bot_app):
+    mock_job_repo.get_unfinished_jobs.return_value = [_job(id=1), _job(id=2)]
+    with patch('app.services.ingestion_worker.enqueue_ingestion_job') as mock_enqueue:
+        await start_ingestion_worker(mock_bot_app)
+
+    assert ingestion_worker._bot_app is mock_bot_app
+    assert [c.args[0] for c in mock_enqueue.call_args_list] == [1, 2]
@@ -1,4 +1,5 @@
 import pytest
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 from openai import AsyncOpenAI
 from openai.types.chat import ChatCompletionMessage, ChatCompletion
@@ -139,7 +140,7 @@ async def test_generate_embedding_success(llm_service_with_mock_client: LLMServi
     
     result = await llm_service_with_mock_client.generate_embedding(text_input)
     assert result == expected_embedding
-    mock_openai_client.embeddings.create.assert_called_once_with(input=[text_input.replace('\n', ' ')], model="text-embedding-3-small")
+    mock_openai_client.embeddings.create.assert_called_once_with(input=[text_input.replace('\n', ' ')], model="text-embedding-3-small", timeout=30)
 
 @pytest.mark.asyncio
 async def test_generate_embedding_api_error(llm_service_with_mock_client: LLMService, mock_openai_client, caplog):
@@ -148,6 +149,38 @@ async def test_generate_embedding_api_error(llm_service_with_mock_client: LLMSer
     assert result is None
     assert "Error generating embedding" in caplog.text
 
+# --- Test generate_embeddings (batched) ---
+@pytest.mark.asyncio
+async def test_generate_embeddings_batches_requests(llm_service_with_mock_client: LLMService, mock_openai_client):
+    texts = ["one", "two\nlines", "three"]
+
+    def make_response(input, model, timeout):
+        # Return the batch out of order to check results are re-ordered by index
+        data = [Embedding(embedding=[float(len(t))], index=i, object="embedding") for i, t in enumerate(input)]
+        return CreateEmbeddingResponse(data=list(reversed(data)), model=model, object="list", usage=Usage(prompt_tokens=0, total_tokens=0))
+
+    mock_openai_client.embeddings.create = AsyncMock(side_effect=make_response)
+
+    result = await llm_service_with_mock_client.generate_embeddings(texts, batch_size=2)
+
+    assert result == [[3.0], [9.0], [5.0]]
+    assert mock_openai_client.embeddings.create.await_count == 2
+    first_call = mock_openai_client.embeddings.create.await_args_list[0]
+    assert first_call.kwargs["input"] == ["one", "two lines"]
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_empty_input(llm_service_with_mock_client: LLMService, mock_openai_client):
+    result = await llm_service_with_mock_client.generate_embeddings([])
+    assert result == []
+    mock_openai_client.embeddings.create.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_generate_embeddings_api_error(llm_service_with_mock_client: LLMService, mock_openai_client, caplog):
+    mock_openai_client.embeddings.create = AsyncMock(side_effect=Exception("API Down"))
+    result = await llm_service_with_mock_client.generate_embeddings(["a", "b"])
+    assert result is None
+    assert "Error generating embeddings for batch" in caplog.text
+
 # --- Test get_completion (method used by others, but also test directly) ---
 @pytest.mark.asyncio
 async def test_get_completion_client_not_initialized(mock_config_service_no_key, caplog):
@@ -231,4 +264,370 @@ async def test_cluster_summarize_exception(llm_service_with_mock_client: LLMServ
     texts = ["text1"]
     result = await llm_service_with_mock_client.cluster_and_summarize_texts(texts)
     assert result == "An error occurred while generating the summary." # Placeholder message
-    assert "Unexpected error during text clustering and summarization" in caplog.text 
\ No newline at end of file
+    assert "Unexpected error during text clustering and summarization" in caplog.text 
+
+# --- Test map_reduce_summarize_texts ---
+@pytest.mark.asyncio
+async def test_map_reduce_summarize_clusters_then_merges(llm_service_with_mock_client: LLMService):
+    texts = [f"bike parking idea {i}" for i in range(4)] + [f"rooftop garden idea {i}" for i in range(4)]
+    embeddings = [[1.0, 0.0]] * 4 + [[0.0, 1.0]] * 4
+    llm_service_with_mock_client.generate_embeddings = AsyncMock(return_value=embeddings)
+    llm_service_with_mock_client.get_completion = AsyncMock(side_effect=[
+        "Title: Bikes\nSummary: More bike parking.",
+        "Title: Gardens\nSummary: A rooftop garden.",
+        "Theme 1: Bikes\nSummary: ...\n\nTheme 2: Gardens\nSummary: ..."
+    ])
+
+    result = await llm_service_with_mock_client.map_reduce_summarize_texts(texts, num_clusters=2)
+
+    assert result.startswith("Theme 1: Bikes")
+    calls = llm_service_with_mock_client.get_completion.call_args_list
+    assert len(calls) == 3 # One map call per cluster plus the merge
+    assert [call.kwargs["task"] for call in calls] == ["summarize_cluster", "summarize_cluster", "summarize_submissions"]
+    map_prompts = [call.args[0] for call in calls[:2]]
+    assert all("4 of 4 similar free-form submissions" in prompt for prompt in map_prompts)
+    assert any("bike parking idea 0" in prompt and "rooftop" not in prompt for prompt in map_prompts)
+    merge_prompt = calls[2].args[0]
+    assert "8 free-form submissions" in merge_prompt
+    assert "Group 1 (4 submissions)" in merge_prompt and "Group 2 (4 submissions)" in merge_prompt
+
+@pytest.mark.asyncio
+async def test_map_reduce_summarize_skips_failed_clusters(llm_service_with_mock_client: LLMService):
+    llm_service_with_mock_client.generate_embeddings = AsyncMock(return_value=[[1.0, 0.0], [0.0, 1.0]])
+    llm_service_with_mock_client.get_completion = AsyncMock(side_effect=[None, "Title: B\nSummary: b", "Theme 1: B"])
+
+    result = await llm_service_with_mock_client.map_reduce_summarize_texts(["a", "b"], num_clusters=2)
+
+    assert result == "Theme 1: B"
+    merge_prompt = llm_service_with_mock_client.get_completion.call_args_list[-1].args[0]
+    assert "Group 1 (1 submissions)" in merge_prompt and "Group 2" not in merge_prompt
+
+@pytest.mark.asyncio
+async def test_map_reduce_summarize_embedding_failure(llm_service_with_mock_client: LLMService, caplog):
+    llm_service_with_mock_client.generate_embeddings = AsyncMock(return_value=None)
+    llm_service_with_mock_client.get_completion = AsyncMock()
+
+    result = await llm_service_with_mock_client.map_reduce_summarize_texts(["a", "b", "c"])
+
+    assert result is None
+    llm_service_with_mock_client.get_completion.assert_not_called()
+    assert "Could not embed 3 texts for map-reduce summarization." in caplog.text
+# --- Test stream_completion ---
+def _stream_chunk(content):
+    from types import SimpleNamespace
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+async def _fake_stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+@pytest.mark.asyncio
+async def test_stream_completion_yields_deltas(llm_service_with_mock_client: LLMService, mock_openai_client):
+    chunks = [_stream_chunk("Hel"), _stream_chunk(None), _stream_chunk("lo"), _stream_chunk("!")]
+    mock_openai_client.chat.completions.create = AsyncMock(return_value=_fake_stream(chunks))
+
+    deltas = [delta async for delta in llm_service_with_mock_client.stream_completion("Say hello")]
+
+    assert deltas == ["Hel", "lo", "!"]
+    call_kwargs = mock_openai_client.chat.completions.create.call_args.kwargs
+    assert call_kwargs["stream"] is True
+    assert call_kwargs["messages"][-1] == {"role": "user", "content": "Say hello"}
+
+@pytest.mark.asyncio
+async def test_stream_completion_api_error_yields_nothing(llm_service_with_mock_client: LLMService, mock_openai_client, caplog):
+    mock_openai_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+    deltas = [delta async for delta in llm_service_with_mock_client.stream_completion("prompt")]
+    assert deltas == []
+    assert "Error streaming completion" in caplog.text
+
+@pytest.mark.asyncio
+async def test_stream_completion_error_mid_stream_raises_interrupted(llm_service_with_mock_client: LLMService, mock_openai_client, caplog):
+    from app.services.resilience import LLMStreamInterruptedError
+
+    async def broken_stream():
+        yield _stream_chunk("Hel")
+        raise Exception("Connection reset")
+    mock_openai_client.chat.completions.create = AsyncMock(return_value=broken_stream())
+
+    deltas = []
+    with pytest.raises(LLMStreamInterruptedError):
+        async for delta in llm_service_with_mock_client.stream_completion("Say hello"):
+            deltas.append(delta)
+
+    assert deltas == ["Hel"]
+    assert "Error streaming completion" in caplog.text
+
+@pytest.mark.asyncio
+async def test_stream_completion_client_not_initialized(mock_config_service_no_key, caplog):
+    service = LLMService()
+    deltas = [delta async for delta in service.stream_completion("prompt")]
+    assert deltas == []
+    assert "Cannot stream completion" in caplog.text
+
+# --- Test model routing and per-task metrics ---
+@pytest.mark.asyncio
+async def test_get_completion_uses_task_route(llm_service_with_mock_client: LLMService, mock_openai_client):
+    from app.config import LLMTaskRoute
+    from app.utils.metrics import metrics
+    from openai.types.completion_usage import CompletionUsage
+
+    metrics.reset()
+    mock_choice = Choice(finish_reason="stop", index=0, message=ChatCompletionMessage(content="{}", role="assistant"))
+    mock_openai_client.chat.completions.create = AsyncMock(return_value=ChatCompletion(
+        id="c", created=1, model="gpt-4o-mini", object="chat.completion", choices=[mock_choice],
+        usage=CompletionUsage(prompt_tokens=1000, completion_tokens=100, total_tokens=1100)
+    ))
+    route = LLMTaskRoute("gpt-4o-mini", timeout_seconds=15, max_tokens=400)
+
+    with patch('app.services.llm_service.ConfigService.get_llm_task_route', return_value=route) as mock_route:
+        await llm_service_with_mock_client.get_completion("classify this", task="analyze_ask_query")
+
+    mock_route.assert_called_once_with("analyze_ask_query")
+    call_kwargs = mock_openai_client.chat.completions.create.call_args.kwargs
+    assert call_kwargs["model"] == "gpt-4o-mini"
+    assert call_kwargs["timeout"] == 15
+    assert call_kwargs["max_tokens"] == 400
+    assert metrics.get_summary("llm.latency_seconds", task="analyze_ask_query", model="gpt-4o-mini")["count"] == 1
+    assert metrics.get_counter("llm.prompt_tokens", task="analyze_ask_query", model="gpt-4o-mini") == 1000
+    assert metrics.get_counter("llm.cost_usd", task="analyze_ask_query", model="gpt-4o-mini") == pytest.approx((1000 * 0.15 + 100 * 0.60) / 1_000_000)
+
+@pytest.mark.asyncio
+async def test_get_completion_failure_counts_error(llm_service_with_mock_client: LLMService, mock_openai_client):
+    from app.utils.metrics import metrics
+
+    metrics.reset()
+    mock_openai_client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+    await llm_service_with_mock_client.get_completion("prompt", model="gpt-4o", task="summarize_submissions")
+    assert metrics.get_counter("llm.errors", task="summarize_submissions", model="gpt-4o") == 1
+
+@pytest.mark.asyncio
+async def test_parsing_methods_use_their_tasks(llm_service_with_mock_client: LLMService):
+    llm_service_with_mock_client.get_completion = AsyncMock(return_value=None)
+    await llm_service_with_mock_client.analyze_ask_query("what's open?")
+    await llm_service_with_mock_client.parse_natural_language_duration("tomorrow")
+    tasks = [call.kwargs["task"] for call in llm_service_with_mock_client.get_completion.call_args_list]
+    assert tasks == ["analyze_ask_query", "parse_duration"]
+
+@pytest.mark.asyncio
+async def test_get_completion_json_output_sets_response_format(llm_service_with_mock_client: LLMService, mock_openai_client):
+    mock_openai_client.chat.completions.create = AsyncMock(return_value=_completion('{"ok": true}'))
+    result = await llm_service_with_mock_client.get_completion("Reply in JSON", task="analyze_ask_query", json_output=True)
+    assert result == '{"ok": true}'
+    assert mock_openai_client.chat.completions.create.call_args.kwargs["response_format"] == {"type": "json_object"}
+
+@pytest.mark.asyncio
+async def test_analyze_ask_query_resolves_date_range_in_one_call(llm_service_with_mock_client: LLMService):
+    llm_service_with_mock_client.get_completion = AsyncMock(return_value=json.dumps({
+        "intent": "query_proposals",
+        "content_keywords": "proposals closed last week",
+        "structured_filters": {"status": "closed", "proposal_type": None, "date_query": "last week"},
+        "date_query_type": "deadline",
+        "date_range": {"start_datetime": "2024-05-13T00:00:00Z", "end_datetime": "2024-05-19T23:59:59"}
+    }))
+
+    analysis = await llm_service_with_mock_client.analyze_ask_query("what proposals closed last week?")
+
+    assert analysis["date_range"] == {"start_datetime": "2024-05-13T00:00:00+00:00", "end_datetime": "2024-05-19T23:59:59+00:00"}
+    llm_service_with_mock_client.get_completion.assert_awaited_once()
+    assert llm_service_with_mock_client.get_completion.call_args.kwargs["json_output"] is True
+
+@pytest.mark.asyncio
+async def test_analyze_ask_query_drops_invalid_date_bounds(llm_service_with_mock_client: LLMService):
+    llm_service_with_mock_client.get_completion = AsyncMock(return_value=json.dumps({
+        "intent": "query_proposals",
+        "content_keywords": "garden",
+        "structured_filters": {"status": None, "proposal_type": None, "date_query": "someday"},
+        "date_range": {"start_datetime": "someday", "end_datetime": None}
+    }))
+
+    analysis = await llm_service_with_mock_client.analyze_ask_query("garden proposals someday")
+
+    assert analysis["date_range"] is None
+    assert analysis["date_query_type"] == "deadline"
+
+@pytest.mark.asyncio
+async def test_completion_usage_is_attributed_to_current_source(llm_service_with_mock_client: LLMService, mock_openai_client):
+    from types import SimpleNamespace
+    from app.services.usage_accounting import UsageAccumulator, llm_usage_source
+
+    response = _completion("Answer")
+    response.usage = SimpleNamespace(prompt_tokens=1000, completion_tokens=100)
+    mock_openai_client.chat.completions.create = AsyncMock(return_value=response)
+    accumulator = UsageAccumulator()
+    with patch('app.services.llm_service.usage_accumulator', accumulator), llm_usage_source("/ask"):
+        await llm_service_with_mock_client.get_completion("prompt", model="gpt-4o", task="ask_answer")
+
+    totals = accumulator.pending()[("/ask", "ask_answer", "gpt-4o")]
+    assert (totals.calls, totals.prompt_tokens, totals.completion_tokens) == (1, 1000, 100)
+    assert totals.cost_usd == pytest.approx((1000 * 2.50 + 100 * 10.00) / 1_000_000)
+
+def test_llm_task_routes_defaults_and_overrides():
+    with patch('app.config.LLM_TASK_ROUTES_JSON', ''):
+        routes = ConfigService.get_llm_task_routes()
+    assert routes["analyze_ask_query"].model == "gpt-4o-mini"
+    assert routes["ask_answer"].model == "gpt-4o"
+
+    with patch('app.config.LLM_TASK_ROUTES_JSON', '{"ask_answer": {"model": "gpt-4.1", "timeout_seconds": 90}}'):
+        route = ConfigService.get_llm_task_route("ask_answer")
+        fallback = ConfigService.get_llm_task_route("unknown_task")
+    assert route.model == "gpt-4.1"
+    assert route.timeout_seconds == 90
+    assert route.max_tokens == 1200 # Unchanged fields keep their default
+    assert fallback.model == "gpt-4o"
+
+    with patch('app.config.LLM_TASK_ROUTES_JSON', '{"ask_answer": {"bogus": 1}}'):
+        with pytest.raises(ValueError):
+            ConfigService.get_llm_task_routes()
+
+@pytest.mark.asyncio
+async def test_calls_acquire_rate_limit_budget_in_service_lane(mock_config_service_with_key, mock_openai_client):
+    from app.services.rate_limiter import LANE_BACKGROUND
+
+    service = LLMService(lane=LANE_BACKGROUND)
+    service.client = mock_openai_client
+    mock_choice = Choice(finish_reason="stop", index=0, message=ChatCompletionMessage(content="ok", role="assistant"))
+    mock_openai_client.chat.completions.create = AsyncMock(return_value=ChatCompletion(id="c", created=1, model="m", object="chat.completion", choices=[mock_choice]))
+    limiter = MagicMock()
+    limiter.acquire = AsyncMock(return_value=0.0)
+
+    with patch('app.services.llm_service.get_openai_rate_limiter', return_value=limiter):
+        await service.get_completion("x" * 400, task="summarize_submissions")
+
+    estimated_tokens, lane = limiter.acquire.call_args.args
+    assert lane == LANE_BACKGROUND
+    assert estimated_tokens == 101 + 1500 # Prompt estimate plus the route's max_tokens
+
+# --- Test retries, deadlines and hedging ---
+def _status_error(status_code):
+    import openai
+    return openai.APIStatusError("error", response=MagicMock(status_code=status_code, headers={}), body=None)
+
+def _completion(content):
+    mock_choice = Choice(finish_reason="stop", index=0, message=ChatCompletionMessage(content=content, role="assistant"))
+    return ChatCompletion(id="c", created=1, model="m", object="chat.completion", choices=[mock_choice])
+
+@pytest.fixture
+def no_retry_sleep():
+    with patch('app.services.llm_service.asyncio.sleep', new=AsyncMock()) as mock_sleep, \
+         patch('app.services.llm_service.ConfigService.get_llm_retry_delays', return_value=(0.5, 8.0)), \
+         patch('app.services.llm_service.ConfigService.get_llm_max_retries', return_value=3):
+        yield mock_sleep
+
+@pytest.mark.asyncio
+async def test_get_completion_retries_transient_errors(llm_service_with_mock_client: LLMService, mock_openai_client, no_retry_sleep):
+    from app.utils.metrics import metrics
+
+    metrics.reset()
+    mock_openai_client.chat.completions.create = AsyncMock(side_effect=[_status_error(503), _status_error(429), _completion("ok")])
+
+    result = await llm_service_with_mock_client.get_completion("prompt", task="summarize_submissions")
+
+    assert result == "ok"
+    assert mock_openai_client.chat.completions.create.await_count == 3
+    assert no_retry_sleep.await_count == 2
+    assert all(0 <= call.args[0] <= 1.0 for call in no_retry_sleep.await_args_list) # Jittered, first two backoff windows
+    assert metrics.get_counter("llm.retries", task="summarize_submissions", model="gpt-4o", reason="APIStatusError") == 2
+
+@pytest.mark.asyncio
+async def test_get_completion_does_not_retry_client_errors(llm_service_with_mock_client: LLMService, mock_openai_client, no_retry_sleep):
+    mock_openai_client.chat.completions.create = AsyncMock(side_effect=_status_error(400))
+    assert await llm_service_with_mock_client.get_completion("prompt") is None
+    assert mock_openai_client.chat.completions.create.await_count == 1
+    no_retry_sleep.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_completion_gives_up_after_max_retries(llm_service_with_mock_client: LLMService, mock_openai_client, no_retry_sleep):
+    mock_openai_client.chat.completions.create = AsyncMock(side_effect=_status_error(500))
+    assert await llm_service_with_mock_client.get_completion("prompt") is None
+    assert mock_openai_client.chat.completions.create.await_count == 4 # First attempt plus 3 retries
+
+@pytest.mark.asyncio
+async def test_get_completion_respects_task_deadline(llm_service_with_mock_client: LLMService, mock_openai_client, no_retry_sleep):
+    from app.config import LLMTaskRoute
+
+    route = LLMTaskRoute("gpt-4o", timeout_seconds=10, deadline_seconds=0.2)
+    mock_openai_client.chat.completions.create = AsyncMock(side_effect=_status_error(503))
+    with patch('app.services.llm_service.ConfigService.get_llm_task_route', return_value=route), \
+         patch('app.services.llm_service.backoff_delay', return_value=1.0): # Longer than the remaining deadline
+        assert await llm_service_with_mock_client.get_completion("prompt") is None
+    assert mock_openai_client.chat.completions.create.await_count == 1
+    assert mock_openai_client.chat.completions.create.call_args.kwargs["timeout"] <= 0.2
+
+@pytest.mark.asyncio
+async def test_get_completion_hedges_slow_latency_critical_call(llm_service_with_mock_client: LLMService, mock_openai_client):
+    import asyncio
+    from app.config import LLMTaskRoute
+    from app.utils.metrics import metrics
+
+    metrics.reset()
+    calls = []
+    async def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            await asyncio.sleep(5) # First request stalls
+        return _completion("hedged")
+    mock_openai_client.chat.completions.create = create
+    route = LLMTaskRoute("gpt-4o-mini", timeout_seconds=10, deadline_seconds=20, hedge_after_seconds=0.05)
+
+    with patch('app.services.llm_service.ConfigService.get_llm_task_route', return_value=route):
+        result = await asyncio.wait_for(llm_service_with_mock_client.get_completion("prompt", task="analyze_ask_query"), timeout=2)
+
+    assert result == "hedged"
+    assert len(calls) == 2
+    assert metrics.get_counter("llm.hedge_wins", label="analyze_ask_query") == 1
+
+@pytest.mark.asyncio
+async def test_background_lane_never_hedges(mock_config_service_with_key):
+    from app.config import LLMTaskRoute
+    from app.services.rate_limiter import LANE_BACKGROUND
+
+    service = LLMService(lane=LANE_BACKGROUND)
+    assert service._hedge_budget("embedding", "m", LLMTaskRoute("m", 10, hedge_after_seconds=1)) is None
+    assert LLMService()._hedge_budget("embedding", "m-unseen", LLMTaskRoute("m", 10, hedge_after_seconds=1)) == 1
+
+# --- Test single-flight coalescing ---
+@pytest.mark.asyncio
+async def test_concurrent_identical_completions_share_one_request(llm_service_with_mock_client: LLMService, mock_openai_client):
+    import asyncio
+
+    release = asyncio.Event()
+    async def create(**kwargs):
+        await release.wait()
+        return _completion("shared")
+    mock_openai_client.chat.completions.create = AsyncMock(side_effect=create)
+
+    other_service = LLMService() # Coalescing spans LLMService instances
+    other_service.client = mock_openai_client
+    calls = [
+        asyncio.create_task(llm_service_with_mock_client.get_completion("Same  prompt", task="ask_answer")),
+        asyncio.create_task(other_service.get_completion("Same prompt\n", task="ask_answer")),
+        asyncio.create_task(llm_service_with_mock_client.get_completion("Same prompt", task="summarize_submissions")), # Different task
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert results == ["shared", "shared", "shared"]
+    assert mock_openai_client.chat.completions.create.await_count == 2
+
+    # Once finished, nothing is reused
+    await llm_service_with_mock_client.get_completion("Same prompt", task="ask_answer")
+    assert mock_openai_client.chat.completions.create.await_count == 3
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_ask_analyses_share_one_completion(llm_service_with_mock_client: LLMService):
+    import asyncio
+
+    async def get_completion(prompt, model=None, task="completion", json_output=False):
+        await asyncio.sleep(0.01)
+        return '{"intent": "query_general_docs", "content_keywords": null, "structured_filters": {}}'
+    llm_service_with_mock_client.get_completion = AsyncMock(side_effect=get_completion)
+
+    results = await asyncio.gather(
+        llm_service_with_mock_client.analyze_ask_query("What is the WiFi password?"),
+        llm_service_with_mock_client.analyze_ask_query("what is the  wifi password?"),
+    )
+
+    assert results[0] == results[1]
+    assert results[0] is not results[1]
+    llm_service_with_mock_client.get_completion.assert_awaited_once()
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+
+from app.services.rate_limiter import LANE_BACKGROUND, LANE_INTERACTIVE, OpenAIRateLimiter
+from app.utils.metrics import metrics
+
+@pytest.mark.asyncio
+async def test_acquire_within_budget_does_not_wait():
+    limiter = OpenAIRateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+    for _ in range(5):
+        waited = await asyncio.wait_for(limiter.acquire(100), timeout=0.5)
+        assert waited < 0.05
+    assert limiter.request_bucket.level == pytest.approx(595, abs=1)
+
+@pytest.mark.asyncio
+async def test_disabled_limiter_never_waits():
+    limiter = OpenAIRateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    assert not limiter.enabled
+    assert await limiter.acquire(10**9, LANE_BACKGROUND) == 0.0
+
+@pytest.mark.asyncio
+async def test_interactive_lane_is_served_before_queued_background():
+    limiter = OpenAIRateLimiter(requests_per_minute=0, tokens_per_minute=60000, interactive_reserve_fraction=0)
+    await limiter.acquire(60000) # Drain the token bucket (refills at 1000 tokens/s)
+    order = []
+
+    async def call(name, lane):
+        await limiter.acquire(100, lane)
+        order.append(name)
+
+    background = asyncio.create_task(call("background", LANE_BACKGROUND))
+    await asyncio.sleep(0) # Background is queued first
+    interactive = asyncio.create_task(call("interactive", LANE_INTERACTIVE))
+    await asyncio.wait_for(asyncio.gather(background, interactive), timeout=2)
+
+    assert order == ["interactive", "background"]
+    metrics_summary = metrics.get_summary("llm.queue_wait_seconds", lane="background")
+    assert metrics_summary is not None and metrics_summary["max"] > 0.05
+
+@pytest.mark.asyncio
+async def test_background_lane_leaves_interactive_reserve():
+    limiter = OpenAIRateLimiter(requests_per_minute=0, tokens_per_minute=60000, interactive_reserve_fraction=0.5)
+    await asyncio.wait_for(limiter.acquire(30000, LANE_BACKGROUND), timeout=0.5) # Down to the reserve
+
+    blocked_background = asyncio.create_task(limiter.acquire(5000, LANE_BACKGROUND))
+    await asyncio.sleep(0.05)
+    assert not blocked_background.done()
+
+    # Interactive traffic may use the reserve immediately
+    await asyncio.wait_for(limiter.acquire(5000, LANE_INTERACTIVE), timeout=0.5)
+
+    blocked_background.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await blocked_background
+    assert limiter.queue_depth == 0
+
+@pytest.mark.asyncio
+async def test_oversized_request_is_clamped_to_bucket_capacity():
+    limiter = OpenAIRateLimiter(requests_per_minute=0, tokens_per_minute=1000)
+    await asyncio.wait_for(limiter.acquire(50000), timeout=0.5)
+    assert limiter.token_bucket.level == pytest.approx(0, abs=1)
@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+import openai
+
+from app.services.resilience import backoff_delay, hedged_call, is_retryable_error, retry_after_seconds
+
+def make_status_error(status_code, headers=None, code=None):
+    response = MagicMock(status_code=status_code, headers=headers or {})
+    error = openai.APIStatusError("error", response=response, body={"code": code} if code else None)
+    error.code = code
+    return error
+
+def test_is_retryable_error():
+    assert is_retryable_error(make_status_error(429))
+    assert is_retryable_error(make_status_error(503))
+    assert is_retryable_error(openai.APITimeoutError(request=MagicMock()))
+    assert is_retryable_error(asyncio.TimeoutError())
+    assert not is_retryable_error(make_status_error(400))
+    assert not is_retryable_error(make_status_error(401))
+    assert not is_retryable_error(make_status_error(429, code="insufficient_quota"))
+    assert not is_retryable_error(ValueError("bad"))
+
+def test_retry_after_seconds_reads_headers():
+    assert retry_after_seconds(make_status_error(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(make_status_error(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(make_status_error(503)) is None
+    assert retry_after_seconds(ValueError()) is None
+
+def test_backoff_delay_is_jittered_and_capped():
+    assert backoff_delay(0, 0.5, 8, rng=lambda: 1.0) == 0.5
+    assert backoff_delay(3, 0.5, 8, rng=lambda: 1.0) == 4.0
+    assert backoff_delay(10, 0.5, 8, rng=lambda: 1.0) == 8.0
+    assert backoff_delay(3, 0.5, 8, rng=lambda: 0.25) == 1.0
+
+@pytest.mark.asyncio
+async def test_hedged_call_returns_fast_result_without_hedging():
+    calls = []
+    async def request():
+        calls.append(1)
+        return "fast"
+    assert await hedged_call(request, hedge_after_seconds=0.5) == "fast"
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_hedged_call_hedge_wins_and_slow_call_is_cancelled():
+    started = []
+    slow_cancelled = asyncio.Event()
+
+    async def request():
+        started.append(len(started))
+        if len(started) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                slow_cancelled.set()
+                raise
+            return "slow"
+        return "hedge"
+
+    on_hedge = MagicMock(side_effect=lambda: asyncio.sleep(0))
+    result = await asyncio.wait_for(hedged_call(request, hedge_after_seconds=0.05, on_hedge=on_hedge), timeout=1)
+
+    assert result == "hedge"
+    assert len(started) == 2
+    on_hedge.assert_called_once()
+    await asyncio.wait_for(slow_cancelled.wait(), timeout=1)
+
+@pytest.mark.asyncio
+async def test_hedged_call_raises_when_both_fail():
+    async def request():
+        await asyncio.sleep(0.1)
+        raise RuntimeError("down")
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(hedged_call(request, hedge_after_seconds=0.01), timeout=1)
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+
+from app.services.single_flight import SingleFlight, normalize_for_coalescing
+
+def test_normalize_for_coalescing():
+    assert normalize_for_coalescing("  What is\n open?  ") == "What is open?"
+    assert normalize_for_coalescing("What IS open?", casefold=True) == "what is open?"
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+    release = asyncio.Event()
+
+    async def call():
+        calls.append(1)
+        await release.wait()
+        return {"answer": [1, 2]}
+
+    waiters = [asyncio.create_task(flight.run(("task", "key"), call)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flight.in_flight_count == 1
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert len(calls) == 1
+    assert all(result == {"answer": [1, 2]} for result in results)
+    results[1]["answer"].append(3) # Followers get their own copy
+    assert results[0] == {"answer": [1, 2]}
+    assert flight.in_flight_count == 0
+
+@pytest.mark.asyncio
+async def test_sequential_calls_are_not_cached():
+    flight = SingleFlight("test")
+    counter = iter(range(10))
+
+    async def call():
+        return next(counter)
+
+    assert await flight.run("key", call) == 0
+    assert await flight.run("key", call) == 1
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters_and_key_is_released():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("boom")
+
+    waiters = [asyncio.create_task(flight.run("key", failing)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.in_flight_count == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.run("key", call))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.run("key", call))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+
+    assert await follower == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
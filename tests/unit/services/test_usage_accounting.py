@@ -0,0 +1,101 @@
+import asyncio
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import usage_accounting
+from app.services.usage_accounting import (
+    UNTAGGED_SOURCE, UsageAccumulator, UsageTotals, current_usage_source, flush_llm_usage, llm_usage_source
+)
+
+@pytest.fixture
+def accumulator():
+    fresh = UsageAccumulator()
+    with patch('app.services.usage_accounting.usage_accumulator', fresh):
+        yield fresh
+
+def test_record_aggregates_per_source_task_and_model():
+    accumulator = UsageAccumulator()
+    with llm_usage_source("/ask"):
+        accumulator.record("ask_answer", "gpt-4o", 1.5, prompt_tokens=100, completion_tokens=20, cost_usd=0.01)
+        accumulator.record("ask_answer", "gpt-4o", 0.5, prompt_tokens=50, completion_tokens=10, cost_usd=0.005)
+        accumulator.record("ask_answer", "gpt-4o", 2.0, success=False)
+    accumulator.record("embedding", "text-embedding-3-small", 0.1, prompt_tokens=5)
+
+    totals = accumulator.pending()
+    assert totals[("/ask", "ask_answer", "gpt-4o")] == UsageTotals(
+        calls=3, errors=1, prompt_tokens=150, completion_tokens=30, cost_usd=pytest.approx(0.015), latency_seconds=4.0
+    )
+    assert totals[(UNTAGGED_SOURCE, "embedding", "text-embedding-3-small")].prompt_tokens == 5
+
+@pytest.mark.asyncio
+async def test_usage_source_is_inherited_by_spawned_tasks_and_restored():
+    seen = []
+    async def child():
+        seen.append(current_usage_source())
+
+    with llm_usage_source("deadline_check_job"):
+        await asyncio.create_task(child())
+    assert seen == ["deadline_check_job"]
+    assert current_usage_source() == UNTAGGED_SOURCE
+
+def test_drain_and_restore():
+    accumulator = UsageAccumulator()
+    accumulator.record("completion", "gpt-4o", 1.0, source="ingestion")
+    drained = accumulator.drain()
+    assert accumulator.pending() == {}
+    accumulator.record("completion", "gpt-4o", 1.0, source="ingestion")
+    accumulator.restore(drained)
+    assert accumulator.pending()[("ingestion", "completion", "gpt-4o")].calls == 2
+
+def _mock_session_local(session):
+    context_manager = AsyncMock()
+    context_manager.__aenter__.return_value = session
+    context_manager.__aexit__ = AsyncMock(return_value=None)
+    return MagicMock(return_value=context_manager)
+
+@pytest.mark.asyncio
+async def test_flush_writes_rows_and_clears(accumulator):
+    accumulator.record("ask_answer", "gpt-4o", 1.0, prompt_tokens=10, source="/ask")
+    session = AsyncMock()
+    with patch('app.persistence.database.AsyncSessionLocal', _mock_session_local(session)), \
+         patch('app.persistence.repositories.llm_usage_repository.LLMUsageRepository') as MockRepo:
+        MockRepo.return_value.add_usage_rows = AsyncMock()
+        written = await flush_llm_usage()
+
+    assert written == 1
+    rows = MockRepo.return_value.add_usage_rows.call_args.args[0]
+    assert rows[0][:3] == ("/ask", "ask_answer", "gpt-4o")
+    assert rows[0][3].prompt_tokens == 10
+    session.commit.assert_awaited_once()
+    assert accumulator.pending() == {}
+
+@pytest.mark.asyncio
+async def test_flush_failure_keeps_usage_for_next_flush(accumulator):
+    accumulator.record("ask_answer", "gpt-4o", 1.0, source="/ask")
+    session = AsyncMock()
+    with patch('app.persistence.database.AsyncSessionLocal', _mock_session_local(session)), \
+         patch('app.persistence.repositories.llm_usage_repository.LLMUsageRepository') as MockRepo:
+        MockRepo.return_value.add_usage_rows = AsyncMock(side_effect=Exception("DB down"))
+        written = await flush_llm_usage()
+
+    assert written == 0
+    session.rollback.assert_awaited_once()
+    assert accumulator.pending()[("/ask", "ask_answer", "gpt-4o")].calls == 1
+
+@pytest.mark.asyncio
+async def test_flush_with_nothing_pending_skips_database(accumulator):
+    with patch('app.persistence.database.AsyncSessionLocal') as mock_session_local:
+        assert await flush_llm_usage() == 0
+    mock_session_local.assert_not_called()
+
+def test_llm_service_imports_without_database_config():
+    """Offline benchmarks import LLMService with no POSTGRES_* set; only flushing usage needs the database."""
+    env = {key: value for key, value in os.environ.items() if not key.startswith("POSTGRES_")}
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.services.llm_service; assert 'app.persistence.database' not in sys.modules"],
+        env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
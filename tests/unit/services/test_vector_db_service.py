@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from app.services.vector_db_service import VectorDBService, CHROMA_DATA_PATH, DEFAULT_COLLECTION_NAME, PROPOSALS_COLLECTION_NAME
+from app.services.vector_db_service import VectorDBService, CHROMA_DATA_PATH, DEFAULT_COLLECTION_NAME, PROPOSALS_COLLECTION_NAME, CHUNK_STORAGE_OFFSETS, make_chunk_id, invalidate_document_text
 
 # Mock chromadb parts
 @pytest.fixture
@@ -320,4 +320,96 @@ async def test_search_proposal_embeddings_no_results(vector_db_service_with_mock
         query_embedding=[0.1, 0.2, 0.3]
     )
     
-    assert len(results) == 0 
\ No newline at end of file
+    assert len(results) == 0 
+@pytest.mark.asyncio
+async def test_store_embeddings_with_chunk_ids(vector_db_service_with_mocked_client):
+    service, _, mock_collection = vector_db_service_with_mocked_client
+    chunk_ids = [make_chunk_id(5, "alpha"), make_chunk_id(5, "beta")]
+
+    result_ids = await service.store_embeddings(5, ["alpha", "beta"], [[0.1], [0.2]], chunk_ids=chunk_ids)
+
+    assert result_ids == chunk_ids
+    assert mock_collection.add.call_args.kwargs["ids"] == chunk_ids
+
+def test_make_chunk_id_is_content_addressed():
+    assert make_chunk_id(1, "same text") == make_chunk_id(1, "same text")
+    assert make_chunk_id(1, "same text") != make_chunk_id(1, "other text")
+    assert make_chunk_id(1, "same text") != make_chunk_id(2, "same text")
+    assert make_chunk_id(1, "same text").startswith("doc_1_chunk_")
+
+@pytest.mark.asyncio
+async def test_get_document_chunk_ids(vector_db_service_with_mocked_client):
+    service, _, mock_collection = vector_db_service_with_mocked_client
+    mock_collection.get = MagicMock(return_value={"ids": ["doc_3_chunk_a", "doc_3_chunk_b"]})
+
+    ids = await service.get_document_chunk_ids(3)
+
+    assert ids == ["doc_3_chunk_a", "doc_3_chunk_b"]
+    mock_collection.get.assert_called_once_with(where={"document_sql_id": "3"}, include=[])
+
+@pytest.mark.asyncio
+async def test_update_chunk_metadatas_and_delete_chunks(vector_db_service_with_mocked_client):
+    service, _, mock_collection = vector_db_service_with_mocked_client
+    mock_collection.update = MagicMock()
+    mock_collection.delete = MagicMock()
+
+    assert await service.update_chunk_metadatas(["id1"], [{"chunk_index": 0}]) is True
+    mock_collection.update.assert_called_once_with(ids=["id1"], metadatas=[{"chunk_index": 0}])
+    assert await service.update_chunk_metadatas(["id1"], []) is False
+
+    assert await service.delete_chunks(["id1", "id2"]) is True
+    mock_collection.delete.assert_called_once_with(ids=["id1", "id2"])
+    assert await service.delete_chunks([]) is True # Nothing to delete
+    assert mock_collection.delete.call_count == 1
+
+@pytest.mark.asyncio
+async def test_store_embeddings_offsets_mode_omits_chunk_text(vector_db_service_with_mocked_client):
+    service, _, mock_collection = vector_db_service_with_mocked_client
+    service.storage_mode = CHUNK_STORAGE_OFFSETS
+    metadatas = [{"chunk_start": 0, "chunk_end": 5}, {"chunk_start": 5, "chunk_end": 9}]
+
+    await service.store_embeddings(8, ["hello", "world"], [[0.1], [0.2]], chunk_metadatas=metadatas)
+
+    add_kwargs = mock_collection.add.call_args.kwargs
+    assert "documents" not in add_kwargs
+    assert add_kwargs["metadatas"][0] == {"document_sql_id": "8", "chunk_start": 0, "chunk_end": 5}
+
+@pytest.mark.asyncio
+async def test_store_embeddings_offsets_mode_without_offsets_keeps_text(vector_db_service_with_mocked_client):
+    service, _, mock_collection = vector_db_service_with_mocked_client
+    service.storage_mode = CHUNK_STORAGE_OFFSETS
+
+    await service.store_embeddings(8, ["hello"], [[0.1]], chunk_metadatas=[{"chunk_index": 0}])
+
+    assert mock_collection.add.call_args.kwargs["documents"] == ["hello"]
+
+@pytest.mark.asyncio
+async def test_search_similar_chunks_offsets_mode_materializes_from_cached_content(vector_db_service_with_mocked_client):
+    service, _, mock_collection = vector_db_service_with_mocked_client
+    service.storage_mode = CHUNK_STORAGE_OFFSETS
+    invalidate_document_text(21)
+    mock_collection.query = MagicMock(return_value={
+        'ids': [['doc_21_chunk_a', 'doc_21_chunk_b', 'legacy_chunk']],
+        'distances': [[0.1, 0.2, 0.3]],
+        'metadatas': [[
+            {"document_sql_id": "21", "chunk_start": 0, "chunk_end": 5},
+            {"document_sql_id": "21", "chunk_start": 6, "chunk_end": 11},
+            {"document_sql_id": "22"}, # Stored before offsets mode, still has its text in Chroma
+        ]],
+    })
+    mock_collection.get = MagicMock(return_value={'ids': ['legacy_chunk'], 'documents': ['legacy text']})
+    content_loader = AsyncMock(return_value="hello world")
+
+    results = await service.search_similar_chunks([0.1], top_n=3, content_loader=content_loader)
+
+    assert mock_collection.query.call_args.kwargs["include"] == ['metadatas', 'distances']
+    assert [hit["document_content"] for hit in results] == ["hello", "world", "legacy text"]
+    content_loader.assert_awaited_once_with(21) # Second hit served from the cache
+    mock_collection.get.assert_called_once_with(ids=['legacy_chunk'], include=['documents'])
+
+    # A later query reuses the cached text until the document is invalidated
+    await service.search_similar_chunks([0.1], top_n=3, content_loader=content_loader)
+    assert content_loader.await_count == 1
+    invalidate_document_text(21)
+    await service.search_similar_chunks([0.1], top_n=3, content_loader=content_loader)
+    assert content_loader.await_count == 2
@@ -8,15 +8,12 @@ from app.telegram_handlers.admin_command_handlers import (
     handle_add_global_doc_content,
     handle_add_global_doc_title,
     cancel_add_global_doc,
+    stats_command,
     # get_add_global_doc_conversation_handler, # We test functions directly
     ADD_GLOBAL_DOC_CONTENT,
     ADD_GLOBAL_DOC_TITLE,
 )
 from app.config import ConfigService
-from app.core.context_service import ContextService
-from app.services.llm_service import LLMService
-from app.services.vector_db_service import VectorDBService
-from app.persistence.database import AsyncSessionLocal
 
 ADMIN_ID = 12345
 NON_ADMIN_ID = 67890
@@ -118,101 +115,55 @@ async def test_handle_add_global_doc_content_empty(mock_update, mock_context):
     assert result == ADD_GLOBAL_DOC_CONTENT
 
 @pytest.mark.asyncio
-@patch('app.telegram_handlers.admin_command_handlers.AsyncSessionLocal')
-@patch('app.telegram_handlers.admin_command_handlers.ContextService')
-@patch('app.telegram_handlers.admin_command_handlers.LLMService')
-@patch('app.telegram_handlers.admin_command_handlers.VectorDBService')
-@patch('app.telegram_handlers.admin_command_handlers.ConfigService')
+@patch('app.telegram_handlers.admin_command_handlers.submit_ingestion_job', new_callable=AsyncMock)
 async def test_handle_add_global_doc_title_success_text_content(
-    mock_config_service, mock_vector_db_service, mock_llm_service, mock_context_service_class, mock_async_session, mock_update, mock_context
+    mock_submit_job, mock_update, mock_context
 ):
     title = "Test Title"
     doc_content = "This is test content."
+    mock_update.effective_user.id = ADMIN_ID
     mock_update.message.text = title
     mock_context.user_data['add_global_doc_content_or_url'] = doc_content
-
-    mock_config_instance = MagicMock(spec=ConfigService)
-    mock_config_instance.get_openai_api_key.return_value = "fake_api_key"
-    mock_config_service.return_value = mock_config_instance
-
-    mock_llm_instance = MagicMock(spec=LLMService)
-    mock_llm_service.return_value = mock_llm_instance
-    mock_vector_db_instance = MagicMock(spec=VectorDBService)
-    mock_vector_db_service.return_value = mock_vector_db_instance
-    
-    mock_cs_instance = AsyncMock(spec=ContextService)
-    mock_cs_instance.process_and_store_document.return_value = 1
-    mock_context_service_class.return_value = mock_cs_instance
-    
-    mock_session_context_manager = AsyncMock()
-    mock_session = AsyncMock()
-    mock_session_context_manager.__aenter__.return_value = mock_session
-    mock_session_context_manager.__aexit__.return_value = None
-    mock_async_session.return_value = mock_session_context_manager
+    mock_submit_job.return_value = 1
 
     result = await handle_add_global_doc_title(mock_update, mock_context)
 
-    mock_context_service_class.assert_called_once_with(
-        db_session=mock_session, 
-        llm_service=mock_llm_instance, 
-        vector_db_service=mock_vector_db_instance
-    )
-    mock_cs_instance.process_and_store_document.assert_called_once_with(
+    mock_submit_job.assert_awaited_once_with(
+        requester_telegram_id=ADMIN_ID,
         content_source=doc_content,
         source_type="admin_global_text",
         title=title,
         proposal_id=None
     )
     mock_update.message.reply_text.assert_called_once_with(
-        f"Global document '{title}' (ID: 1) added successfully."
+        f"Global document '{title}' is being processed in the background (Job ID: 1). "
+        f"I'll message you when it's ready. Check progress anytime with /doc_status 1."
     )
     assert 'add_global_doc_content_or_url' not in mock_context.user_data
     assert result == ConversationHandler.END
 
 @pytest.mark.asyncio
-@patch('app.telegram_handlers.admin_command_handlers.AsyncSessionLocal')
-@patch('app.telegram_handlers.admin_command_handlers.ContextService')
-@patch('app.telegram_handlers.admin_command_handlers.LLMService')
-@patch('app.telegram_handlers.admin_command_handlers.VectorDBService')
-@patch('app.telegram_handlers.admin_command_handlers.ConfigService')
+@patch('app.telegram_handlers.admin_command_handlers.submit_ingestion_job', new_callable=AsyncMock)
 async def test_handle_add_global_doc_title_success_url_content(
-    mock_config_service, mock_vector_db_service, mock_llm_service, mock_context_service_class, mock_async_session, mock_update, mock_context
+    mock_submit_job, mock_update, mock_context
 ):
     title = "Test URL Title"
     doc_url = "http://example.com/doc"
+    mock_update.effective_user.id = ADMIN_ID
     mock_update.message.text = title
     mock_context.user_data['add_global_doc_content_or_url'] = doc_url
-
-    mock_config_instance = MagicMock(spec=ConfigService)
-    mock_config_instance.get_openai_api_key.return_value = "fake_api_key"
-    mock_config_service.return_value = mock_config_instance
-
-    mock_llm_instance = MagicMock(spec=LLMService)
-    mock_llm_service.return_value = mock_llm_instance
-    mock_vector_db_instance = MagicMock(spec=VectorDBService)
-    mock_vector_db_service.return_value = mock_vector_db_instance
-
-    mock_cs_instance = AsyncMock(spec=ContextService)
-    mock_cs_instance.process_and_store_document.return_value = 2
-    mock_context_service_class.return_value = mock_cs_instance
-
-    mock_session_context_manager = AsyncMock()
-    mock_session = AsyncMock()
-    mock_session_context_manager.__aenter__.return_value = mock_session
-    mock_session_context_manager.__aexit__.return_value = None
-    mock_async_session.return_value = mock_session_context_manager
+    mock_submit_job.return_value = 2
 
     result = await handle_add_global_doc_title(mock_update, mock_context)
 
-    mock_cs_instance.process_and_store_document.assert_called_once_with(
+    mock_submit_job.assert_awaited_once_with(
+        requester_telegram_id=ADMIN_ID,
         content_source=doc_url,
         source_type="admin_global_url",
         title=title,
         proposal_id=None
     )
-    mock_update.message.reply_text.assert_called_once_with(
-        f"Global document '{title}' (ID: 2) added successfully."
-    )
+    assert "(Job ID: 2)" in mock_update.message.reply_text.call_args[0][0]
     assert result == ConversationHandler.END
 
 
@@ -241,93 +192,41 @@ async def test_handle_add_global_doc_title_missing_content_in_user_data(mock_upd
     assert result == ConversationHandler.END
 
 @pytest.mark.asyncio
-@patch('app.telegram_handlers.admin_command_handlers.AsyncSessionLocal')
-@patch('app.telegram_handlers.admin_command_handlers.ContextService')
-@patch('app.telegram_handlers.admin_command_handlers.LLMService')
-@patch('app.telegram_handlers.admin_command_handlers.VectorDBService')
-@patch('app.telegram_handlers.admin_command_handlers.ConfigService')
-async def test_handle_add_global_doc_title_context_service_failure(
-    mock_config_service, mock_vector_db_service, mock_llm_service, mock_context_service_class, mock_async_session, mock_update, mock_context
+@patch('app.telegram_handlers.admin_command_handlers.submit_ingestion_job', new_callable=AsyncMock)
+async def test_handle_add_global_doc_title_job_not_created(
+    mock_submit_job, mock_update, mock_context
 ):
-    title = "Test Fail Title"
-    doc_content = "content that will fail"
-    mock_update.message.text = title
-    mock_context.user_data['add_global_doc_content_or_url'] = doc_content
-
-    mock_config_instance = MagicMock(spec=ConfigService)
-    mock_config_instance.get_openai_api_key.return_value = "fake_api_key"
-    mock_config_service.return_value = mock_config_instance
-
-    mock_llm_instance = MagicMock(spec=LLMService)
-    mock_llm_service.return_value = mock_llm_instance
-    mock_vector_db_instance = MagicMock(spec=VectorDBService)
-    mock_vector_db_service.return_value = mock_vector_db_instance
-
-    mock_cs_instance = AsyncMock(spec=ContextService)
-    mock_cs_instance.process_and_store_document.side_effect = Exception("DB commit failed") 
-    mock_context_service_class.return_value = mock_cs_instance
-
-    mock_session_context_manager = AsyncMock()
-    mock_session = AsyncMock()
-    mock_session_context_manager.__aenter__.return_value = mock_session
-    mock_session_context_manager.__aexit__.return_value = None
-    mock_async_session.return_value = mock_session_context_manager
+    mock_update.effective_user.id = ADMIN_ID
+    mock_update.message.text = "Title"
+    mock_context.user_data['add_global_doc_content_or_url'] = "content"
+    mock_submit_job.return_value = None
 
     result = await handle_add_global_doc_title(mock_update, mock_context)
 
     mock_update.message.reply_text.assert_called_once_with(
-        "An error occurred while adding the document. Please try again later."
+        "Failed to queue the global document for processing. Please try again later."
     )
     assert 'add_global_doc_content_or_url' not in mock_context.user_data
     assert result == ConversationHandler.END
 
 @pytest.mark.asyncio
-@patch('app.telegram_handlers.admin_command_handlers.ConfigService')
-@patch('app.telegram_handlers.admin_command_handlers.LLMService', side_effect=AttributeError("Mocked AttributeError"))
-async def test_handle_add_global_doc_title_service_init_attribute_error(
-    mock_llm_service, mock_config_service, mock_update, mock_context
+@patch('app.telegram_handlers.admin_command_handlers.submit_ingestion_job', new_callable=AsyncMock)
+async def test_handle_add_global_doc_title_submit_failure(
+    mock_submit_job, mock_update, mock_context
 ):
-    title = "Error Title"
-    doc_content = "Some content"
-    mock_update.message.text = title
-    mock_context.user_data['add_global_doc_content_or_url'] = doc_content
-
-    mock_config_instance = MagicMock(spec=ConfigService)
-    mock_config_service.return_value = mock_config_instance
-    # LLMService is already patched to raise AttributeError
-
-    result = await handle_add_global_doc_title(mock_update, mock_context)
-
-    mock_update.message.reply_text.assert_called_once_with(
-        "A configuration error occurred with a core service (API key missing?). Please contact an admin."
-    )
-    assert 'add_global_doc_content_or_url' in mock_context.user_data
-    assert result == ConversationHandler.END
-
-@pytest.mark.asyncio
-@patch('app.telegram_handlers.admin_command_handlers.ConfigService')
-@patch('app.telegram_handlers.admin_command_handlers.LLMService', side_effect=Exception("Mocked Generic Exception"))
-async def test_handle_add_global_doc_title_service_init_generic_exception(
-    mock_llm_service, mock_config_service, mock_update, mock_context
-):
-    title = "Generic Error Title"
-    doc_content = "Some content"
-    mock_update.message.text = title
-    mock_context.user_data['add_global_doc_content_or_url'] = doc_content
-
-    mock_config_instance = MagicMock(spec=ConfigService)
-    mock_config_service.return_value = mock_config_instance
-    # LLMService is already patched to raise Exception
+    mock_update.effective_user.id = ADMIN_ID
+    mock_update.message.text = "Test Fail Title"
+    mock_context.user_data['add_global_doc_content_or_url'] = "content that will fail"
+    mock_submit_job.side_effect = Exception("DB commit failed")
 
     result = await handle_add_global_doc_title(mock_update, mock_context)
 
     mock_update.message.reply_text.assert_called_once_with(
-        "A configuration error occurred with a core service. Please contact an admin."
+        "An error occurred while adding the document. Please try again later."
     )
-    assert 'add_global_doc_content_or_url' in mock_context.user_data
+    assert 'add_global_doc_content_or_url' not in mock_context.user_data
     assert result == ConversationHandler.END
 
-
 @pytest.mark.asyncio
 async def test_cancel_add_global_doc(mock_update, mock_context):
     mock_context.user_data['add_global_doc_content_or_url'] = "some content to be cleared"
@@ -367,4 +266,43 @@ async def test_cancel_add_global_doc(mock_update, mock_context):
 
 # Removed placeholder
 # def test_placeholder():
-#     assert True 
\ No newline at end of file
+#     assert True 
+# --- Test stats_command ---
+@pytest.mark.asyncio
+async def test_stats_command_non_admin_denied(mock_update, mock_context):
+    mock_update.effective_user.id = NON_ADMIN_ID
+    with patch('app.telegram_handlers.admin_command_handlers.ConfigService.get_admin_ids', return_value=[ADMIN_ID]), \
+         patch('app.telegram_handlers.admin_command_handlers.flush_llm_usage', new=AsyncMock()) as mock_flush:
+        await stats_command(mock_update, mock_context)
+    mock_update.message.reply_text.assert_called_once_with("Access Denied: This command is for administrators only.")
+    mock_flush.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_stats_command_shows_top_sources(mock_update, mock_context):
+    mock_update.effective_user.id = ADMIN_ID
+    mock_context.args = ["30"]
+    rows = [
+        {"source": "/ask", "calls": 4, "errors": 1, "prompt_tokens": 4000, "completion_tokens": 800, "cost_usd": 0.018, "latency_seconds": 6.0},
+        {"source": "deadline_check_job", "calls": 2, "errors": 0, "prompt_tokens": 9000, "completion_tokens": 600, "cost_usd": 0.0285, "latency_seconds": 8.0},
+    ]
+    with patch('app.telegram_handlers.admin_command_handlers.ConfigService.get_admin_ids', return_value=[ADMIN_ID]), \
+         patch('app.telegram_handlers.admin_command_handlers.flush_llm_usage', new=AsyncMock()) as mock_flush, \
+         patch('app.telegram_handlers.admin_command_handlers.AsyncSessionLocal'), \
+         patch('app.telegram_handlers.admin_command_handlers.LLMUsageRepository') as MockRepo:
+        MockRepo.return_value.get_usage_by_source = AsyncMock(return_value=rows)
+        await stats_command(mock_update, mock_context)
+
+    mock_flush.assert_awaited_once()
+    reply = mock_update.message.reply_text.call_args[0][0]
+    assert "last 30 day(s)" in reply
+    assert "/ask: $0.0180, 4 calls (1 errors), 4000+800 tokens, avg 1.50s" in reply
+    assert "deadline_check_job: $0.0285, 2 calls (0 errors), 9000+600 tokens, avg 4.00s" in reply
+    assert "DB pool: " in reply
+
+@pytest.mark.asyncio
+async def test_stats_command_invalid_days(mock_update, mock_context):
+    mock_update.effective_user.id = ADMIN_ID
+    mock_context.args = ["week"]
+    with patch('app.telegram_handlers.admin_command_handlers.ConfigService.get_admin_ids', return_value=[ADMIN_ID]):
+        await stats_command(mock_update, mock_context)
+    mock_update.message.reply_text.assert_called_once_with("Usage: /stats [days]")
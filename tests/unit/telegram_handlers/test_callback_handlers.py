@@ -7,19 +7,24 @@ from telegram.constants import ParseMode
 from app.telegram_handlers.callback_handlers import (
     handle_collect_proposal_type_callback,
     handle_vote_callback,
-    handle_proposal_filter_callback
+    handle_proposal_filter_callback,
+    handle_proposals_page_callback,
+    handle_my_votes_page_callback
 )
 from app.telegram_handlers.conversation_defs import (
     COLLECT_PROPOSAL_TYPE, COLLECT_OPTIONS, ASK_DURATION,
     USER_DATA_PROPOSAL_TYPE, PROPOSAL_TYPE_CALLBACK,
     PROPOSAL_FILTER_OPEN,
     PROPOSAL_FILTER_CLOSED,
-    PROPOSAL_FILTER_CALLBACK_PREFIX
+    PROPOSAL_FILTER_CALLBACK_PREFIX,
+    PROPOSALS_PAGE_CALLBACK_PREFIX,
+    MY_VOTES_PAGE_CALLBACK_PREFIX
 )
 from app.persistence.models.proposal_model import ProposalType, ProposalStatus
 from app.core.submission_service import SubmissionService
 from app.core.user_service import UserService
 from app.persistence.database import AsyncSessionLocal
+from app.utils.pagination import PAGE_NEXT, PAGE_PREV, Page, PageCursor, encode_cursor
 
 @pytest.fixture
 def mock_update_callback():
@@ -161,7 +166,7 @@ async def test_handle_collect_proposal_type_text_invalid(mock_update_message, mo
 # Tests for handle_vote_callback
 
 @pytest.mark.asyncio
-@patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal')
+@patch('app.persistence.database.AsyncSessionLocal')
 @patch('app.telegram_handlers.callback_handlers.UserService')
 @patch('app.telegram_handlers.callback_handlers.SubmissionService')
 async def test_handle_vote_callback_success(
@@ -194,7 +199,7 @@ async def test_handle_vote_callback_success(
         username=mock_update_callback.callback_query.from_user.username,
         first_name=mock_update_callback.callback_query.from_user.first_name
     )
-    mock_session.commit.assert_called_once() 
+    mock_session.commit.assert_awaited_once() # User upsert and vote share the update's single commit
     mock_submission_service_instance.record_vote.assert_called_once_with(
         proposal_id=proposal_id,
         submitter_telegram_id=mock_update_callback.callback_query.from_user.id,
@@ -234,7 +239,7 @@ async def test_handle_vote_callback_value_error_parsing(mock_update_callback, mo
     )
 
 @pytest.mark.asyncio
-@patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal')
+@patch('app.persistence.database.AsyncSessionLocal')
 @patch('app.telegram_handlers.callback_handlers.UserService')
 @patch('app.telegram_handlers.callback_handlers.SubmissionService')
 async def test_handle_vote_callback_submission_service_returns_error(
@@ -263,7 +268,7 @@ async def test_handle_vote_callback_submission_service_returns_error(
     mock_update_callback.callback_query.answer.assert_called_once_with(text="Proposal is closed.", show_alert=True)
 
 @pytest.mark.asyncio
-@patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal')
+@patch('app.persistence.database.AsyncSessionLocal')
 @patch('app.telegram_handlers.callback_handlers.UserService', side_effect=Exception("User service boom!"))
 async def test_handle_vote_callback_user_service_exception(
     mock_user_service_class, mock_async_session, mock_update_callback, mock_context
@@ -336,17 +341,18 @@ async def test_handle_proposal_filter_callback_open():
     with patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal', mock_async_session_local_callable):
         with patch('app.telegram_handlers.callback_handlers.ProposalService') as MockProposalService:
             mock_proposal_service_instance = MockProposalService.return_value
-            mock_proposal_service_instance.list_proposals_by_status = AsyncMock(return_value=proposals_data_open)
+            mock_proposal_service_instance.list_proposals_page_by_status = AsyncMock(return_value=Page(proposals_data_open, None, None))
 
             # Act
             await handle_proposal_filter_callback(mock_update, mock_context)
 
             # Assert
             MockProposalService.assert_called_once_with(mock_session_instance)
-            mock_proposal_service_instance.list_proposals_by_status.assert_called_once_with(ProposalStatus.OPEN.value)
+            mock_proposal_service_instance.list_proposals_page_by_status.assert_called_once_with(ProposalStatus.OPEN.value, None, PAGE_NEXT)
             mock_callback_query.edit_message_text.assert_called_once_with(
                 text=expected_formatted_list,
-                parse_mode=ParseMode.MARKDOWN_V2
+                parse_mode=ParseMode.MARKDOWN_V2,
+                reply_markup=None
             )
             mock_callback_query.answer.assert_called_once()
 
@@ -387,17 +393,18 @@ async def test_handle_proposal_filter_callback_closed():
     with patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal', mock_async_session_local_callable):
         with patch('app.telegram_handlers.callback_handlers.ProposalService') as MockProposalService:
             mock_proposal_service_instance = MockProposalService.return_value
-            mock_proposal_service_instance.list_proposals_by_status = AsyncMock(return_value=proposals_data_closed)
+            mock_proposal_service_instance.list_proposals_page_by_status = AsyncMock(return_value=Page(proposals_data_closed, None, None))
 
             # Act
             await handle_proposal_filter_callback(mock_update, mock_context)
 
             # Assert
             MockProposalService.assert_called_once_with(mock_session_instance)
-            mock_proposal_service_instance.list_proposals_by_status.assert_called_once_with(ProposalStatus.CLOSED.value)
+            mock_proposal_service_instance.list_proposals_page_by_status.assert_called_once_with(ProposalStatus.CLOSED.value, None, PAGE_NEXT)
             mock_callback_query.edit_message_text.assert_called_once_with(
                 text=expected_formatted_list,
-                parse_mode=ParseMode.MARKDOWN_V2
+                parse_mode=ParseMode.MARKDOWN_V2,
+                reply_markup=None
             )
             mock_callback_query.answer.assert_called_once()
 
@@ -424,16 +431,17 @@ async def test_handle_proposal_filter_callback_open_no_proposals():
     with patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal', mock_async_session_local_callable):
         with patch('app.telegram_handlers.callback_handlers.ProposalService') as MockProposalService:
             mock_proposal_service_instance = MockProposalService.return_value
-            mock_proposal_service_instance.list_proposals_by_status = AsyncMock(return_value=[]) # Empty list
+            mock_proposal_service_instance.list_proposals_page_by_status = AsyncMock(return_value=Page([], None, None)) # Empty page
 
             # Act
             await handle_proposal_filter_callback(mock_update, mock_context)
 
             # Assert
-            mock_proposal_service_instance.list_proposals_by_status.assert_called_once_with(ProposalStatus.OPEN.value)
+            mock_proposal_service_instance.list_proposals_page_by_status.assert_called_once_with(ProposalStatus.OPEN.value, None, PAGE_NEXT)
             mock_callback_query.edit_message_text.assert_called_once_with(
                 text=expected_text_no_proposals,
-                parse_mode=ParseMode.MARKDOWN_V2
+                parse_mode=ParseMode.MARKDOWN_V2,
+                reply_markup=None
             )
             mock_callback_query.answer.assert_called_once()
 
@@ -490,6 +498,72 @@ async def test_handle_proposal_filter_callback_no_query():
         # Ensure no other actions like edit_message_text or answer are attempted
         # (implicitly tested as mocks for those aren't set up on update/context directly here)
 
+# Tests for the /proposals and /my_votes Prev/Next buttons
+
+def _session_factory(session):
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=None)
+    return factory
+
+@pytest.mark.asyncio
+async def test_handle_proposals_page_callback_fetches_the_requested_page(mock_update_callback, mock_context):
+    from datetime import datetime, timezone
+    cursor = PageCursor(datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc), 42)
+    mock_update_callback.callback_query.data = f"{PROPOSALS_PAGE_CALLBACK_PREFIX}open_{PAGE_NEXT}_{encode_cursor(cursor)}"
+    older_cursor = PageCursor(datetime(2024, 4, 1, tzinfo=timezone.utc), 7)
+    page = Page(
+        [{"id": 41, "title": "Older Prop", "target_channel_id": "-1001", "channel_message_id": None, "deadline_date": "2024-06-01 PST"}],
+        older_cursor, cursor
+    )
+
+    with patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal', _session_factory(AsyncMock())):
+        with patch('app.telegram_handlers.callback_handlers.ProposalService') as MockProposalService:
+            MockProposalService.return_value.list_proposals_page_by_status = AsyncMock(return_value=page)
+
+            await handle_proposals_page_callback(mock_update_callback, mock_context)
+
+            MockProposalService.return_value.list_proposals_page_by_status.assert_called_once_with(
+                ProposalStatus.OPEN.value, cursor, PAGE_NEXT
+            )
+    kwargs = mock_update_callback.callback_query.edit_message_text.call_args.kwargs
+    assert "Older Prop" in kwargs["text"]
+    buttons = kwargs["reply_markup"].inline_keyboard[0]
+    assert [button.text for button in buttons] == ["« Prev", "Next »"]
+    assert buttons[0].callback_data == f"{PROPOSALS_PAGE_CALLBACK_PREFIX}open_{PAGE_PREV}_{encode_cursor(cursor)}"
+    assert buttons[1].callback_data == f"{PROPOSALS_PAGE_CALLBACK_PREFIX}open_{PAGE_NEXT}_{encode_cursor(older_cursor)}"
+    assert all(len(button.callback_data.encode()) <= 64 for button in buttons)
+
+@pytest.mark.asyncio
+async def test_handle_proposals_page_callback_invalid_data(mock_update_callback, mock_context):
+    mock_update_callback.callback_query.data = f"{PROPOSALS_PAGE_CALLBACK_PREFIX}archived_{PAGE_NEXT}_123_4"
+
+    with patch('app.telegram_handlers.callback_handlers.ProposalService') as MockProposalService:
+        await handle_proposals_page_callback(mock_update_callback, mock_context)
+
+        MockProposalService.assert_not_called()
+    mock_update_callback.callback_query.edit_message_text.assert_called_once_with(text="Invalid selection. Please try again.")
+
+@pytest.mark.asyncio
+async def test_handle_my_votes_page_callback_shows_the_pressing_users_history(mock_update_callback, mock_context):
+    from datetime import datetime, timezone
+    cursor = PageCursor(datetime(2024, 5, 1, tzinfo=timezone.utc), 9)
+    mock_update_callback.callback_query.data = f"{MY_VOTES_PAGE_CALLBACK_PREFIX}{PAGE_PREV}_{encode_cursor(cursor)}"
+    history = [{"proposal_id": 1, "proposal_title": "Prop Alpha", "user_response": "Yes", "proposal_status": "open",
+                "proposal_outcome": "N/A", "submission_timestamp": "2024-05-02 PST"}]
+
+    with patch('app.telegram_handlers.callback_handlers.AsyncSessionLocal', _session_factory(AsyncMock())):
+        with patch('app.telegram_handlers.callback_handlers.SubmissionService') as MockSubmissionService:
+            MockSubmissionService.return_value.get_user_submission_history_page = AsyncMock(return_value=Page(history, cursor, None))
+
+            await handle_my_votes_page_callback(mock_update_callback, mock_context)
+
+            MockSubmissionService.return_value.get_user_submission_history_page.assert_called_once_with(123, cursor, PAGE_PREV)
+    kwargs = mock_update_callback.callback_query.edit_message_text.call_args.kwargs
+    assert "Prop Alpha" in kwargs["text"]
+    assert kwargs["parse_mode"] == ParseMode.MARKDOWN_V2
+    assert [button.text for button in kwargs["reply_markup"].inline_keyboard[0]] == ["Next »"]
+
 # Remove placeholder
 # def test_placeholder():
 #     assert True 
\ No newline at end of file
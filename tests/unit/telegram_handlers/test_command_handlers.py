@@ -1,8 +1,15 @@
 """Unit tests for command handlers."""
 import pytest
-from unittest.mock import AsyncMock, patch
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.exc import IntegrityError
 from telegram import Update, User, Message, Chat
-from app.telegram_handlers.command_handlers import start_command, help_command
+from app.core.submission_service import SubmissionService
+from app.core.user_service import _known_users
+from app.persistence.database import update_session
+from app.persistence.models.proposal_model import ProposalStatus, ProposalType
+from app.persistence.repositories.proposal_repository import ProposalFacts
+from app.telegram_handlers.command_handlers import start_command, help_command, usage_source_for_update
 
 
 @pytest.fixture
@@ -105,4 +112,90 @@ async def test_help_command_without_user(mock_update, mock_context):
     
     # The help message content should be the same regardless of whether a user is present
     called_args = mock_update.message.reply_text.call_args[0][0]
-    assert "Here's how I can assist you:" in called_args 
\ No newline at end of file
+    assert "Here's how I can assist you:" in called_args 
+def _update_with(text=None, callback_data=None):
+    from unittest.mock import MagicMock
+    update = MagicMock(spec=Update)
+    update.callback_query = MagicMock(data=callback_data) if callback_data else None
+    update.effective_message = MagicMock(text=text) if text is not None or not callback_data else None
+    return update
+
+def test_usage_source_for_update():
+    assert usage_source_for_update(_update_with(text="/ask what is open?")) == "/ask"
+    assert usage_source_for_update(_update_with(text="/Proposals@CoordinationBot open")) == "/proposals"
+    assert usage_source_for_update(_update_with(text="next Friday at noon")) == "message"
+    assert usage_source_for_update(_update_with(callback_data="vote_12_3")) == "callback:vote"
+    assert usage_source_for_update(_update_with(callback_data="/view_doc 5")) == "callback:/view_doc"
+    assert usage_source_for_update(_update_with(callback_data="ask_proposal_search")) == "callback:ask_proposal_search"
+
+
+@pytest.mark.asyncio
+async def test_start_then_vote_finds_committed_user(mock_update, mock_context):
+    """/start must commit the user before caching them, or a later vote skips the insert and breaks the foreign key."""
+    _known_users.clear()
+    pending, committed = set(), set()
+
+    user_repository = AsyncMock()
+    user_repository.upsert_user.side_effect = lambda telegram_id, **kwargs: pending.add(telegram_id)
+    user_repository.insert_user_if_missing.side_effect = pending.add
+
+    def commit():
+        committed.update(pending)
+        pending.clear()
+    session = AsyncMock()
+    session.commit.side_effect = commit
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    session_factory.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    async def upsert_submission_if_open(proposal_id, submitter_id, response_content):
+        if submitter_id not in committed | pending:
+            raise IntegrityError("INSERT INTO submissions", {}, Exception("submissions_submitter_id_fkey"))
+        return MagicMock()
+
+    with patch('app.persistence.database.AsyncSessionLocal', session_factory), \
+         patch('app.core.user_service.UserRepository', return_value=user_repository), \
+         patch('app.core.submission_service.ProposalRepository') as MockProposalRepository, \
+         patch('app.core.submission_service.SubmissionRepository') as MockSubmissionRepository:
+        MockProposalRepository.return_value.get_proposal_facts = AsyncMock(return_value=ProposalFacts(
+            1, "Lunch", ProposalType.MULTIPLE_CHOICE.value, ("A", "B"), datetime.now(timezone.utc), ProposalStatus.OPEN.value
+        ))
+        MockSubmissionRepository.return_value.upsert_submission_if_open = AsyncMock(side_effect=upsert_submission_if_open)
+
+        await start_command(mock_update, mock_context)
+        assert 12345 in committed
+
+        async with update_session() as vote_session:
+            success, message = await SubmissionService(vote_session).record_vote(1, 12345, 0)
+
+    assert success, message
+    _known_users.clear()
+
+
+@pytest.mark.asyncio
+async def test_failed_first_vote_does_not_cache_voter():
+    """A new voter whose vote fails is rolled back with it, so their next vote inserts them again."""
+    _known_users.clear()
+    session = AsyncMock()
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    session_factory.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    with patch('app.persistence.database.AsyncSessionLocal', session_factory), \
+         patch('app.core.user_service.UserRepository', return_value=AsyncMock()), \
+         patch('app.core.submission_service.ProposalRepository') as MockProposalRepository, \
+         patch('app.core.submission_service.SubmissionRepository') as MockSubmissionRepository:
+        MockProposalRepository.return_value.get_proposal_facts = AsyncMock(return_value=ProposalFacts(
+            1, "Lunch", ProposalType.MULTIPLE_CHOICE.value, ("A", "B"), datetime.now(timezone.utc), ProposalStatus.OPEN.value
+        ))
+        MockSubmissionRepository.return_value.upsert_submission_if_open = AsyncMock(side_effect=Exception("deadlock detected"))
+
+        async with update_session() as vote_session:
+            try:
+                async with update_session():
+                    await SubmissionService(vote_session).record_vote(1, 777, 0)
+            except Exception:
+                pass # The vote handler reports the error to the user
+
+    session.commit.assert_not_awaited()
+    assert _known_users.lookup(777) == (False, None)
@@ -335,3 +335,113 @@ async def test_view_document_content_command_not_found(mock_context_service_clas
 
     await view_document_content_command(mock_update, mock_context)
     mock_update.message.reply_text.assert_called_once_with(f"Could not retrieve content for Document ID {doc_id}. It might not exist or have no content.")
+
+# Tests for doc_status_command
+
+from app.telegram_handlers.document_command_handlers import doc_status_command
+from app.persistence.models.ingestion_job_model import IngestionJob, IngestionJobStatus
+
+def _mock_session_local(mock_async_session):
+    mock_session_context_manager = AsyncMock()
+    mock_session_context_manager.__aenter__.return_value = AsyncMock()
+    mock_session_context_manager.__aexit__.return_value = None
+    mock_async_session.return_value = mock_session_context_manager
+
+@pytest.mark.asyncio
+@patch('app.telegram_handlers.document_command_handlers.AsyncSessionLocal')
+@patch('app.telegram_handlers.document_command_handlers.IngestionJobRepository')
+async def test_doc_status_command_completed_job(mock_repo_class, mock_async_session, mock_update, mock_context):
+    _mock_session_local(mock_async_session)
+    mock_context.args = ["5"]
+    job = IngestionJob(id=5, requester_telegram_id=12345, title="Handbook", status=IngestionJobStatus.COMPLETED.value, document_id=42)
+    mock_repo_class.return_value.get_job_by_id = AsyncMock(return_value=job)
+
+    await doc_status_command(mock_update, mock_context)
+
+    reply = mock_update.message.reply_text.call_args[0][0]
+    assert "Job 5: completed" in reply
+    assert "Document ID: 42" in reply
+
+@pytest.mark.asyncio
+@patch('app.telegram_handlers.document_command_handlers.ConfigService')
+@patch('app.telegram_handlers.document_command_handlers.AsyncSessionLocal')
+@patch('app.telegram_handlers.document_command_handlers.IngestionJobRepository')
+async def test_doc_status_command_other_users_job_hidden(mock_repo_class, mock_async_session, mock_config_service, mock_update, mock_context):
+    _mock_session_local(mock_async_session)
+    mock_config_service.get_admin_ids.return_value = []
+    mock_context.args = ["5"]
+    job = IngestionJob(id=5, requester_telegram_id=999, status=IngestionJobStatus.RUNNING.value)
+    mock_repo_class.return_value.get_job_by_id = AsyncMock(return_value=job)
+
+    await doc_status_command(mock_update, mock_context)
+
+    mock_update.message.reply_text.assert_called_once_with("No document job found with ID 5.")
+
+@pytest.mark.asyncio
+@patch('app.telegram_handlers.document_command_handlers.AsyncSessionLocal')
+@patch('app.telegram_handlers.document_command_handlers.IngestionJobRepository')
+async def test_doc_status_command_lists_recent_jobs(mock_repo_class, mock_async_session, mock_update, mock_context):
+    _mock_session_local(mock_async_session)
+    mock_context.args = []
+    jobs = [
+        IngestionJob(id=2, requester_telegram_id=12345, status=IngestionJobStatus.RUNNING.value, progress="embedding 3 chunks"),
+        IngestionJob(id=1, requester_telegram_id=12345, status=IngestionJobStatus.FAILED.value, error_message="Bad URL"),
+    ]
+    mock_repo_class.return_value.get_jobs_by_requester = AsyncMock(return_value=jobs)
+
+    await doc_status_command(mock_update, mock_context)
+
+    reply = mock_update.message.reply_text.call_args[0][0]
+    assert "Job 2: running (embedding 3 chunks)" in reply
+    assert "Error: Bad URL" in reply
+
+@pytest.mark.asyncio
+async def test_doc_status_command_invalid_id(mock_update, mock_context):
+    mock_context.args = ["abc"]
+    await doc_status_command(mock_update, mock_context)
+    mock_update.message.reply_text.assert_called_once_with("Invalid Job ID. It must be a number, e.g. /doc_status 12")
+
+# Tests for paged /view_doc display
+
+from app.telegram_handlers.document_command_handlers import _display_document_content, VIEW_DOC_PAGE_SIZE
+
+@pytest.mark.asyncio
+@patch('app.telegram_handlers.document_command_handlers.AsyncSessionLocal')
+@patch('app.telegram_handlers.document_command_handlers._get_and_format_document_for_display', new_callable=AsyncMock)
+async def test_display_document_content_short_document_single_message(mock_get_document, mock_async_session):
+    _mock_session_local(mock_async_session)
+    mock_get_document.return_value = Document(id=5, title="Doc", raw_content="Short text.")
+    destination = AsyncMock()
+
+    assert await _display_document_content(5, destination) is True
+
+    destination.reply_text.assert_awaited_once()
+    assert destination.reply_text.call_args.args[0] == "Content for Document ID 5:\n\nShort text\\."
+
+@pytest.mark.asyncio
+@patch('app.telegram_handlers.document_command_handlers.AsyncSessionLocal')
+@patch('app.telegram_handlers.document_command_handlers._get_and_format_document_for_display', new_callable=AsyncMock)
+async def test_display_document_content_long_document_sent_page_by_page(mock_get_document, mock_async_session):
+    _mock_session_local(mock_async_session)
+    content = "." * (VIEW_DOC_PAGE_SIZE * 2 + 10) # Every character doubles when escaped
+    mock_get_document.return_value = Document(id=6, title="Doc", raw_content=content)
+    destination = AsyncMock()
+
+    assert await _display_document_content(6, destination) is True
+
+    sent = [c.args[0] for c in destination.reply_text.call_args_list]
+    assert "sent in parts" in sent[0]
+    assert len(sent) == 4 # Header + 3 pages
+    assert all(len(message) <= 4096 for message in sent)
+    assert "".join(sent[1:]) == "\\." * len(content)
+
+@pytest.mark.asyncio
+@patch('app.telegram_handlers.document_command_handlers.AsyncSessionLocal')
+@patch('app.telegram_handlers.document_command_handlers._get_and_format_document_for_display', new_callable=AsyncMock)
+async def test_display_document_content_not_found(mock_get_document, mock_async_session):
+    _mock_session_local(mock_async_session)
+    mock_get_document.return_value = None
+    destination = AsyncMock()
+
+    assert await _display_document_content(7, destination) is False
+    assert "Could not retrieve content" in destination.reply_text.call_args.args[0]
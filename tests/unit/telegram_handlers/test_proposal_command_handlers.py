@@ -23,6 +23,7 @@ from app.telegram_handlers.conversation_defs import (
     USER_DATA_EDIT_CHANGES
 )
 from app.persistence.models.proposal_model import Proposal
+from app.utils.pagination import Page
 from telegram.ext import ConversationHandler, CommandHandler, CallbackQueryHandler, MessageHandler
 from telegram.ext import filters
 
@@ -76,6 +77,7 @@ async def test_proposals_command_with_open_arg():
     mock_update.effective_user = mock_effective_user
     mock_update.message = MagicMock()
     mock_update.message.chat_id = mock_chat.id
+    mock_update.message.reply_text = AsyncMock()
     mock_context.args = ["open"]
 
     proposals_data_open = [
@@ -89,21 +91,20 @@ async def test_proposals_command_with_open_arg():
 
     with patch('app.telegram_handlers.proposal_command_handlers.AsyncSessionLocal', mock_async_session_local_factory):
         with patch('app.telegram_handlers.proposal_command_handlers.ProposalService') as MockProposalService:
-            with patch('app.telegram_handlers.proposal_command_handlers.telegram_utils.send_message_in_chunks', new_callable=AsyncMock) as mock_send_chunks:
-                mock_proposal_service_instance = MockProposalService.return_value
-                mock_proposal_service_instance.list_proposals_by_status = AsyncMock(return_value=proposals_data_open)
-
-                await proposals_command(mock_update, mock_context)
-                
-                assert mock_send_chunks.called
-                args, kwargs = mock_send_chunks.call_args
-                assert args[0] == mock_context
-                assert kwargs['chat_id'] == mock_chat.id
-                assert kwargs['parse_mode'] == ParseMode.MARKDOWN_V2
-                assert "Open Proposals" in kwargs['text']
-                assert "Open Prop 1" in kwargs['text']
-                assert "1001" in kwargs['text']
-                assert "2024" in kwargs['text']
+            mock_proposal_service_instance = MockProposalService.return_value
+            mock_proposal_service_instance.list_proposals_page_by_status = AsyncMock(return_value=Page(proposals_data_open, None, None))
+
+            await proposals_command(mock_update, mock_context)
+            
+            mock_update.message.reply_text.assert_called_once()
+            args, kwargs = mock_update.message.reply_text.call_args
+            text = args[0]
+            assert kwargs['parse_mode'] == ParseMode.MARKDOWN_V2
+            assert kwargs['reply_markup'] is None # Single page, no Prev/Next buttons
+            assert "Open Proposals" in text
+            assert "Open Prop 1" in text
+            assert "1001" in text
+            assert "2024" in text
 
 @pytest.mark.asyncio
 async def test_proposals_command_with_closed_arg():
@@ -114,6 +115,7 @@ async def test_proposals_command_with_closed_arg():
     mock_update.effective_user = mock_effective_user
     mock_update.message = MagicMock()
     mock_update.message.chat_id = mock_chat.id
+    mock_update.message.reply_text = AsyncMock()
     mock_context.args = ["closed"]
 
     proposals_data_closed = [
@@ -127,22 +129,21 @@ async def test_proposals_command_with_closed_arg():
 
     with patch('app.telegram_handlers.proposal_command_handlers.AsyncSessionLocal', mock_async_session_local_factory):
         with patch('app.telegram_handlers.proposal_command_handlers.ProposalService') as MockProposalService:
-            with patch('app.telegram_handlers.proposal_command_handlers.telegram_utils.send_message_in_chunks', new_callable=AsyncMock) as mock_send_chunks:
-                mock_proposal_service_instance = MockProposalService.return_value
-                mock_proposal_service_instance.list_proposals_by_status = AsyncMock(return_value=proposals_data_closed)
-
-                await proposals_command(mock_update, mock_context)
-
-                assert mock_send_chunks.called
-                args, kwargs = mock_send_chunks.call_args
-                assert args[0] == mock_context
-                assert kwargs['chat_id'] == mock_chat.id
-                assert kwargs['parse_mode'] == ParseMode.MARKDOWN_V2
-                assert "Closed Proposals" in kwargs['text']
-                assert "Closed Prop X" in kwargs['text'] 
-                assert "1003" in kwargs['text']
-                assert "2023" in kwargs['text']
-                assert "X was chosen" in kwargs['text']
+            mock_proposal_service_instance = MockProposalService.return_value
+            mock_proposal_service_instance.list_proposals_page_by_status = AsyncMock(return_value=Page(proposals_data_closed, None, None))
+
+            await proposals_command(mock_update, mock_context)
+
+            mock_update.message.reply_text.assert_called_once()
+            args, kwargs = mock_update.message.reply_text.call_args
+            text = args[0]
+            assert kwargs['parse_mode'] == ParseMode.MARKDOWN_V2
+            assert kwargs['reply_markup'] is None # Single page, no Prev/Next buttons
+            assert "Closed Proposals" in text
+            assert "Closed Prop X" in text 
+            assert "1003" in text
+            assert "2023" in text
+            assert "X was chosen" in text
 
 @pytest.mark.asyncio
 async def test_proposals_command_with_invalid_arg():
@@ -459,7 +460,7 @@ async def test_handle_confirm_edit_proposal_no_actual_changes(
         USER_DATA_EDIT_CHANGES: {}
     }
 
-    with patch('app.telegram_handlers.proposal_command_handlers.AsyncSessionLocal', mock_async_session_factory):
+    with patch('app.persistence.database.AsyncSessionLocal', mock_async_session_factory):
         result = await handle_confirm_edit_proposal(mock_update_callback_edit, mock_context_edit)
 
     mock_update_callback_edit.callback_query.answer.assert_called_once()
@@ -499,7 +500,7 @@ async def test_handle_confirm_edit_proposal_with_changes_success(
     mock_proposal_service_instance.user_service = AsyncMock()
     mock_proposal_service_instance.user_service.get_user_by_telegram_id = AsyncMock(return_value=mock_proposer_user)
 
-    with patch('app.telegram_handlers.proposal_command_handlers.AsyncSessionLocal', mock_async_session_factory):
+    with patch('app.persistence.database.AsyncSessionLocal', mock_async_session_factory):
         with patch('app.telegram_handlers.proposal_command_handlers.telegram_utils.format_proposal_message', return_value="Formatted Message"):
             with patch('app.telegram_handlers.proposal_command_handlers.telegram_utils.create_proposal_options_keyboard', return_value=InlineKeyboardMarkup([])):
                  result = await handle_confirm_edit_proposal(mock_update_callback_edit, mock_context_edit)
@@ -544,7 +545,7 @@ async def test_handle_confirm_edit_proposal_with_changes_service_fail(
     mock_proposal_service_instance = MockProposalService.return_value
     mock_proposal_service_instance.edit_proposal_details = AsyncMock(return_value=(None, "Service update failed."))
 
-    with patch('app.telegram_handlers.proposal_command_handlers.AsyncSessionLocal', mock_async_session_factory):
+    with patch('app.persistence.database.AsyncSessionLocal', mock_async_session_factory):
         result = await handle_confirm_edit_proposal(mock_update_callback_edit, mock_context_edit)
 
     mock_update_callback_edit.callback_query.answer.assert_called_once()
@@ -561,6 +562,32 @@ async def test_handle_confirm_edit_proposal_with_changes_service_fail(
     assert args[0] == "Error applying changes: Service update failed."
     assert result == ConversationHandler.END
 
+@pytest.mark.asyncio
+@patch('app.telegram_handlers.proposal_command_handlers.ProposalService')
+async def test_handle_confirm_edit_proposal_commit_failure_announces_nothing(
+    MockProposalService, mock_async_session_factory, mock_update_callback_edit, mock_context_edit
+):
+    mock_update_callback_edit.callback_query.data = "confirm_edit_yes"
+    user_id = mock_update_callback_edit.effective_user.id
+    mock_context_edit.user_data = {
+        USER_DATA_EDIT_PROPOSAL_ID: 1,
+        USER_DATA_EDIT_CHANGES: {"title": "New Title"}
+    }
+    mock_session_instance = mock_async_session_factory.return_value.__aenter__.return_value
+    mock_session_instance.commit.side_effect = Exception("DB commit error")
+    MockProposalService.return_value.edit_proposal_details = AsyncMock(return_value=(Proposal(
+        id=1, title="New Title", target_channel_id="-1001", channel_message_id=123,
+        proposer_telegram_id=user_id, proposal_type=ProposalType.FREE_FORM.value
+    ), None))
+    MockProposalService.return_value.user_service.get_user_by_telegram_id = AsyncMock(return_value=User(telegram_id=user_id))
+
+    with patch('app.persistence.database.AsyncSessionLocal', mock_async_session_factory):
+        with pytest.raises(Exception, match="DB commit error"):
+            await handle_confirm_edit_proposal(mock_update_callback_edit, mock_context_edit)
+
+    mock_update_callback_edit.callback_query.edit_message_text.assert_not_called()
+    mock_context_edit.bot.edit_message_text.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_handle_confirm_edit_proposal_discard_changes(mock_update_callback_edit, mock_context_edit):
     mock_update_callback_edit.callback_query.data = "edit_prop_confirm_no"
@@ -708,7 +735,7 @@ async def test_cancel_proposal_command_service_success(mock_update, mock_context
     mock_proposal_service_instance = AsyncMock(spec=ProposalService)
     mock_proposal_service_instance.cancel_proposal_by_proposer = AsyncMock(return_value=(True, "Proposal successfully cancelled."))
 
-    with patch('app.telegram_handlers.proposal_command_handlers.AsyncSessionLocal', mock_async_session_factory):
+    with patch('app.persistence.database.AsyncSessionLocal', mock_async_session_factory):
         mock_session_instance = mock_async_session_factory.return_value.__aenter__.return_value
         with patch('app.telegram_handlers.proposal_command_handlers.ProposalService', return_value=mock_proposal_service_instance) as mock_ProposalService_class:
             await cancel_proposal_command(mock_update, mock_context)
@@ -728,7 +755,7 @@ async def test_cancel_proposal_command_service_failure(mock_update, mock_context
     mock_proposal_service_instance = AsyncMock(spec=ProposalService)
     mock_proposal_service_instance.cancel_proposal_by_proposer = AsyncMock(return_value=(False, "Service says: Proposal not found."))
 
-    with patch('app.telegram_handlers.proposal_command_handlers.AsyncSessionLocal', mock_async_session_factory):
+    with patch('app.persistence.database.AsyncSessionLocal', mock_async_session_factory):
         mock_session_instance = mock_async_session_factory.return_value.__aenter__.return_value
         with patch('app.telegram_handlers.proposal_command_handlers.ProposalService', return_value=mock_proposal_service_instance) as mock_ProposalService_class:
             await cancel_proposal_command(mock_update, mock_context)
@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.persistence.database import update_session
+from app.telegram_handlers.session_middleware import with_update_session
+from app.utils.metrics import metrics
+
+@pytest.fixture
+def mock_session():
+    session = AsyncMock()
+    context_manager = MagicMock()
+    context_manager.__aenter__ = AsyncMock(return_value=session)
+    context_manager.__aexit__ = AsyncMock(return_value=None)
+    with patch('app.persistence.database.AsyncSessionLocal', return_value=context_manager):
+        yield session
+    metrics.reset()
+
+@pytest.mark.asyncio
+async def test_with_update_session_commits_once_and_records_metrics(mock_session):
+    seen_sessions = []
+
+    @with_update_session
+    async def some_handler(update, context):
+        async with update_session() as first:
+            seen_sessions.append(first)
+        async with update_session() as second:
+            seen_sessions.append(second)
+        return "done"
+
+    assert await some_handler(MagicMock(), MagicMock()) == "done"
+
+    assert seen_sessions == [mock_session, mock_session]
+    mock_session.commit.assert_awaited_once()
+    assert metrics.get_summary("db.queries_per_update", handler="some_handler")["count"] == 1
+    assert metrics.get_summary("db.commits_per_update", handler="some_handler")["count"] == 1
+
+@pytest.mark.asyncio
+async def test_with_update_session_rolls_back_when_handler_raises(mock_session):
+    @with_update_session
+    async def failing_handler(update, context):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await failing_handler(MagicMock(), MagicMock())
+
+    mock_session.rollback.assert_awaited_once()
+    mock_session.commit.assert_not_awaited()
+    assert metrics.get_summary("db.queries_per_update", handler="failing_handler")["count"] == 1
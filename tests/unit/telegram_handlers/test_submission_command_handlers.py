@@ -26,7 +26,7 @@ def mock_context_submission():
     context.bot.username = "TestBotName"
     return context
 
-@patch("app.telegram_handlers.submission_command_handlers.AsyncSessionLocal")
+@patch("app.persistence.database.AsyncSessionLocal")
 @patch("app.telegram_handlers.submission_command_handlers.SubmissionService")
 @pytest.mark.asyncio
 async def test_submit_command_success(
@@ -52,6 +52,7 @@ async def test_submit_command_success(
         text_submission="This is my submission"
     )
     mock_update_submission.message.reply_text.assert_called_once_with("Submission recorded!")
+    mock_session.commit.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_submit_command_no_args(mock_update_submission, mock_context_submission):
@@ -82,7 +83,7 @@ async def test_submit_command_invalid_proposal_id(mock_update_submission, mock_c
         "Invalid proposal ID: 'abc'. Please provide a numeric ID."
     )
 
-@patch("app.telegram_handlers.submission_command_handlers.AsyncSessionLocal")
+@patch("app.persistence.database.AsyncSessionLocal")
 @patch("app.telegram_handlers.submission_command_handlers.SubmissionService")
 @pytest.mark.asyncio
 async def test_submit_command_service_failure(
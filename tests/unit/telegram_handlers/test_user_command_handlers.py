@@ -10,6 +10,9 @@ from app.core.user_service import UserService # For patching register_user_inter
 from app.utils import telegram_utils # For send_message_in_chunks
 from app.core.proposal_service import ProposalService # Added for my_proposals tests
 from app.persistence.models.proposal_model import ProposalType, ProposalStatus # Added for my_proposals tests
+from app.telegram_handlers.conversation_defs import MY_VOTES_PAGE_CALLBACK_PREFIX
+from app.utils.pagination import PAGE_NEXT, Page, PageCursor, encode_cursor
+from datetime import datetime, timezone
 
 @pytest.mark.asyncio
 async def test_my_votes_command_user_has_votes():
@@ -43,16 +46,18 @@ async def test_my_votes_command_user_has_votes():
         "  Submitted: `2023-01-02 PST`"
     )
 
+    next_cursor = PageCursor(datetime(2023, 1, 1, tzinfo=timezone.utc), 2) # More history after this page
+
     # Mock for the session instance that __aenter__ will return
     mock_session_instance = AsyncMock()
 
-    with patch('app.telegram_handlers.user_command_handlers.get_session', new_callable=MagicMock) as mock_get_session_function:
-        # Configure the mock for the get_session() call
-        # get_session() should return an async context manager
-        mock_async_context_manager = AsyncMock() # This is the object returned by get_session()
+    with patch('app.telegram_handlers.user_command_handlers.update_session', new_callable=MagicMock) as mock_update_session_function:
+        # Configure the mock for the update_session() call
+        # update_session() should return an async context manager
+        mock_async_context_manager = AsyncMock() # This is the object returned by update_session()
         mock_async_context_manager.__aenter__.return_value = mock_session_instance # __aenter__ returns the session
         mock_async_context_manager.__aexit__ = AsyncMock(return_value=None)
-        mock_get_session_function.return_value = mock_async_context_manager
+        mock_update_session_function.return_value = mock_async_context_manager
 
         with patch('app.telegram_handlers.user_command_handlers.UserService') as MockUserService:
             with patch('app.telegram_handlers.user_command_handlers.SubmissionService') as MockSubmissionService:
@@ -60,20 +65,22 @@ async def test_my_votes_command_user_has_votes():
                 mock_user_service_instance.register_user_interaction = AsyncMock()
 
                 mock_submission_service_instance = MockSubmissionService.return_value
-                mock_submission_service_instance.get_user_submission_history = AsyncMock(return_value=formatted_history)
+                mock_submission_service_instance.get_user_submission_history_page = AsyncMock(return_value=Page(formatted_history, next_cursor, None))
 
                 await my_votes_command(mock_update, mock_context)
 
-                mock_get_session_function.assert_called_once() # Ensure get_session() was called
+                mock_update_session_function.assert_called_once() # Ensure update_session() was called
                 MockUserService.assert_called_once_with(mock_session_instance)
                 MockSubmissionService.assert_called_once_with(mock_session_instance)
                 mock_user_service_instance.register_user_interaction.assert_called_once()
-                mock_submission_service_instance.get_user_submission_history.assert_called_once_with(submitter_id=123)
+                mock_submission_service_instance.get_user_submission_history_page.assert_called_once_with(submitter_id=123)
                 mock_update.message.reply_text.assert_called()
                 args, kwargs = mock_update.message.reply_text.call_args
                 assert kwargs.get('parse_mode') == ParseMode.MARKDOWN_V2
                 assert "Prop Alpha" in args[0]
                 assert "Prop Beta" in args[0]
+                next_button, = kwargs['reply_markup'].inline_keyboard[0]
+                assert next_button.callback_data == f"{MY_VOTES_PAGE_CALLBACK_PREFIX}{PAGE_NEXT}_{encode_cursor(next_cursor)}"
 
 @pytest.mark.asyncio
 async def test_my_votes_command_no_votes():
@@ -91,11 +98,11 @@ async def test_my_votes_command_no_votes():
 
     mock_session_instance = AsyncMock()
 
-    with patch('app.telegram_handlers.user_command_handlers.get_session', new_callable=MagicMock) as mock_get_session_function:
+    with patch('app.telegram_handlers.user_command_handlers.update_session', new_callable=MagicMock) as mock_update_session_function:
         mock_async_context_manager = AsyncMock()
         mock_async_context_manager.__aenter__.return_value = mock_session_instance
         mock_async_context_manager.__aexit__ = AsyncMock(return_value=None)
-        mock_get_session_function.return_value = mock_async_context_manager
+        mock_update_session_function.return_value = mock_async_context_manager
 
         with patch('app.telegram_handlers.user_command_handlers.UserService') as MockUserService:
             with patch('app.telegram_handlers.user_command_handlers.SubmissionService') as MockSubmissionService:
@@ -103,11 +110,11 @@ async def test_my_votes_command_no_votes():
                 mock_user_service_instance.register_user_interaction = AsyncMock()
 
                 mock_submission_service_instance = MockSubmissionService.return_value
-                mock_submission_service_instance.get_user_submission_history = AsyncMock(return_value=[]) # No history
+                mock_submission_service_instance.get_user_submission_history_page = AsyncMock(return_value=Page([], None, None)) # No history
 
                 await my_votes_command(mock_update, mock_context)
                 
-                mock_get_session_function.assert_called_once()
+                mock_update_session_function.assert_called_once()
                 MockUserService.assert_called_once_with(mock_session_instance)
                 MockSubmissionService.assert_called_once_with(mock_session_instance)
                 mock_update.message.reply_text.assert_called_once_with(expected_message)
@@ -198,7 +205,7 @@ async def test_my_proposals_command_user_has_proposals():
     mock_async_session_local_callable.return_value.__aenter__ = AsyncMock(return_value=mock_session_instance)
     mock_async_session_local_callable.return_value.__aexit__ = AsyncMock(return_value=None)
 
-    with patch('app.telegram_handlers.user_command_handlers.AsyncSessionLocal', mock_async_session_local_callable):
+    with patch('app.telegram_handlers.user_command_handlers.update_session', mock_async_session_local_callable):
         with patch('app.telegram_handlers.user_command_handlers.UserService') as MockUserService:
             with patch('app.telegram_handlers.user_command_handlers.ProposalService') as MockProposalService:
                 with patch('app.telegram_handlers.user_command_handlers.telegram_utils.send_message_in_chunks', new_callable=AsyncMock) as mock_send_chunks:
@@ -240,7 +247,7 @@ async def test_my_proposals_command_no_proposals():
     mock_async_session_local_callable.return_value.__aenter__ = AsyncMock(return_value=mock_session_instance)
     mock_async_session_local_callable.return_value.__aexit__ = AsyncMock(return_value=None)
 
-    with patch('app.telegram_handlers.user_command_handlers.AsyncSessionLocal', mock_async_session_local_callable):
+    with patch('app.telegram_handlers.user_command_handlers.update_session', mock_async_session_local_callable):
         with patch('app.telegram_handlers.user_command_handlers.UserService') as MockUserService:
             with patch('app.telegram_handlers.user_command_handlers.ProposalService') as MockProposalService:
                 with patch('app.telegram_handlers.user_command_handlers.telegram_utils.send_message_in_chunks', new_callable=AsyncMock) as mock_send_chunks:
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.utils.clustering import kmeans, representative_indices, suggest_cluster_count
+
+def _blobs():
+    # Three well-separated directions with small perturbations
+    rng = np.random.default_rng(42)
+    centers = np.eye(3) * 10
+    return np.vstack([center + rng.normal(scale=0.5, size=(20, 3)) for center in centers])
+
+def test_suggest_cluster_count_bounds():
+    assert suggest_cluster_count(0) == 0
+    assert suggest_cluster_count(1) == 1
+    assert suggest_cluster_count(10) == 2
+    assert suggest_cluster_count(200) == 8 # sqrt(100) = 10, clamped to the maximum
+    assert suggest_cluster_count(50) == 5
+
+def test_kmeans_separates_blobs():
+    vectors = _blobs()
+    labels, centroids = kmeans(vectors, 3)
+    assert centroids.shape == (3, 3)
+    for start in (0, 20, 40):
+        assert len(set(labels[start:start + 20].tolist())) == 1 # Each blob lands in one cluster
+    assert len(set(labels.tolist())) == 3
+
+def test_kmeans_is_deterministic_for_seed():
+    vectors = _blobs()
+    labels_a, centroids_a = kmeans(vectors, 3, seed=7)
+    labels_b, centroids_b = kmeans(vectors, 3, seed=7)
+    assert np.array_equal(labels_a, labels_b)
+    assert np.allclose(centroids_a, centroids_b)
+
+def test_kmeans_caps_k_at_number_of_points():
+    labels, centroids = kmeans([[1.0, 0.0], [0.0, 1.0]], 5)
+    assert len(centroids) == 2
+    assert sorted(labels.tolist()) == [0, 1]
+
+def test_kmeans_rejects_empty_input():
+    with pytest.raises(ValueError):
+        kmeans([], 2)
+
+def test_representative_indices_closest_first():
+    vectors = [[1.0, 0.0], [1.0, 0.5], [1.0, 0.05], [0.0, 1.0]]
+    labels = np.array([0, 0, 0, 1])
+    centroids = np.array([[1.0, 0.0], [0.0, 1.0]])
+    assert representative_indices(vectors, labels, centroids, 0, limit=2) == [0, 2]
+    assert representative_indices(vectors, labels, centroids, 1, limit=5) == [3]
+    assert representative_indices(vectors, labels, centroids, 2, limit=5) == []
@@ -0,0 +1,40 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from app.utils.compression import (
+    compress_text,
+    decompress_text,
+    iter_decompressed_text,
+    DEFAULT_CONTENT_ENCODING,
+    ZLIB_ENCODING,
+)
+
+def test_compress_round_trip_default_encoding():
+    text = "Policy text with unicode: café, 数据, emoji 🎉\n" * 200
+    data, encoding = compress_text(text)
+    assert encoding == DEFAULT_CONTENT_ENCODING
+    assert len(data) < len(text.encode("utf-8"))
+    assert decompress_text(data, encoding) == text
+
+def test_default_encoding_is_zlib_even_when_zstandard_is_installed():
+    # Whether zstandard happens to be importable must not decide how rows are written
+    with patch('app.utils.compression.zstandard', MagicMock()):
+        _, encoding = compress_text("hello world")
+    assert encoding == ZLIB_ENCODING
+
+def test_compress_round_trip_zlib():
+    data, encoding = compress_text("hello world", encoding=ZLIB_ENCODING)
+    assert encoding == ZLIB_ENCODING
+    assert decompress_text(data, encoding) == "hello world"
+
+def test_iter_decompressed_text_pages():
+    text = "é" * 2500 + "x" * 10 # Multi-byte characters must not be split across pages
+    data, encoding = compress_text(text, encoding=ZLIB_ENCODING)
+    pages = list(iter_decompressed_text(data, encoding, page_size=1000))
+    assert [len(page) for page in pages] == [1000, 1000, 510]
+    assert "".join(pages) == text
+
+def test_unsupported_encoding_raises():
+    with pytest.raises(ValueError):
+        compress_text("text", encoding="lz4")
+    with pytest.raises(ValueError):
+        decompress_text(b"data", "lz4")
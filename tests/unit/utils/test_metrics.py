@@ -0,0 +1,35 @@
+from app.utils.metrics import MetricsRegistry
+
+def test_observe_summarizes_series():
+    registry = MetricsRegistry()
+    for value in [1.0, 2.0, 3.0, 4.0]:
+        registry.observe("latency_seconds", value, task="ask")
+
+    summary = registry.get_summary("latency_seconds", task="ask")
+    assert summary["count"] == 4
+    assert summary["sum"] == 10.0
+    assert summary["avg"] == 2.5
+    assert summary["min"] == 1.0
+    assert summary["max"] == 4.0
+    assert summary["p95"] == 4.0
+
+def test_labels_separate_series():
+    registry = MetricsRegistry()
+    registry.observe("latency_seconds", 1.0, task="a")
+    registry.observe("latency_seconds", 5.0, task="b")
+    assert registry.get_summary("latency_seconds", task="a")["max"] == 1.0
+    assert registry.get_summary("latency_seconds") is None
+
+def test_counters_and_snapshot():
+    registry = MetricsRegistry()
+    registry.increment("calls", task="ask")
+    registry.increment("calls", 2, task="ask")
+    registry.observe("size", 3)
+
+    assert registry.get_counter("calls", task="ask") == 3.0
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == {"calls{task=ask}": 3.0}
+    assert snapshot["series"]["size"]["count"] == 1
+
+    registry.reset()
+    assert registry.snapshot() == {"series": {}, "counters": {}}
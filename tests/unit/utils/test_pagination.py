@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.persistence.models.proposal_model import Proposal
+from app.utils.pagination import (
+    PAGE_NEXT, PAGE_PREV, PageCursor, build_page, decode_cursor, encode_cursor, keyset_select
+)
+from app.utils.telegram_utils import create_page_navigation_keyboard, parse_page_callback_data
+
+BASE = datetime(2024, 5, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+def _rows(ids):
+    """Fake (creation_date, id) rows; a higher id is newer."""
+    return [(BASE + timedelta(minutes=row_id), row_id) for row_id in ids]
+
+def _key(row):
+    return row
+
+def test_cursor_round_trip_keeps_microseconds():
+    cursor = PageCursor(BASE, 12345)
+    assert decode_cursor(encode_cursor(cursor)) == cursor
+
+def test_encode_cursor_treats_naive_datetimes_as_utc():
+    assert encode_cursor(PageCursor(BASE.replace(tzinfo=None), 1)) == encode_cursor(PageCursor(BASE, 1))
+
+def test_decode_cursor_rejects_malformed_values():
+    assert decode_cursor("") is None
+    assert decode_cursor("abc_1") is None
+    assert decode_cursor("123") is None
+
+def test_first_page_has_only_a_next_cursor():
+    rows = _rows([10, 9, 8]) # limit 2 + 1 look-ahead row
+    page = build_page(rows, 2, _key)
+    assert [row_id for _, row_id in page.items] == [10, 9]
+    assert page.next_cursor == PageCursor(*rows[1])
+    assert page.prev_cursor is None
+
+def test_last_page_going_next_has_only_a_prev_cursor():
+    rows = _rows([8, 7])
+    cursor = PageCursor(*_rows([9])[0])
+    page = build_page(rows, 2, _key, cursor, PAGE_NEXT)
+    assert page.next_cursor is None
+    assert page.prev_cursor == PageCursor(*rows[0])
+
+def test_prev_page_is_returned_newest_first():
+    rows = _rows([5, 6, 7]) # Fetched oldest first when going back, with one look-ahead row
+    cursor = PageCursor(*_rows([4])[0])
+    page = build_page(rows, 2, _key, cursor, PAGE_PREV)
+    assert [row_id for _, row_id in page.items] == [6, 5]
+    assert page.prev_cursor == PageCursor(*_rows([6])[0])
+    assert page.next_cursor == PageCursor(*_rows([5])[0])
+
+def test_single_page_has_no_cursors():
+    page = build_page(_rows([2, 1]), 10, _key)
+    assert page.next_cursor is None and page.prev_cursor is None
+    assert create_page_navigation_keyboard(page, "x_") is None
+
+def test_keyset_select_uses_a_row_comparison_and_look_ahead_limit():
+    cursor = PageCursor(BASE, 3)
+    stmt = keyset_select(select(Proposal), Proposal.creation_date, Proposal.id, 10, cursor, PAGE_NEXT)
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "(proposals.creation_date, proposals.id) < (" in sql
+    assert "ORDER BY proposals.creation_date DESC, proposals.id DESC" in sql
+    assert stmt._limit == 11
+
+    back = str(keyset_select(select(Proposal), Proposal.creation_date, Proposal.id, 10, cursor, PAGE_PREV).compile(dialect=postgresql.dialect()))
+    assert "(proposals.creation_date, proposals.id) > (" in back
+    assert "ORDER BY proposals.creation_date ASC, proposals.id ASC" in back
+
+def test_page_callback_data_round_trip():
+    rows = _rows([10, 9, 8])
+    page = build_page(rows, 2, _key, PageCursor(*_rows([11])[0]), PAGE_NEXT)
+    prev_button, next_button = create_page_navigation_keyboard(page, "proposals_page_closed_").inline_keyboard[0]
+    assert len(next_button.callback_data.encode()) <= 64
+    assert parse_page_callback_data(next_button.callback_data, "proposals_page_closed_") == (PAGE_NEXT, page.next_cursor)
+    assert parse_page_callback_data(prev_button.callback_data, "proposals_page_closed_") == (PAGE_PREV, page.prev_cursor)
+    assert parse_page_callback_data("proposals_page_closed_x_1_2", "proposals_page_closed_") is None
@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import patch
+
+from app.utils.prompt_packing import ContextBlock, count_tokens, pack_context_blocks
+
+@pytest.fixture(autouse=True)
+def estimated_token_counts():
+    # Deterministic counts (~4 chars per token) regardless of whether tiktoken encodings can be loaded
+    with patch('app.utils.prompt_packing._get_encoder', return_value=None):
+        yield
+
+def test_count_tokens_estimate():
+    assert count_tokens("") == 0
+    assert count_tokens("a" * 40) == 11
+
+def test_pack_keeps_highest_scores_within_budget():
+    blocks = [
+        ContextBlock("low", "l" * 400, 0.1),     # 101 tokens
+        ContextBlock("high", "h" * 400, 0.9),    # 101 tokens
+        ContextBlock("mid", "m" * 400, 0.5),     # 101 tokens
+        ContextBlock("small", "s" * 20, 0.05),   # 6 tokens
+    ]
+    packed = pack_context_blocks(blocks, token_budget=230, separator="\n")
+
+    assert [block.key for block in packed.included] == ["high", "mid", "small"] # "small" still fits after "low" is skipped
+    assert [block.key for block in packed.dropped] == ["low"]
+    assert packed.tokens <= 230
+
+def test_pack_ties_keep_input_order():
+    blocks = [ContextBlock(str(i), "x" * 40, 1.0) for i in range(5)]
+    packed = pack_context_blocks(blocks, token_budget=30, separator="\n")
+    assert [block.key for block in packed.included] == ["0", "1"]
+    assert [block.key for block in packed.dropped] == ["2", "3", "4"]
+
+def test_pack_truncates_oversized_top_block():
+    text = "\n".join(f"line {i} " + "word " * 10 for i in range(100))
+    packed = pack_context_blocks([ContextBlock("big", text, 1.0), ContextBlock("other", "o" * 4000, 0.5)], token_budget=100)
+
+    assert [block.key for block in packed.included] == ["big"]
+    assert packed.included[0].text.endswith("[...]")
+    assert count_tokens(packed.included[0].text) <= 110
+    assert [block.key for block in packed.dropped] == ["other"]
@@ -0,0 +1,90 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+from app.utils.telegram_utils import (
+    MAX_MESSAGE_LENGTH,
+    StreamingMessageEditor,
+    escape_markdown_v2,
+    split_text_for_markdown_v2,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def placeholder():
+    message = AsyncMock(spec=Message)
+    message.message_id = 55
+    return message
+
+def test_split_text_for_markdown_v2_pages_fit_after_escaping():
+    text = "a.b! " * 2000 # Escaping grows this text by 40%
+    pages = split_text_for_markdown_v2(text)
+    assert len(pages) > 1
+    assert all(len(page) <= MAX_MESSAGE_LENGTH for page in pages)
+    assert "".join(pages) == escape_markdown_v2(text)
+
+def test_split_text_for_markdown_v2_short_text_single_page():
+    assert split_text_for_markdown_v2("Hello (world)") == [escape_markdown_v2("Hello (world)")]
+    assert split_text_for_markdown_v2("") == []
+
+@pytest.mark.asyncio
+async def test_streaming_editor_throttles_edits(placeholder):
+    clock = FakeClock()
+    editor = StreamingMessageEditor(placeholder, min_interval_seconds=1.0, clock=clock)
+
+    await editor.update("Hello")
+    clock.now += 0.3
+    await editor.update("Hello wor") # Too soon, skipped
+    clock.now += 1.0
+    await editor.update("Hello world.")
+
+    assert placeholder.edit_text.call_count == 2
+    assert placeholder.edit_text.call_args_list[0].args[0] == "Hello …"
+    assert placeholder.edit_text.call_args_list[1].args[0] == "Hello world\\. …"
+    assert editor.first_visible_at == 100.0
+
+@pytest.mark.asyncio
+async def test_streaming_editor_ignores_empty_text_and_edit_errors(placeholder):
+    clock = FakeClock()
+    editor = StreamingMessageEditor(placeholder, min_interval_seconds=1.0, clock=clock)
+
+    await editor.update("   ")
+    placeholder.edit_text.assert_not_called()
+
+    placeholder.edit_text.side_effect = RetryAfter(10)
+    await editor.update("Partial")
+    assert editor.first_visible_at is None
+    clock.now += 5
+    placeholder.edit_text.side_effect = None
+    await editor.update("Partial answer") # Still inside the RetryAfter window
+    assert placeholder.edit_text.call_count == 1
+
+@pytest.mark.asyncio
+async def test_streaming_editor_finalize_attaches_markup_and_ignores_not_modified(placeholder):
+    editor = StreamingMessageEditor(placeholder, min_interval_seconds=0, clock=FakeClock())
+    markup = MagicMock()
+    placeholder.edit_text.side_effect = BadRequest("Message is not modified")
+
+    await editor.finalize("Done.", reply_markup=markup)
+
+    placeholder.edit_text.assert_called_once()
+    assert placeholder.edit_text.call_args.args[0] == "Done\\."
+    assert placeholder.edit_text.call_args.kwargs["reply_markup"] is markup
+    placeholder.reply_text.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_streaming_editor_finalize_splits_long_answer(placeholder):
+    editor = StreamingMessageEditor(placeholder, min_interval_seconds=0, clock=FakeClock())
+    markup = MagicMock()
+
+    await editor.finalize("word " * 1000, reply_markup=markup) # 5000 chars: two messages
+
+    assert placeholder.edit_text.call_args.kwargs["reply_markup"] is None
+    placeholder.reply_text.assert_called_once()
+    assert placeholder.reply_text.call_args.kwargs["reply_markup"] is markup
@@ -1,5 +1,5 @@
 import pytest
-from app.utils.text_processing import simple_chunk_text
+from app.utils.text_processing import simple_chunk_text, content_defined_chunk_text, chunk_spans_in_text, html_to_text
 
 def test_simple_chunk_text_empty_input():
     assert simple_chunk_text("", 100, 10) == []
@@ -130,4 +130,55 @@ def test_simple_chunk_text_long_text_various_overlaps():
             reconstructed_from_overlap += chunk[10:] # 10 is overlap
             last_end += len(chunk) - 10
             
-    assert text.startswith(reconstructed_from_overlap[:len(text)-50]) # Check a large portion 
\ No newline at end of file
+    assert text.startswith(reconstructed_from_overlap[:len(text)-50]) # Check a large portion 
+
+def test_html_to_text_strips_tags_scripts_and_styles():
+    html = "<html><head><style>p {color: red;}</style></head><body><h1>Title</h1><p>Hello   <b>world</b></p><script>alert(1)</script><p>Second</p></body></html>"
+    assert html_to_text(html) == "Title\n\nHello world\n\nSecond"
+
+def test_html_to_text_empty_input():
+    assert html_to_text("") == ""
+
+def _sample_text(n_words: int = 3000) -> str:
+    import random
+    rng = random.Random(42)
+    return " ".join("".join(rng.choice("abcdefghijklmnop") for _ in range(rng.randint(2, 9))) for _ in range(n_words))
+
+def test_content_defined_chunk_text_empty_input():
+    assert content_defined_chunk_text("", 100, 10) == []
+    assert content_defined_chunk_text(None, 100, 10) == []
+
+def test_content_defined_chunk_text_covers_text_without_overlap():
+    text = _sample_text()
+    chunks = content_defined_chunk_text(text, chunk_size=200, overlap=0)
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 400 for chunk in chunks) # Capped at 2 * chunk_size
+    assert all(len(chunk) >= 50 for chunk in chunks[:-1]) # At least chunk_size // 4, except the tail
+
+def test_content_defined_chunk_text_overlap_prefixes_previous_tail():
+    text = _sample_text()
+    plain = content_defined_chunk_text(text, chunk_size=200, overlap=0)
+    overlapped = content_defined_chunk_text(text, chunk_size=200, overlap=20)
+    assert len(plain) == len(overlapped)
+    assert overlapped[0] == plain[0]
+    assert overlapped[1] == plain[0][-20:] + plain[1]
+
+def test_content_defined_chunk_text_local_edit_changes_few_chunks():
+    text = _sample_text()
+    original = content_defined_chunk_text(text, chunk_size=200, overlap=20)
+    middle = len(text) // 2
+    edited = content_defined_chunk_text(text[:middle] + " a newly inserted sentence " + text[middle:], chunk_size=200, overlap=20)
+    # Boundaries resynchronise after the edit, so almost every chunk survives unchanged
+    changed = set(edited) - set(original)
+    assert 1 <= len(changed) <= 3
+    assert len(set(original) - set(edited)) <= 3
+
+def test_chunk_spans_in_text_maps_overlapping_chunks():
+    text = _sample_text(500)
+    chunks = content_defined_chunk_text(text, chunk_size=200, overlap=20)
+    spans = chunk_spans_in_text(text, chunks)
+    assert all(span is not None for span in spans)
+    assert [text[start:end] for start, end in spans] == chunks
+
+def test_chunk_spans_in_text_missing_chunk():
+    assert chunk_spans_in_text("abcdef", ["abc", "xyz", "def"]) == [(0, 3), None, (3, 6)]